@@ -0,0 +1,88 @@
+"""
+Файловые кэши на диске: сборка превью изображений и ограничение размера каталога кэша.
+Функции выполняются вне event loop - в пуле процессов (render_thumbnail) или в потоке (evict_files).
+Модуль не импортирует приложение: процесс пула, распаковывая задачу, импортирует только его,
+а не модули с роутами, моделями и логами.
+"""
+import os
+import shutil
+import uuid
+from typing import Iterable, List
+
+
+JPEG_QUALITY = 85
+
+
+def render_thumbnail(source: str, target: str, size: int) -> bool:
+    """
+    Вписывает изображение в квадрат size x size и сохраняет в target в формате исходного файла.
+    PNG меньше size копируются без изменений. Выполняется в пуле процессов
+    media_service.get_thumbnail_executor().
+
+    Returns:
+        bool: False, если файл не удалось прочитать как изображение
+    """
+    import cv2
+
+    extension = os.path.splitext(source)[1].lower()
+    tmp_path = f"{target}.{uuid.uuid4().hex}.tmp"
+    # IMREAD_COLOR учитывает поворот из EXIF (фото с телефона), в PNG сохраняется прозрачность
+    flags = cv2.IMREAD_UNCHANGED if extension == ".png" else cv2.IMREAD_COLOR
+    image = cv2.imread(source, flags)
+    if image is None:
+        return False
+    height, width = image.shape[:2]
+    try:
+        if max(height, width) <= size and flags == cv2.IMREAD_UNCHANGED:
+            shutil.copyfile(source, tmp_path)
+        else:
+            scale = min(1.0, size / max(height, width))
+            if scale < 1.0:
+                image = cv2.resize(image, (max(1, round(width * scale)), max(1, round(height * scale))),
+                                   interpolation=cv2.INTER_AREA)
+            params = [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY] if extension in ('.jpg', '.jpeg') else []
+            ok, buffer = cv2.imencode(extension, image, params)
+            if not ok:
+                return False
+            with open(tmp_path, "wb") as file:
+                file.write(buffer.tobytes())
+        os.replace(tmp_path, target)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return True
+
+
+def evict_files(directory: str, max_bytes: int, keep: Iterable[str] = ()) -> List[str]:
+    """
+    Удаляет файлы каталога, которые дольше всего не запрашивали (по mtime), пока
+    суммарный размер больше max_bytes. Незавершенные *.tmp не трогаются.
+
+    Args:
+        directory: Каталог кэша
+        max_bytes: Допустимый размер каталога
+        keep: Имена файлов, которые нельзя удалять
+
+    Returns:
+        List[str]: Имена удаленных файлов
+    """
+    keep = set(keep)
+    files = []
+    for entry in os.scandir(directory):
+        if entry.is_file() and not entry.name.endswith(".tmp"):
+            stat = entry.stat()
+            files.append((stat.st_mtime, stat.st_size, entry.name))
+    total = sum(size for _, size, _ in files)
+    removed = []
+    for _, size, name in sorted(files):
+        if total <= max_bytes:
+            break
+        if name in keep:
+            continue
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed.append(name)
+    return removed
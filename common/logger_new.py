@@ -1,13 +1,40 @@
 """
 Структурированное JSON логирование для АвтоНяня
 Поддерживает rotation, разные уровни логирования и structured fields
+
+Запись в stdout и файлы выполняется в фоновом потоке (QueueListener): в event loop запись
+только проходит фильтр и кладется в очередь, JSON форматирование и файловый I/O идут в потоке
+записи. Частые события до WARNING прореживаются (LOG_SAMPLE_RATES) и ограничиваются по
+количеству в секунду на место вызова (LOG_RATE_LIMIT), уровень можно задать для модуля
+(LOG_MODULE_LEVELS).
+
+В процессах пулов (common/worker_pool.py) конвейер не создается: логгеры передают записи в root,
+который инициализатор пула настраивает на stderr.
 """
+import atexit
 import logging
+import queue
+import random
 import sys
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, List, Optional, Tuple
 from pythonjsonlogger import jsonlogger
 from config import settings
+from common.tracing import TraceContextFilter
+from common.worker_pool import is_worker_process
+
+
+LOG_LEVELS = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+    "critical": logging.CRITICAL
+}
+
+# Окно ограничения частоты записей (секунды)
+RATE_LIMIT_WINDOW = 1.0
 
 
 class CustomJsonFormatter(jsonlogger.JsonFormatter):
@@ -32,32 +59,106 @@ class CustomJsonFormatter(jsonlogger.JsonFormatter):
             log_record['exception'] = self.formatException(record.exc_info)
 
 
-def setup_logger(name: str = __name__) -> logging.Logger:
+class LogPolicyFilter(logging.Filter):
     """
-    Настройка логгера с JSON форматированием и rotation
-    
+    Уровни по модулям, sampling и ограничение частоты записей до WARNING.
+    Записи WARNING и выше не прореживаются и не ограничиваются. Место вызова - строка, где
+    вызван логгер (хелперы ниже передают stacklevel=2, чтобы это была строка вызова хелпера).
+
     Args:
-        name: Имя логгера
-        
+        default_level: Уровень для модулей без своего уровня
+        module_levels: Модуль (record.module) -> уровень
+        sample_rates: "модуль.функция" или "модуль" -> доля сохраняемых записей (0..1)
+        rate_limit: Записей в секунду на место вызова (0 - без ограничения)
+    """
+
+    def __init__(self,
+                 default_level: int = logging.INFO,
+                 module_levels: Optional[Dict[str, str]] = None,
+                 sample_rates: Optional[Dict[str, float]] = None,
+                 rate_limit: int = 0):
+        super().__init__()
+        self.default_level = default_level
+        self.module_levels = {module: LOG_LEVELS[level.lower()] for module, level in (module_levels or {}).items()}
+        self.sample_rates = dict(sample_rates or {})
+        self.rate_limit = rate_limit
+        # (файл, строка) -> [начало окна, записей в окне, отброшено в окне]
+        self._windows: Dict[Tuple[str, int], List] = {}
+        self.sampled_out = 0
+        self.rate_limited = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self.module_levels.get(record.module, self.default_level):
+            return False
+        if record.levelno >= logging.WARNING:
+            return True
+
+        rate = self.sample_rates.get(f"{record.module}.{record.funcName}")
+        if rate is None:
+            rate = self.sample_rates.get(record.module)
+        if rate is not None:
+            if random.random() >= rate:
+                self.sampled_out += 1
+                return False
+            record.sample_rate = rate
+
+        if self.rate_limit:
+            key = (record.pathname, record.lineno)
+            window = self._windows.get(key)
+            if window is None or record.created - window[0] >= RATE_LIMIT_WINDOW:
+                if window is not None and window[2]:
+                    # Первая запись нового окна сообщает, сколько записей отброшено в предыдущем
+                    record.suppressed = window[2]
+                self._windows[key] = [record.created, 1, 0]
+            elif window[1] >= self.rate_limit:
+                window[2] += 1
+                self.rate_limited += 1
+                return False
+            else:
+                window[1] += 1
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Кладет запись в очередь без ожидания (SimpleQueue: put не ждет поток записи).
+    Аргументы сообщения подставляются сразу, форматирование делает поток записи.
+    Если в очереди больше max_size записей, запись отбрасывается (счетчик dropped).
+
+    Args:
+        log_queue: Очередь потока записи
+        max_size: Допустимое количество записей в очереди
+    """
+
+    def __init__(self, log_queue: queue.SimpleQueue, max_size: int = 10000):
+        super().__init__(log_queue)
+        self.max_size = max_size
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Запись не копируется: у логгеров конвейера других handlers нет
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.queue.qsize() >= self.max_size:
+            self.dropped += 1
+            return
+        self.queue.put_nowait(record)
+
+
+def create_log_handlers(log_dir: Path) -> List[logging.Handler]:
+    """
+    Handlers записи: stdout (для Docker logs), app.log и error.log с rotation.
+
+    Args:
+        log_dir: Каталог файлов логов
+
     Returns:
-        Настроенный логгер
+        List[logging.Handler]: Handlers с JSON форматированием
     """
-    logger = logging.getLogger(name)
-    
-    # Устанавливаем уровень логирования из конфига
-    log_level_map = {
-        "debug": logging.DEBUG,
-        "info": logging.INFO,
-        "warning": logging.WARNING,
-        "error": logging.ERROR,
-        "critical": logging.CRITICAL
-    }
-    logger.setLevel(log_level_map.get(settings.log_level.lower(), logging.INFO))
-    
-    # Избегаем дублирования handlers
-    if logger.handlers:
-        return logger
-    
     # JSON форматтер
     json_formatter = CustomJsonFormatter(
         '%(timestamp)s %(level)s %(name)s %(message)s'
@@ -67,10 +168,8 @@ def setup_logger(name: str = __name__) -> logging.Logger:
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(json_formatter)
     console_handler.setLevel(logging.DEBUG)
-    logger.addHandler(console_handler)
     
     # File handler с rotation - для персистентных логов
-    log_dir = Path(settings.report_file_path) / "logs"
     log_dir.mkdir(parents=True, exist_ok=True)
     
     file_handler = RotatingFileHandler(
@@ -81,7 +180,6 @@ def setup_logger(name: str = __name__) -> logging.Logger:
     )
     file_handler.setFormatter(json_formatter)
     file_handler.setLevel(logging.INFO)
-    logger.addHandler(file_handler)
     
     # Отдельный файл для ошибок
     error_handler = RotatingFileHandler(
@@ -92,13 +190,135 @@ def setup_logger(name: str = __name__) -> logging.Logger:
     )
     error_handler.setFormatter(json_formatter)
     error_handler.setLevel(logging.ERROR)
-    logger.addHandler(error_handler)
+    
+    return [console_handler, file_handler, error_handler]
+
+
+def create_log_pipeline(handlers: List[logging.Handler],
+                        policy: Optional[logging.Filter] = None,
+                        queue_size: int = 10000) -> Tuple[NonBlockingQueueHandler, QueueListener]:
+    """
+    Очередь записей и фоновый поток, который передает их handlers.
+
+    Args:
+        handlers: Handlers записи (выполняются в фоновом потоке)
+        policy: Фильтр, применяемый до постановки в очередь
+        queue_size: Размер очереди
+
+    Returns:
+        Tuple[NonBlockingQueueHandler, QueueListener]: handler для логгеров и запущенный поток записи
+    """
+    log_queue = queue.SimpleQueue()
+    queue_handler = NonBlockingQueueHandler(log_queue, max_size=queue_size)
+    if policy is not None:
+        queue_handler.addFilter(policy)
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return queue_handler, listener
+
+
+_pipeline: Optional[Tuple[NonBlockingQueueHandler, QueueListener]] = None
+
+
+def get_log_pipeline() -> Tuple[NonBlockingQueueHandler, QueueListener]:
+    """
+    Общий конвейер записи логов процесса (создается при первом вызове).
+    Поток записи останавливается при завершении процесса, оставшиеся записи дописываются.
+    """
+    global _pipeline
+    if _pipeline is None:
+        policy = LogPolicyFilter(
+            default_level=LOG_LEVELS.get(settings.log_level.lower(), logging.INFO),
+            module_levels=settings.log_module_levels,
+            sample_rates=settings.log_sample_rates,
+            rate_limit=settings.log_rate_limit
+        )
+        _pipeline = create_log_pipeline(
+            create_log_handlers(Path(settings.report_file_path) / "logs"),
+            policy=policy,
+            queue_size=settings.log_queue_size
+        )
+        # После policy: trace_id добавляется только в записи, которые будут записаны
+        _pipeline[0].addFilter(TraceContextFilter())
+        atexit.register(_pipeline[1].stop)
+    return _pipeline
+
+
+def close_log_pipeline() -> None:
+    """
+    Останавливает конвейер записи процесса: оставшиеся записи дописываются, файлы закрываются,
+    логгеры снова передают записи в root. Используется в процессах пулов (init_worker_logging).
+    """
+    global _pipeline
+    if _pipeline is None:
+        return
+    queue_handler, listener = _pipeline
+    _pipeline = None
+    atexit.unregister(listener.stop)
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+    loggers = [logging.getLogger(), *(item for item in logging.Logger.manager.loggerDict.values()
+                                      if isinstance(item, logging.Logger))]
+    for item in loggers:
+        if queue_handler in item.handlers:
+            item.removeHandler(queue_handler)
+            item.propagate = True
+
+
+def get_log_pipeline_stats() -> Dict[str, int]:
+    """
+    Количество записей, не попавших в лог.
+
+    Returns:
+        Dict[str, int]: queue_full, rate_limited, sampled_out
+    """
+    if _pipeline is None:
+        return {}
+    queue_handler = _pipeline[0]
+    policy = next((item for item in queue_handler.filters if isinstance(item, LogPolicyFilter)), None)
+    return {
+        "queue_full": queue_handler.dropped,
+        "rate_limited": policy.rate_limited if policy else 0,
+        "sampled_out": policy.sampled_out if policy else 0
+    }
+
+
+def setup_logger(name: str = __name__) -> logging.Logger:
+    """
+    Настройка логгера с JSON форматированием и rotation
+    
+    Args:
+        name: Имя логгера
+        
+    Returns:
+        Настроенный логгер
+    """
+    logger = logging.getLogger(name)
+    
+    # Уровень логгера - минимальный из общего и уровней модулей, остальное отсекает LogPolicyFilter
+    levels = [settings.log_level, *settings.log_module_levels.values()]
+    logger.setLevel(min(LOG_LEVELS.get(level.lower(), logging.INFO) for level in levels))
+    
+    # В процессе пула записи идут в root (stderr), без своего конвейера
+    if is_worker_process():
+        return logger
+
+    # Избегаем дублирования handlers
+    if any(isinstance(handler, NonBlockingQueueHandler) for handler in logger.handlers):
+        return logger
+    
+    logger.addHandler(get_log_pipeline()[0])
+    # Записи не дублируются через root (у него тот же handler)
+    logger.propagate = False
     
     return logger
 
 
 # Создаём глобальный логгер для приложения
 logger = setup_logger("autonanny")
+# Логгеры модулей (logging.getLogger(__name__)) пишут через тот же конвейер
+setup_logger("")
 
 
 # Вспомогательные функции для structured logging
@@ -112,7 +332,7 @@ def log_with_context(level: str, message: str, **kwargs):
         **kwargs: Дополнительные поля для логирования
     """
     log_func = getattr(logger, level.lower())
-    log_func(message, extra=kwargs)
+    log_func(message, extra=kwargs, stacklevel=2)
 
 
 def log_request(method: str, path: str, status_code: int, duration_ms: float, user_id: int = None):
@@ -126,7 +346,8 @@ def log_request(method: str, path: str, status_code: int, duration_ms: float, us
             "status_code": status_code,
             "duration_ms": duration_ms,
             "user_id": user_id
-        }
+        },
+        stacklevel=2
     )
 
 
@@ -139,7 +360,8 @@ def log_db_query(query: str, duration_ms: float, rows_affected: int = None):
             "query": query[:200],  # Обрезаем длинные запросы
             "duration_ms": duration_ms,
             "rows_affected": rows_affected
-        }
+        },
+        stacklevel=2
     )
 
 
@@ -158,7 +380,8 @@ def log_error(error: Exception, context: dict = None):
             "event_type": "error",
             "error_type": type(error).__name__,
             **(context or {})
-        }
+        },
+        stacklevel=2
     )
 
 
@@ -170,7 +393,8 @@ def log_business_event(event_name: str, **kwargs):
             "event_type": "business",
             "event_name": event_name,
             **kwargs
-        }
+        },
+        stacklevel=2
     )
 
 
@@ -183,5 +407,7 @@ def setup_tortoise_logger():
     # Используем те же handlers что и основной логгер
     for handler in logger.handlers:
         tortoise_logger.addHandler(handler)
+    # Не дублируем записи через root (у него тот же handler)
+    tortoise_logger.propagate = False
     
     return tortoise_logger
@@ -0,0 +1,455 @@
+"""
+Метрики приложения в текстовом формате Prometheus (GET /metrics).
+Реестр хранит счетчики, гистограммы и gauge в памяти процесса; значения gauge с функцией
+(количество WebSocket-соединений) считаются в момент запроса /metrics, поэтому не требуют
+учета в горячих путях. Метки HTTP - шаблон маршрута (/api/v1.0/admins/parents/{parent_id}),
+а не путь запроса; количество рядов одной метрики ограничено MAX_SERIES, лишние ряды
+попадают в ряд с метками "other".
+"""
+import bisect
+import contextlib
+import functools
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from common.logger_new import get_log_pipeline_stats
+
+
+MAX_SERIES = 1000
+OVERFLOW_LABEL = "other"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+JOB_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 300.0, 900.0, 1800.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Хост внешнего API -> метка service
+EXTERNAL_SERVICES = {
+    "securepay.tinkoff.ru": "tinkoff",
+    "maps.googleapis.com": "google_maps",
+    "fcm.googleapis.com": "firebase",
+    "oauth2.googleapis.com": "firebase",
+    "firebasedynamiclinks.googleapis.com": "firebase",
+    "oauth.yandex.ru": "yandex",
+    "login.yandex.ru": "yandex",
+    "api.vk.com": "vk",
+}
+
+
+def format_value(value: float) -> str:
+    """
+    Значение в формате Prometheus.
+    """
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """
+    Метки ряда: {name="value",...} (пустая строка, если меток нет).
+    """
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Metric:
+    """
+    Базовая метрика с рядами по значениям меток.
+
+    Args:
+        name: Имя метрики
+        documentation: Описание (HELP)
+        labelnames: Имена меток
+    """
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _new_series(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """
+        Ряд метрики с указанными значениями меток (по порядку labelnames).
+        """
+        series = self._series.get(values)
+        if series is not None:
+            return series
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {values}")
+        with self._lock:
+            if values not in self._series and len(self._series) >= MAX_SERIES:
+                values = (OVERFLOW_LABEL,) * len(self.labelnames)
+            return self._series.setdefault(values, self._new_series())
+
+    def samples(self) -> Iterator[Tuple[str, Tuple[str, ...], Tuple[str, ...], float]]:
+        """
+        Значения рядов: (суффикс имени, имена меток, значения меток, значение).
+        """
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for suffix, names, values, value in self.samples():
+            lines.append(f"{self.name}{suffix}{format_labels(names, values)} {format_value(value)}")
+        return lines
+
+
+class _Value:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(Metric):
+    """Монотонный счетчик (имя с суффиксом _total)"""
+
+    type_name = "counter"
+
+    def _new_series(self):
+        return _Value()
+
+    def inc(self, amount: float = 1) -> None:
+        """Увеличивает счетчик без меток"""
+        self.labels().inc(amount)
+
+    def samples(self):
+        for values, series in list(self._series.items()):
+            yield "", self.labelnames, values, series.value
+
+
+class Gauge(Metric):
+    """
+    Текущее значение. С function значения рядов берутся из функции в момент сбора.
+
+    Args:
+        function: Функция без аргументов -> {значения меток: значение}
+    """
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 function: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None):
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+
+    def _new_series(self):
+        return _Value()
+
+    def set(self, value: float) -> None:
+        """Значение gauge без меток"""
+        self.labels().set(value)
+
+    def samples(self):
+        if self.function is not None:
+            for values, value in self.function().items():
+                yield "", self.labelnames, values, value
+            return
+        for values, series in list(self._series.items()):
+            yield "", self.labelnames, values, series.value
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Histogram(Metric):
+    """
+    Гистограмма (ряды _bucket, _sum, _count).
+
+    Args:
+        buckets: Верхние границы интервалов по возрастанию (+Inf добавляется автоматически)
+    """
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_series(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Наблюдение гистограммы без меток"""
+        self.labels().observe(value)
+
+    def samples(self):
+        bucket_names = self.labelnames + ("le",)
+        for values, series in list(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), series.counts):
+                cumulative += count
+                yield "_bucket", bucket_names, values + (format_value(bound),), cumulative
+            yield "_sum", self.labelnames, values, series.sum
+            yield "_count", self.labelnames, values, cumulative
+
+
+class MetricsRegistry:
+    """Реестр метрик процесса"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+              function: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, function))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """
+        Все метрики в текстовом формате Prometheus.
+
+        Returns:
+            str: Тело ответа /metrics
+        """
+        lines = []
+        for metric in self._metrics.values():
+            try:
+                lines.extend(metric.render())
+            except Exception as exp:  # Ошибка функции gauge не должна ломать сбор остальных метрик
+                lines.append(f"# {metric.name} collection failed: {type(exp).__name__}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests by route template and status", ("method", "route", "status"))
+HTTP_REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route"))
+HTTP_REQUESTS_IN_PROGRESS = registry.gauge(
+    "http_requests_in_progress", "HTTP requests being processed")
+WEBSOCKET_MESSAGES = registry.counter(
+    "websocket_messages_sent_total", "WebSocket frames sent by connection manager", ("manager", "result"))
+PUSH_NOTIFICATIONS = registry.counter(
+    "push_notifications_total", "Firebase push notifications by app", ("app", "result"))
+EXTERNAL_REQUESTS = registry.counter(
+    "external_requests_total", "Outgoing HTTP requests by external service", ("service", "status"))
+EXTERNAL_REQUEST_DURATION = registry.histogram(
+    "external_request_duration_seconds", "Outgoing HTTP request latency by external service", ("service",))
+JOB_RUNS = registry.counter(
+    "background_job_runs_total", "Background job runs by result", ("job", "result"))
+JOB_DURATION = registry.histogram(
+    "background_job_duration_seconds", "Background job run duration", ("job",), buckets=JOB_BUCKETS)
+
+WEBSOCKET_EVICTIONS = registry.counter(
+    "websocket_evictions_total", "WebSocket connections closed after a failed send", ("manager",))
+
+# Менеджер соединений -> функция количества соединений (см. register_websocket_manager)
+_websocket_managers: Dict[str, Callable[[], int]] = {}
+WEBSOCKET_CONNECTIONS = registry.gauge(
+    "websocket_connections", "Active WebSocket connections by connection manager", ("manager",),
+    function=lambda: {(name, ): count() for name, count in _websocket_managers.items()})
+# Менеджер соединений -> функция памяти реестра на одно соединение
+_websocket_memory: Dict[str, Callable[[], int]] = {}
+WEBSOCKET_MEMORY_PER_CONNECTION = registry.gauge(
+    "websocket_memory_per_connection_bytes", "Approximate connection registry memory per WebSocket connection",
+    ("manager",), function=lambda: {(name, ): memory() for name, memory in _websocket_memory.items()})
+
+LOG_RECORDS_DROPPED = registry.gauge(
+    "log_records_dropped", "Log records dropped since start (queue_full, rate_limited, sampled_out)", ("reason",),
+    function=lambda: {(reason,): count for reason, count in get_log_pipeline_stats().items()})
+
+
+def register_websocket_manager(name: str, connections: Callable[[], int],
+                               memory_per_connection: Optional[Callable[[], int]] = None) -> None:
+    """
+    Добавляет менеджер WebSocket-соединений в gauge websocket_connections
+    (и websocket_memory_per_connection_bytes, если передана функция памяти).
+
+    Args:
+        name: Метка manager (driver, client, chat)
+        connections: Функция, возвращающая количество активных соединений
+        memory_per_connection: Функция, возвращающая память реестра на одно соединение (байты)
+    """
+    _websocket_managers[name] = connections
+    if memory_per_connection is not None:
+        _websocket_memory[name] = memory_per_connection
+
+
+def track_websocket_message(manager: str, ok: bool = True) -> None:
+    """
+    Учитывает отправленный (или не отправленный из-за ошибки) кадр WebSocket.
+    """
+    WEBSOCKET_MESSAGES.labels(manager, "ok" if ok else "error").inc()
+
+
+def track_websocket_eviction(manager: str) -> None:
+    """
+    Учитывает соединение, закрытое менеджером после неудачной отправки кадра.
+    """
+    WEBSOCKET_EVICTIONS.labels(manager).inc()
+
+
+@contextlib.contextmanager
+def track_job(job: str) -> Iterator[None]:
+    """
+    Учитывает запуск фоновой задачи: длительность и результат (ok/error).
+
+    Args:
+        job: Метка job (имя задачи)
+    """
+    started = time.perf_counter()
+    result = "error"
+    try:
+        yield
+        result = "ok"
+    finally:
+        JOB_DURATION.labels(job).observe(time.perf_counter() - started)
+        JOB_RUNS.labels(job, result).inc()
+
+
+def tracked_job(job: str) -> Callable:
+    """
+    Декоратор корутины фоновой задачи: каждый вызов учитывается как в track_job.
+
+    Args:
+        job: Метка job (имя задачи)
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with track_job(job):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def get_external_service(url: str) -> str:
+    """
+    Метка service для URL внешнего запроса.
+
+    Returns:
+        str: Имя сервиса из EXTERNAL_SERVICES или "other"
+    """
+    return EXTERNAL_SERVICES.get(urlsplit(url).hostname or "", OVERFLOW_LABEL)
+
+
+def install_requests_instrumentation() -> None:
+    """
+    Учитывает исходящие запросы библиотеки requests (Tinkoff, Google Maps, Firebase, OAuth):
+    все они проходят через HTTPAdapter.send. Повторный вызов ничего не делает.
+    """
+    from requests.adapters import HTTPAdapter
+
+    send = HTTPAdapter.send
+    if getattr(send, "__metrics__", False):
+        return
+
+    def instrumented_send(self, request, *args, **kwargs):
+        service = get_external_service(request.url)
+        started = time.perf_counter()
+        status = "error"
+        try:
+            response = send(self, request, *args, **kwargs)
+            status = str(response.status_code)
+            return response
+        finally:
+            EXTERNAL_REQUEST_DURATION.labels(service).observe(time.perf_counter() - started)
+            EXTERNAL_REQUESTS.labels(service, status).inc()
+
+    instrumented_send.__metrics__ = True
+    HTTPAdapter.send = instrumented_send
+
+
+def get_route_template(scope: Dict) -> str:
+    """
+    Шаблон маршрута, который обработал запрос (scope["route"] заполняет роутер).
+
+    Returns:
+        str: Путь маршрута с параметрами или "unmatched"
+    """
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: количество и длительность HTTP запросов по шаблонам маршрутов.
+
+    Args:
+        app: ASGI приложение
+    """
+
+    def __init__(self, app):
+        self.app = app
+        install_requests_instrumentation()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_PROGRESS.labels().inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_PROGRESS.labels().dec()
+            route = get_route_template(scope)
+            HTTP_REQUEST_DURATION.labels(scope["method"], route).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(scope["method"], route, str(status_code)).inc()
@@ -0,0 +1,232 @@
+"""
+Профилирование запросов к БД в рамках HTTP запроса.
+Методы клиента Tortoise (asyncpg) оборачиваются так, что каждый запрос учитывается во всех
+активных счетчиках (profile_queries): QueryProfilerMiddleware открывает счетчик на HTTP запрос,
+тесты - на тест. По итогам запроса в лог пишутся количество запросов, суммарное время в БД и
+самые медленные запросы; в режиме отладки (log_level=debug) те же данные отдаются в заголовках
+X-DB-Query-Count, X-DB-Time-Ms. Эндпоинт может объявить бюджет запросов декоратором query_budget,
+превышение бюджета пишется в лог (и роняет тест, см. tests/query_budget.py).
+"""
+import contextlib
+import contextvars
+import functools
+import heapq
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from config import settings
+from common.logger import log_with_context
+
+
+# Сколько самых медленных запросов хранить и писать в лог
+SLOWEST_QUERIES = 5
+# Длина текста запроса в логе (как в log_db_query)
+QUERY_TEXT_LIMIT = 200
+
+HEADER_QUERY_COUNT = "X-DB-Query-Count"
+HEADER_DB_TIME = "X-DB-Time-Ms"
+
+# Методы клиента, через которые ORM и сервисы выполняют SQL
+CLIENT_METHODS = ("execute_insert", "execute_many", "execute_query", "execute_query_dict", "execute_script")
+
+
+@dataclass
+class QueryStats:
+    """Счетчик запросов к БД"""
+
+    count: int = 0
+    total_ms: float = 0.0
+    # Куча (время, номер, запрос) из SLOWEST_QUERIES самых медленных запросов
+    slowest: List[Tuple[float, int, str]] = field(default_factory=list)
+    # Превышения бюджетов эндпоинтов, выполненных внутри счетчика
+    budget_violations: List[str] = field(default_factory=list)
+
+    def add(self, query: str, duration_ms: float) -> None:
+        """
+        Учитывает выполненный запрос.
+
+        Args:
+            query: Текст SQL
+            duration_ms: Время выполнения в миллисекундах
+        """
+        self.count += 1
+        self.total_ms += duration_ms
+        item = (duration_ms, self.count, query[:QUERY_TEXT_LIMIT])
+        if len(self.slowest) < SLOWEST_QUERIES:
+            heapq.heappush(self.slowest, item)
+        elif item > self.slowest[0]:
+            heapq.heapreplace(self.slowest, item)
+
+    def get_slowest(self) -> List[Dict]:
+        """
+        Самые медленные запросы.
+
+        Returns:
+            List[Dict]: {"query", "duration_ms"} от самого медленного
+        """
+        return [{"query": query, "duration_ms": round(duration_ms, 3)}
+                for duration_ms, _, query in sorted(self.slowest, reverse=True)]
+
+    def as_log_fields(self) -> Dict:
+        """
+        Поля structured log.
+
+        Returns:
+            Dict: db_query_count, db_time_ms, db_slowest_queries
+        """
+        return {
+            "db_query_count": self.count,
+            "db_time_ms": round(self.total_ms, 3),
+            "db_slowest_queries": self.get_slowest()
+        }
+
+
+_active_stats: contextvars.ContextVar[Tuple[QueryStats, ...]] = contextvars.ContextVar(
+    "query_profiler_stats", default=()
+)
+
+
+@contextlib.contextmanager
+def profile_queries() -> Iterator[QueryStats]:
+    """
+    Считает запросы к БД, выполненные в текущем контексте (включая вложенные счетчики).
+
+    Returns:
+        Iterator[QueryStats]: Счетчик
+    """
+    stats = QueryStats()
+    token = _active_stats.set(_active_stats.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _active_stats.reset(token)
+
+
+def get_active_stats() -> Tuple[QueryStats, ...]:
+    """
+    Активные счетчики от внешнего к внутреннему.
+    """
+    return _active_stats.get()
+
+
+def record_query(query: str, duration_ms: float) -> None:
+    """
+    Учитывает запрос во всех активных счетчиках.
+
+    Args:
+        query: Текст SQL
+        duration_ms: Время выполнения в миллисекундах
+    """
+    for stats in _active_stats.get():
+        stats.add(query, duration_ms)
+
+
+def _profiled(method: Callable) -> Callable:
+    @functools.wraps(method)
+    async def wrapper(self, query: str, *args, **kwargs):
+        if not _active_stats.get():
+            return await method(self, query, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return await method(self, query, *args, **kwargs)
+        finally:
+            record_query(query, (time.perf_counter() - started) * 1000)
+
+    wrapper.__query_profiler__ = True
+    return wrapper
+
+
+def install_query_profiler() -> None:
+    """
+    Оборачивает методы клиента asyncpg (и клиента транзакций) учетом запросов.
+    Повторный вызов ничего не делает.
+    """
+    from tortoise.backends.asyncpg.client import AsyncpgDBClient, TransactionWrapper
+
+    for client_class in (AsyncpgDBClient, TransactionWrapper):
+        for name in CLIENT_METHODS:
+            method = client_class.__dict__.get(name)
+            if method is not None and not getattr(method, "__query_profiler__", False):
+                setattr(client_class, name, _profiled(method))
+
+
+def query_budget(max_queries: int) -> Callable:
+    """
+    Декоратор эндпоинта: максимальное количество запросов к БД на HTTP запрос,
+    включая проверку токена и зависимости доступа роутера.
+
+    Args:
+        max_queries: Бюджет запросов
+    """
+    def decorator(endpoint: Callable) -> Callable:
+        endpoint.__query_budget__ = max_queries
+        return endpoint
+    return decorator
+
+
+def get_query_budget(scope: Dict) -> Optional[int]:
+    """
+    Бюджет запросов эндпоинта, который обработал запрос (scope["endpoint"] заполняет роутер).
+
+    Returns:
+        Optional[int]: Бюджет или None, если эндпоинт его не объявил
+    """
+    return getattr(scope.get("endpoint"), "__query_budget__", None)
+
+
+class QueryProfilerMiddleware:
+    """
+    ASGI middleware: счетчик запросов к БД на каждый HTTP запрос.
+
+    Args:
+        app: ASGI приложение
+        debug: Добавлять заголовки X-DB-Query-Count, X-DB-Time-Ms
+            (по умолчанию - при log_level=debug)
+    """
+
+    def __init__(self, app, debug: Optional[bool] = None):
+        self.app = app
+        self.debug = settings.log_level == "debug" if debug is None else debug
+        install_query_profiler()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        outer = get_active_stats()
+        started = time.perf_counter()
+        status_code = None
+
+        with profile_queries() as stats:
+            async def send_with_stats(message):
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    if self.debug:
+                        message["headers"] = list(message.get("headers", [])) + [
+                            (HEADER_QUERY_COUNT.lower().encode(), str(stats.count).encode()),
+                            (HEADER_DB_TIME.lower().encode(), f"{stats.total_ms:.3f}".encode())
+                        ]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_stats)
+            finally:
+                fields = {
+                    "event_type": "db_profile",
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status_code": status_code,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                    **stats.as_log_fields()
+                }
+                budget = get_query_budget(scope)
+                if budget is not None and stats.count > budget:
+                    violation = f"{scope['method']} {scope['path']}: {stats.count} DB queries, budget {budget}"
+                    for outer_stats in outer:
+                        outer_stats.budget_violations.append(violation)
+                    log_with_context("warning", "DB query budget exceeded", query_budget=budget, **fields)
+                else:
+                    log_with_context("debug", "DB queries", **fields)
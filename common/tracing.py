@@ -0,0 +1,425 @@
+"""
+Трассировка запросов: spans с trace_id/span_id для HTTP запросов, WebSocket-сессий,
+push-уведомлений и фоновых задач.
+Текущий span хранится в contextvar, поэтому наследуется корутинами и задачами asyncio.create_task.
+trace_id и span_id добавляются в каждую запись лога (TraceContextFilter), trace_id HTTP запроса
+доступен в request.state.trace_id и возвращается в заголовке X-Trace-Id; входящий заголовок
+traceparent (W3C) продолжает trace вызывающего сервиса.
+
+В экспортер попадает доля trace (TRACE_SAMPLE_RATE), решение принимается для корневого span;
+для остальных trace spans только создаются (trace_id нужен логам) и не экспортируются.
+Экспортер задается set_exporter(): InMemorySpanExporter для тестов, OtlpHttpSpanExporter
+(OTLP/HTTP JSON) при заданном OTLP_TRACES_ENDPOINT.
+
+Заказ проходит несколько независимых запросов (создание, рассылка водителям, принятие), поэтому
+trace, в котором заказ создан, запоминается (remember_order_trace), а spans следующих операций
+с заказом получают атрибут order.id и ссылку (link) на этот trace.
+"""
+import atexit
+import collections
+import contextvars
+import functools
+import inspect
+import logging
+import os
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from config import settings
+
+
+SPAN_INTERNAL = "internal"
+SPAN_SERVER = "server"
+SPAN_CLIENT = "client"
+SPAN_CONSUMER = "consumer"
+
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+
+HEADER_TRACE_ID = "X-Trace-Id"
+TRACE_ID_HEADER_KEY = HEADER_TRACE_ID.lower().encode()
+TRACEPARENT_PATTERN = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+# Сколько заказов помнить для связи spans с trace создания заказа
+ORDER_TRACES_LIMIT = 10000
+
+
+@dataclass(slots=True)
+class Span:
+    """Операция в рамках trace"""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    sampled: bool = False
+    kind: str = SPAN_INTERNAL
+    start_ns: int = 0
+    end_ns: int = 0
+    status: str = STATUS_OK
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    # (trace_id, span_id) связанных spans
+    links: List[Tuple[str, str]] = field(default_factory=list)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1_000_000
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+
+class SpanExporter:
+    """Экспортер завершенных spans (только sampled)"""
+
+    def export(self, span: Span) -> None:
+        pass
+
+    def shutdown(self) -> None:
+        pass
+
+
+class InMemorySpanExporter(SpanExporter):
+    """Хранит spans в памяти (для тестов)"""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def get_spans(self, name: Optional[str] = None) -> List[Span]:
+        return [span for span in self.spans if name is None or span.name == name]
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+
+OTLP_SPAN_KINDS = {SPAN_INTERNAL: 1, SPAN_SERVER: 2, SPAN_CLIENT: 3, SPAN_CONSUMER: 5}
+OTLP_STATUS_CODES = {STATUS_OK: 1, STATUS_ERROR: 2}
+
+
+def otlp_value(value: Any) -> Dict:
+    """
+    Значение атрибута в формате OTLP JSON (AnyValue).
+    """
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def span_to_otlp(span: Span) -> Dict:
+    """
+    Span в формате OTLP JSON.
+    """
+    result = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": OTLP_SPAN_KINDS.get(span.kind, 1),
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": [{"key": key, "value": otlp_value(value)} for key, value in span.attributes.items()],
+        "status": {"code": OTLP_STATUS_CODES[span.status]},
+    }
+    if span.parent_id:
+        result["parentSpanId"] = span.parent_id
+    if span.links:
+        result["links"] = [{"traceId": trace_id, "spanId": span_id} for trace_id, span_id in span.links]
+    return result
+
+
+class OtlpHttpSpanExporter(SpanExporter):
+    """
+    Отправляет spans пачками в OTLP/HTTP (JSON, POST {endpoint}) из фонового потока.
+    Буфер ограничен max_queue spans, при переполнении spans отбрасываются.
+
+    Args:
+        endpoint: URL приемника, например http://otel-collector:4318/v1/traces
+        service_name: service.name ресурса
+        batch_size: Spans в одном запросе
+        interval: Период отправки (секунды)
+        max_queue: Размер буфера
+    """
+
+    def __init__(self, endpoint: str, service_name: str, batch_size: int = 512,
+                 interval: float = 5.0, max_queue: int = 10000):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.interval = interval
+        self.dropped = 0
+        self._buffer: Deque[Span] = collections.deque(maxlen=max_queue)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="otlp-span-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span) -> None:
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+        self._buffer.append(span)
+
+    def build_payload(self, spans: List[Span]) -> Dict:
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    {"key": "service.name", "value": otlp_value(self.service_name)},
+                    {"key": "process.pid", "value": otlp_value(os.getpid())},
+                ]},
+                "scopeSpans": [{
+                    "scope": {"name": __name__},
+                    "spans": [span_to_otlp(span) for span in spans]
+                }]
+            }]
+        }
+
+    def flush(self) -> None:
+        import requests
+
+        while self._buffer:
+            batch = []
+            while self._buffer and len(batch) < self.batch_size:
+                batch.append(self._buffer.popleft())
+            try:
+                requests.post(self.endpoint, json=self.build_payload(batch), timeout=10)
+            except Exception as exp:
+                logging.getLogger(__name__).warning(f"OTLP export failed: {exp}")
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=self.interval)
+        self.flush()
+
+
+_exporter: SpanExporter = SpanExporter()
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+_order_traces: "collections.OrderedDict[int, Tuple[str, str]]" = collections.OrderedDict()
+
+
+def set_exporter(exporter: SpanExporter) -> SpanExporter:
+    """
+    Заменяет экспортер spans.
+
+    Returns:
+        SpanExporter: Предыдущий экспортер
+    """
+    global _exporter
+    previous, _exporter = _exporter, exporter
+    return previous
+
+
+def configure_tracing() -> None:
+    """
+    Экспортер из настроек: OTLP при заданном OTLP_TRACES_ENDPOINT, иначе spans не экспортируются.
+    Оставшиеся spans отправляются при завершении процесса.
+    """
+    if settings.otlp_traces_endpoint:
+        exporter = OtlpHttpSpanExporter(settings.otlp_traces_endpoint, settings.app_name)
+        set_exporter(exporter).shutdown()
+        atexit.register(exporter.shutdown)
+
+
+def new_trace_id() -> str:
+    return f"{random.getrandbits(128):032x}"
+
+
+def new_span_id() -> str:
+    return f"{random.getrandbits(64):016x}"
+
+
+def get_current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def get_trace_id() -> Optional[str]:
+    """
+    trace_id текущего span (correlation id) или None вне trace.
+    """
+    span = _current_span.get()
+    return span.trace_id if span is not None else None
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """
+    Разбирает заголовок W3C traceparent.
+
+    Returns:
+        Optional[Tuple[str, str, bool]]: (trace_id, parent span_id, sampled) или None
+    """
+    match = TRACEPARENT_PATTERN.match((header or "").strip().lower())
+    if not match or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+
+def format_traceparent(span: Span) -> str:
+    return f"00-{span.trace_id}-{span.span_id}-{'01' if span.sampled else '00'}"
+
+
+class SpanScope:
+    """Контекстный менеджер span: делает span текущим и экспортирует его после завершения"""
+
+    __slots__ = ("span", "_token")
+
+    def __init__(self, span: Span):
+        self.span = span
+        self._token = None
+
+    def __enter__(self) -> Span:
+        self._token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        span = self.span
+        _current_span.reset(self._token)
+        span.end_ns = time.time_ns()
+        if exc_type is not None:
+            span.status = STATUS_ERROR
+            span.attributes["exception.type"] = exc_type.__name__
+        if span.sampled:
+            _exporter.export(span)
+
+
+def start_span(name: str,
+               kind: str = SPAN_INTERNAL,
+               parent: Optional[Tuple[str, str, bool]] = None,
+               **attributes) -> SpanScope:
+    """
+    Span текущей операции; вложенные spans и записи логов получают его trace_id.
+
+    Args:
+        name: Название операции
+        kind: internal, server, client, consumer
+        parent: Родитель из другого процесса (parse_traceparent), если текущего span нет
+        **attributes: Атрибуты span
+
+    Returns:
+        SpanScope: Контекстный менеджер, возвращающий Span
+    """
+    current = _current_span.get()
+    if current is not None:
+        trace_id, parent_id, sampled = current.trace_id, current.span_id, current.sampled
+    elif parent is not None:
+        trace_id, parent_id, sampled = parent
+    else:
+        trace_id, parent_id = new_trace_id(), None
+        sampled = random.random() < settings.trace_sample_rate
+    return SpanScope(Span(name, trace_id, new_span_id(), parent_id, sampled, kind, time.time_ns(), attributes=attributes))
+
+
+def remember_order_trace(id_order: int) -> None:
+    """
+    Запоминает текущий span как место создания заказа и помечает его атрибутом order.id.
+    """
+    span = _current_span.get()
+    if span is None:
+        return
+    span.set_attribute("order.id", id_order)
+    _order_traces[id_order] = (span.trace_id, span.span_id)
+    _order_traces.move_to_end(id_order)
+    while len(_order_traces) > ORDER_TRACES_LIMIT:
+        _order_traces.popitem(last=False)
+
+
+def link_order_trace(id_order: int, span: Optional[Span] = None) -> None:
+    """
+    Помечает span (по умолчанию текущий) атрибутом order.id и связывает с trace создания заказа.
+    """
+    span = span or _current_span.get()
+    if span is None:
+        return
+    span.set_attribute("order.id", id_order)
+    origin = _order_traces.get(id_order)
+    if origin is not None and origin[0] != span.trace_id and origin not in span.links:
+        span.links.append(origin)
+        span.set_attribute("order.trace_id", origin[0])
+
+
+def traced(name: str, kind: str = SPAN_INTERNAL, order_arg: Optional[str] = None) -> Callable:
+    """
+    Декоратор корутины: каждый вызов выполняется в span name.
+
+    Args:
+        name: Название операции
+        kind: Тип span
+        order_arg: Аргумент с ID заказа - span связывается с trace создания заказа
+    """
+    def decorator(func: Callable) -> Callable:
+        # Позиция аргумента заказа определяется один раз, а не на каждый вызов
+        position = list(inspect.signature(func).parameters).index(order_arg) if order_arg else None
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with start_span(name, kind) as span:
+                if position is not None:
+                    id_order = args[position] if position < len(args) else kwargs.get(order_arg)
+                    if id_order is not None:
+                        link_order_trace(id_order, span)
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TraceContextFilter(logging.Filter):
+    """Добавляет в запись лога trace_id и span_id текущего span"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        span = _current_span.get()
+        if span is not None:
+            record.trace_id = span.trace_id
+            record.span_id = span.span_id
+        return True
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware: корневой span HTTP запроса или WebSocket-сессии.
+    trace_id кладется в request.state.trace_id (websocket.state.trace_id) и в заголовок X-Trace-Id.
+
+    Args:
+        app: ASGI приложение
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        parent = None
+        for key, value in scope.get("headers") or ():
+            if key == b"traceparent":
+                parent = parse_traceparent(value.decode("latin-1"))
+                break
+        method = scope.get("method", "WS")
+
+        with start_span(scope["path"], SPAN_SERVER, parent=parent) as span:
+            scope.setdefault("state", {})["trace_id"] = span.trace_id
+
+            async def send_with_trace(message):
+                if message["type"] == "http.response.start":
+                    span.attributes["http.status_code"] = message["status"]
+                    message["headers"] = [*message.get("headers", ()), (TRACE_ID_HEADER_KEY, span.trace_id.encode())]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_trace if scope["type"] == "http" else send)
+            finally:
+                # Шаблон маршрута известен только после роутинга
+                route = getattr(scope.get("route"), "path", None)
+                span.attributes["url.path"] = scope["path"]
+                span.name = f"{method} {route or scope['path']}"
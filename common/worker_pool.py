@@ -0,0 +1,63 @@
+"""
+Пулы процессов для тяжелых задач (сборка PDF отчетов, превью изображений).
+Процессы запускаются через spawn и при импорте модулей приложения не должны создавать свой
+конвейер логов: QueueListener и RotatingFileHandler на тех же logs/app.log и logs/error.log,
+что и у воркера uvicorn, ротировали бы файлы одновременно из нескольких процессов. Поэтому
+инициализатор пула помечает процесс (WORKER_PROCESS_ENV) и пишет логи только в stderr.
+Модуль не импортирует приложение, чтобы инициализатор выполнялся до импорта common.logger.
+"""
+import logging
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+
+WORKER_PROCESS_ENV = "AUTONANNY_WORKER_PROCESS"
+
+WORKER_LOG_FORMAT = "%(asctime)s %(levelname)s %(processName)s %(name)s %(message)s"
+
+
+def is_worker_process() -> bool:
+    """
+    Выполняется ли код в процессе пула (create_process_pool), а не в воркере приложения.
+    """
+    return os.environ.get(WORKER_PROCESS_ENV) == "1"
+
+
+def init_worker_logging(level: str = "info") -> None:
+    """
+    Инициализатор процесса пула: логи в stderr без файлов и без потока записи.
+    Если модуль логов уже импортирован (например, при импорте __main__ родителя), его конвейер
+    останавливается.
+
+    Args:
+        level: Уровень логирования (LOG_LEVEL)
+    """
+    os.environ[WORKER_PROCESS_ENV] = "1"
+    logger_module = sys.modules.get("common.logger_new")
+    if logger_module is not None:
+        logger_module.close_log_pipeline()
+
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter(WORKER_LOG_FORMAT))
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+
+
+def create_process_pool(max_workers: int, log_level: str = "info") -> ProcessPoolExecutor:
+    """
+    Пул процессов (spawn), процессы которого настраивают логи через init_worker_logging.
+
+    Args:
+        max_workers: Количество процессов
+        log_level: Уровень логирования процессов
+
+    Returns:
+        ProcessPoolExecutor: Пул процессов
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=init_worker_logging, initargs=(log_level,))
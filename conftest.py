@@ -0,0 +1,5 @@
+"""
+Общая конфигурация pytest: бюджеты запросов к БД (tests/query_budget.py)
+"""
+
+pytest_plugins = ["tests.query_budget"]
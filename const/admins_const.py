@@ -1,7 +1,7 @@
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel, RootModel, ConfigDict, Field
-from typing import Union, List, Dict
+from typing import Union, List, Dict, Literal
 from enum import Enum
 from datetime import date
 
@@ -23,6 +23,8 @@ new_user_message_dont_delivery = JSONResponse({"status": True,
                                                "message": "SMS with user authorization data don't delivery"}, 201)
 user_not_found = JSONResponse({"status": True,
                                "message": "User not found!"}, 201)
+report_job_not_found = JSONResponse({"status": False,
+                                     "message": "Report job not found!"}, 404)
 get_partners = JSONResponse({"status": True,
                              "message": "Success!",
                              "partners": [
@@ -197,6 +199,25 @@ class SuccessPostUserReport(BaseModel):
     user_report_file: str
 
 
+class ReportJob(BaseModel):
+    report: Literal["sales", "users"]
+    start_date: date
+    end_date: date
+    granularity: Literal["day", "week", "month"] = "day"
+
+
+class ReportJobStatus(BaseModel):
+    id: str
+    status: Literal["pending", "done", "failed"]
+    error: Union[str, None] = None
+
+
+class SuccessReportJob(BaseModel):
+    status: bool = True
+    message: str = "Success!"
+    job: ReportJobStatus
+
+
 class City(BaseModel):
     id: int
     title: str
@@ -5,6 +5,8 @@ from typing import Union
 
 chat_not_found_answer = JSONResponse({"status": False,
                                       "message": "Chat not found!"}, 404)
+messages_cursor_conflict = JSONResponse({"status": False,
+                                         "message": "Use either before_id or after_id, not both!"}, 400)
 get_chats = JSONResponse({"status": True,
                          "message": "Success!",
                          "chats": [
@@ -46,7 +48,12 @@ get_messages = JSONResponse({"status": True,
                                                 "isMe": True
                                             }
                              ],
+                             "next_before_id": 0,
+                             "has_more": False,
                              "total": 0})
+get_unread_count = JSONResponse({"status": True,
+                                 "message": "Success!",
+                                 "unread": 0})
 
 
 class GetChats(BaseModel):
@@ -62,4 +69,7 @@ class GetChat(BaseModel):
 class GetMessages(BaseModel):
     id_chat: int
     offset: Union[int, None] = 0
-    limit: Union[int, None] = 10
\ No newline at end of file
+    limit: Union[int, None] = 10
+    before_id: Union[int, None] = None
+    after_id: Union[int, None] = None
+    with_total: Union[bool, None] = None
\ No newline at end of file
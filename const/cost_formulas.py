@@ -1,3 +1,10 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+
 Vm = 27  # Средняя скорость движения автомобиля за 2024г - км/ч
 
 S1 = 3  # Радиус подачи автомобиля - километры
@@ -11,7 +18,39 @@ Kg = 1  # Городской коэффициент - %
 T = 3600 / Vm  # Среднее время за километр пути - секунды
 
 
-def get_total_cost_of_the_trip(*, M: int, S2: float, To: int) -> float:
+@dataclass(frozen=True)
+class PricingCoefficientsValues:
+    """Коэффициенты формулы стоимости (data.pricing_coefficients, по умолчанию - константы модуля)"""
+
+    vm: float = Vm
+    s1: float = S1
+    kc: float = Kc
+    ks: float = Ks
+    kg: float = Kg
+
+    @property
+    def t(self) -> float:
+        """Среднее время за километр пути - секунды"""
+        return 3600 / self.vm
+
+
+DEFAULT_COEFFICIENTS = PricingCoefficientsValues()
+
+# Активные коэффициенты; обновляются кэшем конфигурации цен (services/pricing_config_service.py)
+_current_coefficients = DEFAULT_COEFFICIENTS
+
+
+def set_current_coefficients(coefficients: PricingCoefficientsValues) -> None:
+    global _current_coefficients
+    _current_coefficients = coefficients
+
+
+def get_current_coefficients() -> PricingCoefficientsValues:
+    return _current_coefficients
+
+
+def get_total_cost_of_the_trip(*, M: int, S2: float, To: int,
+                               coefficients: Optional[PricingCoefficientsValues] = None) -> float:
     """
     Получает полную стоимость поездки
 
@@ -19,15 +58,17 @@ def get_total_cost_of_the_trip(*, M: int, S2: float, To: int) -> float:
         M (int): Тариф - руб/км
         S2 (float): Дистанция поездки из точки A в точку B - метры
         To (int): Ориентировочное время поездки - секунды
+        coefficients (PricingCoefficientsValues): Коэффициенты формулы, по умолчанию - активные
 
     Returns:
         float: Полная стоимость поездки
     """
 
+    c = coefficients or _current_coefficients
     S2 /= 1000  # Дистанция в километрах
 
     try:
-        Kh2 = To / (T * S2)  # Коэффициент учёта пробок
+        Kh2 = To / (c.t * S2)  # Коэффициент учёта пробок
     except ZeroDivisionError:
         Kh2 = 1
 
@@ -36,10 +77,47 @@ def get_total_cost_of_the_trip(*, M: int, S2: float, To: int) -> float:
     elif Kh2 >= 2.5:
         Kh2 = 2.5
 
-    S = S1 + S2
+    S = c.s1 + S2
 
     cost_drive = S * M  # Стоимость поездки (чистая)
-    cost_insurance = Ks * S2 / 100  # Стоимость страховки
-    cost_drive_full = Kh2 * cost_drive * Kg + cost_insurance  # Стоимость поездки (без кэшбека)
-    cost_cashback = Kc * cost_drive_full / 100  # Стоимость кэшбека
+    cost_insurance = c.ks * S2 / 100  # Стоимость страховки
+    cost_drive_full = Kh2 * cost_drive * c.kg + cost_insurance  # Стоимость поездки (без кэшбека)
+    cost_cashback = c.kc * cost_drive_full / 100  # Стоимость кэшбека
+    return cost_drive_full + cost_cashback
+
+
+def get_total_cost_matrix(*, M: ArrayLike, S2: ArrayLike, To: ArrayLike,
+                          coefficients: Optional[PricingCoefficientsValues] = None) -> np.ndarray:
+    """
+    Стоимость поездки для каждого тарифа и каждого варианта маршрута за один проход
+    (та же формула, что get_total_cost_of_the_trip)
+
+    Args:
+        M (ArrayLike): Тарифы - руб/км, n значений
+        S2 (ArrayLike): Дистанции вариантов маршрута - метры, k значений
+        To (ArrayLike): Ориентировочное время вариантов маршрута - секунды, k значений
+        coefficients (PricingCoefficientsValues): Коэффициенты формулы, по умолчанию - активные
+
+    Returns:
+        np.ndarray: Матрица стоимостей n x k (строка - тариф, столбец - вариант маршрута)
+    """
+
+    c = coefficients or _current_coefficients
+    tariffs = np.asarray(M, dtype=np.float64).reshape(-1, 1)
+    distances = np.asarray(S2, dtype=np.float64) / 1000  # Дистанции в километрах
+    durations = np.asarray(To, dtype=np.float64)
+    if distances.shape != durations.shape or distances.ndim != 1:
+        raise ValueError("S2 and To must be one-dimensional arrays of the same length")
+
+    # Коэффициент учёта пробок; при нулевом знаменателе 1, как в get_total_cost_of_the_trip
+    denominator = c.t * distances if c.vm else np.zeros_like(distances)
+    Kh2 = np.divide(durations, denominator, out=np.ones_like(durations), where=denominator != 0)
+    Kh2 = np.clip(Kh2, 1, 2.5)
+
+    S = c.s1 + distances
+
+    cost_drive = tariffs * S  # Стоимость поездки (чистая), n x k
+    cost_insurance = c.ks * distances / 100  # Стоимость страховки
+    cost_drive_full = Kh2 * cost_drive * c.kg + cost_insurance  # Стоимость поездки (без кэшбека)
+    cost_cashback = c.kc * cost_drive_full / 100  # Стоимость кэшбека
     return cost_drive_full + cost_cashback
@@ -5,6 +5,8 @@ from typing import Union
 
 driver_not_found = JSONResponse({"status": False,
                                  "message": "Driver not found!"}, 404)
+driver_position_unknown = JSONResponse({"status": False,
+                                        "message": "Driver position unknown, pass latitude and longitude!"}, 422)
 get_driver = JSONResponse({"status": True,
                            "message": "Success!",
                            "driver": {
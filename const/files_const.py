@@ -4,4 +4,8 @@ from fastapi.responses import JSONResponse
 upload_files = JSONResponse({"status": True,
                              "message": "Success!",
                              "files_path": ["string"],
-                             "files_type": [0]})
\ No newline at end of file
+                             "files_type": [0]})
+upload_file_too_large = JSONResponse({"status": False,
+                                      "message": "File is too large!"}, 413)
+file_not_found = JSONResponse({"status": False,
+                               "message": "File not found!"}, 404)
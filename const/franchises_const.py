@@ -52,6 +52,10 @@ incorrect_period = JSONResponse({"status": False,
                                  "message": "The period must be 0 or negative",
                                  }, status_code=400)
 
+incorrect_dates = JSONResponse({"status": False,
+                                "message": "Both date_from and date_to are required and date_from must not be after date_to",
+                                }, status_code=400)
+
 incorrect_period_str = JSONResponse({"status": False,
                                      "message": "The period must 'day', 'week', 'month', 'year'",
                                      }, status_code=400)
@@ -59,6 +63,9 @@ incorrect_period_str = JSONResponse({"status": False,
 incorrect_user = JSONResponse({"status": False,
                               "message": "Current users do not belong to any franchise",
                                }, status_code=400)
+incorrect_driver_status = JSONResponse({"status": False,
+                                       "message": "Status must be one of: unverified, deleted, blocked, active",
+                                       }, status_code=400)
 
 get_franchise_driver_orders = JSONResponse(
     {
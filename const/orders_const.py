@@ -233,6 +233,7 @@ get_schedules_responses = JSONResponse({"status": True,
                                           },
                                           "duration": 0,
                                           "all_salary": 0,
+                                          "distance_km": 1.25,
                                           "children_count": 0,
                                           "week_days": [
                                                             0
@@ -271,7 +272,9 @@ get_schedules_responses = JSONResponse({"status": True,
                                                                             0
                                                           ]
                                                         }
-                                          ]}]
+                                          ]}],
+                             "next_after_id": 0,
+                             "has_more": False
                              }, 200)
 get_driver_schedules = JSONResponse({"status": True,
                                     "message": "Success!",
@@ -417,6 +420,18 @@ get_total_price = JSONResponse({"status": True,
                                 "total_price": "string",
                                 "accurately": True})
 
+get_onetime_quotes = JSONResponse({"status": True,
+                                   "message": "Success!",
+                                   "tariffs": [
+                                       {
+                                           "id_tariff": 0,
+                                           "prices": [0.0]
+                                       }
+                                   ]})
+
+# Вариантов маршрута в одном запросе расчета стоимости
+MAX_QUOTE_ROUTES = 20
+
 class NowLocation(BaseModel):
     latitude: float
     longitude: float
@@ -511,6 +526,16 @@ class GetTotalPrice(BaseModel):
     id_tariff: int
     addresses: List[DriveAddresses]
 
+
+class RouteAlternative(BaseModel):
+    distance: float = Field(..., ge=0)  # Дистанция маршрута - метры
+    duration: int = Field(..., ge=0)  # Ориентировочное время поездки - секунды
+
+
+class GetOnetimeQuotes(BaseModel):
+    routes: List[RouteAlternative] = Field(..., min_length=1, max_length=MAX_QUOTE_ROUTES)
+    id_tariffs: Union[List[int], None] = None  # По умолчанию - все активные тарифы франшизы
+
 class NewSchedule(BaseModel):
     title: str # Количество дней
     description: str # Количество дней
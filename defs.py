@@ -7,6 +7,8 @@ import firebase_admin
 from firebase_admin import credentials, messaging
 
 from config import settings
+from common.metrics import PUSH_NOTIFICATIONS
+from common.tracing import traced, SPAN_CLIENT
 from const.static_data_const import not_user_photo
 from models.authentication_db import UsersBearerToken, HistoryBearerToken, UsersUserAccount
 from models.chats_db import ChatsChatParticipantToken
@@ -134,12 +136,14 @@ firebase_app_client = firebase_admin.initialize_app(cred_app_client, name="app_c
 firebase_app2_driver = firebase_admin.initialize_app(cred_app_driver, name="app_driver")
 
 
+@traced("push.send", SPAN_CLIENT)
 async def sendPush(device_token, title, body, data=None):
     """Отправляет push-уведомление через нужный Firebase-проект"""
 
     user_id = await UsersBearerToken.filter(fbid=device_token).first().values("id_user")
     type_account = await UsersUserAccount.filter(id_user=user_id["id_user"]).first().values("id_type_account")
-    firebase_app = firebase_app_client if type_account["id_type_account"] in [1, 7] else firebase_app2_driver
+    is_client = type_account["id_type_account"] in [1, 7]
+    firebase_app = firebase_app_client if is_client else firebase_app2_driver
 
     message = messaging.Message(
         notification=messaging.Notification(
@@ -150,7 +154,12 @@ async def sendPush(device_token, title, body, data=None):
         token=device_token
     )
 
-    response = messaging.send(message, app=firebase_app)
+    try:
+        response = messaging.send(message, app=firebase_app)
+    except Exception:
+        PUSH_NOTIFICATIONS.labels("client" if is_client else "driver", "error").inc()
+        raise
+    PUSH_NOTIFICATIONS.labels("client" if is_client else "driver", "ok").inc()
     print(f"Уведомление отправлено через! ID сообщения:", response)
 
 
@@ -284,7 +293,6 @@ async def get_time_drive(latitude_a, longitude_a, latitude_b, longitude_b, amoun
         await error(traceback.format_exc())
         return None
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
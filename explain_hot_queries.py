@@ -0,0 +1,189 @@
+"""
+Проверка планов горячих запросов (сокеты, авторизация, чаты, баланс).
+
+Запросы строятся через ORM так же, как в роутерах, и выполняются с EXPLAIN (ANALYZE) на локальной
+БД, заполненной init_and_seed.py. Перед проверкой применяются индексные миграции, которых еще нет
+в aerich. Seq Scan по таблице горячего пути - ошибка, скрипт завершается с кодом 1.
+
+В тестовой БД несколько строк, и планировщик выбирает Seq Scan при любом индексе, поэтому
+запросы выполняются с enable_seqscan = off: Seq Scan остается в плане, только если подходящего
+индекса нет. Каждый запрос выполняется в транзакции с откатом (UPDATE не меняет данные).
+
+Запуск:
+    python init_and_seed.py
+    python explain_hot_queries.py
+    python explain_hot_queries.py --no-migrations
+"""
+import argparse
+import asyncio
+import json
+import re
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+import asyncpg
+from tortoise import Tortoise
+from tortoise.queryset import UpdateQuery
+
+from config import settings
+
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations" / "sql"
+
+# Индексные миграции горячих путей
+HOT_PATH_MIGRATIONS = (
+    "013_add_chat_message_indexes.sql",
+    "015_add_open_roads_indexes.sql",
+    "017_add_admin_schedules_indexes.sql",
+    "020_add_hot_path_indexes.sql",
+)
+
+MODELS = ["models.authentication_db", "models.files_db", "models.users_db", "models.drivers_db",
+          "models.static_data_db", "models.chats_db", "models.admins_db", "models.orders_db"]
+
+SAMPLE_TOKEN = "explain-hot-queries"
+
+
+def hot_queries() -> List[Tuple[str, str, str, list]]:
+    """
+    Горячие запросы в форме, которую генерирует ORM (Tortoise должен быть инициализирован).
+
+    Returns:
+        List[Tuple[str, str, str, list]]: (название, таблица schema.table, SQL, параметры SQL)
+    """
+    from models.authentication_db import UsersBearerToken
+    from models.chats_db import ChatsChatParticipantToken, ChatsMessage, HistoryChatNotification
+    from models.drivers_db import DataDriverMode
+    from models.orders_db import DataOrder, UsersUserOrder
+    from models.users_db import DataUserBalanceHistory
+
+    now = datetime(2024, 1, 31)
+    queries = [
+        ("driver_mode by websocket_token", "data.driver_mode",
+         DataDriverMode.filter(websocket_token=SAMPLE_TOKEN).first()),
+        ("driver_mode position update", "data.driver_mode",
+         DataDriverMode.filter(websocket_token=SAMPLE_TOKEN).update(latitude=55.75, longitude=37.61)),
+        ("driver_mode last by driver", "data.driver_mode",
+         DataDriverMode.filter(id_driver=1).order_by("-id").first()),
+        ("active orders of driver", "data.order",
+         DataOrder.filter(id_driver=1, isActive=True)),
+        ("active orders of parent", "data.order",
+         DataOrder.filter(id_user=1, isActive=True)),
+        ("user_order by socket token", "users.user_order",
+         UsersUserOrder.filter(token=SAMPLE_TOKEN, isActive=True).first()),
+        ("user_order token by order", "users.user_order",
+         UsersUserOrder.filter(id_order=1).first().values("token")),
+        ("user_order last of client", "users.user_order",
+         UsersUserOrder.filter(id_user=1).order_by("-id").first().values("id_order", "token")),
+        ("bearer token", "authentication.bearer_authorization",
+         UsersBearerToken.filter(token=SAMPLE_TOKEN).first().values()),
+        ("bearer last token of user", "authentication.bearer_authorization",
+         UsersBearerToken.filter(id_user=1).order_by("-id").first()),
+        ("bearer (id_user, fbid, token)", "authentication.bearer_authorization",
+         UsersBearerToken.filter(id_user=1, fbid=SAMPLE_TOKEN, token=SAMPLE_TOKEN).count()),
+        ("chat participant token", "chats.chat_participant_token",
+         ChatsChatParticipantToken.filter(token=SAMPLE_TOKEN).first().values()),
+        ("chat messages page", "chats.message",
+         ChatsMessage.filter(id_chat=1).order_by("-id").offset(0).limit(10).values()),
+        ("chat unread mark", "history.chat_notification",
+         HistoryChatNotification.filter(id_user=1, id_chat=1, is_readed=False).update(is_readed=True)),
+        ("balance history by period", "data.user_balance_history",
+         DataUserBalanceHistory.filter(id_user=1, isComplete=True,
+                                       datetime_create__gte=now - timedelta(days=30),
+                                       datetime_create__lte=now).exclude(id_task=-100).values()),
+        ("balance history page", "data.user_balance_history",
+         DataUserBalanceHistory.filter(id_user=1).order_by("-datetime_create").offset(0).limit(20).values()),
+    ]
+    result = []
+    for name, table, query in queries:
+        sql = query.sql()
+        # UPDATE передает значения параметрами ($1, ...), выборки - литералами
+        params = query.values if isinstance(query, UpdateQuery) else []
+        result.append((name, table, sql, params))
+    return result
+
+
+def find_seq_scans(plan: Dict, tables: Iterable[str]) -> List[str]:
+    """
+    Таблицы из tables, которые читаются Seq Scan в плане EXPLAIN (VERBOSE, FORMAT JSON).
+
+    Args:
+        plan: Узел плана ("Plan" из результата EXPLAIN)
+        tables: Таблицы горячего пути (schema.table)
+
+    Returns:
+        List[str]: Таблицы с Seq Scan
+    """
+    tables = set(tables)
+    found = []
+    nodes = [plan]
+    while nodes:
+        node = nodes.pop()
+        if node.get("Node Type") == "Seq Scan":
+            table = f'{node.get("Schema")}.{node.get("Relation Name")}'
+            if table in tables:
+                found.append(table)
+        nodes.extend(node.get("Plans", []))
+    return found
+
+
+def get_migration_version(sql: str) -> str:
+    """
+    Версия миграции из INSERT INTO aerich.
+    """
+    match = re.search(r"INSERT INTO aerich \(version, app, content\)\s*VALUES \(\s*'([^']+)'", sql)
+    return match.group(1) if match else ""
+
+
+async def apply_migrations(conn: asyncpg.Connection) -> None:
+    if await conn.fetchval("SELECT to_regclass('aerich')") is None:
+        await conn.execute((MIGRATIONS_DIR / "001_init_aerich.sql").read_text(encoding="utf-8"))
+    applied = {row["version"] for row in await conn.fetch("SELECT version FROM aerich")}
+    for file_name in HOT_PATH_MIGRATIONS:
+        sql = (MIGRATIONS_DIR / file_name).read_text(encoding="utf-8")
+        if get_migration_version(sql) in applied:
+            continue
+        await conn.execute(sql)
+        print(f"📦 Применена миграция {file_name}")
+
+
+async def explain(conn: asyncpg.Connection, sql: str, params: list) -> Dict:
+    transaction = conn.transaction()
+    await transaction.start()
+    try:
+        await conn.execute("SET LOCAL enable_seqscan = off")
+        result = await conn.fetchval(f"EXPLAIN (ANALYZE, VERBOSE, FORMAT JSON) {sql}", *params)
+    finally:
+        await transaction.rollback()
+    return json.loads(result)[0]["Plan"]
+
+
+async def main(with_migrations: bool = True) -> int:
+    await Tortoise.init(db_url=settings.database_url, modules={"models": MODELS})
+    conn = await asyncpg.connect(settings.database_url)
+    failed = 0
+    try:
+        if with_migrations:
+            await apply_migrations(conn)
+        for name, table, sql, params in hot_queries():
+            plan = await explain(conn, sql, params)
+            seq_scans = find_seq_scans(plan, [table])
+            if seq_scans:
+                failed += 1
+                print(f"❌ {name}: Seq Scan on {', '.join(seq_scans)}\n   {sql}")
+            else:
+                print(f"✅ {name}: {plan['Node Type']}, {plan.get('Actual Total Time', 0):.3f} ms")
+    finally:
+        await conn.close()
+        await Tortoise.close_connections()
+    print(f"\n{'❌' if failed else '✅'} Seq Scan на горячих путях: {failed}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="EXPLAIN (ANALYZE) горячих запросов ORM")
+    parser.add_argument("--no-migrations", action="store_true", help="не применять индексные миграции")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(with_migrations=not args.no_migrations)))
@@ -279,6 +279,16 @@ USERS_TABLES: Sequence[str] = (
         datetime_create TIMESTAMP NULL DEFAULT NOW()
     );
     """,
+    """
+    CREATE TABLE IF NOT EXISTS users.user_presence (
+        id BIGSERIAL PRIMARY KEY,
+        id_user BIGINT NOT NULL,
+        worker_id TEXT NOT NULL,
+        online_until TIMESTAMP NOT NULL,
+        last_seen TIMESTAMP NOT NULL DEFAULT NOW(),
+        UNIQUE (id_user, worker_id)
+    );
+    """,
 )
 
 
@@ -344,6 +354,53 @@ DATA_TABLES: Sequence[str] = (
     );
     """,
     """
+    CREATE TABLE IF NOT EXISTS data.pricing_config_version (
+        id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+        version BIGINT NOT NULL DEFAULT 0,
+        datetime_update TIMESTAMP NOT NULL DEFAULT NOW()
+    );
+    """,
+    """
+    INSERT INTO data.pricing_config_version (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING;
+    """,
+    """
+    CREATE OR REPLACE FUNCTION data.bump_pricing_config_version() RETURNS TRIGGER AS $$
+    BEGIN
+        UPDATE data.pricing_config_version SET version = version + 1, datetime_update = NOW() WHERE id = 1;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    """,
+    """
+    DROP TRIGGER IF EXISTS trg_car_tariff_pricing_version ON data.car_tariff;
+    """,
+    """
+    CREATE TRIGGER trg_car_tariff_pricing_version
+        AFTER INSERT OR UPDATE OR DELETE ON data.car_tariff
+        FOR EACH STATEMENT EXECUTE FUNCTION data.bump_pricing_config_version();
+    """,
+    """
+    DROP TRIGGER IF EXISTS trg_franchise_user_pricing_version ON users.franchise_user;
+    """,
+    """
+    CREATE TRIGGER trg_franchise_user_pricing_version
+        AFTER INSERT OR UPDATE OR DELETE ON users.franchise_user
+        FOR EACH STATEMENT EXECUTE FUNCTION data.bump_pricing_config_version();
+    """,
+    """
+    DO $$
+    BEGIN
+        -- data.pricing_coefficients создается миграцией 010
+        IF to_regclass('data.pricing_coefficients') IS NOT NULL THEN
+            DROP TRIGGER IF EXISTS trg_pricing_coefficients_pricing_version ON data.pricing_coefficients;
+            CREATE TRIGGER trg_pricing_coefficients_pricing_version
+                AFTER INSERT OR UPDATE OR DELETE ON data.pricing_coefficients
+                FOR EACH STATEMENT EXECUTE FUNCTION data.bump_pricing_config_version();
+        END IF;
+    END;
+    $$;
+    """,
+    """
     CREATE TABLE IF NOT EXISTS data.driving_status (
         id BIGSERIAL PRIMARY KEY,
         status TEXT NOT NULL
@@ -475,6 +532,22 @@ DATA_TABLES: Sequence[str] = (
     );
     """,
     """
+    CREATE TABLE IF NOT EXISTS data.open_road_market (
+        id BIGSERIAL PRIMARY KEY,
+        id_schedule_road BIGINT NOT NULL UNIQUE,
+        id_schedule BIGINT NOT NULL,
+        week_day BIGINT NOT NULL,
+        week_days TEXT NOT NULL,
+        start_time TEXT NOT NULL,
+        end_time TEXT NOT NULL,
+        salary DECIMAL(10, 2) NOT NULL,
+        pickup_lat FLOAT,
+        pickup_lon FLOAT,
+        requests_count INTEGER NOT NULL DEFAULT 0,
+        datetime_update TIMESTAMP DEFAULT NOW()
+    );
+    """,
+    """
     CREATE TABLE IF NOT EXISTS data.schedule_other_parametrs (
         id BIGSERIAL PRIMARY KEY,
         id_schedule BIGINT NOT NULL,
@@ -503,6 +576,95 @@ DATA_TABLES: Sequence[str] = (
     );
     """,
     """
+    CREATE TABLE IF NOT EXISTS data.franchise_balance_daily (
+        id BIGSERIAL PRIMARY KEY,
+        id_franchise BIGINT NOT NULL,
+        day DATE NOT NULL,
+        id_task BIGINT NOT NULL,
+        money DECIMAL(14, 2) NOT NULL DEFAULT 0,
+        operations_count INTEGER NOT NULL DEFAULT 0,
+        UNIQUE (id_franchise, day, id_task)
+    );
+    """,
+    """
+    CREATE OR REPLACE FUNCTION data.apply_franchise_balance_daily(
+        p_id_user BIGINT, p_id_task BIGINT, p_money NUMERIC, p_datetime TIMESTAMP, p_sign INTEGER
+    ) RETURNS VOID AS $$
+    BEGIN
+        -- Записи без даты не попадают ни в один период
+        IF p_datetime IS NULL THEN
+            RETURN;
+        END IF;
+        INSERT INTO data.franchise_balance_daily AS t (id_franchise, day, id_task, money, operations_count)
+        SELECT DISTINCT fu.id_franchise, p_datetime::date, COALESCE(p_id_task, 0), p_sign * p_money, p_sign
+        FROM users.franchise_user fu
+        WHERE fu.id_user = p_id_user
+        ON CONFLICT (id_franchise, day, id_task) DO UPDATE SET
+            money = t.money + EXCLUDED.money,
+            operations_count = t.operations_count + EXCLUDED.operations_count;
+    END;
+    $$ LANGUAGE plpgsql;
+    """,
+    """
+    CREATE OR REPLACE FUNCTION data.user_balance_history_rollup() RETURNS TRIGGER AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            PERFORM data.apply_franchise_balance_daily(OLD.id_user, OLD.id_task, OLD.money, OLD.datetime_create, -1);
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            PERFORM data.apply_franchise_balance_daily(NEW.id_user, NEW.id_task, NEW.money, NEW.datetime_create, 1);
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    """,
+    """
+    DROP TRIGGER IF EXISTS trg_user_balance_history_rollup ON data.user_balance_history;
+    """,
+    """
+    CREATE TRIGGER trg_user_balance_history_rollup
+        AFTER INSERT OR DELETE OR UPDATE OF id_user, id_task, money, datetime_create
+        ON data.user_balance_history
+        FOR EACH ROW EXECUTE FUNCTION data.user_balance_history_rollup();
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS data.report_daily_snapshot (
+        id BIGSERIAL PRIMARY KEY,
+        report_key TEXT NOT NULL,
+        day DATE NOT NULL,
+        count BIGINT NOT NULL DEFAULT 0,
+        sum DECIMAL(18, 2) NOT NULL DEFAULT 0,
+        datetime_create TIMESTAMP DEFAULT NOW(),
+        UNIQUE (report_key, day)
+    );
+    """,
+    """
+    CREATE OR REPLACE FUNCTION data.invalidate_report_daily_snapshot() RETURNS TRIGGER AS $$
+    DECLARE
+        prefix TEXT := TG_TABLE_SCHEMA || '."' || TG_TABLE_NAME || '":';
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.datetime_create IS NOT NULL THEN
+            DELETE FROM data.report_daily_snapshot
+            WHERE day = OLD.datetime_create::date AND left(report_key, length(prefix)) = prefix;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.datetime_create IS NOT NULL THEN
+            DELETE FROM data.report_daily_snapshot
+            WHERE day = NEW.datetime_create::date AND left(report_key, length(prefix)) = prefix;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    """,
+    """
+    DROP TRIGGER IF EXISTS trg_user_report_snapshot ON users.user;
+    """,
+    """
+    CREATE TRIGGER trg_user_report_snapshot
+        AFTER INSERT OR DELETE OR UPDATE OF datetime_create
+        ON users.user
+        FOR EACH ROW EXECUTE FUNCTION data.invalidate_report_daily_snapshot();
+    """,
+    """
     CREATE TABLE IF NOT EXISTS data.task_balance_history (
         id BIGSERIAL PRIMARY KEY,
         title TEXT NOT NULL
@@ -574,6 +736,20 @@ CHATS_TABLES: Sequence[str] = (
         datetime_create TIMESTAMP
     );
     """,
+    """
+    CREATE TABLE IF NOT EXISTS chats.chat_summary (
+        id BIGSERIAL PRIMARY KEY,
+        id_chat BIGINT NOT NULL,
+        id_user BIGINT NOT NULL,
+        id_last_message BIGINT,
+        last_msg TEXT,
+        last_msg_type INTEGER,
+        last_timestamp BIGINT,
+        unread_count INTEGER NOT NULL DEFAULT 0,
+        datetime_update TIMESTAMP DEFAULT NOW(),
+        UNIQUE (id_chat, id_user)
+    );
+    """,
 )
 
 
@@ -614,6 +790,15 @@ HISTORY_TABLES: Sequence[str] = (
     );
     """,
     """
+    DROP TRIGGER IF EXISTS trg_payment_tink_report_snapshot ON history.payment_tink;
+    """,
+    """
+    CREATE TRIGGER trg_payment_tink_report_snapshot
+        AFTER INSERT OR DELETE OR UPDATE OF amount, datetime_create
+        ON history.payment_tink
+        FOR EACH ROW EXECUTE FUNCTION data.invalidate_report_daily_snapshot();
+    """,
+    """
     CREATE TABLE IF NOT EXISTS history.notification (
         id BIGSERIAL PRIMARY KEY,
         id_user BIGINT NOT NULL,
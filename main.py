@@ -1,9 +1,14 @@
 from config import settings
 from routers import authentication, files, static_data, chats, drivers, users, chats_websocket, admins, orders, payments
-from routers import franchises, orders_socket, mains
+from routers import franchises, orders_socket, mains, metrics
 from const.dependency import has_access_admin, has_access_franchise, has_access, has_access_franchise_admin_and_main_admin
 from const.dependency import BearerTokenAuthBackend, has_access_files
 from starlette.middleware.authentication import AuthenticationMiddleware
+from common.query_profiler import QueryProfilerMiddleware
+from common.metrics import MetricsMiddleware
+from common.tracing import TracingMiddleware, configure_tracing
+from common.logger import logger
+from services.reference_data_service import reference_data
 from tortoise.contrib.fastapi import register_tortoise
 from fastapi.responses import JSONResponse
 from fastapi import FastAPI, Depends
@@ -28,6 +33,12 @@ app.include_router(
 )
 
 
+app.include_router(
+    metrics.router,
+    tags=["Metrics"]
+)
+
+
 app.include_router(
     authentication.router,
     prefix="/api/v1.0/auth",
@@ -107,6 +118,13 @@ app.add_middleware(AuthenticationMiddleware,
                    backend=BearerTokenAuthBackend(),
                    on_error=lambda conn, exc: JSONResponse({"detail": str(exc)}, status_code=401))
 
+# Добавлены последними - внешние, поэтому учитывают и запрос проверки токена
+app.add_middleware(QueryProfilerMiddleware)
+app.add_middleware(MetricsMiddleware)
+# Самый внешний: trace_id доступен остальным middleware и попадает в их логи
+app.add_middleware(TracingMiddleware)
+configure_tracing()
+
 
 app.include_router(
     files.router,
@@ -206,6 +224,18 @@ register_tortoise(
     add_exception_handlers=True
 )
 
+
+@app.on_event("startup")
+async def load_reference_data():
+    # После register_tortoise: обработчики startup выполняются по порядку, БД уже подключена
+    try:
+        await reference_data.load_all()
+    except Exception as exp:
+        # Справочники загрузятся при первом запросе
+        logger.warning(f"Reference data was not loaded at startup: {exp}")
+
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", log_level=settings.log_level, port=settings.port,
-                ssl_certfile=settings.ssl_certfile, ssl_keyfile=settings.ssl_keyfile)
+                ssl_certfile=settings.ssl_certfile, ssl_keyfile=settings.ssl_keyfile,
+                ws_ping_interval=settings.ws_ping_interval, ws_ping_timeout=settings.ws_ping_timeout)
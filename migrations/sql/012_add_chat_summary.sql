@@ -0,0 +1,102 @@
+-- ============================================================================
+-- Миграция: 012_add_chat_summary
+-- Описание: Сводка по чатам (последнее сообщение и счетчик непрочитанных)
+-- Задача: user-027
+-- Дата: 2026-10-19
+-- Автор: AutoNanny Team
+-- ============================================================================
+
+BEGIN;
+
+-- ============================================================================
+-- 1. Создание таблицы chats.chat_summary
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS chats.chat_summary (
+    id BIGSERIAL PRIMARY KEY,
+    id_chat BIGINT NOT NULL,
+    id_user BIGINT NOT NULL,
+    id_last_message BIGINT NULL,
+    last_msg TEXT NULL,
+    last_msg_type INTEGER NULL,
+    last_timestamp BIGINT NULL,
+    unread_count INTEGER NOT NULL DEFAULT 0,
+    datetime_update TIMESTAMP NULL DEFAULT NOW(),
+
+    CONSTRAINT uq_chat_summary_chat_user UNIQUE (id_chat, id_user),
+    CONSTRAINT chk_chat_summary_unread CHECK (unread_count >= 0)
+);
+
+COMMENT ON TABLE chats.chat_summary IS 'Сводка по чату для каждого участника, обновляется при отправке и прочтении сообщений';
+COMMENT ON COLUMN chats.chat_summary.id_last_message IS 'ID последнего сообщения в чате';
+COMMENT ON COLUMN chats.chat_summary.last_msg IS 'Текст последнего сообщения';
+COMMENT ON COLUMN chats.chat_summary.last_msg_type IS 'Тип последнего сообщения (data.message_type)';
+COMMENT ON COLUMN chats.chat_summary.last_timestamp IS 'Время отправки последнего сообщения (unix timestamp)';
+COMMENT ON COLUMN chats.chat_summary.unread_count IS 'Количество непрочитанных сообщений для участника';
+
+-- ============================================================================
+-- 2. Индексы
+-- ============================================================================
+
+-- Список чатов пользователя, отсортированный по последнему сообщению
+CREATE INDEX IF NOT EXISTS idx_chat_summary_user_last
+    ON chats.chat_summary(id_user, last_timestamp DESC);
+
+-- Бейдж непрочитанных
+CREATE INDEX IF NOT EXISTS idx_chat_summary_user_unread
+    ON chats.chat_summary(id_user)
+    WHERE unread_count > 0;
+
+-- ============================================================================
+-- 3. Заполнение по существующим данным
+-- ============================================================================
+
+INSERT INTO chats.chat_summary (id_chat, id_user, id_last_message, last_msg, last_msg_type,
+                                last_timestamp, unread_count, datetime_update)
+SELECT cp.id_chat,
+       cp.id_user,
+       lm.id,
+       lm.msg,
+       lm."msgType",
+       lm.timestamp_send,
+       COALESCE(ur.unread_count, 0),
+       NOW()
+FROM (SELECT DISTINCT id_chat, id_user FROM chats.chat_participant) AS cp
+LEFT JOIN (
+    SELECT DISTINCT ON (id_chat) id_chat, id, msg, "msgType", timestamp_send
+    FROM chats.message
+    ORDER BY id_chat, id DESC
+) AS lm ON lm.id_chat = cp.id_chat
+LEFT JOIN (
+    SELECT id_chat, id_user, COUNT(*) AS unread_count
+    FROM history.chat_notification
+    WHERE is_readed = FALSE
+    GROUP BY id_chat, id_user
+) AS ur ON ur.id_chat = cp.id_chat AND ur.id_user = cp.id_user
+ON CONFLICT (id_chat, id_user) DO NOTHING;
+
+-- ============================================================================
+-- 4. Регистрация миграции в системе Aerich
+-- ============================================================================
+
+INSERT INTO aerich (version, app, content)
+VALUES (
+    '12_add_chat_summary',
+    'models',
+    '{
+        "description": "Сводка по чатам для списка чатов и бейджа непрочитанных",
+        "task": "user-027",
+        "changes": [
+            "Создана таблица chats.chat_summary",
+            "Созданы индексы по пользователю",
+            "Таблица заполнена по chats.message и history.chat_notification"
+        ]
+    }'::jsonb
+)
+ON CONFLICT DO NOTHING;
+
+COMMIT;
+
+SELECT
+    'Migration 012 completed successfully' AS status,
+    NOW() AS completed_at;
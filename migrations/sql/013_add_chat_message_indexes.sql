@@ -0,0 +1,47 @@
+-- ============================================================================
+-- Миграция: 013_add_chat_message_indexes
+-- Описание: Индексы для курсорной пагинации сообщений и отметки прочтения
+-- Задача: user-028
+-- Дата: 2026-10-19
+-- Автор: AutoNanny Team
+-- ============================================================================
+
+BEGIN;
+
+-- ============================================================================
+-- 1. Индексы
+-- ============================================================================
+
+-- Курсорная пагинация /chats/get_messages: WHERE id_chat = ? AND id < ? ORDER BY id DESC
+CREATE INDEX IF NOT EXISTS idx_chat_message_chat_id
+    ON chats.message(id_chat, id);
+
+-- Проверка наличия непрочитанных перед отметкой прочтения
+CREATE INDEX IF NOT EXISTS idx_chat_notification_unread
+    ON history.chat_notification(id_user, id_chat)
+    WHERE is_readed = FALSE;
+
+-- ============================================================================
+-- 2. Регистрация миграции в системе Aerich
+-- ============================================================================
+
+INSERT INTO aerich (version, app, content)
+VALUES (
+    '13_add_chat_message_indexes',
+    'models',
+    '{
+        "description": "Индексы для курсорной пагинации сообщений чата",
+        "task": "user-028",
+        "changes": [
+            "Создан индекс chats.message(id_chat, id)",
+            "Создан частичный индекс history.chat_notification(id_user, id_chat) WHERE is_readed = FALSE"
+        ]
+    }'::jsonb
+)
+ON CONFLICT DO NOTHING;
+
+COMMIT;
+
+SELECT
+    'Migration 013 completed successfully' AS status,
+    NOW() AS completed_at;
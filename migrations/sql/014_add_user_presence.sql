@@ -0,0 +1,61 @@
+-- ============================================================================
+-- Миграция: 014_add_user_presence
+-- Описание: Присутствие пользователей онлайн (чат и сокеты заказов)
+-- Задача: user-029
+-- Дата: 2026-10-19
+-- Автор: AutoNanny Team
+-- ============================================================================
+
+BEGIN;
+
+-- ============================================================================
+-- 1. Создание таблицы users.user_presence
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS users.user_presence (
+    id BIGSERIAL PRIMARY KEY,
+    id_user BIGINT NOT NULL,
+    worker_id TEXT NOT NULL,
+    online_until TIMESTAMP NOT NULL,
+    last_seen TIMESTAMP NOT NULL DEFAULT NOW(),
+
+    CONSTRAINT uq_user_presence_user_worker UNIQUE (id_user, worker_id)
+);
+
+COMMENT ON TABLE users.user_presence IS 'Присутствие пользователей онлайн, одна запись на пару (пользователь, воркер)';
+COMMENT ON COLUMN users.user_presence.worker_id IS 'Идентификатор процесса приложения (host:pid)';
+COMMENT ON COLUMN users.user_presence.online_until IS 'Пользователь считается онлайн до этого момента без нового heartbeat';
+COMMENT ON COLUMN users.user_presence.last_seen IS 'Время последней активности пользователя';
+
+-- ============================================================================
+-- 2. Индексы
+-- ============================================================================
+
+-- Проверка "онлайн ли пользователь" перед отправкой push
+CREATE INDEX IF NOT EXISTS idx_user_presence_user_online
+    ON users.user_presence(id_user, online_until);
+
+-- ============================================================================
+-- 3. Регистрация миграции в системе Aerich
+-- ============================================================================
+
+INSERT INTO aerich (version, app, content)
+VALUES (
+    '14_add_user_presence',
+    'models',
+    '{
+        "description": "Присутствие пользователей онлайн для отправки push только офлайн-получателям",
+        "task": "user-029",
+        "changes": [
+            "Создана таблица users.user_presence",
+            "Создан индекс users.user_presence(id_user, online_until)"
+        ]
+    }'::jsonb
+)
+ON CONFLICT DO NOTHING;
+
+COMMIT;
+
+SELECT
+    'Migration 014 completed successfully' AS status,
+    NOW() AS completed_at;
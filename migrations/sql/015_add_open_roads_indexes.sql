@@ -0,0 +1,66 @@
+-- ============================================================================
+-- Миграция: 015_add_open_roads_indexes
+-- Описание: Индексы для ленты открытых маршрутов /drivers/get_schedules_requests
+-- Задача: user-032
+-- Дата: 2026-10-19
+-- Автор: AutoNanny Team
+-- ============================================================================
+
+BEGIN;
+
+-- ============================================================================
+-- 1. Индексы
+-- ============================================================================
+
+-- Anti-join: NOT EXISTS активного водителя на маршруте
+CREATE INDEX IF NOT EXISTS idx_schedule_road_driver_active_road
+    ON data.schedule_road_driver(id_schedule_road)
+    WHERE "isActive" = TRUE;
+
+-- Активные маршруты графика в порядке курсора (id_schedule, id)
+CREATE INDEX IF NOT EXISTS idx_schedule_road_active_schedule
+    ON data.schedule_road(id_schedule, id)
+    WHERE "isActive" = TRUE;
+
+-- Фильтр по дню недели
+CREATE INDEX IF NOT EXISTS idx_schedule_road_active_week_day
+    ON data.schedule_road(week_day, id_schedule)
+    WHERE "isActive" = TRUE;
+
+-- Адреса маршрута и bounding box точки отправления для фильтра по расстоянию
+CREATE INDEX IF NOT EXISTS idx_schedule_road_address_road
+    ON data.schedule_road_address(id_schedule_road);
+
+CREATE INDEX IF NOT EXISTS idx_schedule_road_address_from_point
+    ON data.schedule_road_address(from_lat, from_lon, id_schedule_road);
+
+-- Последняя позиция водителя
+CREATE INDEX IF NOT EXISTS idx_driver_mode_driver
+    ON data.driver_mode(id_driver, id DESC);
+
+-- ============================================================================
+-- 2. Регистрация миграции в системе Aerich
+-- ============================================================================
+
+INSERT INTO aerich (version, app, content)
+VALUES (
+    '15_add_open_roads_indexes',
+    'models',
+    '{
+        "description": "Индексы для ленты открытых маршрутов",
+        "task": "user-032",
+        "changes": [
+            "Создан частичный индекс data.schedule_road_driver(id_schedule_road) WHERE isActive",
+            "Созданы частичные индексы data.schedule_road(id_schedule, id) и (week_day, id_schedule) WHERE isActive",
+            "Созданы индексы data.schedule_road_address(id_schedule_road) и (from_lat, from_lon, id_schedule_road)",
+            "Создан индекс data.driver_mode(id_driver, id DESC)"
+        ]
+    }'::jsonb
+)
+ON CONFLICT DO NOTHING;
+
+COMMIT;
+
+SELECT
+    'Migration 015 completed successfully' AS status,
+    NOW() AS completed_at;
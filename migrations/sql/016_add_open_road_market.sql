@@ -0,0 +1,104 @@
+-- ============================================================================
+-- Миграция: 016_add_open_road_market
+-- Описание: Витрина открытых маршрутов для ленты водителей /drivers/get_schedules_requests
+-- Задача: user-033
+-- Дата: 2026-10-19
+-- Автор: AutoNanny Team
+-- ============================================================================
+
+BEGIN;
+
+-- ============================================================================
+-- 1. Создание таблицы data.open_road_market
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS data.open_road_market (
+    id BIGSERIAL PRIMARY KEY,
+    id_schedule_road BIGINT NOT NULL UNIQUE,
+    id_schedule BIGINT NOT NULL,
+    week_day BIGINT NOT NULL,
+    week_days TEXT NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT NOT NULL,
+    salary DECIMAL(10, 2) NOT NULL,
+    pickup_lat FLOAT,
+    pickup_lon FLOAT,
+    requests_count INTEGER NOT NULL DEFAULT 0,
+    datetime_update TIMESTAMP DEFAULT NOW()
+);
+
+COMMENT ON TABLE data.open_road_market IS 'Открытые маршруты (без назначенного водителя) для ленты водителей';
+COMMENT ON COLUMN data.open_road_market.pickup_lat IS 'Широта точки отправления первого адреса маршрута';
+COMMENT ON COLUMN data.open_road_market.pickup_lon IS 'Долгота точки отправления первого адреса маршрута';
+COMMENT ON COLUMN data.open_road_market.requests_count IS 'Количество активных заявок водителей на маршрут';
+
+-- ============================================================================
+-- 2. Индексы
+-- ============================================================================
+
+-- Лента по курсору графика
+CREATE INDEX IF NOT EXISTS idx_open_road_market_schedule
+    ON data.open_road_market(id_schedule, id_schedule_road);
+
+-- Фильтр по дню недели
+CREATE INDEX IF NOT EXISTS idx_open_road_market_week_day
+    ON data.open_road_market(week_day, id_schedule);
+
+-- Bounding box точки отправления
+CREATE INDEX IF NOT EXISTS idx_open_road_market_pickup
+    ON data.open_road_market(pickup_lat, pickup_lon);
+
+-- ============================================================================
+-- 3. Заполнение витрины по текущим данным
+-- ============================================================================
+
+INSERT INTO data.open_road_market (
+    id_schedule_road, id_schedule, week_day, week_days, start_time, end_time,
+    salary, pickup_lat, pickup_lon, requests_count, datetime_update
+)
+SELECT r.id, r.id_schedule, r.week_day, s.week_days, r.start_time, r.end_time,
+       r.amount, a.from_lat, a.from_lon,
+       (SELECT COUNT(*) FROM wait_data.schedule_road_drivers w
+        WHERE w.id_road = r.id AND w."isActive" = TRUE),
+       NOW()
+FROM data.schedule_road r
+JOIN data.schedule s ON s.id = r.id_schedule AND s."isActive" IS NOT NULL
+LEFT JOIN LATERAL (
+    SELECT from_lat, from_lon FROM data.schedule_road_address
+    WHERE id_schedule_road = r.id
+    ORDER BY id
+    LIMIT 1
+) a ON TRUE
+WHERE r."isActive" = TRUE
+  AND NOT EXISTS (
+      SELECT 1 FROM data.schedule_road_driver d
+      WHERE d.id_schedule_road = r.id AND d."isActive" = TRUE
+  )
+ON CONFLICT (id_schedule_road) DO NOTHING;
+
+-- ============================================================================
+-- 4. Регистрация миграции в системе Aerich
+-- ============================================================================
+
+INSERT INTO aerich (version, app, content)
+VALUES (
+    '16_add_open_road_market',
+    'models',
+    '{
+        "description": "Витрина открытых маршрутов для ленты водителей",
+        "task": "user-033",
+        "changes": [
+            "Создана таблица data.open_road_market",
+            "Созданы индексы по (id_schedule, id_schedule_road), (week_day, id_schedule), (pickup_lat, pickup_lon)",
+            "Витрина заполнена по текущим открытым маршрутам"
+        ]
+    }'::jsonb
+)
+ON CONFLICT DO NOTHING;
+
+COMMIT;
+
+SELECT
+    'Migration 016 completed successfully' AS status,
+    (SELECT COUNT(*) FROM data.open_road_market) AS open_roads,
+    NOW() AS completed_at;
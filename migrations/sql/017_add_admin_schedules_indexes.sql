@@ -0,0 +1,46 @@
+-- ============================================================================
+-- Миграция: 017_add_admin_schedules_indexes
+-- Описание: Индексы для списка контрактов /admins/schedules
+-- Задача: user-035
+-- Дата: 2026-10-19
+-- Автор: AutoNanny Team
+-- ============================================================================
+
+BEGIN;
+
+-- ============================================================================
+-- 1. Индексы
+-- ============================================================================
+
+-- Полнотекстовый поиск по названию контракта (выражение совпадает с запросом AdminService)
+CREATE INDEX IF NOT EXISTS idx_schedule_title_fts
+    ON data.schedule USING GIN (to_tsvector('russian', COALESCE(title, '')));
+
+-- Фильтр по родителю с курсором по ID
+CREATE INDEX IF NOT EXISTS idx_schedule_user_id
+    ON data.schedule(id_user, id DESC);
+
+-- ============================================================================
+-- 2. Регистрация миграции в системе Aerich
+-- ============================================================================
+
+INSERT INTO aerich (version, app, content)
+VALUES (
+    '17_add_admin_schedules_indexes',
+    'models',
+    '{
+        "description": "Индексы для списка контрактов админ-панели",
+        "task": "user-035",
+        "changes": [
+            "Создан GIN-индекс to_tsvector(russian, title) на data.schedule",
+            "Создан индекс data.schedule(id_user, id DESC)"
+        ]
+    }'::jsonb
+)
+ON CONFLICT DO NOTHING;
+
+COMMIT;
+
+SELECT
+    'Migration 017 completed successfully' AS status,
+    NOW() AS completed_at;
@@ -0,0 +1,109 @@
+-- ============================================================================
+-- Миграция: 018_add_franchise_balance_daily
+-- Описание: Дневные итоги движений баланса по франшизе и типу операции для /franchises/money_stats
+-- Задача: user-037
+-- Дата: 2026-10-19
+-- Автор: AutoNanny Team
+-- ============================================================================
+
+BEGIN;
+
+-- ============================================================================
+-- 1. Создание таблицы data.franchise_balance_daily
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS data.franchise_balance_daily (
+    id BIGSERIAL PRIMARY KEY,
+    id_franchise BIGINT NOT NULL,
+    day DATE NOT NULL,
+    id_task BIGINT NOT NULL,
+    money DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    operations_count INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (id_franchise, day, id_task)
+);
+
+COMMENT ON TABLE data.franchise_balance_daily IS 'Дневные итоги data.user_balance_history по франшизе и id_task';
+COMMENT ON COLUMN data.franchise_balance_daily.id_task IS 'Тип операции (id_task), 0 - операции без типа';
+
+-- ============================================================================
+-- 2. Инкрементальное обновление триггером на data.user_balance_history
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION data.apply_franchise_balance_daily(
+    p_id_user BIGINT, p_id_task BIGINT, p_money NUMERIC, p_datetime TIMESTAMP, p_sign INTEGER
+) RETURNS VOID AS $$
+BEGIN
+    -- Записи без даты не попадают ни в один период
+    IF p_datetime IS NULL THEN
+        RETURN;
+    END IF;
+    INSERT INTO data.franchise_balance_daily AS t (id_franchise, day, id_task, money, operations_count)
+    SELECT DISTINCT fu.id_franchise, p_datetime::date, COALESCE(p_id_task, 0), p_sign * p_money, p_sign
+    FROM users.franchise_user fu
+    WHERE fu.id_user = p_id_user
+    ON CONFLICT (id_franchise, day, id_task) DO UPDATE SET
+        money = t.money + EXCLUDED.money,
+        operations_count = t.operations_count + EXCLUDED.operations_count;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION data.user_balance_history_rollup() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM data.apply_franchise_balance_daily(OLD.id_user, OLD.id_task, OLD.money, OLD.datetime_create, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM data.apply_franchise_balance_daily(NEW.id_user, NEW.id_task, NEW.money, NEW.datetime_create, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_user_balance_history_rollup ON data.user_balance_history;
+CREATE TRIGGER trg_user_balance_history_rollup
+    AFTER INSERT OR DELETE OR UPDATE OF id_user, id_task, money, datetime_create
+    ON data.user_balance_history
+    FOR EACH ROW EXECUTE FUNCTION data.user_balance_history_rollup();
+
+-- ============================================================================
+-- 3. Заполнение итогов по существующей истории
+-- ============================================================================
+
+-- Новые записи истории ждут окончания заполнения
+LOCK TABLE data.user_balance_history IN SHARE ROW EXCLUSIVE MODE;
+
+DELETE FROM data.franchise_balance_daily;
+
+INSERT INTO data.franchise_balance_daily (id_franchise, day, id_task, money, operations_count)
+SELECT fu.id_franchise, h.datetime_create::date, COALESCE(h.id_task, 0), SUM(h.money), COUNT(*)
+FROM data.user_balance_history h
+JOIN (SELECT DISTINCT id_user, id_franchise FROM users.franchise_user) fu ON fu.id_user = h.id_user
+WHERE h.datetime_create IS NOT NULL
+GROUP BY fu.id_franchise, h.datetime_create::date, COALESCE(h.id_task, 0);
+
+-- ============================================================================
+-- 4. Регистрация миграции в системе Aerich
+-- ============================================================================
+
+INSERT INTO aerich (version, app, content)
+VALUES (
+    '18_add_franchise_balance_daily',
+    'models',
+    '{
+        "description": "Дневные итоги движений баланса по франшизе",
+        "task": "user-037",
+        "changes": [
+            "Создана таблица data.franchise_balance_daily",
+            "Создан триггер trg_user_balance_history_rollup на data.user_balance_history",
+            "Итоги заполнены по существующей истории балансов"
+        ]
+    }'::jsonb
+)
+ON CONFLICT DO NOTHING;
+
+COMMIT;
+
+SELECT
+    'Migration 018 completed successfully' AS status,
+    (SELECT COUNT(*) FROM data.franchise_balance_daily) AS daily_rows,
+    NOW() AS completed_at;
@@ -0,0 +1,62 @@
+-- ============================================================================
+-- Миграция: 019_add_report_daily_snapshot
+-- Описание: Дневные итоги отчетов /admins/report_sales и /admins/report_users за закрытые дни
+-- Задача: user-038
+-- Дата: 2026-10-19
+-- Автор: AutoNanny Team
+-- ============================================================================
+
+BEGIN;
+
+-- ============================================================================
+-- 1. Создание таблицы data.report_daily_snapshot
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS data.report_daily_snapshot (
+    id BIGSERIAL PRIMARY KEY,
+    report_key TEXT NOT NULL,
+    day DATE NOT NULL,
+    count BIGINT NOT NULL DEFAULT 0,
+    sum DECIMAL(18, 2) NOT NULL DEFAULT 0,
+    datetime_create TIMESTAMP DEFAULT NOW(),
+    UNIQUE (report_key, day)
+);
+
+COMMENT ON TABLE data.report_daily_snapshot IS 'Дневные итоги отчетов админ-панели за закрытые дни';
+COMMENT ON COLUMN data.report_daily_snapshot.report_key IS 'Таблица и поле суммы отчета, например history."payment_tink":amount';
+
+-- ============================================================================
+-- 2. Индексы
+-- ============================================================================
+
+-- Агрегация по дням за период (GROUP BY date_trunc('day', datetime_create))
+CREATE INDEX IF NOT EXISTS idx_payment_tink_datetime_create
+    ON history.payment_tink(datetime_create);
+
+CREATE INDEX IF NOT EXISTS idx_user_datetime_create
+    ON users.user(datetime_create);
+
+-- ============================================================================
+-- 3. Регистрация миграции в системе Aerich
+-- ============================================================================
+
+INSERT INTO aerich (version, app, content)
+VALUES (
+    '19_add_report_daily_snapshot',
+    'models',
+    '{
+        "description": "Дневные итоги отчетов админ-панели",
+        "task": "user-038",
+        "changes": [
+            "Создана таблица data.report_daily_snapshot",
+            "Созданы индексы history.payment_tink(datetime_create) и users.user(datetime_create)"
+        ]
+    }'::jsonb
+)
+ON CONFLICT DO NOTHING;
+
+COMMIT;
+
+SELECT
+    'Migration 019 completed successfully' AS status,
+    NOW() AS completed_at;
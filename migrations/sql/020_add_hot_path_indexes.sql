@@ -0,0 +1,102 @@
+-- ============================================================================
+-- Миграция: 020_add_hot_path_indexes
+-- Описание: Индексы горячих запросов сокетов, авторизации, чатов и баланса
+-- Задача: user-041
+-- Дата: 2026-10-19
+-- Автор: AutoNanny Team
+-- ============================================================================
+-- chats.message(id_chat, id) и history.chat_notification(id_user, id_chat) WHERE is_readed = FALSE
+-- уже созданы миграцией 013. Проверка планов: explain_hot_queries.py
+
+BEGIN;
+
+-- ============================================================================
+-- 1. Сокеты водителя и клиента
+-- ============================================================================
+
+-- /orders/ws: DataDriverMode.filter(websocket_token=...).first() / .update(latitude, longitude)
+CREATE INDEX IF NOT EXISTS idx_driver_mode_websocket_token
+    ON data.driver_mode(websocket_token);
+
+-- Активные заказы водителя и родителя: DataOrder.filter(id_driver|id_user=..., isActive=True)
+CREATE INDEX IF NOT EXISTS idx_order_active_driver
+    ON data."order"(id_driver)
+    WHERE "isActive" = TRUE;
+
+CREATE INDEX IF NOT EXISTS idx_order_active_user
+    ON data."order"(id_user)
+    WHERE "isActive" = TRUE;
+
+-- Сокет клиента: UsersUserOrder.filter(token=..., isActive=True)
+CREATE INDEX IF NOT EXISTS idx_user_order_active_token
+    ON users.user_order(token)
+    WHERE "isActive" = TRUE;
+
+-- Токен сокета заказа: UsersUserOrder.filter(id_order=...).values("token") - index-only scan
+CREATE INDEX IF NOT EXISTS idx_user_order_order
+    ON users.user_order(id_order) INCLUDE (token, "isActive");
+
+-- Последний заказ клиента: UsersUserOrder.filter(id_user=...).order_by("-id").values("id_order", "token")
+CREATE INDEX IF NOT EXISTS idx_user_order_user_last
+    ON users.user_order(id_user, id DESC) INCLUDE (id_order, token);
+
+-- ============================================================================
+-- 2. Авторизация
+-- ============================================================================
+
+-- Каждый запрос с Bearer-токеном: UsersBearerToken.filter(token=...)
+CREATE INDEX IF NOT EXISTS idx_bearer_authorization_token
+    ON authentication.bearer_authorization(token);
+
+-- Токены пользователя: последний токен (order_by("-id")), fbid для push,
+-- проверка (id_user, fbid, token) и удаление при выходе
+CREATE INDEX IF NOT EXISTS idx_bearer_authorization_user
+    ON authentication.bearer_authorization(id_user, id DESC) INCLUDE (fbid);
+
+-- ============================================================================
+-- 3. Чаты
+-- ============================================================================
+
+-- Сокет чата: ChatsChatParticipantToken.filter(token=...)
+CREATE INDEX IF NOT EXISTS idx_chat_participant_token_token
+    ON chats.chat_participant_token(token);
+
+CREATE INDEX IF NOT EXISTS idx_chat_participant_token_user
+    ON chats.chat_participant_token(id_user);
+
+-- ============================================================================
+-- 4. История баланса
+-- ============================================================================
+
+-- /users/balance за период и PaymentService.get_history (order_by("-datetime_create"))
+CREATE INDEX IF NOT EXISTS idx_user_balance_history_user_datetime
+    ON data.user_balance_history(id_user, datetime_create DESC);
+
+-- ============================================================================
+-- 5. Регистрация миграции в системе Aerich
+-- ============================================================================
+
+INSERT INTO aerich (version, app, content)
+VALUES (
+    '20_add_hot_path_indexes',
+    'models',
+    '{
+        "description": "Индексы горячих запросов сокетов, авторизации, чатов и баланса",
+        "task": "user-041",
+        "changes": [
+            "Создан индекс data.driver_mode(websocket_token)",
+            "Созданы частичные индексы data.order(id_driver) и (id_user) WHERE isActive",
+            "Созданы индексы users.user_order(token) WHERE isActive, (id_order) INCLUDE (token, isActive), (id_user, id DESC) INCLUDE (id_order, token)",
+            "Созданы индексы authentication.bearer_authorization(token) и (id_user, id DESC) INCLUDE (fbid)",
+            "Созданы индексы chats.chat_participant_token(token) и (id_user)",
+            "Создан индекс data.user_balance_history(id_user, datetime_create DESC)"
+        ]
+    }'::jsonb
+)
+ON CONFLICT DO NOTHING;
+
+COMMIT;
+
+SELECT
+    'Migration 020 completed successfully' AS status,
+    NOW() AS completed_at;
@@ -0,0 +1,75 @@
+-- ============================================================================
+-- Миграция: 021_add_pricing_config_version
+-- Описание: Версия конфигурации цен (тарифы, коэффициенты, привязка к франшизе) для кэша в воркерах
+-- Задача: user-047
+-- Дата: 2026-10-19
+-- Автор: AutoNanny Team
+-- ============================================================================
+
+BEGIN;
+
+-- ============================================================================
+-- 1. Создание таблицы data.pricing_config_version
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS data.pricing_config_version (
+    id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    version BIGINT NOT NULL DEFAULT 0,
+    datetime_update TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+COMMENT ON TABLE data.pricing_config_version IS 'Версия конфигурации цен: воркеры перечитывают кэш тарифов и коэффициентов при ее изменении';
+
+INSERT INTO data.pricing_config_version (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING;
+
+-- ============================================================================
+-- 2. Увеличение версии при любом изменении тарифов, коэффициентов и привязки к франшизе
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION data.bump_pricing_config_version() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE data.pricing_config_version SET version = version + 1, datetime_update = NOW() WHERE id = 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_car_tariff_pricing_version ON data.car_tariff;
+CREATE TRIGGER trg_car_tariff_pricing_version
+    AFTER INSERT OR UPDATE OR DELETE ON data.car_tariff
+    FOR EACH STATEMENT EXECUTE FUNCTION data.bump_pricing_config_version();
+
+DROP TRIGGER IF EXISTS trg_pricing_coefficients_pricing_version ON data.pricing_coefficients;
+CREATE TRIGGER trg_pricing_coefficients_pricing_version
+    AFTER INSERT OR UPDATE OR DELETE ON data.pricing_coefficients
+    FOR EACH STATEMENT EXECUTE FUNCTION data.bump_pricing_config_version();
+
+DROP TRIGGER IF EXISTS trg_franchise_user_pricing_version ON users.franchise_user;
+CREATE TRIGGER trg_franchise_user_pricing_version
+    AFTER INSERT OR UPDATE OR DELETE ON users.franchise_user
+    FOR EACH STATEMENT EXECUTE FUNCTION data.bump_pricing_config_version();
+
+-- ============================================================================
+-- 3. Регистрация миграции в системе Aerich
+-- ============================================================================
+
+INSERT INTO aerich (version, app, content)
+VALUES (
+    '21_add_pricing_config_version',
+    'models',
+    '{
+        "description": "Версия конфигурации цен для кэша тарифов и коэффициентов",
+        "task": "user-047",
+        "changes": [
+            "Создана таблица data.pricing_config_version",
+            "Созданы триггеры увеличения версии на data.car_tariff, data.pricing_coefficients и users.franchise_user"
+        ]
+    }'::jsonb
+)
+ON CONFLICT DO NOTHING;
+
+COMMIT;
+
+SELECT
+    'Migration 021 completed successfully' AS status,
+    (SELECT version FROM data.pricing_config_version WHERE id = 1) AS pricing_config_version,
+    NOW() AS completed_at;
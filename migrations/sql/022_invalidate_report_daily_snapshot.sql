@@ -0,0 +1,81 @@
+-- ============================================================================
+-- Миграция: 022_invalidate_report_daily_snapshot
+-- Описание: Сброс дневных итогов отчетов админ-панели при изменении исходных записей
+-- Задача: user-038
+-- Дата: 2026-10-19
+-- Автор: AutoNanny Team
+-- ============================================================================
+
+BEGIN;
+
+-- ============================================================================
+-- 1. Функция сброса снимка за день измененной записи
+-- ============================================================================
+
+-- Ключ отчета - schema."table":поле (ReportService.get_table), поэтому функция общая для всех источников.
+-- Удаленные дни пересчитываются при следующем запросе отчета.
+CREATE OR REPLACE FUNCTION data.invalidate_report_daily_snapshot() RETURNS TRIGGER AS $$
+DECLARE
+    prefix TEXT := TG_TABLE_SCHEMA || '."' || TG_TABLE_NAME || '":';
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.datetime_create IS NOT NULL THEN
+        DELETE FROM data.report_daily_snapshot
+        WHERE day = OLD.datetime_create::date AND left(report_key, length(prefix)) = prefix;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.datetime_create IS NOT NULL THEN
+        DELETE FROM data.report_daily_snapshot
+        WHERE day = NEW.datetime_create::date AND left(report_key, length(prefix)) = prefix;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================================
+-- 2. Триггеры на источниках отчетов
+-- ============================================================================
+
+-- /admins/report_sales: количество и сумма платежей
+DROP TRIGGER IF EXISTS trg_payment_tink_report_snapshot ON history.payment_tink;
+CREATE TRIGGER trg_payment_tink_report_snapshot
+    AFTER INSERT OR DELETE OR UPDATE OF amount, datetime_create
+    ON history.payment_tink
+    FOR EACH ROW EXECUTE FUNCTION data.invalidate_report_daily_snapshot();
+
+-- /admins/report_users: регистрации пользователей
+DROP TRIGGER IF EXISTS trg_user_report_snapshot ON users.user;
+CREATE TRIGGER trg_user_report_snapshot
+    AFTER INSERT OR DELETE OR UPDATE OF datetime_create
+    ON users.user
+    FOR EACH ROW EXECUTE FUNCTION data.invalidate_report_daily_snapshot();
+
+-- ============================================================================
+-- 3. Сброс снимков, сохраненных до появления триггеров
+-- ============================================================================
+
+DELETE FROM data.report_daily_snapshot;
+
+-- ============================================================================
+-- 4. Регистрация миграции в системе Aerich
+-- ============================================================================
+
+INSERT INTO aerich (version, app, content)
+VALUES (
+    '22_invalidate_report_daily_snapshot',
+    'models',
+    '{
+        "description": "Сброс дневных итогов отчетов при изменении исходных записей",
+        "task": "user-038",
+        "changes": [
+            "Создана функция data.invalidate_report_daily_snapshot",
+            "Созданы триггеры trg_payment_tink_report_snapshot и trg_user_report_snapshot",
+            "Удалены снимки, сохраненные до появления триггеров"
+        ]
+    }'::jsonb
+)
+ON CONFLICT DO NOTHING;
+
+COMMIT;
+
+SELECT
+    'Migration 022 completed successfully' AS status,
+    NOW() AS completed_at;
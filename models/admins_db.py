@@ -17,3 +17,25 @@ class AdminMobileSettings(Model):
         return self.id
 
 
+
+
+class DataReportDailySnapshot(Model):
+    """
+    Используется для хранения дневных итогов отчетов админ-панели (/admins/report_sales, /admins/report_users)
+    за закрытые дни, чтобы отчеты за длинные периоды не пересчитывали исходные таблицы.
+    report_key - таблица и поле суммы, например history."payment_tink":amount.
+    """
+    id = fields.BigIntField(pk=True)
+    report_key = fields.TextField(null=False)
+    day = fields.DateField(null=False)
+    count = fields.BigIntField(default=0)
+    sum = fields.DecimalField(18, 2, default=0)
+    datetime_create = fields.DatetimeField(auto_now_add=True)
+
+    class Meta:
+        schema = "data"
+        table = "report_daily_snapshot"
+        unique_together = (("report_key", "day"),)
+
+    def __str__(self):
+        return self.id
@@ -118,3 +118,30 @@ class HistoryChatNotification(Model):
     def __str__(self):
         return self.id
 
+
+
+class ChatsChatSummary(Model):
+    """
+    Используется для хранения сводки по чату для каждого участника: последнее сообщение и количество непрочитанных.
+    Поддерживается при записи (отправка сообщения, прочтение), чтобы список чатов не сканировал
+    ChatsMessage и HistoryChatNotification.
+    Ссылается на модель ChatsChat, UsersUser, ChatsMessage.
+    """
+    id = fields.BigIntField(pk=True)
+    id_chat = fields.BigIntField(null=False)
+    id_user = fields.BigIntField(null=False)
+    id_last_message = fields.BigIntField(null=True)
+    last_msg = fields.TextField(null=True)
+    last_msg_type = fields.IntField(null=True)
+    last_timestamp = fields.BigIntField(null=True)
+    unread_count = fields.IntField(default=0)
+    datetime_update = fields.DatetimeField(null=True)
+
+
+    class Meta:
+        schema = "chats"
+        table = "chat_summary"
+        unique_together = (("id_chat", "id_user"),)
+
+    def __str__(self):
+        return self.id
@@ -368,6 +368,34 @@ class WaitDataScheduleRoadDriver(Model):
         return self.id
 
 
+class DataOpenRoadMarket(Model):
+    """
+    Используется для хранения витрины открытых маршрутов (без назначенного водителя) для ленты водителей.
+    Поддерживается при записи (изменение графиков и маршрутов, заявки и назначения водителей),
+    чтобы лента не собиралась из DataSchedule, DataScheduleRoad, DataScheduleRoadDriver и DataScheduleRoadAddress.
+    Ссылается на модель DataScheduleRoad, DataSchedule.
+    """
+    id = fields.BigIntField(pk=True)
+    id_schedule_road = fields.BigIntField(null=False, unique=True)
+    id_schedule = fields.BigIntField(null=False)
+    week_day = fields.BigIntField()
+    week_days = fields.TextField()
+    start_time = fields.TextField()  # Время в формате HH:MM - часовой пояс UTC
+    end_time = fields.TextField()  # Время в формате HH:MM - часовой пояс UTC
+    salary = fields.DecimalField(10, 2)
+    pickup_lat = fields.FloatField(null=True)  # Точка отправления первого адреса маршрута
+    pickup_lon = fields.FloatField(null=True)
+    requests_count = fields.IntField(default=0)  # Активные заявки водителей на маршрут
+    datetime_update = fields.DatetimeField(null=True)
+
+    class Meta:
+        schema = "data"
+        table = "open_road_market"
+
+    def __str__(self):
+        return self.id
+
+
 class UsersUserOrder(Model):
     """
     Используется для хранения токена WebSocket и связи между пользователем и заказом.
@@ -182,6 +182,29 @@ class DataUserBalanceHistory(Model):
         return self.id
 
 
+class DataFranchiseBalanceDaily(Model):
+    """
+    Используется для хранения дневных итогов движений баланса участников франшизы по типу операции (id_task).
+    Поддерживается триггером на data.user_balance_history, чтобы статистика франшизы
+    не суммировала историю балансов построчно.
+    Ссылается на модель UsersFranchise, DataUserBalanceHistory.
+    """
+    id = fields.BigIntField(pk=True)
+    id_franchise = fields.BigIntField(null=False)
+    day = fields.DateField(null=False)
+    id_task = fields.BigIntField(null=False)  # 0 - операции без типа
+    money = fields.DecimalField(14, 2, default=0)
+    operations_count = fields.IntField(default=0)
+
+    class Meta:
+        schema = "data"
+        table = "franchise_balance_daily"
+        unique_together = (("id_franchise", "day", "id_task"),)
+
+    def __str__(self):
+        return self.id
+
+
 class DataDebitCard(Model):
     """
     Модель должна использоваться для хранения части информации банковских карт (последних цифр карты, срока годности).
@@ -590,3 +613,24 @@ class WeeklyPaymentHistory(Model):
         return self.id
 
 
+
+
+class UsersUserPresence(Model):
+    """
+    Модель для хранения присутствия пользователя онлайн (чат и сокеты заказов).
+    Одна запись на пару (пользователь, воркер), чтобы присутствие было видно всем воркерам.
+    Пользователь онлайн, если хотя бы у одной записи online_until больше текущего времени.
+    """
+    id = fields.BigIntField(pk=True)
+    id_user = fields.BigIntField(null=False)  # ID пользователя
+    worker_id = fields.TextField(null=False)  # Идентификатор процесса (host:pid)
+    online_until = fields.DatetimeField(null=False)  # До какого момента считаем онлайн без heartbeat
+    last_seen = fields.DatetimeField(null=False)  # Последняя активность
+
+    class Meta:
+        schema = "users"
+        table = "user_presence"
+        unique_together = (("id_user", "worker_id"),)
+
+    def __str__(self):
+        return self.id
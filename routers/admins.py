@@ -16,6 +16,7 @@ from models.drivers_db import UsersDriverData
 from sevice.admin_service import ReportMaker, create_franchise_user, create_partner_user
 
 from common.logger import logger
+from common.query_profiler import query_budget
 from config import settings
 
 from fastapi.responses import FileResponse
@@ -30,6 +31,11 @@ import traceback
 import decimal
 import json
 from utils.response_helpers import generate_responses
+from services.admin_service import AdminService
+from services.report_service import ReportGranularity
+from services.report_pdf_service import report_pdf
+from services.reference_data_service import reference_data, DRIVE_PARAMETERS
+from services.pricing_config_service import pricing_config
 
 router = APIRouter()
 router_for_franchise_admin = APIRouter()
@@ -676,6 +682,7 @@ async def delete_other_parametr_of_drive(item: GetUser):
     if await DataOtherDriveParametr.filter(isActive=True, id=item.id).count() == 0:
         return not_found_other_parametr
     await DataOtherDriveParametr.filter(isActive=True, id=item.id).update(isActive=False)
+    reference_data.invalidate(DRIVE_PARAMETERS)
     return success_answer
 
 @router.put("/other-parametrs-of-drive",
@@ -687,18 +694,21 @@ async def update_other_parametr_of_drive(item: UpdateOtherDriveParametr):
         await DataOtherDriveParametr.filter(isActive=True, id=item.id).update(title=item.title)
     if item.amount is not None and len(str(item.amount)) > 0:
         await DataOtherDriveParametr.filter(isActive=True, id=item.id).update(amount=decimal.Decimal(item.amount))
+    reference_data.invalidate(DRIVE_PARAMETERS)
     return success_answer
 
 @router.post("/other-parametrs-of-drive",
              responses=generate_responses([success_answer]))
 async def create_other_parametr_of_drive(item: OtherDriveParametr):
     await DataOtherDriveParametr.create(title=item.title, amount=decimal.Decimal(item.amount))
+    reference_data.invalidate(DRIVE_PARAMETERS)
     return success_answer
 
 @router.get("/report_sales")
-async def get_report_sales(request: Request, start_date: date, end_date: date) -> SuccessGetSalary:
+async def get_report_sales(request: Request, start_date: date, end_date: date,
+                           granularity: ReportGranularity = "day") -> SuccessGetSalary:
     reporter = ReportMaker(HistoryPaymentTink, "Salary", report_type="sum")
-    report = await reporter.create_report_by_period(start_date, end_date)
+    report = await reporter.create_report_by_period(start_date, end_date, granularity)
     salary = Report(report)
     response = SuccessGetSalary(salary=salary)
     return response
@@ -706,18 +716,17 @@ async def get_report_sales(request: Request, start_date: date, end_date: date) -
 @router.post("/report_sales",
              responses=generate_responses([]),
              response_class=FileResponse)
-async def get_file_report_sales(request: Request, start_date: date, end_date: date):
-    reporter = ReportMaker(HistoryPaymentTink, "Salary", report_type="sum")
-    await reporter.create_report_by_period(start_date, end_date)
-    report_file_path = await reporter.save_report_to_pdf(title="salary_report")
-    _, file_name = report_file_path.rsplit('/', 1)
-    return FileResponse(report_file_path, media_type="application/pdf", filename=file_name, background=BackgroundTask(os.remove, report_file_path))
+async def get_file_report_sales(request: Request, start_date: date, end_date: date,
+                                granularity: ReportGranularity = "day"):
+    id_job = await report_pdf.render("sales", start_date, end_date, granularity)
+    return report_file_response(id_job)
 
 @router.get("/report_users")
-async def get_report_users(request: Request, start_date: date, end_date: date) -> SuccessGetUserReport:
+async def get_report_users(request: Request, start_date: date, end_date: date,
+                           granularity: ReportGranularity = "day") -> SuccessGetUserReport:
     try:
         reporter = ReportMaker(UsersUser, "User register", report_type="count")
-        report = await reporter.create_report_by_period(start_date, end_date)
+        report = await reporter.create_report_by_period(start_date, end_date, granularity)
         users = Report(report)
     except:
         logger.error("Can't to create report")
@@ -728,16 +737,47 @@ async def get_report_users(request: Request, start_date: date, end_date: date) -
 @router.post("/report_users",
              responses=generate_responses([]),
              response_class=FileResponse)
-async def get_file_report_users(request: Request, start_date: date, end_date: date):
+async def get_file_report_users(request: Request, start_date: date, end_date: date,
+                                granularity: ReportGranularity = "day"):
     try:
-        reporter = ReportMaker(UsersUser, "User register", report_type="count")
-        await reporter.create_report_by_period(start_date, end_date)
-        report_file_path = await reporter.save_report_to_pdf(title="user_report")
-        _, file_name = report_file_path.rsplit('/', 1)
+        id_job = await report_pdf.render("users", start_date, end_date, granularity)
     except:
         logger.error("Can't to create report and report file")
     else:
-        return FileResponse(report_file_path, media_type="application/pdf", filename=file_name, background=BackgroundTask(os.remove, report_file_path))
+        return report_file_response(id_job)
+
+
+def report_file_response(id_job: str) -> FileResponse:
+    # Отчеты за закрытые периоды остаются в кэше, остальные удаляются после скачивания
+    report_file_path = report_pdf.get_file(id_job)
+    background = None if report_pdf.is_cacheable(id_job) else BackgroundTask(os.remove, report_file_path)
+    return FileResponse(report_file_path, media_type="application/pdf",
+                        filename=report_pdf.get_download_name(id_job), background=background)
+
+
+@router.post("/report_jobs",
+             responses=generate_responses([]))
+async def create_report_job(request: Request, item: ReportJob) -> SuccessReportJob:
+    id_job = await report_pdf.start(item.report, item.start_date, item.end_date, item.granularity)
+    return SuccessReportJob(job=report_pdf.get_status(id_job))
+
+
+@router.get("/report_jobs/{id_job}",
+            responses=generate_responses([report_job_not_found]))
+async def get_report_job(request: Request, id_job: str) -> SuccessReportJob:
+    job = report_pdf.get_status(id_job)
+    if job is None:
+        return report_job_not_found
+    return SuccessReportJob(job=job)
+
+
+@router.get("/report_jobs/{id_job}/file",
+            responses=generate_responses([report_job_not_found]),
+            response_class=FileResponse)
+async def get_report_job_file(request: Request, id_job: str):
+    if report_pdf.get_file(id_job) is None:
+        return report_job_not_found
+    return report_file_response(id_job)
 
 
 # ============================================================================
@@ -745,6 +785,7 @@ async def get_file_report_users(request: Request, start_date: date, end_date: da
 # ============================================================================
 
 @router.post("/parents")
+@query_budget(5)
 async def get_parents_list(request: Request, filters: GetParents):
     """
     BE-MVP-023: Получение списка родителей с фильтрацией.
@@ -764,68 +805,16 @@ async def get_parents_list(request: Request, filters: GetParents):
         JSONResponse: Список родителей с метаданными
     """
     try:
-        # Базовый запрос: получаем всех пользователей с ролью "Родитель" (id_type_account=1)
-        parent_ids_query = UsersUserAccount.filter(id_type_account=1).values_list("id_user", flat=True)
-        parent_ids = await parent_ids_query
-        
-        # Строим запрос к пользователям
-        query = UsersUser.filter(id__in=parent_ids)
-        
-        # Фильтр по статусу активности
-        if filters.is_active is not None:
-            query = query.filter(isActive=filters.is_active)
-        
-        # Поиск по имени, фамилии, телефону
-        if filters.search:
-            query = query.filter(
-                Q(name__icontains=filters.search) |
-                Q(surname__icontains=filters.search) |
-                Q(phone__icontains=filters.search)
-            )
-        
-        # Подсчет общего количества
-        total = await query.count()
-        
-        # Пагинация
-        parents = await query.order_by("-datetime_create").offset(filters.offset).limit(filters.limit).values(
-            "id", "name", "surname", "phone", "isActive", "datetime_create"
+        # Фильтры, агрегаты и пагинация выполняются одним запросом
+        result, total = await AdminService.get_parents_page(
+            offset=filters.offset or 0,
+            limit=filters.limit or 50,
+            search=filters.search,
+            is_active=filters.is_active,
+            has_children=filters.has_children,
+            has_active_orders=filters.has_active_orders
         )
         
-        # Обогащаем данные
-        result = []
-        for parent in parents:
-            # Фото пользователя
-            photo = await UsersUserPhoto.filter(id_user=parent["id"]).first()
-            parent["photo_path"] = photo.photo_path if photo and photo.photo_path else not_user_photo
-            
-            # Количество детей
-            children_count = await UsersChild.filter(id_user=parent["id"], isActive=True).count()
-            parent["children_count"] = children_count
-            
-            # Количество активных заказов
-            active_orders = await DataSchedule.filter(id_user=parent["id"], isActive=True).count()
-            parent["active_orders_count"] = active_orders
-            
-            # Фильтр по наличию детей
-            if filters.has_children is not None:
-                if filters.has_children and children_count == 0:
-                    continue
-                if not filters.has_children and children_count > 0:
-                    continue
-            
-            # Фильтр по наличию активных заказов
-            if filters.has_active_orders is not None:
-                if filters.has_active_orders and active_orders == 0:
-                    continue
-                if not filters.has_active_orders and active_orders > 0:
-                    continue
-            
-            # Форматируем дату
-            parent["datetime_create"] = await get_date_from_datetime(parent["datetime_create"])
-            parent["status"] = "Активен" if parent["isActive"] else "Заблокирован"
-            
-            result.append(parent)
-        
         logger.info(
             f"Admin {request.user} requested parents list",
             extra={
@@ -1125,18 +1114,22 @@ async def contact_parent(request: Request, item: ContactParent):
 # ============================================================================
 
 @router.post("/schedules")
+@query_budget(5)
 async def get_all_schedules(
     request: Request,
     page: int = 1,
     per_page: int = 20,
     status: str = None,
     parent_id: int = None,
-    search: str = None
+    search: str = None,
+    after_id: int = None
 ):
     """
     BE-MVP-024: Получение списка всех контрактов/расписаний для админа.
     
     Админ может просматривать все контракты с фильтрацией и поиском.
+    Контракты отдаются от новых к старым; родитель, количество маршрутов и водителей
+    загружаются тем же запросом.
     
     Args:
         request: Объект запроса
@@ -1144,80 +1137,22 @@ async def get_all_schedules(
         per_page: Количество на странице (по умолчанию 20)
         status: Фильтр по статусу (active/inactive)
         parent_id: Фильтр по ID родителя
-        search: Поиск по названию контракта
+        search: Полнотекстовый поиск по названию контракта (по началу слов)
+        after_id: Курсор - pagination.next_after_id предыдущей страницы (page и total не используются)
         
     Returns:
         JSONResponse: Список контрактов с пагинацией
     """
     try:
-        # Строим запрос с фильтрами
-        query = DataSchedule.filter()
-        
-        # Фильтр по статусу
-        if status == "active":
-            query = query.filter(isActive=True)
-        elif status == "inactive":
-            query = query.filter(isActive=False)
-        
-        # Фильтр по родителю
-        if parent_id:
-            query = query.filter(id_user=parent_id)
-        
-        # Поиск по названию
-        if search:
-            query = query.filter(title__icontains=search)
-        
-        # Подсчет общего количества
-        total = await query.count()
-        
-        # Пагинация
-        offset = (page - 1) * per_page
-        schedules = await query.offset(offset).limit(per_page).all()
-        
-        # Формируем результат
-        result = []
-        for schedule in schedules:
-            # Получаем информацию о родителе
-            parent = await UsersUser.filter(id=schedule.id_user).first()
-            
-            # Получаем маршруты
-            roads = await DataScheduleRoad.filter(
-                id_schedule=schedule.id,
-                isActive=True
-            ).count()
-            
-            # Получаем назначенных водителей
-            from models.orders_db import DataScheduleRoadDriver
-            road_ids = await DataScheduleRoad.filter(
-                id_schedule=schedule.id,
-                isActive=True
-            ).values_list("id", flat=True)
-            
-            drivers_count = 0
-            if road_ids:
-                drivers_count = await DataScheduleRoadDriver.filter(
-                    id_schedule_road__in=road_ids,
-                    isActive=True
-                ).count()
-            
-            result.append({
-                "id": schedule.id,
-                "title": schedule.title,
-                "description": schedule.description,
-                "children_count": schedule.children_count,
-                "duration": schedule.duration,
-                "week_days": schedule.week_days,
-                "is_active": schedule.isActive,
-                "datetime_create": schedule.datetime_create.isoformat() if schedule.datetime_create else None,
-                "parent": {
-                    "id": parent.id if parent else None,
-                    "name": parent.name if parent else None,
-                    "surname": parent.surname if parent else None,
-                    "phone": parent.phone if parent else None
-                },
-                "roads_count": roads,
-                "drivers_assigned": drivers_count
-            })
+        is_active = {"active": True, "inactive": False}.get(status)
+        result, total, has_more = await AdminService.get_schedules_page(
+            limit=per_page,
+            offset=(page - 1) * per_page,
+            after_id=after_id,
+            is_active=is_active,
+            parent_id=parent_id,
+            search=search
+        )
         
         logger.info(
             f"Admin {request.user} viewed schedules list",
@@ -1243,7 +1178,9 @@ async def get_all_schedules(
                 "page": page,
                 "per_page": per_page,
                 "total": total,
-                "pages": (total + per_page - 1) // per_page
+                "pages": (total + per_page - 1) // per_page if total is not None else None,
+                "next_after_id": result[-1]["id"] if result and has_more else None,
+                "has_more": has_more
             }
         })
         
@@ -1665,8 +1602,9 @@ async def get_pricing_coefficients(request: Request):
         JSONResponse: Текущие коэффициенты
     """
     try:
-        # Получаем активные коэффициенты
-        coefficients = await PricingCoefficients.filter(is_active=True).first()
+        # Активные коэффициенты из кэша конфигурации цен
+        coefficients_row = (await pricing_config.get()).coefficients_row
+        coefficients = PricingCoefficients(**coefficients_row) if coefficients_row else None
         
         if not coefficients:
             # Создаем дефолтные коэффициенты если их нет
@@ -1834,6 +1772,7 @@ async def update_pricing_coefficients(
         
         # Обновляем
         await PricingCoefficients.filter(id=coefficients.id).update(**updates)
+        pricing_config.invalidate()
         
         # Получаем обновленные значения
         updated_coefficients = await PricingCoefficients.filter(id=coefficients.id).first()
@@ -1,12 +1,8 @@
-from typing import List, Dict, Optional
-
-from models.chats_db import ChatsChatParticipant, ChatsMessage, DataMessageType, ChatsChat, HistoryChatNotification
+from models.chats_db import ChatsChatParticipant, ChatsMessage, ChatsChat
 from fastapi import APIRouter, Request, HTTPException
-from models.users_db import UsersUser, UsersUserPhoto
-from const.static_data_const import not_user_photo
 from const.chats_const import *
-import json
 from utils.response_helpers import generate_responses
+from services.chat_service import ChatService
 
 router = APIRouter()
 
@@ -16,133 +12,36 @@ router = APIRouter()
 )
 async def get_all_chats(request: Request,
                        item: Union[GetChats, None] = None) -> JSONResponse:
-    """Получает и возвращает список чатов пользователя с дополнительной информацией."""
-
-    async def get_user_chats() -> List[Dict]:
-        """Получает список чатов пользователя с учетом пагинации."""
-        query = ChatsChatParticipant.filter(id_user=request.user)
-        if item is not None:
-            query = query.limit(item.limit).offset(item.offset)
-        return await query.all().values("id_chat")
-
-    async def is_chat_active(chat_id: int) -> bool:
-        """Проверяет, активен ли чат."""
-        return await ChatsChat.filter(id=chat_id, isActive=False).count() == 0
-
-    async def get_chat_participant(chat_id: int) -> Optional[Dict]:
-        """Получает информацию о собеседнике (о том, кто общается с request.user) в чате."""
-        return await ChatsChatParticipant.filter(
-            id_chat=chat_id,
-            id_user__not=request.user
-        ).first().values("id_user")
-
-    async def get_user_info(user_id: int) -> Dict:
-        """Получает основную информацию о пользователе."""
-        return await UsersUser.filter(id=user_id).first().values("name")
-
-    async def get_user_photo(user_id: int) -> Dict:
-        """Получает фото пользователя."""
-        photo = await UsersUserPhoto.filter(id_user=user_id).first().values()
-        return photo.get("photo_path", not_user_photo)
-
-    async def get_last_message(chat_id: int) -> Optional[Dict]:
-        """Получает последнее сообщение в чате."""
-        return await ChatsMessage.filter(id_chat=chat_id).order_by(
-            "-id").first().values()
-
-    async def prepare_message_data(message: Dict) -> Dict:
-        """Форматирует данные сообщения."""
-        if message.get("msgType") == 1:
-            return {
-                "msg": message["msg"],
-                "time": message["timestamp_send"]
-            }
-
-        message_type = await DataMessageType.filter(
-            id=message["msgType"]).first().values("title")
-        return {
-            "msg": message_type["title"],
-            "time": message["timestamp_send"]
-        }
-
-    async def get_unread_count(chat_id: int) -> int:
-        """Считает непрочитанные сообщения."""
-        return await HistoryChatNotification.filter(
-            id_user=request.user,
-            id_chat=chat_id,
-            is_readed=False
-        ).count()
-
-    def apply_search(chats: List[Dict]) -> List[Dict]:
-        """Фильтрует чаты по поисковому запросу (по вхождению в username собеседника)."""
-        if not item or not item.search:
-            return chats
-
-        search_lower = item.search.lower()
-        return [
-            chat for chat in chats
-            if "username" in chat and search_lower in chat["username"].lower()
-        ]
-
-    def sort_chats(chats: List[Dict]) -> List[Dict]:
-        """Сортирует чаты по времени последнего сообщения."""
-
-        def get_sort_key(chat: Dict) -> int:
-            if not chat.get("message"):
-                return 0
-            return chat["message"].get("time", 0)
-
-        return sorted(chats, key=get_sort_key, reverse=True)
-
-    # 1. Получаем чаты пользователя
-    user_chats = await get_user_chats()
-
-    # 2. Фильтруем активные чаты
-    active_chats = []
-    for chat in user_chats:
-        if await is_chat_active(chat["id_chat"]):
-            active_chats.append(chat)
-
-    # 3. Обогащаем информацию о чатах
-    enriched_chats = []
-    for chat in active_chats:
-        chat_id = chat["id_chat"]
-        result_chat = {"id_chat": chat_id}
-
-        # Информация о собеседнике
-        participant = await get_chat_participant(chat_id)
-        if participant:
-            user_info = await get_user_info(participant["id_user"])
-            result_chat["username"] = user_info["name"]
-            result_chat["photo_path"] = await get_user_photo(participant["id_user"])
-
-        # Последнее сообщение
-        last_message = await get_last_message(chat_id)
-        if last_message:
-            message_data = await prepare_message_data(last_message)
-            message_data["new_message"] = await get_unread_count(chat_id)
-            result_chat["message"] = message_data
-        else:
-            result_chat["message"] = None
-
-        enriched_chats.append(result_chat)
-
-    # 4. Применяем поиск
-    filtered_chats = apply_search(enriched_chats)
-
-    # 5. Сортируем чаты
-    sorted_chats = sort_chats(filtered_chats)
-
-    # 6. Получаем общее количество чатов
-    total_chats = await ChatsChatParticipant.filter(id_user=request.user).count()
+    """
+    Получает и возвращает список чатов пользователя с дополнительной информацией.
 
+    Собеседник, фото, последнее сообщение и количество непрочитанных загружаются
+    одним запросом для всей страницы, поиск и сортировка выполняются в БД.
+    """
+    item = item or GetChats()
+    chats, total = await ChatService.get_chat_list(
+        user_id=request.user,
+        offset=item.offset or 0,
+        limit=item.limit or 50,
+        search=item.search
+    )
     return JSONResponse({
         "status": True,
         "message": "Success!",
-        "chats": sorted_chats,
-        "total": total_chats
+        "chats": chats,
+        "total": total
     })
 
+@router.get("/unread_count",
+            responses=generate_responses([get_unread_count]))
+async def get_unread_count(request: Request):
+    """
+    Возвращает общее количество непрочитанных сообщений пользователя (бейдж).
+    Считается по сводке chats.chat_summary, без обхода сообщений.
+    """
+    total = await ChatService.get_unread_total(request.user)
+    return JSONResponse({"status": True, "message": "Success!", "unread": total})
+
 @router.post("/get_chat",
              responses=generate_responses([get_chat]))
 async def get_chat_by_id(request: Request, item: GetChat):
@@ -150,7 +49,7 @@ async def get_chat_by_id(request: Request, item: GetChat):
         raise HTTPException(403, "Forbidden")
     chat = await ChatsChat.filter(id=item.id).first().values()
     mes = await ChatsMessage.filter(id_chat=item.id).order_by("-id").offset(0).limit(10).values()
-    await HistoryChatNotification.filter(id_user=request.user,id_chat=chat["id"],is_readed=False).update(is_readed=True)
+    await ChatService.mark_chat_read(chat["id"], request.user)
     for message in mes:
         del message["id"]
         del message["id_chat"]
@@ -167,14 +66,20 @@ async def get_chat_by_id(request: Request, item: GetChat):
                              "last_messages": mes
                          }})
 
-@router.post("/get_messages", responses=generate_responses([get_messages]))
+@router.post("/get_messages", responses=generate_responses([get_messages, messages_cursor_conflict]))
 async def get_chat_by_id(request: Request, item: GetMessages):
     """
     Возвращает сообщения из указанного чата.
 
+    Поддерживает курсорную пагинацию: before_id - сообщения старше указанного (прокрутка истории),
+    after_id - сообщения новее указанного (догрузка новых). Без курсора используется offset.
+    Оба курсора сразу передавать нельзя (400).
+    Общее количество сообщений считается только при with_total=true (по умолчанию - только
+    в режиме offset, для совместимости).
+
     Args:
         request (Request): Объект запроса, содержащий информацию о пользователе.
-        item (GetMessages): Данные запроса, содержащие идентификатор чата, смещение и лимит.
+        item (GetMessages): Данные запроса, содержащие идентификатор чата, курсор или смещение и лимит.
 
     Example:
 
@@ -182,12 +87,13 @@ async def get_chat_by_id(request: Request, item: GetMessages):
 
             {
                 "id_chat": 1,
-                "offset": 0,
+                "before_id": 1520,
                 "limit": 10
             }
 
     Returns:
-        JSONResponse: Ответ, содержащий статус операции, ID чата, список сообщений и общее количество сообщений.
+        JSONResponse: Ответ, содержащий статус операции, ID чата, список сообщений (от новых к старым),
+        курсор next_before_id, флаг has_more и общее количество сообщений (если запрошено).
     """
     if (
         await ChatsChatParticipant.filter(
@@ -196,18 +102,21 @@ async def get_chat_by_id(request: Request, item: GetMessages):
         == 0
     ):
         raise HTTPException(403, "Forbidden")
+    if item.before_id is not None and item.after_id is not None:
+        return messages_cursor_conflict
     chat = await ChatsChat.filter(id=item.id_chat).first().values()
-    mes = (
-        await ChatsMessage.filter(id_chat=item.id_chat)
-        .order_by("-id")
-        .offset(item.offset)
-        .limit(item.limit)
-        .values()
+    mes, has_more = await ChatService.get_messages_page(
+        id_chat=item.id_chat,
+        limit=item.limit or 10,
+        offset=item.offset or 0,
+        before_id=item.before_id,
+        after_id=item.after_id
     )
-    count = await ChatsMessage.filter(id_chat=item.id_chat).count()
-    await HistoryChatNotification.filter(
-        id_user=request.user, id_chat=chat["id"], is_readed=False
-    ).update(is_readed=True)
+    with_total = item.with_total
+    if with_total is None:
+        with_total = item.before_id is None and item.after_id is None
+    count = await ChatsMessage.filter(id_chat=item.id_chat).count() if with_total else None
+    await ChatService.mark_chat_read(chat["id"], request.user)
     for message in mes:
         del message["id_chat"]
         message["isMe"] = False
@@ -220,6 +129,8 @@ async def get_chat_by_id(request: Request, item: GetMessages):
             "message": "Success!",
             "id_chat": chat["id"],
             "messages": mes,
+            "next_before_id": mes[-1]["id"] if mes else None,
+            "has_more": has_more,
             "total": count,
         }
     )
@@ -1,24 +1,27 @@
+import sys
 import time
 
 from models.chats_db import (
     ChatsChatParticipant,
     ChatsMessage,
     ChatsChatParticipantToken,
-    HistoryChatNotification,
 )
 from models.authentication_db import UsersBearerToken
 from const.static_data_const import DictToModel
 from fastapi import APIRouter, WebSocket
-from typing import List
+from typing import Dict, Optional
 from defs import error, sendPush
 import traceback
 import json
 
 from models.users_db import HistoryNotification
+from services.chat_service import ChatService
+from services.presence_service import presence, CHANNEL_CHAT
+from common.logger import logger
+from common.metrics import register_websocket_manager, track_websocket_eviction, track_websocket_message
 from censure import Censor
 
 router = APIRouter()
-users = {}
 censor_ru = Censor.get(lang="ru")
 
 class ConnectionManager:
@@ -27,48 +30,88 @@ class ConnectionManager:
 
     Отвечает за установку, отключение соединений и отправку сообщений
     всем подключенным клиентам или индивидуальным пользователям.
+    Хранит двусторонние словари токен <-> сокет, поэтому подключение, отключение
+    и поиск токена по сокету выполняются за O(1). Полуоткрытые соединения закрывает
+    uvicorn по ping/pong протокола WebSocket (settings.ws_ping_interval/ws_ping_timeout),
+    а менеджер отключает соединения, на которые не удалось отправить кадр.
     """
 
     def __init__(self):
         """
         Инициализация ConnectionManager.
 
-        Создает пустой список для хранения активных WebSocket-соединений.
+        Создает пустые словари активных соединений.
         """
-        self.active_connections: List[WebSocket] = []
+        self.active_connections: Dict[WebSocket, str] = {}
+        self.sockets: Dict[str, WebSocket] = {}
+        self.evictions = 0
 
-    async def connect(self, websocket: WebSocket):
+    async def connect(self, websocket: WebSocket, token: str):
         """
         Устанавливает новое WebSocket-соединение.
 
-        Принимает соединение от клиента и добавляет его в список активных соединений.
+        Принимает соединение от клиента и регистрирует его под токеном. Новое соединение
+        с тем же токеном заменяет старое.
 
         Args:
             websocket (WebSocket): WebSocket-соединение клиента.
+            token (str): Токен пользователя.
         """
         await websocket.accept()
-        self.active_connections.append(websocket)
+        self.active_connections[websocket] = token
+        self.sockets[token] = websocket
 
     def disconnect(self, websocket: WebSocket):
         """
         Отключает WebSocket-соединение.
 
-        Удаляет соединение из списка активных соединений и удаляет соответствующий
-        токен из словаря пользователей.
+        Удаляет соединение из активных и соответствующий токен из словаря пользователей,
+        если токен не был занят более новым соединением. Повторный вызов безопасен.
 
         Args:
             websocket (WebSocket): WebSocket-соединение клиента, которое нужно отключить.
         """
-        self.active_connections.remove(websocket)
+        token = self.active_connections.pop(websocket, None)
+        if token is not None and self.sockets.get(token) is websocket:
+            del self.sockets[token]
+
+    async def evict(self, websocket: WebSocket):
+        """
+        Принудительно закрывает соединение, на которое не удалось отправить кадр.
+
+        Args:
+            websocket (WebSocket): WebSocket-соединение клиента.
+        """
+        if websocket not in self.active_connections:
+            return
+        self.disconnect(websocket)
+        self.evictions += 1
+        track_websocket_eviction(CHANNEL_CHAT)
         try:
-            token_to_remove = next(
-                (token for token, ws in users.items() if ws == websocket), None
-            )
-            if token_to_remove:
-                del users[token_to_remove]
+            await websocket.close(code=1001)
         except Exception:
             pass
 
+    def stats(self) -> Dict:
+        """
+        Возвращает показатели реестра соединений.
+
+        Returns:
+            Dict: количество живых соединений, число принудительных отключений и
+            примерный объем памяти реестра на одно соединение (байты).
+        """
+        connections = len(self.active_connections)
+        registry_size = (
+            sys.getsizeof(self.active_connections)
+            + sys.getsizeof(self.sockets)
+            + sum(sys.getsizeof(token) for token in self.sockets)
+        )
+        return {
+            "connections": connections,
+            "evictions": self.evictions,
+            "memory_per_connection": registry_size // connections if connections else 0,
+        }
+
     @staticmethod
     async def send_personal_message(message: str, websocket: WebSocket):
         """
@@ -78,7 +121,12 @@ class ConnectionManager:
             message (str): Сообщение в формате JSON.
             websocket (WebSocket): WebSocket-соединение получателя.
         """
-        await websocket.send_text(message)
+        try:
+            await websocket.send_text(message)
+        except Exception:
+            track_websocket_message(CHANNEL_CHAT, ok=False)
+            raise
+        track_websocket_message(CHANNEL_CHAT)
 
     async def broadcast(self, message: str):
         """
@@ -88,11 +136,88 @@ class ConnectionManager:
         Args:
             message (str): Сообщение в формате JSON.
         """
-        for connection in self.active_connections:
+        for connection in list(self.active_connections):
             await connection.send_text(message)
 
 
 manager = ConnectionManager()
+register_websocket_manager(CHANNEL_CHAT, lambda: len(manager.active_connections),
+                           memory_per_connection=lambda: manager.stats()["memory_per_connection"])
+# Токен -> сокет для текущих подключений (поддерживается менеджером)
+users = manager.sockets
+
+
+async def deliver_chat_frame(token: Optional[str], payload: Dict) -> bool:
+    """
+    Отправляет кадр в чат-сокет пользователя в текущем воркере.
+
+    Args:
+        token (Optional[str]): Токен чат-сокета получателя.
+        payload (Dict): Кадр сообщения.
+
+    Returns:
+        bool: True, если кадр отправлен; сокет, на который не удалось отправить, закрывается.
+    """
+    websocket = users.get(token) if token else None
+    if websocket is None:
+        return False
+    try:
+        await manager.send_personal_message(json.dumps(payload), websocket)
+        return True
+    except Exception:
+        await error(traceback.format_exc())
+        await manager.evict(websocket)
+        return False
+
+
+async def notify_receiver(token: Optional[str], id_user: int, id_chat: int, payload: Dict):
+    """
+    Доставляет новое сообщение получателю: в его чат-сокет в текущем воркере, иначе
+    push-уведомлением, если получатель не подключен к чату (presence). Кадры между воркерами
+    не пересылаются: получатель, у которого чат открыт в другом воркере, не получает ни кадр,
+    ни push и увидит сообщение при следующей загрузке чата (POST /chats/get_messages) - push
+    такому получателю не отправляется сознательно, чтобы не дублировать открытый чат.
+    Если кадр не удалось отправить в сокет этого воркера, сокет закрывается и отправляется push.
+
+    Args:
+        token (Optional[str]): Токен чат-сокета получателя.
+        id_user (int): ID получателя.
+        id_chat (int): ID чата.
+        payload (Dict): Кадр сообщения (поле "msg" - текст для push).
+    """
+    local_socket = token is not None and token in users
+    if await deliver_chat_frame(token, payload):
+        return
+    if not local_socket and await presence.is_online(id_user):
+        return
+    try:
+        await send_chat_push(id_user, id_chat, payload["msg"])
+    except Exception:
+        await error(traceback.format_exc())
+
+
+async def send_chat_push(id_user: int, id_chat: int, msg: str):
+    """
+    Отправляет push о новом сообщении и сохраняет уведомление в истории.
+
+    Args:
+        id_user (int): ID получателя.
+        id_chat (int): ID чата.
+        msg (str): Текст сообщения.
+    """
+    fbid = await UsersBearerToken.filter(id_user=id_user).order_by("-id").first().values()
+    msg_notification = msg if len(msg) <= 50 else msg[:47] + "..."
+    await sendPush(
+        fbid["fbid"],
+        "Новое сообщение",
+        str(msg_notification),
+        {"action": "message", "id": str(id_chat)},
+    )
+    await HistoryNotification.create(
+        id_user=id_user,
+        title="Новое сообщение",
+        description=msg_notification,
+    )
 
 
 @router.websocket("/{token}")
@@ -101,7 +226,8 @@ async def websocket_endpoint(websocket: WebSocket, token: str):
     Обрабатывает WebSocket-соединение для пользователя.
 
     Принимает сообщение от клиента, проверяет его, отправляет в чат и уведомляет
-    другого пользователя через WebSocket или пуш-уведомление.
+    другого пользователя через его чат-сокет, а если получатель не подключен к чату -
+    пуш-уведомлением (notify_receiver). На текст "ping" сервер отвечает "pong".
 
     Формат сообщения:
 
@@ -119,19 +245,22 @@ async def websocket_endpoint(websocket: WebSocket, token: str):
         websocket (WebSocket): WebSocket-соединение клиента.
         token (str): Уникальный токен пользователя, использующийся для идентификации.
     """
+    id_user = None
     try:
-        await manager.connect(websocket)
-        if token not in users:
-            users[token] = websocket
+        await manager.connect(websocket, token)
+        id_user = (
+            await ChatsChatParticipantToken.filter(token=token).first().values()
+        )["id_user"]
+        await presence.connect(id_user)
         while True:
             mes = await websocket.receive_text()
+            if mes.lower() == "ping":
+                await manager.send_personal_message("pong", websocket)
+                continue
             data = json.loads(mes)
             data = DictToModel(data)
             if data.msgType == 1:
                 data.msg = censor_ru.clean_line(str(data.msg), beep='***')[0]
-            id_user = (
-                await ChatsChatParticipantToken.filter(token=token).first().values()
-            )["id_user"]
             if (
                 await ChatsChatParticipant.filter(
                     id_chat=data.id_chat, id_user=id_user
@@ -164,6 +293,7 @@ async def websocket_endpoint(websocket: WebSocket, token: str):
                         msg=data.msg,
                         msgType=data.msgType,
                     )
+                    await ChatService.update_last_message(data.id, data.msg, data.msgType)
                     data_update_rec = {
                         "id": data.id,
                         "id_chat": data.id_chat,
@@ -184,13 +314,7 @@ async def websocket_endpoint(websocket: WebSocket, token: str):
                         "edited": True,
                     }
 
-                    if rec_tok.token in users:
-                        try:
-                            await manager.send_personal_message(
-                                json.dumps(data_update_rec), users[rec_tok.token]
-                            )
-                        except Exception:
-                            await error(traceback.format_exc())
+                    await deliver_chat_frame(rec_tok.token, data_update_rec)
 
                     try:
                         await manager.send_personal_message(
@@ -218,18 +342,12 @@ async def websocket_endpoint(websocket: WebSocket, token: str):
                     }
                 )
             
-            message_new = await ChatsMessage.create(
+            message_new = await ChatService.save_message(
                 id_chat=data.id_chat,
                 id_sender=id_user,
+                id_receiver=receiver.id_user,
                 msg=filtered_msg,
-                msgType=data.msgType,
-                timestamp_send=time.time(),
-            )
-            await HistoryChatNotification.filter(
-                id_user=id_user, id_chat=data.id_chat
-            ).update(is_readed=True)
-            await HistoryChatNotification.create(
-                id_user=receiver.id_user, id_chat=data.id_chat, id_msg=message_new.id
+                msg_type=data.msgType,
             )
             data_rec = {
                 "id": message_new.id,
@@ -247,43 +365,7 @@ async def websocket_endpoint(websocket: WebSocket, token: str):
                 "timestamp_send": time.time(),
                 "isMe": True,
             }
-            if rec_tok.token in users:
-                try:
-                    try:
-                        await manager.send_personal_message(
-                            json.dumps(data_rec), users[rec_tok.token]
-                        )
-                    except Exception:
-                        await error(traceback.format_exc())
-                        if rec_tok.token in users:
-                            if users[rec_tok.token] is not None:
-                                manager.disconnect(users[rec_tok.token])
-                            del users[rec_tok.token]
-                    try:
-                        fbid = (
-                            await UsersBearerToken.filter(id_user=receiver.id_user)
-                            .order_by("-id")
-                            .first()
-                            .values()
-                        )
-                        msg_notification = (
-                            data.msg if len(data.msg) <= 50 else data.msg[:47] + "..."
-                        )
-                        await sendPush(  # TODO: Наверное отправлять Push надо, если пользователь не подключен к веб-сокету. Сейчас вроде бы наоборот.
-                            fbid["fbid"],
-                            "Новое сообщение",
-                            str(msg_notification),
-                            {"action": "message", "id": str(data.id_chat)},
-                        )
-                        await HistoryNotification.create(
-                            id_user=receiver.id_user,
-                            title="Новое сообщение",
-                            description=msg_notification,
-                        )
-                    except Exception:
-                        await error(traceback.format_exc())
-                except Exception:
-                    await error(traceback.format_exc())
+            await notify_receiver(rec_tok.token, receiver.id_user, data.id_chat, data_rec)
             try:
                 try:
                     await manager.send_personal_message(
@@ -291,8 +373,6 @@ async def websocket_endpoint(websocket: WebSocket, token: str):
                     )
                 except Exception:
                     await error(traceback.format_exc())
-                    if token in users:
-                        del users[token]
                     if websocket is not None:
                         manager.disconnect(websocket)
             except Exception:
@@ -304,3 +384,6 @@ async def websocket_endpoint(websocket: WebSocket, token: str):
                 manager.disconnect(websocket)
         except Exception:
             pass
+    finally:
+        if id_user is not None:
+            await presence.disconnect(id_user)
@@ -27,6 +27,9 @@ import decimal
 import json
 import uuid
 from utils.response_helpers import generate_responses
+from services.schedule_tree_loader import ScheduleTreeLoader, parse_int_list, format_address
+from services.open_roads_service import OpenRoadsService
+from common.query_profiler import query_budget
 
 router = APIRouter()
 
@@ -135,100 +138,106 @@ async def send_payment_requests(request: Request, item: SendPaymentRequest):
 
 @router.get("/get_schedules_requests",
             responses=generate_responses([get_schedules_responses,
-                                          schedule_not_found,
+                                          driver_position_unknown,
                                           access_forbidden]))
-async def get_schedule(request: Request, limit: Union[int, None] = 30, offset: Union[int, None] = 0):
+@query_budget(9)
+async def get_schedule(request: Request, limit: Union[int, None] = 30, offset: Union[int, None] = 0,
+                       after_id: Union[int, None] = None, week_day: Union[int, None] = None,
+                       radius_km: Union[float, None] = None, latitude: Union[float, None] = None,
+                       longitude: Union[float, None] = None, sort: Union[str, None] = None):
     """
-    Эндпоинт для получения всех расписаний
+    Эндпоинт для получения расписаний с открытыми (без водителя) маршрутами
+
+    Лента читается из витрины открытых маршрутов (data.open_road_market) одним запросом,
+    поэтому каждая страница содержит до limit графиков, у которых есть доступные маршруты.
 
     Args:
         request (Request): Объект запроса
         limit (Union[int, None], optional): Количество расписаний. По умолчанию 30.
         offset (Union[int, None], optional): Смещение. По умолчанию к 0.
+        after_id (Union[int, None], optional): Курсор - next_after_id предыдущей страницы.
+        week_day (Union[int, None], optional): Только маршруты указанного дня недели.
+        radius_km (Union[float, None], optional): Только маршруты с точкой отправления в радиусе
+            от водителя (координаты из latitude/longitude или из режима поиска заказов).
+        latitude (Union[float, None], optional): Широта водителя.
+        longitude (Union[float, None], optional): Долгота водителя.
+        sort (Union[str, None], optional): "distance" - сначала ближайшие графики
+            (пагинация через offset). По умолчанию - по ID графика.
 
     Returns:
-        JSONResponse: Ответ с расписаниями
+        JSONResponse: Ответ с расписаниями, курсором next_after_id и флагом has_more
     """
-    schedules = await DataSchedule.all().limit(limit).offset(offset).values \
-        ("id", "id_user", "title", "description", "children_count",
-         "id_tariff", "week_days", "duration")
+    sort_by_distance = sort == "distance"
+    position = None
+    if radius_km is not None or sort_by_distance:
+        if latitude is not None and longitude is not None:
+            position = (latitude, longitude)
+        else:
+            position = await OpenRoadsService.get_driver_position(request.user)
+        if position is None:
+            return driver_position_unknown
+    open_roads, has_more = await OpenRoadsService.get_open_roads_page(
+        limit=limit or 30,
+        after_id=after_id,
+        offset=offset or 0,
+        week_day=week_day,
+        position=position,
+        radius_km=radius_km,
+        sort_by_distance=sort_by_distance
+    )
+    # Поля графика, адреса и родитель - из деревьев (6 запросов на страницу), в витрине только фильтры
+    trees = await ScheduleTreeLoader(with_drivers=False, with_children_and_contacts=False).load(
+        road_ids=[id_road for page in open_roads.values() for id_road in page["roads"]])
     valid_schedules = []
-    for schedule in schedules:
-        stop = False  # Флаг - если он True, значит с маршрутами в расписании что-то не так => расписание не выводится
-        photo = await UsersUserPhoto.filter(id_user=schedule["id"]).first().values()
-        schedule["user"] = {
-            "id_user": schedule["id_user"],
-            "name": (await UsersUser.filter(id=schedule["id_user"]).first().values())["name"],
-            "photo_path": not_user_photo if photo is None or len(photo) == 0 else photo["photo_path"]
+    for id_schedule, page in open_roads.items():
+        tree = trees.get(id_schedule)
+        if tree is None or not tree["roads"]:  # Витрина отстала от графика
+            continue
+        user = tree["user"]
+        schedule = {
+            "id": tree["id"],
+            "title": tree["title"],
+            "description": tree["description"],
+            "children_count": tree["children_count"],
+            "id_tariff": tree["id_tariff"],
+            "week_days": parse_int_list(tree["week_days"]),
+            "duration": tree["duration"],
+            "user": {
+                "id_user": tree["id_user"],
+                "name": user["name"] if user else None,
+                "photo_path": user["photo_path"] if user else not_user_photo
+            },
+            "other_parametrs": tree["other_parametrs"],
+            "distance_km": page["distance_km"]
         }
-        schedule["week_days"] = [int(x) for x in schedule["week_days"].split(";") if x.isdigit()]
-        other_parametrs = await DataScheduleOtherParametrs.filter(id_schedule=schedule["id"],
-                                                                  isActive=True).order_by("id").all().values()
-        other_parametrs_data = []
-        for parametr in other_parametrs:
-            other_parametrs_data.append({
-                "parametr": parametr["id_other_parametr"],
-                "count": parametr["amount"]
-            })
-        schedule["other_parametrs"] = other_parametrs_data
-        roads = await DataScheduleRoad.filter(id_schedule=schedule["id"], isActive=True).order_by("id").all().values()
 
         all_price = 0
         available_roads = []
-        for road in roads:
-            try:
-                road["type_drive"] = [int(x) for x in road["type_drive"].split(";") if x.isdigit()]
-                addresses = await DataScheduleRoadAddress.filter(id_schedule_road=road["id"]).order_by("id").all().values()
-                data_addresses = []
-                price_road = road.get("amount", -1)
-                if await DataScheduleRoadDriver.filter(id_schedule_road=road["id"], isActive=True).count() > 0:  # Если у маршрута уже есть исполнитель
-                    continue
-
-                for address in addresses:
-                    address_data = {
-                        "from_address": {
-                            "address": address["from_address"],
-                            "location": {
-                                "longitude": address["from_lon"],
-                                "latitude": address["from_lat"]
-                            }
-                        },
-                        "to_address": {
-                            "address": address["to_address"],
-                            "location": {
-                                "longitude": address["to_lon"],
-                                "latitude": address["to_lat"]
-                            }
-                        }
-                    }
-                    data_addresses.append(address_data)
-
-                road["addresses"] = data_addresses
-                road["salary"] = round(float(price_road), 2)
-                all_price += price_road
-
-                road.pop("id_schedule", None)
-                road.pop("amount", None)
-                road.pop("isActive", None)
-                road.pop("datetime_create", None)
-                available_roads.append(road)
-            except Exception as e:
-                stop = True
-                break
-        if stop:  # Если в расписании что-то не так => расписание не выводится
-            continue
-        if roads is None or len(available_roads) == 0:  # Если в расписании нет маршрутов => расписание не выводится
-            continue
+        for road in tree["roads"]:
+            price_road = road.get("amount", -1)
+            all_price += price_road
+            available_roads.append({
+                "id": road["id"],
+                "week_day": road["week_day"],
+                "title": road["title"],
+                "start_time": road["start_time"],
+                "end_time": road["end_time"],
+                "type_drive": parse_int_list(road["type_drive"]),
+                "addresses": [format_address(address) for address in road["addresses"]],
+                "salary": round(float(price_road), 2)
+            })
         schedule["roads"] = available_roads
         schedule["all_salary"] = round(float(all_price), 2)  # Ensure total salary is float
-        del schedule["id_user"]
         valid_schedules.append(schedule)
 
     return JSONResponse({"status": True,
                          "message": "Success!",
-                         "schedules": valid_schedules}, 200)
+                         "schedules": valid_schedules,
+                         "next_after_id": list(open_roads)[-1] if open_roads and not sort_by_distance else None,
+                         "has_more": has_more}, 200)
 
 @router.get("/get_full_roads_info")
+@query_budget(9)
 async def get_full_roads_info(request: Request,
                               road_ids: str):  # road_ids как строка вида "1,2,3"
     """
@@ -337,113 +346,89 @@ async def get_full_roads_info(request: Request,
             return JSONResponse(
                 {"status": False, "message": "No valid road IDs provided"}, 400)
 
-        # Получаем все дороги по указанным ID (без фильтра isActive)
-        roads = await DataScheduleRoad.filter(id__in=road_id_list).order_by(
-            "id").all().values()
-        if not roads:
+        # Получаем все дороги по указанным ID (без фильтра isActive) вместе с графиками
+        trees = await ScheduleTreeLoader(only_active_roads=False, with_drivers=False,
+                                         keep_missing_schedules=True).load(road_ids=road_id_list)
+        if not trees:
             return JSONResponse({"status": False, "message": "No roads found"}, 404)
 
         valid_schedules = {}
         # Группируем дороги по расписаниям
-        for road in roads:
-            schedule_id = road["id_schedule"]
-            if schedule_id not in valid_schedules:
-                # Получаем данные расписания
-                schedule = await DataSchedule.filter(id=schedule_id).first().values(
-                    "id", "id_user", "title", "description", "children_count",
-                    "id_tariff", "week_days", "duration"
-                )
-                if not schedule:
-                    schedule = {
-                        "id": schedule_id,
-                        "title": "Unknown schedule",
-                        "description": "No description",
-                        "children_count": 0,
-                        "id_tariff": None,
-                        "week_days": "1",
-                        "duration": 0
-                    }
-
-                # Добавляем информацию о пользователе
-                photo = await UsersUserPhoto.filter(
-                    id_user=schedule["id"]).first().values()
-                user_data = await UsersUser.filter(
-                    id=schedule["id_user"]).first().values() if schedule.get(
-                    "id_user") else None
-                schedule["user"] = {
-                    "id_user": schedule.get("id_user", 0),
+        for schedule_id, tree in trees.items():
+            if tree.get("missing"):
+                # Графика маршрута нет в БД - отдаем маршруты с графиком-заглушкой
+                tree.update(id_user=0, title="Unknown schedule", description="No description",
+                            children_count=0, week_days="1", duration=0)
+            user_data = tree["user"]
+            schedule = {
+                "id": schedule_id,
+                "id_user": tree["id_user"],
+                "title": tree["title"],
+                "description": tree["description"],
+                "children_count": tree["children_count"],
+                "id_tariff": tree["id_tariff"],
+                "week_days": parse_int_list(tree["week_days"]) if tree["week_days"] else [1],
+                "duration": tree["duration"],
+                "user": {
+                    "id_user": tree.get("id_user", 0),
                     "name": user_data["name"] if user_data else "Unknown user",
-                    "photo_path": not_user_photo if photo is None or len(
-                        photo) == 0 else photo.get("photo_path", not_user_photo)
-                }
-                schedule["week_days"] = [int(x) for x in
-                                         schedule["week_days"].split(";") if
-                                         x.isdigit()] if schedule["week_days"] else [1]
-
-                # Получаем дополнительные параметры
-                other_parametrs = await DataScheduleOtherParametrs.filter(
-                    id_schedule=schedule_id, isActive=True
-                ).order_by("id").all().values()
-                schedule["other_parametrs"] = [{
-                    "parametr": parametr["id_other_parametr"] if parametr.get(
-                        "id_other_parametr") else 0,
-                    "count": parametr["amount"] if parametr.get(
-                        "amount") is not None else 0
-                } for parametr in other_parametrs] if other_parametrs else []
-
-                schedule["roads"] = []
-                valid_schedules[schedule_id] = schedule
+                    "photo_path": user_data["photo_path"] if user_data else not_user_photo
+                },
+                "other_parametrs": [{
+                    "parametr": parametr["parametr"] if parametr["parametr"] else 0,
+                    "count": parametr["count"] if parametr["count"] is not None else 0
+                } for parametr in tree["other_parametrs"]],
+                "roads": []
+            }
+            valid_schedules[schedule_id] = schedule
 
             # Обрабатываем данные дороги (в случае ошибки - отправляем моковые данные) (TODO)
-            road_data = dict()
-            road_data["id"] = road["id"]
-            road_data["type_drive"] = [int(x) for x in road["type_drive"].split(";") if
-                                       x.isdigit()] if road.get("type_drive") else [0]
-            road_data["start_time"] = road["start_time"] if road.get("start_time", 0) is not None else 0
-            road_data["end_time"] = road["end_time"] if road.get("end_time", 0) is not None else 0
-            road_data["week_day"] = road["week_day"] if road.get("week_day", -1) is not None else -1
-            road_data["title"] = road["title"] if road.get("title") else "Unknown road"
-
-            # Получаем адреса
-            addresses = await DataScheduleRoadAddress.filter(
-                id_schedule_road=road["id"]
-            ).order_by("id").all().values()
-            data_addresses = []
-            for address in addresses:
-                address_data = {
-                    "from_address": {
-                        "address": address["from_address"] if address.get(
-                            "from_address") else "Unknown from address",
-                        "location": {
-                            "longitude": address["from_lon"] if address.get(
-                                "from_lon") is not None else 0.0,
-                            "latitude": address["from_lat"] if address.get(
-                                "from_lat") is not None else 0.0
-                        }
-                    },
-                    "to_address": {
-                        "address": address["to_address"] if address.get(
-                            "to_address") else "Unknown to address",
-                        "location": {
-                            "longitude": address["to_lon"] if address.get(
-                                "to_lon") is not None else 0.0,
-                            "latitude": address["to_lat"] if address.get(
-                                "to_lat") is not None else 0.0
+            for road in tree["roads"]:
+                road_data = dict()
+                road_data["id"] = road["id"]
+                road_data["type_drive"] = parse_int_list(road["type_drive"]) if road.get("type_drive") else [0]
+                road_data["start_time"] = road["start_time"] if road.get("start_time", 0) is not None else 0
+                road_data["end_time"] = road["end_time"] if road.get("end_time", 0) is not None else 0
+                road_data["week_day"] = road["week_day"] if road.get("week_day", -1) is not None else -1
+                road_data["title"] = road["title"] if road.get("title") else "Unknown road"
+
+                # Адреса
+                data_addresses = []
+                for address in road["addresses"]:
+                    address_data = {
+                        "from_address": {
+                            "address": address["from_address"] if address.get(
+                                "from_address") else "Unknown from address",
+                            "location": {
+                                "longitude": address["from_lon"] if address.get(
+                                    "from_lon") is not None else 0.0,
+                                "latitude": address["from_lat"] if address.get(
+                                    "from_lat") is not None else 0.0
+                            }
+                        },
+                        "to_address": {
+                            "address": address["to_address"] if address.get(
+                                "to_address") else "Unknown to address",
+                            "location": {
+                                "longitude": address["to_lon"] if address.get(
+                                    "to_lon") is not None else 0.0,
+                                "latitude": address["to_lat"] if address.get(
+                                    "to_lat") is not None else 0.0
+                            }
                         }
                     }
-                }
-                data_addresses.append(address_data)
-            road_data["addresses"] = data_addresses if data_addresses else [{
-                "from_address": {"address": "Unknown",
-                                 "location": {"longitude": 0.0, "latitude": 0.0}},
-                "to_address": {"address": "Unknown",
-                               "location": {"longitude": 0.0, "latitude": 0.0}}
-            }]
-
-            price_road = road.get("amount")
-            road_data["salary"] = round(float(price_road),
-                                        2) if price_road is not None else 0.0
-            valid_schedules[schedule_id]["roads"].append(road_data)
+                    data_addresses.append(address_data)
+                road_data["addresses"] = data_addresses if data_addresses else [{
+                    "from_address": {"address": "Unknown",
+                                     "location": {"longitude": 0.0, "latitude": 0.0}},
+                    "to_address": {"address": "Unknown",
+                                   "location": {"longitude": 0.0, "latitude": 0.0}}
+                }]
+
+                price_road = road.get("amount")
+                road_data["salary"] = round(float(price_road),
+                                            2) if price_road is not None else 0.0
+                schedule["roads"].append(road_data)
 
         # Финальная обработка и подсчет общей стоимости
         result_schedules = []
@@ -701,6 +686,7 @@ async def want_schedule_requests(request: Request, item: WantSchedule):
                 "isActive": req.isActive,
             }
         )
+    await OpenRoadsService.refresh(road_ids=item.id_road)
     
     # BE-MVP-015: Логирование успешного принятия полной программы
     logger.info(
@@ -779,6 +765,7 @@ async def decline_roads_requests(request: Request, item: DeclineRoads):
         if await DataScheduleRoadDriver.filter(id_schedule_road=each, id_driver=request.user).count() == 0:
             return JSONResponse({"status": False, "message": "You do not have access to this road"}, 404)
         await DataScheduleRoadDriver.filter(id_schedule_road=each, id_driver=request.user).update(isActive=False)
+    await OpenRoadsService.refresh(road_ids=item.id_road)
 
     return JSONResponse({"status": True, "message": "Success!"}, 200)
 
@@ -1,40 +1,34 @@
 from fastapi import APIRouter, UploadFile, File, Request
 from fastapi.responses import FileResponse, JSONResponse
-from defs import generate_file_name
 from const.files_const import *
 from models.files_db import *
-from typing import List
+from typing import List, Optional
 import json
 from utils.response_helpers import generate_responses
+from services.file_storage_service import file_storage, UploadTooLarge
+from services.media_service import media
 
 router = APIRouter()
 
 @router.post("/upload_files",
-             responses=generate_responses([upload_files]))
+             responses=generate_responses([upload_files, upload_file_too_large]))
 async def upload_files(request: Request, files: List[UploadFile] = File()):
-    path=[]
-    path_type=[]
-    for file in files:
-        file.filename= await generate_file_name(file.filename)
-        if file.filename.lower().endswith(('.png', '.jpg', '.jpeg', '.heic', '.heif', '.svg')):
-            path_type.append(2)
-        elif file.filename.lower().endswith(('.mp4', '.mkv', '.mov', '.avi', '.gif', '.h264')):
-            path_type.append(3)
-        else:
-            path_type.append(4)
-        contents=await file.read()
-        with open("/root/files/" + file.filename, "wb") as f:
-            f.write(contents)
-        path.append("https://nyanyago.ru/api/v1.0/files/" + file.filename)
-        await DataUploadedFile.create(id_user=request.user,
-                                      files_path="https://nyanyago.ru/api/v1.0/files/"+file.filename)
+    try:
+        stored = await file_storage.save(files)
+    except UploadTooLarge:
+        return upload_file_too_large
+    path = [file_storage.url(item.name) for item in stored]
+    await DataUploadedFile.bulk_create([DataUploadedFile(id_user=request.user, files_path=url) for url in path])
     return JSONResponse({"status": True,
                          "message": "Success!",
                          "files_path": path,
-                         "files_type": path_type})
+                         "files_type": [item.file_type for item in stored]})
 
 @router.get("/{file}",
-            response_class=FileResponse)
-async def send_files(file: str):
-    return "/root/files/" + file
-
+            response_class=FileResponse,
+            responses=generate_responses([file_not_found]))
+async def send_files(request: Request, file: str, size: Optional[int] = None):
+    media_file = await media.get_file(file, size)
+    if media_file is None:
+        return file_not_found
+    return await media.response(request, media_file)
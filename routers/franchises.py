@@ -3,7 +3,7 @@ import hashlib
 import json
 import random
 import traceback
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 from const.admins_const import *
 from const.dependency import (has_access_franchise, has_access_franchise_admin,
@@ -29,6 +29,9 @@ from models.users_db import (DataUserBalance, DataUserBalanceHistory,
                              UsersVerifyAccount)
 from smsaero import SmsAero
 from utils.response_helpers import generate_responses
+from services.franchise_service import FranchiseService, DRIVER_STATUS_FILTERS
+from services.pricing_config_service import pricing_config
+from common.query_profiler import query_budget
 
 router = APIRouter()
 
@@ -304,17 +307,25 @@ async def get_new_drivers_data(request: Request):
 @router.get(
     "/drivers",
     dependencies=[Depends(has_access_franchise)],
-    responses=generate_responses([get_new_drivers, incorrect_user]),
+    responses=generate_responses([get_new_drivers, incorrect_user, incorrect_driver_status]),
 )
-async def get_all_drivers(request: Request, only_active_requests: bool = False):
+@query_budget(5)
+async def get_all_drivers(request: Request, only_active_requests: bool = False,
+                          status: Union[str, None] = None, limit: Union[int, None] = None,
+                          offset: int = 0):
     """
     Возвращает всех водителей франшизы пользователя (в т.ч. неподтверждённые аккаунты)
 
+    Статус, фото и сумма заявок на вывод загружаются одним запросом вместе со списком.
+
     Args:
         request (Request): Объект запроса
         only_active_requests (bool): Возвращает список водителей,
             у которых есть активные заявки на вывод.
             По умолчанию - False - возвращать ВСЕХ водителей.
+        status (Union[str, None]): Фильтр по статусу: unverified, deleted, blocked, active.
+        limit (Union[int, None]): Размер страницы. По умолчанию - все водители.
+        offset (int): Смещение.
 
     Example:
         Пример успешного ответа:
@@ -339,6 +350,8 @@ async def get_all_drivers(request: Request, only_active_requests: bool = False):
         JSONResponse: Список водителей франшизы
     """
 
+    if status is not None and status not in DRIVER_STATUS_FILTERS:
+        return incorrect_driver_status
     my_ref = (
         await UsersFranchiseUser.filter(id_user=request.user)
         .order_by("-id")
@@ -347,69 +360,36 @@ async def get_all_drivers(request: Request, only_active_requests: bool = False):
     )
     if not my_ref:
         return incorrect_user
-    data = [
-        x["id_user"]
-        for x in (
-            await UsersFranchiseUser.filter(id_franchise=my_ref["id_franchise"])
-            .all()
-            .values()
-        )
-    ]
-    data = [
-        x["id_user"]
-        for x in (
-            await UsersUserAccount.filter(id_user__in=data, id_type_account=2)
-            .all()
-            .values()
-        )
-    ]
-    result = []
-    for driver in data:
-        driver_info = await UsersUser.filter(id=driver).first().values()
-        status = await WaitDataVerifyDriver.filter(id_driver=driver).count()
-        driver_info["status"] = "Не подтверждён" if status != 0 else "Активен"
-        if driver_info["status"] == "Активен":
-            if await UsersVerifyAccount.filter(id_user=driver).count() == 0:
-                driver_info["status"] = "Заблокирован"
-            if driver_info["isActive"] is None:
-                driver_info["status"] = "Удалён"
-        photo = await UsersUserPhoto.filter(id_user=driver_info["id"]).first().values()
-        photo = not_user_photo if photo is None else photo["photo_path"]
-        driver_info["photo_path"] = photo
-
-        sum_of_active_requests_list: list = (
-            await HistoryRequestPayment.filter(id_user=driver_info["id"], isActive=True)
-            .all()
-            .values("money")
-        )
-        sum_of_requests: float = sum([float(x["money"]) for x in sum_of_active_requests_list])
-
-        driver_info["request_for_payment"] = sum_of_requests
-        if only_active_requests:
-            if driver_info["request_for_payment"] == 0:
-                continue
-        result.append(driver_info)
-    for i in range(len(result) - 1):
-        for j in range(len(result) - i - 1):
-            if result[j]["datetime_create"] < result[j + 1]["datetime_create"]:
-                result[j], result[j + 1] = result[j + 1], result[j]
-    for each in result:
-        each["datetime_create"] = each["datetime_create"].isoformat()
-    return JSONResponse({"status": True, "message": "Success!", "drivers": result})
+    result, total = await FranchiseService.get_drivers_page(
+        id_franchise=my_ref["id_franchise"],
+        status=status,
+        only_active_requests=only_active_requests,
+        limit=limit,
+        offset=offset
+    )
+    return JSONResponse({"status": True, "message": "Success!", "drivers": result, "total": total})
 
 @router.get(
     "/money_stats",
-    responses=generate_responses([get_money_stats, incorrect_period, incorrect_user]),
+    responses=generate_responses([get_money_stats, incorrect_period, incorrect_dates, incorrect_user]),
 )
-async def get_stats(request: Request, period: int = 0):
+@query_budget(5)
+async def get_stats(request: Request, period: int = 0,
+                    date_from: Union[date, None] = None, date_to: Union[date, None] = None):
     """
     Финансовая статистика по франшизе
 
+    Суммы считаются по дневным итогам data.franchise_balance_daily
+    (не более одной строки на день и тип операции).
+
     Args:
         request (Request): Запрос
         period (int): Сдвиг по месяцу. Только неположительные значения.
             (0 текущий месяц,
             -1 предыдущий месяц и тд.)
+        date_from (Union[date, None]): Начало произвольного периода (включительно).
+            Вместе с date_to заменяет period.
+        date_to (Union[date, None]): Конец произвольного периода (включительно).
 
     Returns:
         Сообщение о некорректном периоде или некорректном текущем пользователе
@@ -419,15 +399,19 @@ async def get_stats(request: Request, period: int = 0):
         Статистику по расходам и доходам за заданный период
     """
 
-    if period > 0:
-        return incorrect_period
+    if date_from is not None or date_to is not None:
+        if date_from is None or date_to is None or date_from > date_to:
+            return incorrect_dates
+        start_of_period = date_from
+        end_of_period = date_to + timedelta(days=1)
+    else:
+        if period > 0:
+            return incorrect_period
 
-    today = datetime.today()
-    today_with_month_shift = today + relativedelta(months=period)
-    start_of_month = today_with_month_shift.replace(
-        day=1, hour=0, minute=0, second=0, microsecond=0
-    )
-    end_of_month = start_of_month + relativedelta(months=1)
+        today = datetime.today()
+        today_with_month_shift = today + relativedelta(months=period)
+        start_of_period = today_with_month_shift.replace(day=1).date()
+        end_of_period = start_of_period + relativedelta(months=1)
 
     current_user = (
         await UsersFranchiseUser.filter(id_user=request.user)
@@ -439,38 +423,14 @@ async def get_stats(request: Request, period: int = 0):
     if not current_user:
         return incorrect_user
 
-    all_franchise_members = (
-        await UsersFranchiseUser.filter(id_franchise=current_user["id_franchise"])
-        .all()
-        .values()
-    )
-    all_franchise_members_id = [x["id_user"] for x in all_franchise_members]
-
-    spending_on_bonuses = (
-        await DataUserBalanceHistory.filter(
-            id_user__in=all_franchise_members_id,
-            id_task=-2,
-            datetime_create__gte=start_of_month,
-            datetime_create__lt=end_of_month,
-        )
-        .all()
-        .values("money")
-    )
-    spending_on_bonuses = sum(-float(x["money"]) for x in spending_on_bonuses)
-
-    received_due_to_commission = (
-        await DataUserBalanceHistory.filter(
-            id_user__in=all_franchise_members_id,
-            id_task=-3,
-            datetime_create__gte=start_of_month,
-            datetime_create__lt=end_of_month,
-        )
-        .all()
-        .values("money")
-    )  # отрицательное значение
-    received_due_to_commission = sum(
-        -float(x["money"]) for x in received_due_to_commission
+    totals = await FranchiseService.get_money_totals(
+        id_franchise=current_user["id_franchise"],
+        date_from=start_of_period,
+        date_to=end_of_period,
+        tasks=[-2, -3]
     )
+    spending_on_bonuses = 0.0 - totals[-2]
+    received_due_to_commission = 0.0 - totals[-3]  # комиссия записывается отрицательным значением
 
     return JSONResponse(
         {
@@ -558,13 +518,11 @@ async def agree_output_payment(item: OutputPayment):
 @router.get("/tariffs",
             responses=generate_responses([get_tariffs]))
 async def get_tariffs(request: Request):
-    my_ref = await UsersFranchiseUser.filter(id_user=request.user).first().values()
-    data = await DataCarTariff.filter(id_franchise=my_ref["id_franchise"]).order_by("id").\
-                                            all().values("id", "title", "amount", "photo_path",
-                                                         "description", "isActive")
-    for each in data:
-        each["amount"] = float(each["amount"])
-        each["isAvailable"] = True
+    id_franchise = await pricing_config.get_user_franchise(request.user)
+    data = [{"id": each["id"], "title": each["title"], "amount": float(each["amount"]),
+             "photo_path": each["photo_path"], "description": each["description"], "isActive": each["isActive"],
+             "isAvailable": True}
+            for each in await pricing_config.get_franchise_tariffs(id_franchise, only_active=False)]
     return JSONResponse({"status": True,
                          "message": "Success!",
                          "tariffs": data})
@@ -581,6 +539,7 @@ async def new_tariff(request: Request, item: NewTariff):
         return access_forbidden
     await DataCarTariff.create(title=item.title, id_franchise=my_ref["id_franchise"], description=item.description,
                                amount=data["amount"], photo_path=item.photo_path, percent=None, one_time=item.one_time)
+    pricing_config.invalidate()
     return success_answer
 
 @router.put("/tariff",
@@ -601,6 +560,7 @@ async def update_tariff(request: Request, item: UpdateTariff):
         await DataCarTariff.filter(id=item.id_tariff).update(photo_path=item.photo_path)
     if item.one_time:
         await DataCarTariff.filter(id=item.id_tariff).update(one_time=item.one_time)
+    pricing_config.invalidate()
     return success_answer
 
 @router.delete("/tariff",
@@ -616,6 +576,7 @@ async def new_tariff(request: Request, id: int):
     if data["title"].lower() in ("эконом", "комфорт", "комфорт+", "бизнес", "минивэн"):
         return access_forbidden
     await DataCarTariff.filter(id=id, id_franchise=my_ref["id_franchise"]).update(isActive=False)
+    pricing_config.invalidate()
     return success_answer
 
 @router.post("/add_bonus_money",
@@ -635,7 +596,8 @@ async def add_bonus_money(request: Request, item: BonusFineDriver):
     await DataUserBalance.filter(id_user=item.id_driver, id=balance["id"]).update(
                                                             money=decimal.Decimal(int(balance["money"])+item.amount))
     await DataUserBalanceHistory.create(id_user=item.id_driver, money=decimal.Decimal(item.amount), id_task=-2,
-                                        isComplete=True, description="Зачисление бонусов от Франшизы")
+                                        isComplete=True, description="Зачисление бонусов от Франшизы",
+                                        datetime_create=datetime.now())
     return success_answer
 
 @router.post("/add_fine_money",
@@ -655,7 +617,8 @@ async def add_bonus_money(request: Request, item: BonusFineDriver):
     await DataUserBalance.filter(id_user=item.id_driver, id=balance["id"]).update(
                                                             money=decimal.Decimal(int(balance["money"])-item.amount))
     await DataUserBalanceHistory.create(id_user=item.id_driver, money=decimal.Decimal(-item.amount), id_task=-3,
-                                        isComplete=True, description="Начисление комиссии от Франшизы")
+                                        isComplete=True, description="Начисление комиссии от Франшизы",
+                                        datetime_create=datetime.now())
     return success_answer
 
 @router.post("/response_new_driver",
@@ -0,0 +1,30 @@
+import hmac
+
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse, Response
+
+from config import settings
+from common.metrics import CONTENT_TYPE, registry
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics(request: Request):
+    """
+    Метрики приложения в текстовом формате Prometheus.
+
+    Если задан METRICS_TOKEN, запрос должен содержать заголовок Authorization: Token <METRICS_TOKEN>
+    (схема Bearer занята JWT пользователей, см. BearerTokenAuthBackend).
+
+    Args:
+        request (Request): Объект запроса
+
+    Returns:
+        Response: Метрики (text/plain; version=0.0.4)
+    """
+    if settings.metrics_token:
+        expected = f"Token {settings.metrics_token}"
+        if not hmac.compare_digest(request.headers.get("Authorization", ""), expected):
+            return JSONResponse({"detail": "Forbidden"}, status_code=403)
+    return Response(registry.render(), media_type=CONTENT_TYPE)
@@ -12,7 +12,7 @@ from const.dependency import has_access_parent, has_access_franchise
 from const.login_const import forbidden
 from models.chats_db import ChatsChatParticipant, ChatsChat
 from models.drivers_db import UsersDriverData, UsersCar, DataDriverMode
-from models.static_data_db import DataCarTariff, DataOtherDriveParametr, DataCarMark, \
+from models.static_data_db import DataOtherDriveParametr, DataCarMark, \
     DataCarModel, DataColor
 from const.orders_const import CurrentDrive, you_have_active_drive, start_current_drive, \
     NewSchedule, get_schedule, \
@@ -20,10 +20,10 @@ from const.orders_const import CurrentDrive, you_have_active_drive, start_curren
     get_schedule_road_response, \
     get_schedule_responses, AnswerResponse, get_onetime_prices, get_orders, \
     OneTimeOrder, GetTotalPrice, get_total_price, UpdateSchedule, update_road_response, \
-    MAX_CHILDREN_PER_SCHEDULE, too_many_children
+    MAX_CHILDREN_PER_SCHEDULE, too_many_children, GetOnetimeQuotes, get_onetime_quotes
 from const.static_data_const import access_forbidden, DictToModel, not_user_photo
 from models.users_db import UsersUser, UsersUserPhoto, HistoryNotification, \
-    UsersFranchiseUser, DataUserBalance, DataUserBalanceHistory
+    DataUserBalance, DataUserBalanceHistory
 from models.authentication_db import UsersUserAccount, UsersBearerToken
 from fastapi import APIRouter, Request, Depends, HTTPException
 from defs import check_access_schedule, sendPush, get_time_drive, get_order_data
@@ -36,6 +36,10 @@ from sevice.google_maps_api import get_lat_lon, get_distance_and_duration
 from utils.response_helpers import generate_responses, enrich_roads_with_children_and_contact
 from services.schedule_service import ScheduleService
 from services.route_service import RouteService
+from services.schedule_tree_loader import ScheduleTreeLoader, parse_int_list, format_address, format_contact
+from services.open_roads_service import OpenRoadsService
+from services.pricing_config_service import pricing_config
+from services.quote_service import QuoteService
 
 router = APIRouter()
 
@@ -93,6 +97,8 @@ async def update_schedule(request: Request, item: UpdateSchedule):
     
     if not success:
         return schedule_not_found
+    if "week_days" in update_data:
+        await OpenRoadsService.refresh(schedule_ids=[item.id])
     
     # Обработка дополнительных параметров (оставляем как есть, т.к. это специфичная логика)
     if item.other_parametrs and len(item.other_parametrs) > 0:
@@ -264,6 +270,7 @@ async def create_schedule(request: Request, item: NewSchedule):
             "contact": road.contact if hasattr(road, 'contact') else None,
             "children": road.children if hasattr(road, 'children') else []
         })
+    await OpenRoadsService.refresh(schedule_ids=[schedule.id])
 
     return JSONResponse(
         {
@@ -306,87 +313,52 @@ async def get_schedule(request: Request, id: int):
     if await check_access_schedule(request.user, schedule["id_user"]) is False:
         return access_forbidden
 
+    tree = (await ScheduleTreeLoader(with_users=False, with_drivers=False).load([schedule["id"]]))[schedule["id"]]
+
     # Недели в список
     schedule["week_days"] = [int(x) for x in schedule["week_days"].split(";")]
 
     # Доп. параметры
-    other_parametrs = await DataScheduleOtherParametrs.filter(
-        id_schedule=schedule["id"],
-        isActive=True
-    ).order_by("id").all().values()
-
-    schedule["other_parametrs"] = [
-        {
-            "parametr": parametr["id_other_parametr"],
-            "count": parametr["amount"]
-        }
-        for parametr in other_parametrs
-    ]
+    schedule["other_parametrs"] = tree["other_parametrs"]
 
     # Тариф
-    tariff = (await DataCarTariff.filter(id=schedule["id_tariff"]).first().values())["amount"]
+    tariff = (await pricing_config.get_tariff(schedule["id_tariff"]))["amount"]
 
     all_price = 0
-    roads = await DataScheduleRoad.filter(
-        id_schedule=schedule["id"], isActive=True
-    ).order_by("id").all().values()
+    roads = tree["roads"]
 
     for road in roads:
         road["type_drive"] = [int(x) for x in road["type_drive"].split(";")]
 
         # Адреса
-        addresses = await DataScheduleRoadAddress.filter(
-            id_schedule_road=road["id"]
-        ).order_by("id").all().values()
-
         data_addresses = []
         price_road = 0
-        for address in addresses:
+        for address in road["addresses"]:
             info, _ = await get_time_drive(
                 address["from_lat"], address["from_lon"],
                 address["to_lat"], address["to_lon"], tariff
             )
             price_road += info
             all_price += price_road
-            address_data = {
-                "from_address": {
-                    "address": address["from_address"],
-                    "location": {
-                        "longitude": address["from_lon"],
-                        "latitude": address["from_lat"]
-                    }
-                },
-                "to_address": {
-                    "address": address["to_address"],
-                    "location": {
-                        "longitude": address["to_lon"],
-                        "latitude": address["to_lat"]
-                    }
-                }
-            }
-            data_addresses.append(address_data)
+            data_addresses.append(format_address(address))
 
         road["amount"] = price_road
         road["addresses"] = data_addresses
 
         # Контактное лицо
-        contact = await DataScheduleRoadContact.filter(
-            id_schedule_road=road["id"], isActive=True
-        ).first().values("surname", "name", "patronymic", "contact_phone") if await DataScheduleRoadContact.filter(
-            id_schedule_road=road["id"], isActive=True
-        ).exists() else None
-        road["contact"] = contact
-
-        # Дети маршрута
-        children = await DataScheduleRoadChild.filter(
-            id_schedule_road=road["id"], isActive=True
-        ).all().values("id_child")
-        road["children"] = [child["id_child"] for child in children]
+        contact = road["contact"]
+        road["contact"] = {
+            "surname": contact["surname"],
+            "name": contact["name"],
+            "patronymic": contact["patronymic"],
+            "contact_phone": contact["contact_phone"]
+        } if contact else None
 
         # Убираем лишнее
         del road["id_schedule"]
         del road["isActive"]
         del road["datetime_create"]
+        del road["driver"]
 
     schedule["roads"] = roads
     schedule["amount"] = all_price
@@ -483,143 +455,43 @@ async def get_schedule(request: Request):
             }
     """
 
-    schedules = (
-        await DataSchedule.filter(id_user=request.user, isActive__in=[True, False])
-        .all()
-        .values(
-            "id",
-            "title",
-            "description",
-            "children_count",
-            "id_tariff",
-            "week_days",
-            "duration",
-            "id_user",
-            "isActive",
-            "datetime_create",
-        )
-    )
-    for schedule in schedules:
-        week_days_raw = schedule.get("week_days", "")
-        if week_days_raw:
-            schedule["week_days"] = [
-                int(x) for x in week_days_raw.split(";") if x.isdigit()
-            ]
-        else:
-            schedule["week_days"] = []
+    schedule_ids = [
+        x["id"] for x in await DataSchedule.filter(
+            id_user=request.user, isActive__in=[True, False]
+        ).order_by("id").values("id")
+    ]
+    trees = await ScheduleTreeLoader().load(schedule_ids)
 
+    schedules = []
+    for schedule in trees.values():
+        schedule["week_days"] = parse_int_list(schedule["week_days"])
         schedule["datetime_create"] = (
             str(schedule["datetime_create"]) if schedule["datetime_create"] else None
         )
-
-        other_parametrs = (
-            await DataScheduleOtherParametrs.filter(
-                id_schedule=schedule["id"], isActive=True
-            )
-            .order_by("id")
-            .all()
-            .values()
-        )
-
-        other_parametrs_data = []
-        for parametr in other_parametrs:
-            other_parametrs_data.append(
-                {"parametr": parametr["id_other_parametr"], "count": parametr["amount"]}
-            )
-        schedule["other_parametrs"] = other_parametrs_data
-
-
+        schedule.pop("user", None)
 
         all_price = 0
-        roads = (
-            await DataScheduleRoad.filter(id_schedule=schedule["id"], isActive=True)
-            .order_by("id")
-            .all()
-            .values()
-        )
-
-        for road in roads:
-            type_drive_raw = road.get("type_drive", "")
-            id_driver_raw = await DataScheduleRoadDriver.filter(
-                id_schedule_road=road["id"]
-            ).first().values("id_driver")
-            id_driver = id_driver_raw["id_driver"] if id_driver_raw else None
-            driver_raw = await UsersUser.filter(id=id_driver).first().values(
-                "name", "surname", "phone"
-            )
-            if driver_raw:
-                road["driver_name"] = driver_raw["name"]
-                road["driver_surname"] = driver_raw["surname"]
-                road["driver_phone"] = driver_raw["phone"]
-            else:
-                road["driver_name"] = None
-                road["driver_surname"] = None
-                road["driver_phone"] = None
-            if type_drive_raw:
-                road["type_drive"] = [
-                    int(x) for x in type_drive_raw.split(";") if x.isdigit()
-                ]
-            else:
-                road["type_drive"] = []
+        for road in schedule["roads"]:
+            driver = road.pop("driver")
+            road["driver_name"] = driver["name"] if driver else None
+            road["driver_surname"] = driver["surname"] if driver else None
+            road["driver_phone"] = driver["phone"] if driver else None
+            road["type_drive"] = parse_int_list(road["type_drive"])
 
-            addresses = (
-                await DataScheduleRoadAddress.filter(id_schedule_road=road["id"])
-                .order_by("id")
-                .all()
-                .values()
-            )
             price_road = road.get("amount", -1)
             if price_road is not None:
                 all_price += price_road
-            data_addresses = []
-            for address in addresses:
-                from_lat = address.get("from_lat")
-                from_lon = address.get("from_lon")
-                to_lat = address.get("to_lat")
-                to_lon = address.get("to_lon")
-
-                address_data = {
-                    "from_address": {
-                        "address": address["from_address"],
-                        "location": {"longitude": from_lon, "latitude": from_lat},
-                    },
-                    "to_address": {
-                        "address": address["to_address"],
-                        "location": {"longitude": to_lon, "latitude": to_lat},
-                    },
-                }
-                data_addresses.append(address_data)
-
-            # дети маршрута
-            children = await DataScheduleRoadChild.filter(
-                id_schedule_road=road["id"], isActive=True
-            ).all().values("id_child")
-            road["children"] = [c["id_child"] for c in children] if children else []
-
-            # контакт
-            contact = await DataScheduleRoadContact.filter(
-                id_schedule_road=road["id"], isActive=True
-            ).first()
-            if contact:
-                road["contact"] = {
-                    "surname": contact.surname,
-                    "name": contact.name,
-                    "patronymic": contact.patronymic,
-                    "phone": contact.contact_phone,
-                }
-            else:
-                road["contact"] = None
-
             road["amount"] = round(float(price_road),
                                    2) if price_road is not None else 0
-            road["addresses"] = data_addresses
+            road["addresses"] = [format_address(address) for address in road["addresses"]]
+            road["contact"] = format_contact(road["contact"])
 
             road.pop("id_schedule", None)
             road.pop("isActive", None)
             road.pop("datetime_create", None)
 
-        schedule["roads"] = roads
         schedule["amount"] = round(float(all_price), 2)
+        schedules.append(schedule)
 
     return JSONResponse(
         {"status": True, "message": "Success!", "schedules": schedules}, 200
@@ -730,6 +602,7 @@ async def delete_schedule(request: Request, id: int):
 
         # Деактивация контактных лиц
         await DataScheduleRoadContact.filter(id_schedule_road=road.id, isActive=True).update(is_active=False)
+    await OpenRoadsService.refresh(schedule_ids=[id])
 
     return success_answer
 
@@ -804,6 +677,7 @@ async def delete_schedule(request: Request, id: int, debit_amount: float):
 
         # Деактивация контактных лиц
         await DataScheduleRoadContact.filter(id_schedule_road=road.id, isActive=True).update(is_active=False)
+    await OpenRoadsService.refresh(schedule_ids=[id])
 
     return success_answer
 
@@ -849,6 +723,7 @@ async def delete_schedule_road(request: Request, id: int):
 
     # Деактивация контактных лиц
     await DataScheduleRoadContact.filter(id_schedule_road=id, isActive=True).update(is_active=False)
+    await OpenRoadsService.refresh(road_ids=[id])
 
     return success_answer
 
@@ -908,6 +783,7 @@ async def create_schedule_road(request: Request, id: int, item: Road):
     # Обновляем стоимость и сохраняем адреса
     await DataScheduleRoad.filter(id=new_road.id).update(amount=total_price)
     await RouteService.save_route_addresses(new_road.id, addresses_data)
+    await OpenRoadsService.refresh(road_ids=[new_road.id])
     
     return JSONResponse({
         "status": True,
@@ -1009,8 +885,7 @@ async def update_schedule_road(request: Request, item: UpdateRoad):
     else:
         return schedule_not_found
 
-    tariff_amount_dict: dict = await DataCarTariff.filter(
-        id=id_tariff).first().values("amount")
+    tariff_amount_dict = await pricing_config.get_tariff(id_tariff)
 
     if not tariff_amount_dict:
         return JSONResponse({"status": False,
@@ -1078,6 +953,7 @@ async def update_schedule_road(request: Request, item: UpdateRoad):
 
     total_price_from_db = await DataScheduleRoad.filter(id=item.id).first().values(
         "amount")
+    await OpenRoadsService.refresh(road_ids=[item.id])
 
     total_price_from_db = str(total_price_from_db["amount"])
 
@@ -1150,8 +1026,7 @@ async def get_schedule_road(id: int):
     data_addresses = []
     price_road = 0.0
     schedule = await DataSchedule.filter(id=road["id_schedule"]).first().values()
-    tariff = (await DataCarTariff.filter(id=schedule["id_tariff"]).first().values())[
-        "amount"]
+    tariff = (await pricing_config.get_tariff(schedule["id_tariff"]))["amount"]
     for address in addresses:
         distance, time = await get_distance_and_duration(
             {"lat": address["from_lat"], "lng": address["from_lon"]},
@@ -1200,6 +1075,7 @@ async def get_schedule_road(id: int):
     road["other_parametrs"] = await DataScheduleOtherParametrs.filter(
         id_schedule=road["id_schedule"]).values('id_other_parametr', 'amount')
     await DataScheduleRoad.filter(id=id, isActive=True).update(amount=price_road)
+    await OpenRoadsService.refresh(road_ids=[id])
     del road["id_schedule"]
     del road["isActive"]
     del road["datetime_create"]
@@ -1695,6 +1571,7 @@ async def answer_schedule_responses(request: Request, item: AnswerResponse):
                 id_driver=road["id_driver"],
                 isRepeat=True,
             )
+    await OpenRoadsService.refresh(schedule_ids=[item.id_schedule])
     fbid = (
         await UsersBearerToken.filter(id_user=data["id_driver"])
         .order_by("-id")
@@ -1796,13 +1673,9 @@ async def get_onetime_prices(request: Request, duration: int, distance: int):
     Вроде как deprecated функция.
     См. const -> cost_formulas.py -> get_total_cost_of_the_trip().
     """
-    my_ref, result = await UsersFranchiseUser.filter(
-        id_user=request.user).first().values(), []
-    data = await DataCarTariff.filter(id_franchise=my_ref["id_franchise"],
-                                      isActive=True).order_by("id").all().values("id",
-                                                                                 "amount")
+    id_franchise, result = await pricing_config.get_user_franchise(request.user), []
+    data = await pricing_config.get_franchise_tariffs(id_franchise)
     for each in data:
-        each["isAvailable"] = True
         T = duration
         T1 = 7
         S1 = 3
@@ -1825,6 +1698,28 @@ async def get_onetime_prices(request: Request, duration: int, distance: int):
                          "tariffs": result})
 
 
+@router.post("/onetime_quotes",
+             responses=generate_responses([get_onetime_quotes]))
+async def get_onetime_quotes_route(request: Request, item: GetOnetimeQuotes):
+    """
+    Стоимость разовой поездки по каждому тарифу франшизы для нескольких вариантов маршрута.
+    Формула - const -> cost_formulas.py -> get_total_cost_of_the_trip() с активными коэффициентами.
+
+    Args:
+        request: Объект запроса
+        item: Варианты маршрута (дистанция в метрах, время в секундах) и, при необходимости, ID тарифов
+
+    Returns:
+        JSONResponse: Для каждого тарифа - стоимости в порядке вариантов маршрута
+    """
+    tariffs = await QuoteService.quote_onetime(
+        request.user, [route.model_dump() for route in item.routes], item.id_tariffs
+    )
+    return JSONResponse({"status": True,
+                         "message": "Success!",
+                         "tariffs": tariffs})
+
+
 @router.get("/get_price_by_road",
             responses=generate_responses([success_answer,
                                           access_forbidden]))
@@ -1834,11 +1729,10 @@ async def get_price_by_road(request: Request, id_tariff: int, duration: int,
     Вроде как deprecated функция.
     См. const -> cost_formulas.py -> get_total_cost_of_the_trip().
     """
-    my_ref = await UsersFranchiseUser.filter(id_user=request.user).first().values()
-    if await DataCarTariff.filter(id=id_tariff, id_franchise=my_ref["id_franchise"],
-                                  isActive=True).count() == 0:
+    id_franchise = await pricing_config.get_user_franchise(request.user)
+    tariff = await pricing_config.get_tariff(id_tariff)
+    if not tariff or tariff["id_franchise"] != id_franchise or not tariff["isActive"]:
         return access_forbidden
-    tariff = await DataCarTariff.filter(id=id_tariff).first().values()
     T = duration
     T1 = 7
     S1 = 3
@@ -1962,8 +1856,7 @@ async def new_order(request: Request, one_time_order: OneTimeOrder):
         # False = Не активен (мб это значит что заказ создан, но не начался)
     )
 
-    tariff_amount_dict: dict = await DataCarTariff.filter(
-        id=one_time_order.id_tariff).first().values("amount")
+    tariff_amount_dict = await pricing_config.get_tariff(one_time_order.id_tariff)
 
     if not tariff_amount_dict:
         raise HTTPException(status_code=400, detail="Tariff not found")
@@ -11,8 +11,7 @@ from const.cost_formulas import get_total_cost_of_the_trip
 from const.dependency import has_access, has_access_driver
 from const.static_data_const import not_user_photo
 from models.authentication_db import UsersUserAccount, UsersBearerToken
-from models.chats_db import ChatsChatParticipant, ChatsChat, ChatsMessage, \
-    HistoryChatNotification
+from models.chats_db import ChatsChatParticipant, ChatsChat
 from models.drivers_db import DataDriverMode
 from models.orders_db import UsersUserOrder, DataOrder, DataOrderInfo, \
     DataOrderAddresses, WaitDataSearchDriver, DataOrderOtherParametrs
@@ -21,11 +20,14 @@ from const.orders_const import start_onetime_drive, CurrentDrive, JSONResponse,
     cant_decline_in_drive_mode
 from const.users_const import order_not_found, success_answer
 from defs import error, get_time_drive, get_order_data, sendPush, get_order_data_for_socket, get_order_data_socket
-from models.static_data_db import DataCarTariff
 from models.users_db import UsersUser, UsersUserPhoto
 from sevice.google_maps_api import get_lat_lon, get_distance_and_duration
+from services.chat_service import ChatService
+from services.presence_service import CHANNEL_DRIVER, CHANNEL_CLIENT
+from services.pricing_config_service import pricing_config
+from common.metrics import register_websocket_manager, track_websocket_message
+from common.tracing import traced, remember_order_trace, link_order_trace
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
@@ -185,8 +187,10 @@ class ConnectionManager:
     async def send_personal_message(self, message: str, websocket: WebSocket):
         try:
             await websocket.send_text(message)
+            track_websocket_message(CHANNEL_DRIVER)
             logger.info(f"Sent message: {message}")
         except Exception as e:
+            track_websocket_message(CHANNEL_DRIVER, ok=False)
             logger.info(f"Error sending message: {str(e)}")
 
     async def notify_clients_about_driver(self, driver_token: str):
@@ -241,6 +245,7 @@ class ConnectionManager:
 
 
 manager_driver = ConnectionManager()
+register_websocket_manager(CHANNEL_DRIVER, lambda: len(manager_driver.active_connections))
 
 
 async def send_active_orders_to_driver(websocket: WebSocket):
@@ -287,6 +292,7 @@ async def send_active_orders_to_driver(websocket: WebSocket):
         await error(traceback.format_exc())
 
 
+@traced("orders.send_message_to_client", order_arg="id_order")
 async def send_message_to_client(id_order, status):
     """Отправка сообщения клиенту"""
     try:
@@ -342,6 +348,9 @@ async def websocket_endpoint(websocket: WebSocket, token: str):
         while True:
             try:
                 message = await websocket.receive_text()
+                if message.lower() == "ping":
+                    await manager_driver.send_personal_message("pong", websocket)
+                    continue
                 message_data = json.loads(message)
             except json.JSONDecodeError:
                 await manager_driver.send_personal_message(json.dumps({"error": "Invalid JSON format"}), websocket)
@@ -513,7 +522,9 @@ class ConnectionManagerClient:
     async def send_personal_message(self, message: str, websocket: WebSocket):
         try:
             await websocket.send_text(message)
+            track_websocket_message(CHANNEL_CLIENT)
         except Exception as e:
+            track_websocket_message(CHANNEL_CLIENT, ok=False)
             logger.info(f"Error sending message: {str(e)}")
 
     async def send_drivers_to_client(self, token: str):
@@ -560,6 +571,7 @@ class ConnectionManagerClient:
 
 
 manager_client = ConnectionManagerClient()
+register_websocket_manager(CHANNEL_CLIENT, lambda: len(manager_client.active_connections))
 
 
 @router.websocket("/search-driver/{token}")
@@ -598,6 +610,9 @@ async def websocket_endpoint_client(websocket: WebSocket, token: str):
         while True:
             try:
                 message = await websocket.receive_text()
+                if message.lower() == "ping":
+                    await manager_client.send_personal_message("pong", websocket)
+                    continue
                 try:
                     message_data = json.loads(message)
                 except json.JSONDecodeError as e:
@@ -650,6 +665,7 @@ def calculate_distance(lat1, lon1, lat2, lon2):
     return distance
 
 
+@traced("orders.send_message_to_driver", order_arg="id_order")
 async def send_message_to_driver(id_order, message_data):
     """ Отправка сообщения водителю """
     try:
@@ -666,6 +682,7 @@ async def send_message_to_driver(id_order, message_data):
         await error(traceback.format_exc())
 
 
+@traced("orders.send_order_to_driver", order_arg="id_order")
 async def send_order_to_driver(id_order: int):
     """отправляет заказ всем активным водителям в радиусе 3км"""
     try:
@@ -699,6 +716,7 @@ async def accept_order(request: Request, id_order: int, send_message: bool = Fal
     """
     Роут для принятия заявки водителем. Принимает id_order и текущего пользователя.
     """
+    link_order_trace(id_order)
     result = {"status": True, "message": [], "order_data": None, "id_chat": None}
 
     is_driver = await UsersUserAccount.filter(id_user=request.user, id_type_account=2).exists()
@@ -761,15 +779,13 @@ async def accept_order(request: Request, id_order: int, send_message: bool = Fal
 
     if send_message:
         user_order = await UsersUserOrder.filter(id_order=id_order).first().values("token")
-        message_new = await ChatsMessage.create(
+        await ChatService.save_message(
             id_chat=chat_id,
             id_sender=request.user,
+            id_receiver=order.id_user,
             msg=f"{user_order['token']}",
-            msgType=5,
-            timestamp_send=time.time(),
-        )
-        await HistoryChatNotification.create(
-            id_user=order.id_user, id_chat=chat_id, id_msg=message_new.id
+            msg_type=5,
+            mark_sender_read=False,
         )
 
     try:
@@ -818,6 +834,7 @@ async def accept_order(request: Request, id_order: int, send_message: bool = Fal
                                            success_answer]),
              dependencies=[Depends(has_access_driver)])
 async def decline_order(request: Request, id_order: int):
+    link_order_trace(id_order)
     # TODO: Можно и без него, но он не мешает (если отменять тут - то ещё и чат удалится)
     if await UsersUserAccount.filter(id_user=request.user, id_type_account=2).count() == 0:
         return forbidden
@@ -942,6 +959,7 @@ async def start_onetime_drive(request: Request, item: CurrentDrive):
     """
     order = await DataOrder.create(id_user=request.user, id_status=1, id_type_order=1,
                                    type_drive=item.type_drive-1)
+    remember_order_trace(order.id)
 
     all_addresses = []
 
@@ -949,9 +967,7 @@ async def start_onetime_drive(request: Request, item: CurrentDrive):
     total_distance: float = 0.0
     total_duration: float = 0.0
 
-    tariff_amount_dict: dict = (
-        await DataCarTariff.filter(id=item.idTariff).first().values("amount")
-    )
+    tariff_amount_dict = await pricing_config.get_tariff(item.idTariff)
 
     if not tariff_amount_dict:
         return JSONResponse({"status": False, "message": "Tariff not found!"}, 404)
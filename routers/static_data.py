@@ -1,6 +1,3 @@
-from models.orders_db import DataDrivingStatus
-from models.static_data_db import DataCountry, DataColor, DataCity, DataCarMark, DataCarModel, DataOtherDriveParametr, \
-    DataCarTariff
 from models.authentication_db import UsersBearerToken
 from models.admins_db import AdminMobileSettings
 from fastapi import APIRouter, Depends, Request
@@ -8,72 +5,49 @@ from const.dependency import has_access, has_access_franchise
 from const.static_data_const import *
 import json
 
-from models.users_db import UsersFranchiseUser
 from utils.response_helpers import generate_responses
+from services.reference_data_service import reference_data, COUNTRIES, COLORS, CITIES, CAR_MARKS, CAR_MODELS, \
+    DRIVE_PARAMETERS, DRIVE_STATUSES
+from services.pricing_config_service import pricing_config
 
 router = APIRouter()
 
 @router.get("/country/",
             responses=generate_responses([country]))
-async def get_country_data(id: Union[int, None] = None, title: Union[str, None] = None):
-    answer = {"status": True, "message": "Success!"}
-    if title is None and id is None:
-        answer["countries"] = await DataCountry().filter().order_by("id").all().values()
-    else:
-        answer["countries"] = await DataCountry().filter(id=id).all().values() if id is not None \
-                                else await DataCountry().filter(title__icontains=title).order_by("id").all().values()
-    return JSONResponse(answer)
+async def get_country_data(request: Request, id: Union[int, None] = None, title: Union[str, None] = None):
+    return await get_reference_rows(request, COUNTRIES, id, title)
 
 @router.get("/color/",
             responses=generate_responses([color]))
-async def get_color_data(id: Union[int, None] = None, title: Union[str, None] = None):
-    answer = {"status": True, "message": "Success!"}
-    if title is None and id is None:
-        answer["colors"] = await DataColor().filter().order_by("id").all().values()
-    else:
-        answer["colors"] = await DataColor().filter(id=id).all().values() if id is not None \
-                                else await DataColor().filter(title__icontains=title).order_by("id").all().values()
-    return JSONResponse(answer)
+async def get_color_data(request: Request, id: Union[int, None] = None, title: Union[str, None] = None):
+    return await get_reference_rows(request, COLORS, id, title)
 
 @router.get("/city/",
             responses=generate_responses([city]))
-async def get_city_data(id: Union[int, None] = None, title: Union[str, None] = None):
-    answer = {"status": True, "message": "Success!"}
-    if title is None and id is None:
-        answer["cities"] = await DataCity().filter().order_by("id").all().values()
-    else:
-        answer["cities"] = await DataCity().filter(id=id).all().values() if id is not None \
-                                else await DataCity().filter(title__icontains=title).order_by("id").all().values()
-    return JSONResponse(answer)
+async def get_city_data(request: Request, id: Union[int, None] = None, title: Union[str, None] = None):
+    return await get_reference_rows(request, CITIES, id, title)
 
 @router.get("/car-mark/",
             responses=generate_responses([car_mark]))
-async def get_car_mark_data(id: Union[int, None] = None, title: Union[str, None] = None):
-    answer = {"status": True, "message": "Success!"}
-    if title is None and id is None:
-        answer["marks"] = await DataCarMark().filter().order_by("id").all().values()
-    else:
-        answer["marks"] = await DataCarMark().filter(id=id).all().values() if id is not None \
-                                else await DataCarMark().filter(title__icontains=title).order_by("id").all().values()
-    return JSONResponse(answer)
+async def get_car_mark_data(request: Request, id: Union[int, None] = None, title: Union[str, None] = None):
+    return await get_reference_rows(request, CAR_MARKS, id, title)
 
 @router.get("/car-model/",
             responses=generate_responses([car_model]))
-async def get_car_model_data(id: Union[int, None]=None, title: Union[str, None]=None, id_mark: Union[int, None]=None):
-    answer = {"status": True, "message": "Success!"}
+async def get_car_model_data(request: Request, id: Union[int, None]=None, title: Union[str, None]=None,
+                             id_mark: Union[int, None]=None):
     if title is None and id is None and id_mark is None:
-        models = await DataCarModel().filter().order_by("id").all().values()
-    elif id_mark is not None and (id is None and title is None):
-        models = await DataCarModel().filter(id_car_mark=id_mark).order_by("-id").all().values()
+        return await reference_data.response(request, CAR_MODELS)
+    table = await reference_data.get(CAR_MODELS)
+    if id_mark is not None and (id is None and title is None):
+        models = table.by_mark.get(id_mark, [])[::-1]
     elif title is not None and (id is None and id_mark is None):
-        models = await DataCarModel().filter(title__icontains=title).order_by("-id").all().values()
+        models = table.search(title)[::-1]
+    elif id is not None:
+        models = [table.by_id[id]] if id in table.by_id else []
     else:
-        models = await DataCarModel().filter(id=id).all().values() if id is not None else \
-                  await DataCarModel().filter(title__icontains=title, id_car_mark=id_mark).order_by("id").all().values()
-    for model in models:
-        if model['releaseYear'] is not None: model["title"] = f"{model['title']} ({model['releaseYear']})"
-    answer["models"] = models
-    return JSONResponse(answer)
+        models = table.search(title, table.by_mark.get(id_mark, []))
+    return await reference_data.response(request, CAR_MODELS, models)
 
 @router.post("/get-biometric-settings",
              dependencies=[Depends(has_access)],
@@ -86,13 +60,8 @@ async def get_now_settings_of_biometric_authentication():
 @router.get("/other-parametrs-of-drive",
             dependencies=[Depends(has_access)],
             responses=generate_responses([drive_params]))
-async def get_other_drive_params():
-    data = await DataOtherDriveParametr.filter(isActive=True).order_by("id").all().values("id", "title", "amount", "isActive")
-    for each in data:
-        each["amount"] = float(each["amount"])
-    return JSONResponse({"status": True,
-                         "message": "Success!",
-                         "data": data})
+async def get_other_drive_params(request: Request):
+    return await reference_data.response(request, DRIVE_PARAMETERS)
 
 @router.get(
     "/tariffs",
@@ -127,16 +96,11 @@ async def get_tariffs(request: Request):
     Returns:
         JSONResponse - тарифы франшизы текущего пользователя или сообщение об ошибке.
     """
-    my_ref = await UsersFranchiseUser.filter(id_user=request.user).first().values()
-    if not my_ref:
+    id_franchise = await pricing_config.get_user_franchise(request.user)
+    if id_franchise is None:
         return franchise_not_found
 
-    data: list = (
-        await DataCarTariff.filter(id_franchise=my_ref["id_franchise"], isActive=True)
-        .order_by("id")
-        .all()
-        .values()
-    )
+    data: list = await pricing_config.get_franchise_tariffs(id_franchise)
     result = []
     for each in data:
         current_tariff: dict = dict()
@@ -157,11 +121,16 @@ async def get_tariffs(request: Request):
             dependencies=[Depends(has_access)],
             responses=generate_responses([drive_statuses]))
 async def get_drive_statuses(request: Request):
-    statuses = await DataDrivingStatus.filter().order_by("id").all().values()
-    for each in statuses:
-        each["title"] = each["status"]
-        del each["status"]
-    return JSONResponse({"status": True,
-                         "message": "Success!",
-                         "drive_statuses": statuses})
+    return await reference_data.response(request, DRIVE_STATUSES)
+
 
+async def get_reference_rows(request: Request, name: str, id: Union[int, None], title: Union[str, None]):
+    """Справочник целиком, строка по id или строки, название которых содержит title"""
+    if title is None and id is None:
+        return await reference_data.response(request, name)
+    table = await reference_data.get(name)
+    if id is not None:
+        rows = [table.by_id[id]] if id in table.by_id else []
+    else:
+        rows = table.search(title)
+    return await reference_data.response(request, name, rows)
@@ -11,6 +11,7 @@ import requests
 
 from config import settings
 from common.logger import logger
+from common.query_profiler import query_budget
 from const.drivers_const import *
 from const.static_data_const import (DictToModel, access_forbidden,
                                      not_user_photo)
@@ -1121,6 +1122,7 @@ async def delete_child(request: Request, child_id: int):
 
 
 @router.get("/children")
+@query_budget(2)
 async def get_my_children(request: Request):
     """
     Получить список детей текущего пользователя.
@@ -0,0 +1,277 @@
+"""
+Сервисный слой списков админ-панели.
+Списки собираются одним SQL-запросом: агрегаты подключаются сгруппированными подзапросами,
+все фильтры применяются до OFFSET/LIMIT, общее количество считается оконной функцией.
+"""
+import re
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from tortoise import Tortoise
+
+from services.chat_service import build_search_pattern
+from const.static_data_const import not_user_photo
+
+
+# Родители (id_type_account=1) с количеством активных детей и активных графиков.
+# Параметры: $1 is_active, $2 шаблон поиска, $3 has_children, $4 has_active_orders
+PARENTS_FILTERED_SQL = """
+WITH parents AS (
+    SELECT u.id, u.name, u.surname, u.phone, u."isActive", u.datetime_create,
+           COALESCE(ch.children_count, 0) AS children_count,
+           COALESCE(sc.active_orders_count, 0) AS active_orders_count
+    FROM users.user u
+    LEFT JOIN (
+        SELECT id_user, COUNT(*) AS children_count
+        FROM users.child
+        WHERE "isActive" = TRUE
+        GROUP BY id_user
+    ) ch ON ch.id_user = u.id
+    LEFT JOIN (
+        SELECT id_user, COUNT(*) AS active_orders_count
+        FROM data.schedule
+        WHERE "isActive" = TRUE
+        GROUP BY id_user
+    ) sc ON sc.id_user = u.id
+    WHERE EXISTS (
+        SELECT 1 FROM authentication.user_account ua
+        WHERE ua.id_user = u.id AND ua.id_type_account = 1
+    )
+      AND ($1::boolean IS NULL OR u."isActive" = $1)
+      AND ($2::text IS NULL
+           OR u.name ILIKE $2 ESCAPE '\\'
+           OR u.surname ILIKE $2 ESCAPE '\\'
+           OR u.phone ILIKE $2 ESCAPE '\\')
+),
+filtered AS (
+    SELECT * FROM parents
+    WHERE ($3::boolean IS NULL OR (children_count > 0) = $3)
+      AND ($4::boolean IS NULL OR (active_orders_count > 0) = $4)
+)
+"""
+
+# Страница родителей: фото подключается только для строк страницы.
+# Параметры: $5 limit, $6 offset
+PARENTS_PAGE_SQL = PARENTS_FILTERED_SQL + """,
+page AS (
+    SELECT *, COUNT(*) OVER () AS total
+    FROM filtered
+    ORDER BY datetime_create DESC NULLS LAST, id DESC
+    LIMIT $5 OFFSET $6
+)
+SELECT page.*, ph.photo_path
+FROM page
+LEFT JOIN LATERAL (
+    SELECT photo_path FROM users.user_photo
+    WHERE id_user = page.id
+    ORDER BY id
+    LIMIT 1
+) ph ON TRUE
+ORDER BY page.datetime_create DESC NULLS LAST, page.id DESC
+"""
+
+# Общее количество, если страница пуста (offset за пределами списка)
+PARENTS_COUNT_SQL = PARENTS_FILTERED_SQL + """
+SELECT COUNT(*) AS total FROM filtered
+"""
+
+# Графики с родителем, количеством активных маршрутов и назначенных водителей.
+# Поиск по названию - полнотекстовый (индекс idx_schedule_title_fts), курсор - ID графика по убыванию.
+# Параметры: $1 isActive, $2 id родителя, $3 tsquery, $4 курсор after_id
+SCHEDULES_FILTER_SQL = """
+WHERE ($1::boolean IS NULL OR s."isActive" = $1)
+  AND ($2::bigint IS NULL OR s.id_user = $2)
+  AND ($3::text IS NULL OR to_tsvector('russian', COALESCE(s.title, '')) @@ to_tsquery('russian', $3))
+"""
+
+# Параметры: $4 after_id, $5 limit, $6 offset
+SCHEDULES_PAGE_SQL = """
+WITH page AS (
+    SELECT s.id, s.id_user, s.title, s.description, s.children_count, s.duration,
+           s.week_days, s."isActive", s.datetime_create
+    FROM data.schedule s
+""" + SCHEDULES_FILTER_SQL + """
+      AND ($4::bigint IS NULL OR s.id < $4)
+    ORDER BY s.id DESC
+    LIMIT $5 OFFSET $6
+)
+SELECT page.*,
+       u.name AS parent_name, u.surname AS parent_surname, u.phone AS parent_phone,
+       (u.id IS NOT NULL) AS parent_exists,
+       COALESCE(agg.roads_count, 0) AS roads_count,
+       COALESCE(agg.drivers_assigned, 0) AS drivers_assigned
+FROM page
+LEFT JOIN users.user u ON u.id = page.id_user
+LEFT JOIN LATERAL (
+    SELECT COUNT(*) AS roads_count,
+           SUM((SELECT COUNT(*) FROM data.schedule_road_driver d
+                WHERE d.id_schedule_road = r.id AND d."isActive" = TRUE)) AS drivers_assigned
+    FROM data.schedule_road r
+    WHERE r.id_schedule = page.id AND r."isActive" = TRUE
+) agg ON TRUE
+ORDER BY page.id DESC
+"""
+
+SCHEDULES_COUNT_SQL = """
+SELECT COUNT(*) AS total
+FROM data.schedule s
+""" + SCHEDULES_FILTER_SQL
+
+
+def build_tsquery(search: Optional[str]) -> Optional[str]:
+    """
+    Превращает строку поиска в tsquery с префиксным поиском по каждому слову.
+
+    Args:
+        search: Поисковая строка или None
+
+    Returns:
+        Optional[str]: Строка вида "слово:* & другое:*" или None, если слов нет
+    """
+    if not search:
+        return None
+    words = re.findall(r"\w+", search)
+    if not words:
+        return None
+    return " & ".join(f"{word}:*" for word in words)
+
+
+def format_date(value: Optional[datetime]) -> Optional[str]:
+    """
+    Форматирует дату как DD.MM.YYYY (как get_date_from_datetime в defs).
+
+    Args:
+        value: Дата или None
+
+    Returns:
+        Optional[str]: Строка даты или None
+    """
+    return value.strftime("%d.%m.%Y") if value else None
+
+
+def format_parent_row(row: Dict) -> Dict:
+    """
+    Приводит строку результата PARENTS_PAGE_SQL к формату ответа /admins/parents.
+
+    Args:
+        row: Строка результата запроса
+
+    Returns:
+        Dict: Данные родителя для ответа API
+    """
+    return {
+        "id": row["id"],
+        "name": row["name"],
+        "surname": row["surname"],
+        "phone": row["phone"],
+        "isActive": row["isActive"],
+        "datetime_create": format_date(row["datetime_create"]),
+        "photo_path": row["photo_path"] or not_user_photo,
+        "children_count": row["children_count"],
+        "active_orders_count": row["active_orders_count"],
+        "status": "Активен" if row["isActive"] else "Заблокирован"
+    }
+
+
+def format_schedule_row(row: Dict) -> Dict:
+    """
+    Приводит строку результата SCHEDULES_PAGE_SQL к формату ответа /admins/schedules.
+
+    Args:
+        row: Строка результата запроса
+
+    Returns:
+        Dict: Данные контракта для ответа API
+    """
+    exists = row["parent_exists"]
+    return {
+        "id": row["id"],
+        "title": row["title"],
+        "description": row["description"],
+        "children_count": row["children_count"],
+        "duration": row["duration"],
+        "week_days": row["week_days"],
+        "is_active": row["isActive"],
+        "datetime_create": row["datetime_create"].isoformat() if row["datetime_create"] else None,
+        "parent": {
+            "id": row["id_user"] if exists else None,
+            "name": row["parent_name"] if exists else None,
+            "surname": row["parent_surname"] if exists else None,
+            "phone": row["parent_phone"] if exists else None
+        },
+        "roads_count": row["roads_count"],
+        "drivers_assigned": int(row["drivers_assigned"])
+    }
+
+
+class AdminService:
+    """Сервис списков админ-панели"""
+
+    @staticmethod
+    async def get_parents_page(offset: int,
+                               limit: int,
+                               search: Optional[str] = None,
+                               is_active: Optional[bool] = None,
+                               has_children: Optional[bool] = None,
+                               has_active_orders: Optional[bool] = None) -> Tuple[List[Dict], int]:
+        """
+        Возвращает страницу родителей с количеством детей и активных заказов.
+        Выполняет один запрос (два - если страница пуста, для подсчета total).
+
+        Args:
+            offset: Смещение
+            limit: Размер страницы
+            search: Поиск по имени, фамилии, телефону
+            is_active: Фильтр по статусу аккаунта
+            has_children: Фильтр по наличию активных детей
+            has_active_orders: Фильтр по наличию активных графиков
+
+        Returns:
+            Tuple[List[Dict], int]: (родители на странице, общее количество по фильтрам)
+        """
+        params = [is_active, build_search_pattern(search), has_children, has_active_orders]
+        conn = Tortoise.get_connection("default")
+        rows = await conn.execute_query_dict(PARENTS_PAGE_SQL, params + [limit, offset])
+        if rows:
+            total = rows[0]["total"]
+        elif offset > 0:
+            total = (await conn.execute_query_dict(PARENTS_COUNT_SQL, params))[0]["total"]
+        else:
+            total = 0
+        return [format_parent_row(row) for row in rows], total
+
+    @staticmethod
+    async def get_schedules_page(limit: int,
+                                 offset: int = 0,
+                                 after_id: Optional[int] = None,
+                                 is_active: Optional[bool] = None,
+                                 parent_id: Optional[int] = None,
+                                 search: Optional[str] = None) -> Tuple[List[Dict], Optional[int], bool]:
+        """
+        Возвращает страницу контрактов с родителем, количеством маршрутов и водителей.
+        Один запрос на страницу; при постраничной навигации (без курсора) - еще один для total.
+
+        Args:
+            limit: Размер страницы
+            offset: Смещение (постраничная навигация)
+            after_id: Курсор - ID последнего контракта предыдущей страницы
+            is_active: Фильтр по статусу контракта
+            parent_id: Фильтр по ID родителя
+            search: Полнотекстовый поиск по названию
+
+        Returns:
+            Tuple[List[Dict], Optional[int], bool]: (контракты, общее количество или None
+            в режиме курсора, есть ли следующая страница)
+        """
+        params = [is_active, parent_id, build_tsquery(search)]
+        conn = Tortoise.get_connection("default")
+        rows = await conn.execute_query_dict(
+            SCHEDULES_PAGE_SQL,
+            params + [after_id, limit + 1, 0 if after_id is not None else offset]
+        )
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        total = None
+        if after_id is None:
+            total = (await conn.execute_query_dict(SCHEDULES_COUNT_SQL, params))[0]["total"]
+        return [format_schedule_row(row) for row in rows], total, has_more
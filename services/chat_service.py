@@ -0,0 +1,317 @@
+"""
+Сервисный слой для работы с чатами.
+Список чатов собирается набором SQL-запросов без обхода каждого чата в цикле,
+последнее сообщение и непрочитанные берутся из сводки chats.chat_summary,
+которая обновляется при записи сообщений и их прочтении.
+"""
+import time
+from typing import Dict, List, Optional, Tuple
+
+from tortoise import Tortoise
+from tortoise.transactions import atomic
+
+from models.chats_db import ChatsMessage, HistoryChatNotification, ChatsChatSummary
+from const.static_data_const import not_user_photo
+from common.logger import logger
+
+
+# Активные чаты пользователя вместе с собеседником, его фото, последним сообщением
+# и количеством непрочитанных (из chats.chat_summary). Поиск, сортировка и пагинация
+# выполняются в БД, общее количество считается оконной функцией в том же запросе.
+CHAT_LIST_SQL = """
+WITH my_chats AS (
+    SELECT cp.id_chat
+    FROM chats.chat_participant AS cp
+    LEFT JOIN chats.chat AS c ON c.id = cp.id_chat
+    WHERE cp.id_user = $1 AND c."isActive" IS DISTINCT FROM FALSE
+),
+counterpart AS (
+    SELECT DISTINCT ON (cp.id_chat) cp.id_chat, cp.id_user
+    FROM chats.chat_participant AS cp
+    JOIN my_chats AS mc ON mc.id_chat = cp.id_chat
+    WHERE cp.id_user <> $1
+    ORDER BY cp.id_chat, cp.id
+),
+counterpart_photo AS (
+    SELECT DISTINCT ON (up.id_user) up.id_user, up.photo_path
+    FROM users.user_photo AS up
+    JOIN counterpart AS cp ON cp.id_user = up.id_user
+    ORDER BY up.id_user, up.id
+)
+SELECT mc.id_chat,
+       cp.id_user AS id_counterpart,
+       u.name AS username,
+       ph.photo_path,
+       cs.last_timestamp AS timestamp_send,
+       CASE WHEN cs.last_msg_type = 1 THEN cs.last_msg ELSE mt.title END AS msg,
+       cs.id_last_message IS NOT NULL AS has_message,
+       COALESCE(cs.unread_count, 0) AS new_message,
+       COUNT(*) OVER () AS total
+FROM my_chats AS mc
+LEFT JOIN counterpart AS cp ON cp.id_chat = mc.id_chat
+LEFT JOIN users.user AS u ON u.id = cp.id_user
+LEFT JOIN counterpart_photo AS ph ON ph.id_user = cp.id_user
+LEFT JOIN chats.chat_summary AS cs ON cs.id_chat = mc.id_chat AND cs.id_user = $1
+LEFT JOIN data.message_type AS mt ON mt.id = cs.last_msg_type
+WHERE $2::text IS NULL OR u.name ILIKE $2 ESCAPE '\\'
+ORDER BY COALESCE(cs.last_timestamp, 0) DESC, mc.id_chat DESC
+LIMIT $3 OFFSET $4
+"""
+
+CHAT_LIST_COUNT_SQL = """
+SELECT COUNT(*) AS total
+FROM chats.chat_participant AS cp
+LEFT JOIN chats.chat AS c ON c.id = cp.id_chat
+WHERE cp.id_user = $1 AND c."isActive" IS DISTINCT FROM FALSE
+  AND ($2::text IS NULL OR EXISTS (
+      SELECT 1
+      FROM chats.chat_participant AS other
+      JOIN users.user AS u ON u.id = other.id_user
+      WHERE other.id_chat = cp.id_chat AND other.id_user <> $1
+        AND u.name ILIKE $2 ESCAPE '\\'
+  ))
+"""
+
+
+# Обновление сводки после нового сообщения: у получателя растет счетчик непрочитанных,
+# у отправителя (если его уведомления отмечены прочитанными) счетчик обнуляется.
+SUMMARY_MESSAGE_SQL = """
+INSERT INTO chats.chat_summary AS cs (id_chat, id_user, id_last_message, last_msg, last_msg_type,
+                                      last_timestamp, unread_count, datetime_update)
+SELECT cp.id_chat, cp.id_user, $2, $3, $4, $5,
+       CASE WHEN cp.id_user = $7 THEN 1 ELSE 0 END,
+       NOW()
+FROM (SELECT DISTINCT id_chat, id_user FROM chats.chat_participant WHERE id_chat = $1) AS cp
+ON CONFLICT (id_chat, id_user) DO UPDATE SET
+    id_last_message = EXCLUDED.id_last_message,
+    last_msg = EXCLUDED.last_msg,
+    last_msg_type = EXCLUDED.last_msg_type,
+    last_timestamp = EXCLUDED.last_timestamp,
+    unread_count = CASE
+        WHEN cs.id_user = $7 THEN cs.unread_count + 1
+        WHEN cs.id_user = $6 AND $8 THEN 0
+        ELSE cs.unread_count
+    END,
+    datetime_update = NOW()
+"""
+
+
+def build_search_pattern(search: Optional[str]) -> Optional[str]:
+    """
+    Превращает строку поиска в шаблон ILIKE по вхождению.
+
+    Args:
+        search: Поисковая строка или None
+
+    Returns:
+        Optional[str]: Шаблон вида %...% с экранированными спецсимволами или None
+    """
+    if not search:
+        return None
+    escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def format_chat_row(row: Dict) -> Dict:
+    """
+    Приводит строку результата CHAT_LIST_SQL к формату ответа /get_chats.
+
+    Args:
+        row: Строка результата запроса
+
+    Returns:
+        Dict: Чат в формате {"id_chat", "username", "photo_path", "message"}
+    """
+    chat = {"id_chat": row["id_chat"]}
+    if row["id_counterpart"] is not None:
+        chat["username"] = row["username"]
+        chat["photo_path"] = row["photo_path"] or not_user_photo
+    if row["has_message"]:
+        chat["message"] = {
+            "msg": row["msg"],
+            "time": row["timestamp_send"],
+            "new_message": row["new_message"]
+        }
+    else:
+        chat["message"] = None
+    return chat
+
+
+class ChatService:
+    """Сервис для работы с чатами"""
+
+    @staticmethod
+    async def get_chat_list(user_id: int,
+                            offset: int = 0,
+                            limit: int = 50,
+                            search: Optional[str] = None) -> Tuple[List[Dict], int]:
+        """
+        Получает страницу чатов пользователя фиксированным числом запросов.
+
+        Args:
+            user_id: ID пользователя
+            offset: Смещение
+            limit: Размер страницы
+            search: Поиск по имени собеседника
+
+        Returns:
+            Tuple[List[Dict], int]: (чаты страницы, общее количество с учетом поиска)
+        """
+        pattern = build_search_pattern(search)
+        conn = Tortoise.get_connection("default")
+        rows = await conn.execute_query_dict(CHAT_LIST_SQL, [user_id, pattern, limit, offset])
+
+        if rows:
+            total = rows[0]["total"]
+        elif offset:
+            # Страница за пределами выборки: оконная функция ничего не вернула
+            count = await conn.execute_query_dict(CHAT_LIST_COUNT_SQL, [user_id, pattern])
+            total = count[0]["total"]
+        else:
+            total = 0
+
+        logger.debug(
+            "Chat list loaded",
+            extra={"user_id": user_id, "chats_count": len(rows), "total": total}
+        )
+        return [format_chat_row(row) for row in rows], total
+
+    @staticmethod
+    @atomic(connection_name="default")
+    async def save_message(id_chat: int,
+                           id_sender: int,
+                           id_receiver: int,
+                           msg: str,
+                           msg_type: int,
+                           mark_sender_read: bool = True) -> ChatsMessage:
+        """
+        Сохраняет новое сообщение, уведомление получателю и сводку чата в одной транзакции.
+
+        Args:
+            id_chat: ID чата
+            id_sender: ID отправителя
+            id_receiver: ID получателя
+            msg: Текст сообщения
+            msg_type: Тип сообщения
+            mark_sender_read: Отметить непрочитанные отправителя в этом чате прочитанными
+
+        Returns:
+            ChatsMessage: Созданное сообщение
+        """
+        message = await ChatsMessage.create(
+            id_chat=id_chat,
+            id_sender=id_sender,
+            msg=msg,
+            msgType=msg_type,
+            timestamp_send=time.time(),
+        )
+        if mark_sender_read:
+            await HistoryChatNotification.filter(
+                id_user=id_sender, id_chat=id_chat, is_readed=False
+            ).update(is_readed=True)
+        await HistoryChatNotification.create(
+            id_user=id_receiver, id_chat=id_chat, id_msg=message.id
+        )
+        conn = Tortoise.get_connection("default")
+        await conn.execute_query(SUMMARY_MESSAGE_SQL, [
+            id_chat, message.id, msg, msg_type, int(message.timestamp_send),
+            id_sender, id_receiver, mark_sender_read
+        ])
+        return message
+
+    @staticmethod
+    async def update_last_message(id_message: int, msg: str, msg_type: int) -> None:
+        """
+        Обновляет текст последнего сообщения в сводке после редактирования.
+
+        Args:
+            id_message: ID отредактированного сообщения
+            msg: Новый текст
+            msg_type: Новый тип сообщения
+        """
+        await ChatsChatSummary.filter(id_last_message=id_message).update(
+            last_msg=msg, last_msg_type=msg_type
+        )
+
+    @staticmethod
+    async def get_messages_page(id_chat: int,
+                                limit: int = 10,
+                                offset: int = 0,
+                                before_id: Optional[int] = None,
+                                after_id: Optional[int] = None) -> Tuple[List[Dict], bool]:
+        """
+        Получает страницу сообщений чата от новых к старым.
+
+        С курсором before_id/after_id выборка идет по индексу (id_chat, id) без OFFSET,
+        поэтому глубина прокрутки не влияет на время запроса.
+
+        Args:
+            id_chat: ID чата
+            limit: Размер страницы
+            offset: Смещение (используется только без курсора)
+            before_id: Вернуть сообщения с id < before_id
+            after_id: Вернуть сообщения с id > after_id (вместе с before_id не передается)
+
+        Returns:
+            Tuple[List[Dict], bool]: (сообщения, есть ли еще сообщения в направлении выборки)
+
+        Raises:
+            ValueError: Переданы оба курсора
+        """
+        if before_id is not None and after_id is not None:
+            raise ValueError("before_id and after_id are mutually exclusive")
+        query = ChatsMessage.filter(id_chat=id_chat)
+        if after_id is not None:
+            # Ближайшие новые сообщения: идем по возрастанию id, затем разворачиваем
+            query = query.filter(id__gt=after_id).order_by("id")
+        else:
+            if before_id is not None:
+                query = query.filter(id__lt=before_id)
+            query = query.order_by("-id")
+            if before_id is None and offset:
+                query = query.offset(offset)
+        # Лишняя строка показывает, есть ли следующая страница, без COUNT(*)
+        messages = await query.limit(limit + 1).values()
+        has_more = len(messages) > limit
+        messages = messages[:limit]
+        if after_id is not None:
+            messages.reverse()
+        return messages, has_more
+
+    @staticmethod
+    @atomic(connection_name="default")
+    async def mark_chat_read(id_chat: int, id_user: int) -> None:
+        """
+        Отмечает сообщения чата прочитанными для пользователя и обнуляет счетчик в сводке.
+        Если непрочитанных нет, обновление не выполняется.
+
+        Args:
+            id_chat: ID чата
+            id_user: ID пользователя
+        """
+        unread = HistoryChatNotification.filter(id_user=id_user, id_chat=id_chat, is_readed=False)
+        if not await unread.exists():
+            return
+        await unread.update(is_readed=True)
+        await ChatsChatSummary.filter(
+            id_chat=id_chat, id_user=id_user, unread_count__gt=0
+        ).update(unread_count=0)
+
+    @staticmethod
+    async def get_unread_total(id_user: int) -> int:
+        """
+        Возвращает общее количество непрочитанных сообщений пользователя (бейдж).
+
+        Args:
+            id_user: ID пользователя
+
+        Returns:
+            int: Сумма непрочитанных по всем чатам
+        """
+        conn = Tortoise.get_connection("default")
+        rows = await conn.execute_query_dict(
+            "SELECT COALESCE(SUM(unread_count), 0) AS total FROM chats.chat_summary "
+            "WHERE id_user = $1 AND unread_count > 0",
+            [id_user]
+        )
+        return int(rows[0]["total"])
@@ -0,0 +1,224 @@
+"""
+Сохранение загруженных файлов (/api/v1.0/files/upload_files).
+Файл копируется на диск блоками по UPLOAD_CHUNK_SIZE в пуле потоков, поэтому ни файл целиком
+не попадает в память, ни запись на диск не блокирует event loop. Размер проверяется по типу файла
+до копирования (размер известен парсеру multipart) и еще раз по мере копирования. Одновременно
+считается sha256 содержимого: файл сохраняется под именем "{sha256}{расширение}", одинаковые файлы
+хранятся один раз, а имя можно кэшировать как неизменяемое.
+"""
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+from dataclasses import dataclass
+from typing import BinaryIO, List, Optional
+
+from fastapi import UploadFile
+
+from config import settings
+
+
+FILE_TYPE_IMAGE = 2
+FILE_TYPE_VIDEO = 3
+FILE_TYPE_OTHER = 4
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.heic', '.heif', '.svg')
+VIDEO_EXTENSIONS = ('.mp4', '.mkv', '.mov', '.avi', '.gif', '.h264')
+
+# Расширение сохраняется в имени файла, только если оно безопасно для URL и файловой системы
+EXTENSION_PATTERN = re.compile(r"^\.[a-z0-9]{1,10}$")
+
+# Имя файла, сохраненного по содержимому: sha256 + расширение
+CONTENT_NAME_PATTERN = re.compile(r"^[0-9a-f]{64}(\.[a-z0-9]{1,10})?$")
+
+
+class UploadTooLarge(Exception):
+    """Файл больше лимита для своего типа"""
+
+    def __init__(self, filename: str, limit: int):
+        super().__init__(f"{filename}: file is larger than {limit} bytes")
+        self.filename = filename
+        self.limit = limit
+
+
+@dataclass
+class StoredFile:
+    """Файл, скопированный во временный файл каталога загрузок"""
+
+    name: str
+    file_type: int
+    size: int
+    sha256: str
+    temp_path: str
+
+
+def get_file_type(filename: str) -> int:
+    """
+    Тип файла по расширению: 2 - изображение, 3 - видео, 4 - остальные.
+
+    Args:
+        filename: Имя файла
+
+    Returns:
+        int: Тип файла
+    """
+    filename = (filename or "").lower()
+    if filename.endswith(IMAGE_EXTENSIONS):
+        return FILE_TYPE_IMAGE
+    if filename.endswith(VIDEO_EXTENSIONS):
+        return FILE_TYPE_VIDEO
+    return FILE_TYPE_OTHER
+
+
+def get_size_limit(file_type: int) -> int:
+    """
+    Максимальный размер файла типа file_type в байтах.
+
+    Args:
+        file_type: Тип файла (get_file_type)
+
+    Returns:
+        int: Лимит в байтах
+    """
+    megabytes = {
+        FILE_TYPE_IMAGE: settings.upload_max_image_mb,
+        FILE_TYPE_VIDEO: settings.upload_max_video_mb,
+    }.get(file_type, settings.upload_max_other_mb)
+    return megabytes * 1024 * 1024
+
+
+def get_content_name(sha256: str, filename: str) -> str:
+    """
+    Имя файла по содержимому: sha256 и расширение исходного имени в нижнем регистре.
+
+    Args:
+        sha256: Hex sha256 содержимого
+        filename: Исходное имя файла
+
+    Returns:
+        str: Имя файла в каталоге загрузок
+    """
+    extension = os.path.splitext(str(filename or "").replace("/", "."))[1].lower()
+    return sha256 + extension if EXTENSION_PATTERN.match(extension) else sha256
+
+
+def is_content_name(name: str) -> bool:
+    """Имя файла сохранено по содержимому (содержимое под этим именем не меняется)."""
+    return CONTENT_NAME_PATTERN.match(name) is not None
+
+
+def _copy_chunk(source: BinaryIO, target: BinaryIO, digest, chunk_size: int) -> int:
+    chunk = source.read(chunk_size)
+    if chunk:
+        digest.update(chunk)
+        target.write(chunk)
+    return len(chunk)
+
+
+def _open_temp(directory: str):
+    fd, path = tempfile.mkstemp(dir=directory, prefix=".upload-")
+    return os.fdopen(fd, "wb"), path
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _publish(temp_path: str, path: str) -> bool:
+    if os.path.exists(path):
+        # Такой файл уже загружали
+        _remove(temp_path)
+        return False
+    os.chmod(temp_path, 0o644)
+    os.replace(temp_path, path)
+    return True
+
+
+class FileStorageService:
+    """Потоковое сохранение загруженных файлов"""
+
+    def __init__(self, directory: Optional[str] = None, chunk_size: Optional[int] = None):
+        self.directory = directory or settings.files_dir
+        self.chunk_size = chunk_size or settings.upload_chunk_size
+
+    async def receive(self, file: UploadFile) -> StoredFile:
+        """
+        Копирует файл во временный файл каталога загрузок, проверяя лимит размера.
+
+        Args:
+            file: Загруженный файл
+
+        Returns:
+            StoredFile: Временный файл с sha256 содержимого
+
+        Raises:
+            UploadTooLarge: Файл больше лимита для своего типа
+        """
+        file_type = get_file_type(file.filename)
+        limit = get_size_limit(file_type)
+        if file.size is not None and file.size > limit:
+            raise UploadTooLarge(file.filename, limit)
+
+        await file.seek(0)
+        target, temp_path = await asyncio.to_thread(_open_temp, self.directory)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            while True:
+                copied = await asyncio.to_thread(_copy_chunk, file.file, target, digest, self.chunk_size)
+                if not copied:
+                    break
+                size += copied
+                if size > limit:
+                    raise UploadTooLarge(file.filename, limit)
+            await asyncio.to_thread(target.close)
+        except BaseException:
+            await asyncio.to_thread(target.close)
+            await asyncio.to_thread(_remove, temp_path)
+            raise
+
+        sha256 = digest.hexdigest()
+        return StoredFile(name=get_content_name(sha256, file.filename), file_type=file_type,
+                          size=size, sha256=sha256, temp_path=temp_path)
+
+    async def save(self, files: List[UploadFile]) -> List[StoredFile]:
+        """
+        Сохраняет файлы под именами по содержимому. Если хотя бы один файл больше лимита,
+        не сохраняется ни один.
+
+        Args:
+            files: Загруженные файлы
+
+        Returns:
+            List[StoredFile]: Сохраненные файлы в порядке загрузки
+
+        Raises:
+            UploadTooLarge: Файл больше лимита для своего типа
+        """
+        stored: List[StoredFile] = []
+        try:
+            for file in files:
+                stored.append(await self.receive(file))
+        except BaseException:
+            for item in stored:
+                await asyncio.to_thread(_remove, item.temp_path)
+            raise
+        for item in stored:
+            await asyncio.to_thread(_publish, item.temp_path, self.path(item.name))
+        return stored
+
+    def path(self, name: str) -> str:
+        """Путь к файлу name в каталоге загрузок."""
+        return os.path.join(self.directory, name)
+
+    @staticmethod
+    def url(name: str) -> str:
+        """Публичный адрес файла name."""
+        return settings.files_base_url + name
+
+
+file_storage = FileStorageService()
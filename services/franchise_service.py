@@ -0,0 +1,162 @@
+"""
+Сервисный слой панели франшизы.
+Списки франшизы собираются одним SQL-запросом с агрегатами в подзапросах
+вместо нескольких запросов на каждого участника франшизы, финансовая статистика
+считается по дневным итогам data.franchise_balance_daily.
+"""
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from tortoise import Tortoise
+
+from const.static_data_const import not_user_photo
+
+
+DRIVER_STATUS_UNVERIFIED = "Не подтверждён"
+DRIVER_STATUS_DELETED = "Удалён"
+DRIVER_STATUS_BLOCKED = "Заблокирован"
+DRIVER_STATUS_ACTIVE = "Активен"
+
+# Значения фильтра status в /franchises/drivers
+DRIVER_STATUS_FILTERS = {
+    "unverified": DRIVER_STATUS_UNVERIFIED,
+    "deleted": DRIVER_STATUS_DELETED,
+    "blocked": DRIVER_STATUS_BLOCKED,
+    "active": DRIVER_STATUS_ACTIVE,
+}
+
+# Водители франшизы (id_type_account=2) со статусом и суммой активных заявок на вывод.
+# Статус: есть заявка на верификацию -> не подтвержден; удален; нет подтверждения аккаунта -> заблокирован.
+# Параметры: $1 id франшизы, $2 статус, $3 только с активными заявками на вывод, $4 limit, $5 offset
+FRANCHISE_DRIVERS_SQL = """
+WITH drivers AS (
+    SELECT u.id, u.surname, u.name, u.phone, u."isActive", u.datetime_create,
+           CASE
+               WHEN EXISTS (SELECT 1 FROM wait_data.verify_driver vd WHERE vd.id_driver = u.id)
+                   THEN '""" + DRIVER_STATUS_UNVERIFIED + """'
+               WHEN u."isActive" IS NULL THEN '""" + DRIVER_STATUS_DELETED + """'
+               WHEN NOT EXISTS (SELECT 1 FROM authentication.verify_account va WHERE va.id_user = u.id)
+                   THEN '""" + DRIVER_STATUS_BLOCKED + """'
+               ELSE '""" + DRIVER_STATUS_ACTIVE + """'
+           END AS status,
+           COALESCE(rp.money, 0) AS request_for_payment
+    FROM users.user u
+    LEFT JOIN (
+        SELECT id_user, SUM(money) AS money
+        FROM history.request_payment
+        WHERE "isActive" = TRUE
+        GROUP BY id_user
+    ) rp ON rp.id_user = u.id
+    WHERE u.id IN (SELECT fu.id_user FROM users.franchise_user fu WHERE fu.id_franchise = $1)
+      AND EXISTS (
+          SELECT 1 FROM authentication.user_account ua
+          WHERE ua.id_user = u.id AND ua.id_type_account = 2
+      )
+),
+page AS (
+    SELECT *, COUNT(*) OVER () AS total
+    FROM drivers
+    WHERE ($2::text IS NULL OR status = $2)
+      AND (NOT $3::boolean OR request_for_payment > 0)
+    ORDER BY datetime_create DESC NULLS LAST, id DESC
+    LIMIT $4 OFFSET $5
+)
+SELECT page.*, ph.photo_path
+FROM page
+LEFT JOIN LATERAL (
+    SELECT photo_path FROM users.user_photo
+    WHERE id_user = page.id
+    ORDER BY id
+    LIMIT 1
+) ph ON TRUE
+ORDER BY page.datetime_create DESC NULLS LAST, page.id DESC
+"""
+
+# Суммы движений баланса франшизы по типам операций за период [date_from, date_to).
+# Читает не более (дней в периоде x типов операций) строк дневных итогов.
+FRANCHISE_MONEY_SQL = """
+SELECT id_task, SUM(money) AS money
+FROM data.franchise_balance_daily
+WHERE id_franchise = $1
+  AND day >= $2 AND day < $3
+  AND id_task = ANY($4::bigint[])
+GROUP BY id_task
+"""
+
+
+def format_driver_row(row: Dict) -> Dict:
+    """
+    Приводит строку результата FRANCHISE_DRIVERS_SQL к формату ответа /franchises/drivers.
+
+    Args:
+        row: Строка результата запроса
+
+    Returns:
+        Dict: Данные водителя для ответа API
+    """
+    return {
+        "id": row["id"],
+        "surname": row["surname"],
+        "name": row["name"],
+        "phone": row["phone"],
+        "isActive": row["isActive"],
+        "datetime_create": row["datetime_create"].isoformat() if row["datetime_create"] else None,
+        "status": row["status"],
+        "photo_path": row["photo_path"] if row["photo_path"] is not None else not_user_photo,
+        "request_for_payment": float(row["request_for_payment"])
+    }
+
+
+class FranchiseService:
+    """Сервис панели франшизы"""
+
+    @staticmethod
+    async def get_drivers_page(id_franchise: int,
+                               status: Optional[str] = None,
+                               only_active_requests: bool = False,
+                               limit: Optional[int] = None,
+                               offset: int = 0) -> Tuple[List[Dict], int]:
+        """
+        Возвращает водителей франшизы (от новых к старым) одним запросом.
+
+        Args:
+            id_franchise: ID франшизы
+            status: Фильтр по статусу (значение из DRIVER_STATUS_FILTERS) или None
+            only_active_requests: Только водители с активными заявками на вывод
+            limit: Размер страницы (None - все водители)
+            offset: Смещение
+
+        Returns:
+            Tuple[List[Dict], int]: (водители, общее количество по фильтрам;
+            0, если страница пуста)
+        """
+        conn = Tortoise.get_connection("default")
+        rows = await conn.execute_query_dict(FRANCHISE_DRIVERS_SQL, [
+            id_franchise, DRIVER_STATUS_FILTERS.get(status), only_active_requests, limit, offset
+        ])
+        total = rows[0]["total"] if rows else 0
+        return [format_driver_row(row) for row in rows], total
+
+    @staticmethod
+    async def get_money_totals(id_franchise: int,
+                               date_from: date,
+                               date_to: date,
+                               tasks: Iterable[int]) -> Dict[int, float]:
+        """
+        Возвращает суммы движений баланса участников франшизы по типам операций.
+
+        Args:
+            id_franchise: ID франшизы
+            date_from: Начало периода (включительно)
+            date_to: Конец периода (не включительно)
+            tasks: Типы операций (id_task)
+
+        Returns:
+            Dict[int, float]: id_task -> сумма за период (0.0, если операций не было)
+        """
+        tasks = list(tasks)
+        totals = {id_task: 0.0 for id_task in tasks}
+        conn = Tortoise.get_connection("default")
+        for row in await conn.execute_query_dict(FRANCHISE_MONEY_SQL, [id_franchise, date_from, date_to, tasks]):
+            totals[row["id_task"]] = float(row["money"])
+        return totals
@@ -0,0 +1,274 @@
+"""
+Отдача загруженных файлов (GET /api/v1.0/files/{file}).
+Поддерживаются ETag/If-None-Match и запросы диапазонов (Range/If-Range) для перемотки видео.
+Файлы, сохраненные по содержимому ("{sha256}{расширение}", file_storage_service), не меняются,
+поэтому кэшируются клиентом на год без повторной проверки. По ?size=N изображения отдаются
+уменьшенными: превью собирается OpenCV в пуле процессов и хранится в {FILES_DIR}/.thumbnails,
+размер каталога ограничен, первыми удаляются превью, которые дольше всего не запрашивали.
+"""
+import asyncio
+import os
+import re
+import stat
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import anyio
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+from starlette.types import Receive, Scope, Send
+
+from config import settings
+from common.file_cache import evict_files, render_thumbnail
+from common.logger import logger
+from common.worker_pool import create_process_pool
+from services.file_storage_service import is_content_name
+
+
+# Ширина/высота превью; запрошенный размер округляется вверх до ближайшего из них
+THUMBNAIL_SIZES = (64, 128, 256, 512, 1024)
+
+# Форматы, которые умеет читать OpenCV; остальные файлы по ?size= отдаются без изменений
+THUMBNAIL_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.bmp')
+
+CACHE_CONTROL_IMMUTABLE = "private, max-age=31536000, immutable"
+CACHE_CONTROL_REVALIDATE = "private, no-cache"
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+_thumbnail_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_thumbnail_executor() -> ProcessPoolExecutor:
+    """
+    Пул процессов для сборки превью (common.file_cache.render_thumbnail), чтобы декодирование
+    изображений не блокировало event loop. Процессы пишут логи только в stderr (common/worker_pool.py).
+    """
+    global _thumbnail_executor
+    if _thumbnail_executor is None:
+        _thumbnail_executor = create_process_pool(settings.media_thumbnail_workers, settings.log_level)
+    return _thumbnail_executor
+
+
+def get_thumbnail_size(size: int) -> int:
+    """
+    Размер превью для запрошенного size: ближайший больший из THUMBNAIL_SIZES (не больше максимального).
+    """
+    return next((allowed for allowed in THUMBNAIL_SIZES if allowed >= size), THUMBNAIL_SIZES[-1])
+
+
+def get_etag(name: str, stat_result: os.stat_result, size: Optional[int] = None) -> str:
+    """
+    ETag файла: sha256 для файлов, сохраненных по содержимому, иначе время изменения и размер.
+
+    Args:
+        name: Имя файла
+        stat_result: os.stat исходного файла
+        size: Размер превью (None - исходный файл)
+
+    Returns:
+        str: ETag в кавычках
+    """
+    if is_content_name(name):
+        tag = name[:64]
+    else:
+        tag = f"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"
+    return f'"{tag}-{size}"' if size else f'"{tag}"'
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """
+    Совпадает ли ETag с одним из перечисленных в If-None-Match (слабое сравнение).
+    """
+    if not header:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in tags or etag in tags
+
+
+def parse_range(header: Optional[str], file_size: int) -> Optional[Tuple[int, int]]:
+    """
+    Разбирает заголовок Range с одним диапазоном байт.
+
+    Args:
+        header: Значение Range
+        file_size: Размер файла
+
+    Returns:
+        Optional[Tuple[int, int]]: (начало, конец включительно) или None, если нужно отдать файл
+        целиком (заголовка нет, несколько диапазонов или некорректный синтаксис)
+
+    Raises:
+        ValueError: Диапазон за пределами файла (416)
+    """
+    match = RANGE_PATTERN.match(header.strip()) if header else None
+    if match is None:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        # bytes=-N: последние N байт
+        length = int(end)
+        if length == 0 or file_size == 0:
+            raise ValueError(header)
+        return max(0, file_size - length), file_size - 1
+    start = int(start)
+    if end and int(end) < start:
+        return None
+    if start >= file_size:
+        raise ValueError(header)
+    end = min(int(end), file_size - 1) if end else file_size - 1
+    return start, end
+
+
+class FileRangeResponse(FileResponse):
+    """Часть файла (206 Partial Content): байты с start по end включительно"""
+
+    def __init__(self, path: str, start: int, end: int, stat_result: os.stat_result, headers: Dict[str, str]):
+        headers = dict(headers,
+                       **{"Content-Range": f"bytes {start}-{end}/{stat_result.st_size}",
+                          "Content-Length": str(end - start + 1)})
+        super().__init__(path, status_code=206, headers=headers, stat_result=stat_result)
+        self.start = start
+        self.end = end
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        remaining = self.end - self.start + 1
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+@dataclass
+class MediaFile:
+    """Файл для отдачи: исходный файл или превью"""
+
+    path: str
+    stat_result: os.stat_result
+    etag: str
+    cache_control: str
+
+
+class MediaService:
+    """Отдача загруженных файлов и кэш превью"""
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.directory = directory or settings.files_dir
+        self.thumbnails_directory = os.path.join(self.directory, ".thumbnails")
+        self.max_bytes = max_bytes if max_bytes is not None \
+            else settings.media_thumbnail_cache_max_mb * 1024 * 1024
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    async def get_file(self, name: str, size: Optional[int] = None) -> Optional[MediaFile]:
+        """
+        Файл для отдачи.
+
+        Args:
+            name: Имя файла в каталоге загрузок
+            size: Запрошенный размер превью (None - исходный файл)
+
+        Returns:
+            Optional[MediaFile]: Файл или None, если его нет
+        """
+        # Скрытые файлы - временные файлы загрузки и каталог превью
+        if not name or name.startswith(".") or os.path.basename(name) != name:
+            return None
+        path = os.path.join(self.directory, name)
+        try:
+            stat_result = await asyncio.to_thread(os.stat, path)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        if not stat.S_ISREG(stat_result.st_mode):
+            return None
+        cache_control = CACHE_CONTROL_IMMUTABLE if is_content_name(name) else CACHE_CONTROL_REVALIDATE
+
+        if size is not None and name.lower().endswith(THUMBNAIL_EXTENSIONS):
+            size = get_thumbnail_size(size)
+            thumbnail = await self.get_thumbnail(name, size)
+            if thumbnail is not None:
+                thumbnail_stat = await asyncio.to_thread(os.stat, thumbnail)
+                return MediaFile(thumbnail, thumbnail_stat, get_etag(name, stat_result, size), cache_control)
+        return MediaFile(path, stat_result, get_etag(name, stat_result), cache_control)
+
+    async def get_thumbnail(self, name: str, size: int) -> Optional[str]:
+        """
+        Путь к превью (собирает его, если в кэше нет). Обновляет mtime, чтобы превью дольше оставалось в кэше.
+
+        Args:
+            name: Имя исходного файла
+            size: Размер превью из THUMBNAIL_SIZES
+
+        Returns:
+            Optional[str]: Путь к превью или None, если файл не удалось прочитать как изображение
+        """
+        key = f"{size}_{name}"
+        path = os.path.join(self.thumbnails_directory, key)
+        try:
+            await asyncio.to_thread(os.utime, path)
+            return path
+        except FileNotFoundError:
+            pass
+
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.create_task(self._render(name, size, path))
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        # Отмена запроса не прерывает сборку: превью попадет в кэш
+        return path if await asyncio.shield(task) else None
+
+    async def response(self, request: Request, media: MediaFile) -> Response:
+        """
+        Ответ с файлом: 304, если копия клиента актуальна, 206 для Range, иначе файл целиком.
+
+        Args:
+            request: Запрос
+            media: Файл (get_file)
+
+        Returns:
+            Response: Ответ
+        """
+        headers = {"ETag": media.etag, "Cache-Control": media.cache_control, "Accept-Ranges": "bytes"}
+        if etag_matches(request.headers.get("if-none-match"), media.etag):
+            return Response(status_code=304, headers=headers)
+
+        if_range = request.headers.get("if-range")
+        if if_range is None or if_range.strip() == media.etag:
+            try:
+                byte_range = parse_range(request.headers.get("range"), media.stat_result.st_size)
+            except ValueError:
+                return Response(status_code=416,
+                                headers=dict(headers, **{"Content-Range": f"bytes */{media.stat_result.st_size}"}))
+            if byte_range is not None:
+                return FileRangeResponse(media.path, *byte_range, stat_result=media.stat_result, headers=headers)
+        return FileResponse(media.path, headers=headers, stat_result=media.stat_result)
+
+    async def _render(self, name: str, size: int, path: str) -> bool:
+        await asyncio.to_thread(os.makedirs, self.thumbnails_directory, exist_ok=True)
+        try:
+            rendered = await asyncio.get_running_loop().run_in_executor(
+                get_thumbnail_executor(), render_thumbnail, os.path.join(self.directory, name), path, size)
+        except Exception as exp:
+            logger.error(f"Can't to create thumbnail {size} for {name}: {exp}")
+            return False
+        if not rendered:
+            logger.warning(f"Thumbnail {size} for {name} was not created: file is not an image")
+            return False
+        removed = await asyncio.to_thread(evict_files, self.thumbnails_directory, self.max_bytes,
+                                          [os.path.basename(path)])
+        if removed:
+            logger.debug(f"Thumbnail cache eviction: {len(removed)} files removed")
+        return True
+
+
+media = MediaService()
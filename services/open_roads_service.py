@@ -0,0 +1,208 @@
+"""
+Лента открытых маршрутов для водителей.
+Открытые маршруты (активные, без назначенного водителя) хранятся в витрине data.open_road_market
+с точкой отправления, оплатой, днями недели и временем. Витрина обновляется точечно при изменении
+графиков, маршрутов, заявок и назначений водителей, а лента читает только ее.
+"""
+import math
+from typing import Dict, Iterable, Optional, Tuple
+
+from tortoise import Tortoise
+from tortoise.transactions import atomic
+
+from models.drivers_db import DataDriverMode
+
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+MARKET_DELETE_SQL = """
+DELETE FROM data.open_road_market
+WHERE id_schedule_road = ANY($1::bigint[]) OR id_schedule = ANY($2::bigint[])
+"""
+
+# Открытый маршрут: активен, график не удален, нет активного водителя.
+# Точка отправления - первый адрес маршрута.
+MARKET_INSERT_SQL = """
+INSERT INTO data.open_road_market (
+    id_schedule_road, id_schedule, week_day, week_days, start_time, end_time,
+    salary, pickup_lat, pickup_lon, requests_count, datetime_update
+)
+SELECT r.id, r.id_schedule, r.week_day, s.week_days, r.start_time, r.end_time,
+       r.amount, a.from_lat, a.from_lon,
+       (SELECT COUNT(*) FROM wait_data.schedule_road_drivers w
+        WHERE w.id_road = r.id AND w."isActive" = TRUE),
+       NOW()
+FROM data.schedule_road r
+JOIN data.schedule s ON s.id = r.id_schedule AND s."isActive" IS NOT NULL
+LEFT JOIN LATERAL (
+    SELECT from_lat, from_lon FROM data.schedule_road_address
+    WHERE id_schedule_road = r.id
+    ORDER BY id
+    LIMIT 1
+) a ON TRUE
+WHERE (r.id = ANY($1::bigint[]) OR r.id_schedule = ANY($2::bigint[]))
+  AND r."isActive" = TRUE
+  AND NOT EXISTS (
+      SELECT 1 FROM data.schedule_road_driver d
+      WHERE d.id_schedule_road = r.id AND d."isActive" = TRUE
+  )
+ON CONFLICT (id_schedule_road) DO UPDATE SET
+    id_schedule = EXCLUDED.id_schedule,
+    week_day = EXCLUDED.week_day,
+    week_days = EXCLUDED.week_days,
+    start_time = EXCLUDED.start_time,
+    end_time = EXCLUDED.end_time,
+    salary = EXCLUDED.salary,
+    pickup_lat = EXCLUDED.pickup_lat,
+    pickup_lon = EXCLUDED.pickup_lon,
+    requests_count = EXCLUDED.requests_count,
+    datetime_update = EXCLUDED.datetime_update
+"""
+
+# Страница графиков из витрины: фильтр по дню недели и радиусу (bounding box для индекса +
+# точная проверка по гаверсинусу), сортировка по ID графика (курсор) или по расстоянию.
+MARKET_PAGE_SQL = """
+WITH roads AS (
+    SELECT m.id_schedule_road, m.id_schedule,
+           CASE WHEN $2::float8 IS NULL OR m.pickup_lat IS NULL THEN NULL
+                ELSE 2 * $8::float8 * ASIN(SQRT(
+                    POWER(SIN(RADIANS(m.pickup_lat - $2) / 2), 2)
+                    + COS(RADIANS($2)) * COS(RADIANS(m.pickup_lat))
+                    * POWER(SIN(RADIANS(m.pickup_lon - $3::float8) / 2), 2)
+                ))
+           END AS distance_km
+    FROM data.open_road_market m
+    WHERE ($1::bigint IS NULL OR m.week_day = $1)
+      AND ($4::float8 IS NULL OR (m.pickup_lat BETWEEN $4 AND $5::float8
+                                  AND m.pickup_lon BETWEEN $6::float8 AND $7::float8))
+      AND ($10::bigint IS NULL OR m.id_schedule > $10)
+),
+filtered AS (
+    SELECT * FROM roads
+    WHERE $9::float8 IS NULL OR distance_km <= $9
+),
+page AS (
+    SELECT id_schedule, MIN(distance_km) AS distance_km
+    FROM filtered
+    GROUP BY id_schedule
+    ORDER BY CASE WHEN $13::boolean THEN MIN(distance_km) END NULLS LAST, id_schedule
+    LIMIT $11 OFFSET $12
+)
+SELECT f.id_schedule_road, f.id_schedule, p.distance_km
+FROM filtered f
+JOIN page p ON p.id_schedule = f.id_schedule
+ORDER BY CASE WHEN $13::boolean THEN p.distance_km END NULLS LAST, f.id_schedule, f.id_schedule_road
+"""
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """
+    Прямоугольник координат, содержащий круг радиуса radius_km вокруг точки.
+
+    Args:
+        latitude: Широта центра
+        longitude: Долгота центра
+        radius_km: Радиус в километрах
+
+    Returns:
+        Tuple[float, float, float, float]: (min_lat, max_lat, min_lon, max_lon)
+    """
+    delta_lat = radius_km / KM_PER_DEGREE
+    cos_lat = math.cos(math.radians(latitude))
+    if cos_lat < 1e-6 or radius_km / (KM_PER_DEGREE * cos_lat) >= 180:
+        # У полюса круг покрывает все долготы
+        return latitude - delta_lat, latitude + delta_lat, -180.0, 180.0
+    delta_lon = radius_km / (KM_PER_DEGREE * cos_lat)
+    return latitude - delta_lat, latitude + delta_lat, longitude - delta_lon, longitude + delta_lon
+
+
+class OpenRoadsService:
+    """Сервис ленты открытых маршрутов"""
+
+    @staticmethod
+    async def get_driver_position(id_driver: int) -> Optional[Tuple[float, float]]:
+        """
+        Последнее известное местоположение водителя (из режима поиска заказов).
+
+        Args:
+            id_driver: ID водителя
+
+        Returns:
+            Optional[Tuple[float, float]]: (latitude, longitude) или None
+        """
+        mode = await DataDriverMode.filter(id_driver=id_driver).order_by("-id").first().values(
+            "latitude", "longitude")
+        if not mode:
+            return None
+        return mode["latitude"], mode["longitude"]
+
+    @staticmethod
+    @atomic(connection_name="default")
+    async def refresh(road_ids: Iterable[int] = (), schedule_ids: Iterable[int] = ()) -> None:
+        """
+        Пересчитывает строки витрины для указанных маршрутов и всех маршрутов указанных графиков.
+        Вызывается после изменения графика, маршрута, адресов, заявок или назначения водителя.
+
+        Args:
+            road_ids: ID маршрутов
+            schedule_ids: ID графиков
+        """
+        params = [list(set(road_ids)), list(set(schedule_ids))]
+        if not params[0] and not params[1]:
+            return
+        conn = Tortoise.get_connection("default")
+        await conn.execute_query(MARKET_DELETE_SQL, params)
+        await conn.execute_query(MARKET_INSERT_SQL, params)
+
+    @staticmethod
+    async def get_open_roads_page(limit: int,
+                                  after_id: Optional[int] = None,
+                                  offset: int = 0,
+                                  week_day: Optional[int] = None,
+                                  position: Optional[Tuple[float, float]] = None,
+                                  radius_km: Optional[float] = None,
+                                  sort_by_distance: bool = False) -> Tuple[Dict[int, Dict], bool]:
+        """
+        Страница графиков, у которых есть открытые маршруты (одно чтение витрины).
+
+        Args:
+            limit: Количество графиков на странице
+            after_id: Курсор - ID последнего графика предыдущей страницы (только при сортировке по ID)
+            offset: Смещение (для клиентов без курсора и при сортировке по расстоянию)
+            week_day: Фильтр по дню недели маршрута
+            position: (latitude, longitude) водителя для расчета расстояния
+            radius_km: Радиус поиска в километрах (используется вместе с position)
+            sort_by_distance: Сортировать графики по ближайшей точке отправления (требует position)
+
+        Returns:
+            Tuple[Dict[int, Dict], bool]: (id графика -> {"roads": ID открытых маршрутов,
+            "distance_km": расстояние до ближайшей точки отправления или None}, есть ли следующая страница)
+        """
+        latitude = longitude = None
+        box = (None, None, None, None)
+        if position is not None:
+            latitude, longitude = float(position[0]), float(position[1])
+            if radius_km is not None:
+                box = bounding_box(latitude, longitude, radius_km)
+        sort_by_distance = sort_by_distance and position is not None
+
+        conn = Tortoise.get_connection("default")
+        rows = await conn.execute_query_dict(MARKET_PAGE_SQL, [
+            week_day, latitude, longitude, *box, EARTH_RADIUS_KM,
+            float(radius_km) if radius_km is not None and position is not None else None,
+            None if sort_by_distance else after_id, limit + 1, offset, sort_by_distance
+        ])
+
+        schedules: Dict[int, Dict] = {}
+        for row in rows:
+            distance = row["distance_km"]
+            schedule = schedules.setdefault(row["id_schedule"], {
+                "roads": [],
+                "distance_km": round(float(distance), 2) if distance is not None else None
+            })
+            schedule["roads"].append(row["id_schedule_road"])
+        has_more = len(schedules) > limit
+        if has_more:
+            schedules.pop(list(schedules)[-1])
+        return schedules, has_more
@@ -14,6 +14,7 @@ from models.users_db import UsersUser, UsersUserPhoto
 from models.drivers_db import UsersDriverData, UsersCar
 from models.static_data_db import DataCarMark, DataCarModel, DataColor
 from common.logger import logger
+from services.open_roads_service import OpenRoadsService
 
 
 class OrderService:
@@ -271,6 +272,7 @@ class OrderService:
         # Обновляем статус
         if is_accepted:
             await DataScheduleRoadDriver.filter(id=driver_road_id).update(isActive=True)
+            await OpenRoadsService.refresh(road_ids=[road.id])
             logger.info(
                 f"Driver {driver_road.id_driver} accepted for road {road.id}",
                 extra={
@@ -281,6 +283,7 @@ class OrderService:
             )
         else:
             await DataScheduleRoadDriver.filter(id=driver_road_id).update(isActive=False)
+            await OpenRoadsService.refresh(road_ids=[road.id])
             logger.info(
                 f"Driver {driver_road.id_driver} rejected for road {road.id}",
                 extra={
@@ -19,6 +19,8 @@ from models.users_db import (
 from models.orders_db import DataSchedule
 from services.payment_service import PaymentService
 from defs import sendPush
+from common.metrics import tracked_job
+from common.tracing import traced, SPAN_CONSUMER
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +29,8 @@ class PaymentScheduler:
     """Сервис для автоматического еженедельного списания средств"""
     
     @staticmethod
+    @tracked_job("weekly_payments")
+    @traced("job.weekly_payments", SPAN_CONSUMER)
     async def process_weekly_payments() -> Dict[str, Any]:
         """
         Основная функция для обработки еженедельных платежей.
@@ -115,6 +119,7 @@ class PaymentScheduler:
             raise
     
     @staticmethod
+    @traced("job.weekly_payments.process_single_payment")
     async def _process_single_payment(schedule: WeeklyPaymentSchedule) -> bool:
         """
         Обработка одного платежа.
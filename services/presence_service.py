@@ -0,0 +1,151 @@
+"""
+Сервис присутствия пользователей в чате.
+Отслеживает подключения к чат-сокету и хранит их в users.user_presence (запись на пару
+пользователь - воркер), чтобы перед push о новом сообщении любой воркер мог проверить, открыт ли
+у получателя чат. Пока в воркере есть подключения, присутствие продлевается самим сервером
+одним запросом раз в WRITE_INTERVAL; клиентские кадры в БД не пишутся.
+"""
+import asyncio
+import os
+import socket
+from typing import Dict, Optional
+
+from tortoise import Tortoise
+
+from common.logger import logger
+
+
+# Каналы WebSocket (метки метрик); присутствие учитывается только для чата
+CHANNEL_CHAT = "chat"
+CHANNEL_DRIVER = "driver"
+CHANNEL_CLIENT = "client"
+
+PRESENCE_UPSERT_SQL = """
+INSERT INTO users.user_presence (id_user, worker_id, online_until, last_seen)
+VALUES ($1, $2, NOW() + make_interval(secs => $3), NOW())
+ON CONFLICT (id_user, worker_id) DO UPDATE SET
+    online_until = EXCLUDED.online_until,
+    last_seen = EXCLUDED.last_seen
+"""
+
+PRESENCE_RENEW_SQL = """
+INSERT INTO users.user_presence (id_user, worker_id, online_until, last_seen)
+SELECT id_user, $2, NOW() + make_interval(secs => $3), NOW()
+FROM unnest($1::bigint[]) AS id_user
+ON CONFLICT (id_user, worker_id) DO UPDATE SET
+    online_until = EXCLUDED.online_until,
+    last_seen = EXCLUDED.last_seen
+"""
+
+PRESENCE_OFFLINE_SQL = """
+UPDATE users.user_presence
+SET online_until = NOW(), last_seen = NOW()
+WHERE id_user = $1 AND worker_id = $2
+"""
+
+PRESENCE_IS_ONLINE_SQL = """
+SELECT EXISTS (
+    SELECT 1 FROM users.user_presence
+    WHERE id_user = $1 AND online_until > NOW()
+) AS online
+"""
+
+
+class PresenceService:
+    """Сервис присутствия пользователей в чате"""
+
+    # Сколько секунд пользователь считается онлайн после последнего продления
+    HEARTBEAT_TTL = 90
+    # Интервал продления присутствия подключенных пользователей
+    WRITE_INTERVAL = 30
+
+    def __init__(self):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        # id_user -> количество чат-сокетов в текущем воркере
+        self._connections: Dict[int, int] = {}
+        self._renew_task: Optional[asyncio.Task] = None
+
+    def is_online_local(self, id_user: int) -> bool:
+        """Подключен ли пользователь к чату в текущем воркере."""
+        return id_user in self._connections
+
+    async def connect(self, id_user: int) -> None:
+        """
+        Регистрирует подключение пользователя к чат-сокету.
+
+        Args:
+            id_user: ID пользователя
+        """
+        self._connections[id_user] = self._connections.get(id_user, 0) + 1
+        try:
+            conn = Tortoise.get_connection("default")
+            await conn.execute_query(PRESENCE_UPSERT_SQL, [id_user, self.worker_id, float(self.HEARTBEAT_TTL)])
+        except Exception as e:
+            logger.error(f"Presence update failed: {str(e)}", extra={"user_id": id_user})
+        if self._renew_task is None or self._renew_task.done():
+            self._renew_task = asyncio.create_task(self._renew_loop())
+
+    async def disconnect(self, id_user: int) -> None:
+        """
+        Снимает подключение пользователя. Когда у пользователя не осталось чат-сокетов
+        в воркере, запись воркера помечается офлайн.
+
+        Args:
+            id_user: ID пользователя
+        """
+        count = self._connections.get(id_user)
+        if count is None:
+            return
+        if count > 1:
+            self._connections[id_user] = count - 1
+            return
+        del self._connections[id_user]
+        try:
+            conn = Tortoise.get_connection("default")
+            await conn.execute_query(PRESENCE_OFFLINE_SQL, [id_user, self.worker_id])
+        except Exception as e:
+            logger.error(f"Presence offline update failed: {str(e)}", extra={"user_id": id_user})
+
+    async def is_online(self, id_user: int) -> bool:
+        """
+        Проверяет, подключен ли пользователь к чату в любом воркере.
+        При ошибке БД считаем пользователя офлайн, чтобы не потерять push.
+
+        Args:
+            id_user: ID пользователя
+
+        Returns:
+            bool: Онлайн ли пользователь
+        """
+        if self.is_online_local(id_user):
+            return True
+        try:
+            conn = Tortoise.get_connection("default")
+            rows = await conn.execute_query_dict(PRESENCE_IS_ONLINE_SQL, [id_user])
+            return bool(rows and rows[0]["online"])
+        except Exception as e:
+            logger.error(f"Presence check failed: {str(e)}", extra={"user_id": id_user})
+            return False
+
+    async def renew(self) -> None:
+        """
+        Продлевает присутствие всех пользователей, подключенных к текущему воркеру, одним запросом.
+        """
+        user_ids = list(self._connections)
+        if not user_ids:
+            return
+        try:
+            conn = Tortoise.get_connection("default")
+            await conn.execute_query(PRESENCE_RENEW_SQL, [user_ids, self.worker_id, float(self.HEARTBEAT_TTL)])
+        except Exception as e:
+            logger.error(f"Presence renewal failed: {str(e)}")
+
+    async def _renew_loop(self) -> None:
+        # Каждые WRITE_INTERVAL секунд, пока в воркере есть подключения; HEARTBEAT_TTL с запасом
+        # перекрывает интервал, поэтому подключенный пользователь не выпадает в офлайн
+        while self._connections:
+            await asyncio.sleep(self.WRITE_INTERVAL)
+            await self.renew()
+
+
+presence = PresenceService()
@@ -0,0 +1,179 @@
+"""
+Кэш конфигурации цен: тарифы по франшизам, активные коэффициенты формулы стоимости
+и привязка пользователей к франшизе.
+Каждое изменение data.car_tariff, data.pricing_coefficients и users.franchise_user увеличивает
+версию в data.pricing_config_version (триггеры миграции 021). Воркер сверяет версию не чаще раза
+в PRICING_VERSION_CHECK_SECONDS и перечитывает конфигурацию, если она изменилась; после записи
+в своем воркере invalidate() заставляет сверить версию на следующем запросе. Если таблицы версии
+нет (миграция 021 не применена), версия считается равной 0: конфигурация читается один раз
+и перечитывается только после invalidate() в этом воркере.
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from tortoise import Tortoise
+from tortoise.exceptions import OperationalError
+
+from common.logger import logger
+from config import settings
+from const.cost_formulas import DEFAULT_COEFFICIENTS, PricingCoefficientsValues, set_current_coefficients
+from models.static_data_db import DataCarTariff, PricingCoefficients
+from models.users_db import UsersFranchiseUser
+
+
+PRICING_VERSION_SQL = "SELECT version FROM data.pricing_config_version WHERE id = 1"
+
+# SQLSTATE undefined_table
+UNDEFINED_TABLE = "42P01"
+
+COEFFICIENT_FIELDS = ("vm", "s1", "kc", "ks", "kg")
+
+# Сколько привязок пользователь -> франшиза хранить в одной версии конфигурации
+FRANCHISE_USERS_LIMIT = 10000
+
+
+@dataclass
+class PricingConfig:
+    """Конфигурация цен одной версии"""
+
+    version: int
+    # Все тарифы (в том числе неактивные) по id
+    tariffs: Dict[int, Dict]
+    # id_franchise -> тарифы франшизы по возрастанию id
+    franchise_tariffs: Dict[int, List[Dict]]
+    coefficients: PricingCoefficientsValues
+    # Строка data.pricing_coefficients (None, если активных коэффициентов нет)
+    coefficients_row: Optional[Dict]
+    # id_user -> id_franchise (None - пользователь не привязан); заполняется по запросам
+    franchise_by_user: Dict[int, Optional[int]] = field(default_factory=dict)
+
+
+async def load_pricing_config(version: int) -> PricingConfig:
+    """
+    Загружает тарифы и активные коэффициенты.
+
+    Args:
+        version: Версия конфигурации, прочитанная до загрузки
+
+    Returns:
+        PricingConfig: Конфигурация цен
+    """
+    tariffs = await DataCarTariff.all().order_by("id").values()
+    franchise_tariffs: Dict[int, List[Dict]] = {}
+    for tariff in tariffs:
+        franchise_tariffs.setdefault(tariff["id_franchise"], []).append(tariff)
+
+    coefficients_row = await PricingCoefficients.filter(is_active=True).order_by("id").first().values()
+    if coefficients_row:
+        coefficients = PricingCoefficientsValues(
+            **{name: float(coefficients_row[name]) for name in COEFFICIENT_FIELDS}
+        )
+    else:
+        coefficients = DEFAULT_COEFFICIENTS
+
+    return PricingConfig(
+        version=version,
+        tariffs={tariff["id"]: tariff for tariff in tariffs},
+        franchise_tariffs=franchise_tariffs,
+        coefficients=coefficients,
+        coefficients_row=coefficients_row or None
+    )
+
+
+class PricingConfigService:
+    """Версионированный кэш конфигурации цен в памяти воркера"""
+
+    def __init__(self):
+        self._config: Optional[PricingConfig] = None
+        self._checked_at = float("-inf")
+        self._lock = asyncio.Lock()
+        self._version_table_missing = False
+
+    async def get(self) -> PricingConfig:
+        """
+        Текущая конфигурация цен; версия в БД сверяется не чаще PRICING_VERSION_CHECK_SECONDS.
+
+        Returns:
+            PricingConfig: Конфигурация цен
+        """
+        if self._config is not None and time.monotonic() - self._checked_at < settings.pricing_version_check_seconds:
+            return self._config
+        async with self._lock:
+            if self._config is None or time.monotonic() - self._checked_at >= settings.pricing_version_check_seconds:
+                # Версия читается до загрузки: запись во время загрузки сменит версию и вызовет перечитывание
+                version = await self._read_version()
+                if self._config is None or self._config.version != version:
+                    self._config = await load_pricing_config(version)
+                    set_current_coefficients(self._config.coefficients)
+                self._checked_at = time.monotonic()
+        return self._config
+
+    def invalidate(self) -> None:
+        """Сверить версию на следующем запросе (после изменения тарифов или коэффициентов в этом воркере)."""
+        self._checked_at = float("-inf")
+        if self._version_table_missing and self._config is not None:
+            # Без таблицы версии изменение не отличить по версии - конфигурация перечитывается целиком
+            self._config = None
+
+    async def get_tariff(self, id_tariff: int) -> Optional[Dict]:
+        """
+        Тариф по ID.
+
+        Args:
+            id_tariff: ID тарифа
+
+        Returns:
+            Optional[Dict]: Строка data.car_tariff или None, если тариф не найден
+        """
+        return (await self.get()).tariffs.get(id_tariff)
+
+    async def get_franchise_tariffs(self, id_franchise: int, only_active: bool = True) -> List[Dict]:
+        """
+        Тарифы франшизы по возрастанию id.
+
+        Args:
+            id_franchise: ID франшизы
+            only_active: Только активные тарифы
+
+        Returns:
+            List[Dict]: Строки data.car_tariff
+        """
+        tariffs = (await self.get()).franchise_tariffs.get(id_franchise, [])
+        return [tariff for tariff in tariffs if tariff["isActive"]] if only_active else list(tariffs)
+
+    async def get_user_franchise(self, id_user: int) -> Optional[int]:
+        """
+        Франшиза пользователя (users.franchise_user).
+
+        Args:
+            id_user: ID пользователя
+
+        Returns:
+            Optional[int]: ID франшизы или None, если пользователь не привязан к франшизе
+        """
+        config = await self.get()
+        if id_user not in config.franchise_by_user:
+            ref = await UsersFranchiseUser.filter(id_user=id_user).order_by("id").first().values("id_franchise")
+            if len(config.franchise_by_user) >= FRANCHISE_USERS_LIMIT:
+                config.franchise_by_user.clear()
+            config.franchise_by_user[id_user] = ref["id_franchise"] if ref else None
+        return config.franchise_by_user[id_user]
+
+    async def _read_version(self) -> int:
+        conn = Tortoise.get_connection("default")
+        try:
+            _, rows = await conn.execute_query(PRICING_VERSION_SQL)
+        except OperationalError as exp:
+            if getattr(exp.args[0] if exp.args else None, "sqlstate", None) != UNDEFINED_TABLE:
+                raise
+            if not self._version_table_missing:
+                logger.warning("data.pricing_config_version is missing (migration 021): "
+                               "pricing config is reloaded only after invalidate()")
+            self._version_table_missing = True
+            return 0
+        return rows[0]["version"] if rows else 0
+
+
+pricing_config = PricingConfigService()
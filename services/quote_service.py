@@ -0,0 +1,44 @@
+"""
+Расчет стоимости разовой поездки сразу для всех тарифов франшизы и нескольких вариантов маршрута.
+Тарифы и активные коэффициенты берутся из кэша конфигурации цен, матрица стоимостей
+считается одним проходом NumPy (get_total_cost_matrix).
+"""
+from typing import Dict, List, Optional
+
+from const.cost_formulas import get_total_cost_matrix
+from services.pricing_config_service import pricing_config
+
+
+class QuoteService:
+    """Сервис расчета стоимости разовых поездок"""
+
+    @staticmethod
+    async def quote_onetime(id_user: int, routes: List[Dict], id_tariffs: Optional[List[int]] = None) -> List[Dict]:
+        """
+        Стоимость каждого варианта маршрута по каждому тарифу франшизы пользователя.
+
+        Args:
+            id_user: ID пользователя (тарифы его франшизы)
+            routes: Варианты маршрута: {"distance": метры, "duration": секунды}
+            id_tariffs: Тарифы для расчета; по умолчанию все активные тарифы франшизы,
+                тарифы других франшиз и неактивные пропускаются
+
+        Returns:
+            List[Dict]: [{"id_tariff": ..., "prices": [стоимость для каждого варианта маршрута]}]
+        """
+        id_franchise = await pricing_config.get_user_franchise(id_user)
+        tariffs = await pricing_config.get_franchise_tariffs(id_franchise) if id_franchise is not None else []
+        if id_tariffs is not None:
+            requested = set(id_tariffs)
+            tariffs = [tariff for tariff in tariffs if tariff["id"] in requested]
+        if not tariffs:
+            return []
+
+        config = await pricing_config.get()
+        prices = get_total_cost_matrix(
+            M=[tariff["amount"] or 0 for tariff in tariffs],
+            S2=[route["distance"] for route in routes],
+            To=[route["duration"] for route in routes],
+            coefficients=config.coefficients
+        )
+        return [{"id_tariff": tariff["id"], "prices": row} for tariff, row in zip(tariffs, prices.tolist())]
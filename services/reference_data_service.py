@@ -0,0 +1,264 @@
+"""
+Кэш справочников для роутов static_data: страны, цвета, города, марки и модели автомобилей,
+дополнительные параметры поездки, статусы поездок.
+Справочники меняются редко, а мобильные приложения запрашивают их при каждом запуске, поэтому
+таблицы загружаются в память при старте, ответ без фильтров хранится уже сериализованным,
+а по ETag/Last-Modified клиент получает 304 без тела.
+Запись через админские роуты сбрасывает кэш таблицы (invalidate); в остальных воркерах
+таблица перечитывается по истечении REFERENCE_DATA_TTL, доп. параметры поездки, которые меняются
+через админку, - по истечении REFERENCE_DATA_DRIVE_PARAMETERS_TTL.
+"""
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass, field
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+
+from common.logger import logger
+from config import settings
+from models.orders_db import DataDrivingStatus
+from models.static_data_db import DataCarMark, DataCarModel, DataCity, DataColor, DataCountry, DataOtherDriveParametr
+
+
+COUNTRIES = "countries"
+COLORS = "colors"
+CITIES = "cities"
+CAR_MARKS = "marks"
+CAR_MODELS = "models"
+DRIVE_PARAMETERS = "data"
+DRIVE_STATUSES = "drive_statuses"
+
+# Клиент хранит ответ, но проверяет его актуальность при каждом запросе
+CACHE_CONTROL = "private, no-cache"
+
+
+@dataclass
+class ReferenceTable:
+    """Загруженный справочник"""
+
+    # Строки в формате ответа API, по возрастанию id
+    rows: List[Dict]
+    # Исходные названия в нижнем регистре для поиска по title (как title__icontains)
+    search_titles: List[str]
+    by_id: Dict[int, Dict]
+    # Ответ без фильтров: {"status": True, "message": "Success!", <ключ>: rows}
+    body: bytes
+    etag: str
+    last_modified: str
+    loaded_at: float
+    # id_car_mark -> модели марки (только для моделей автомобилей)
+    by_mark: Dict[int, List[Dict]] = field(default_factory=dict)
+
+    def search(self, title: str, rows: Optional[List[Dict]] = None) -> List[Dict]:
+        """
+        Строки, название которых содержит title без учета регистра.
+
+        Args:
+            title: Подстрока названия
+            rows: Подмножество строк справочника (по умолчанию все)
+
+        Returns:
+            List[Dict]: Найденные строки в исходном порядке
+        """
+        needle = title.lower()
+        allowed = None if rows is None else {id(row) for row in rows}
+        return [row for row, search_title in zip(self.rows, self.search_titles)
+                if needle in search_title and (allowed is None or id(row) in allowed)]
+
+
+async def load_countries() -> List[Dict]:
+    return await DataCountry.filter().order_by("id").all().values()
+
+
+async def load_colors() -> List[Dict]:
+    return await DataColor.filter().order_by("id").all().values()
+
+
+async def load_cities() -> List[Dict]:
+    return await DataCity.filter().order_by("id").all().values()
+
+
+async def load_car_marks() -> List[Dict]:
+    return await DataCarMark.filter().order_by("id").all().values()
+
+
+async def load_car_models() -> List[Dict]:
+    return await DataCarModel.filter().order_by("id").all().values()
+
+
+async def load_drive_parameters() -> List[Dict]:
+    rows = await DataOtherDriveParametr.filter(isActive=True).order_by("id").all().values(
+        "id", "title", "amount", "isActive")
+    for row in rows:
+        row["amount"] = float(row["amount"])
+    return rows
+
+
+async def load_drive_statuses() -> List[Dict]:
+    rows = await DataDrivingStatus.filter().order_by("id").all().values()
+    for row in rows:
+        row["title"] = row.pop("status")
+    return rows
+
+
+def format_car_model(row: Dict) -> Dict:
+    """
+    Модель автомобиля в формате ответа API: к названию добавляется год выпуска.
+    """
+    if row["releaseYear"] is None:
+        return row
+    return {**row, "title": f"{row['title']} ({row['releaseYear']})"}
+
+
+LOADERS: Dict[str, Callable[[], Awaitable[List[Dict]]]] = {
+    COUNTRIES: load_countries,
+    COLORS: load_colors,
+    CITIES: load_cities,
+    CAR_MARKS: load_car_marks,
+    CAR_MODELS: load_car_models,
+    DRIVE_PARAMETERS: load_drive_parameters,
+    DRIVE_STATUSES: load_drive_statuses,
+}
+
+
+def build_table(name: str, raw_rows: List[Dict], previous: Optional[ReferenceTable] = None) -> ReferenceTable:
+    """
+    Собирает справочник из строк БД: индексы, сериализованный ответ и ETag.
+    ETag считается по содержимому, поэтому совпадает во всех воркерах; Last-Modified
+    сохраняется, если содержимое не изменилось.
+
+    Args:
+        name: Ключ справочника в ответе
+        raw_rows: Строки из БД по возрастанию id
+        previous: Ранее загруженная версия справочника
+
+    Returns:
+        ReferenceTable: Справочник
+    """
+    rows = [format_car_model(row) for row in raw_rows] if name == CAR_MODELS else raw_rows
+    body = JSONResponse({"status": True, "message": "Success!", name: rows}).body
+    etag = f'"{hashlib.sha1(body).hexdigest()}"'
+    if previous is not None and previous.etag == etag:
+        last_modified = previous.last_modified
+    else:
+        last_modified = formatdate(usegmt=True)
+
+    by_mark: Dict[int, List[Dict]] = {}
+    if name == CAR_MODELS:
+        for row in rows:
+            by_mark.setdefault(row["id_car_mark"], []).append(row)
+
+    return ReferenceTable(
+        rows=rows,
+        search_titles=[(row.get("title") or "").lower() for row in raw_rows],
+        by_id={row["id"]: row for row in rows},
+        body=body,
+        etag=etag,
+        last_modified=last_modified,
+        loaded_at=time.monotonic(),
+        by_mark=by_mark
+    )
+
+
+def get_ttl(name: str) -> int:
+    """
+    Через сколько секунд справочник перечитывается из БД (изменения, сделанные в других воркерах).
+    """
+    if name == DRIVE_PARAMETERS:
+        return settings.reference_data_drive_parameters_ttl
+    return settings.reference_data_ttl
+
+
+def is_not_modified(request: Request, table: ReferenceTable) -> bool:
+    """
+    Актуальна ли копия клиента (If-None-Match, при его отсутствии If-Modified-Since).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or table.etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return parsedate_to_datetime(table.last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+class ReferenceDataService:
+    """Кэш справочников в памяти воркера"""
+
+    def __init__(self):
+        self._tables: Dict[str, ReferenceTable] = {}
+        self._stale: Dict[str, bool] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def load_all(self) -> None:
+        """Загружает все справочники (при старте приложения)."""
+        for name in LOADERS:
+            await self.get(name)
+
+    async def get(self, name: str) -> ReferenceTable:
+        """
+        Справочник по ключу; загружается при первом обращении, после invalidate и по истечении TTL.
+
+        Args:
+            name: Ключ справочника (COUNTRIES, CAR_MODELS, ...)
+
+        Returns:
+            ReferenceTable: Справочник
+        """
+        table = self._tables.get(name)
+        if table is not None and not self._is_expired(name, table):
+            return table
+        lock = self._locks.setdefault(name, asyncio.Lock())
+        async with lock:
+            # Пока ждали блокировку, справочник мог загрузить другой запрос
+            table = self._tables.get(name)
+            if table is None or self._is_expired(name, table):
+                self._stale[name] = False
+                table = build_table(name, await LOADERS[name](), self._tables.get(name))
+                self._tables[name] = table
+                logger.debug(f"Reference data {name} loaded: {len(table.rows)} rows")
+        return table
+
+    def invalidate(self, name: str) -> None:
+        """
+        Сбрасывает справочник после изменения таблицы; следующий запрос перечитает его из БД.
+
+        Args:
+            name: Ключ справочника
+        """
+        self._stale[name] = True
+
+    def _is_expired(self, name: str, table: ReferenceTable) -> bool:
+        return self._stale.get(name, False) or time.monotonic() - table.loaded_at > get_ttl(name)
+
+    async def response(self, request: Request, name: str, rows: Optional[List[Dict]] = None) -> Response:
+        """
+        Ответ со справочником и заголовками ETag/Last-Modified; 304, если копия клиента актуальна.
+        ETag относится к версии таблицы, поэтому подходит и для ответов с фильтрами.
+
+        Args:
+            request: Запрос
+            name: Ключ справочника
+            rows: Отфильтрованные строки; None - весь справочник (готовое тело ответа)
+
+        Returns:
+            Response: Ответ
+        """
+        table = await self.get(name)
+        headers = {"ETag": table.etag, "Last-Modified": table.last_modified, "Cache-Control": CACHE_CONTROL}
+        if is_not_modified(request, table):
+            return Response(status_code=304, headers=headers)
+        if rows is None:
+            return Response(table.body, media_type="application/json", headers=headers)
+        return JSONResponse({"status": True, "message": "Success!", name: rows}, headers=headers)
+
+
+reference_data = ReferenceDataService()
@@ -0,0 +1,271 @@
+"""
+Фоновая сборка PDF отчетов админ-панели (/admins/report_sales, /admins/report_users, /admins/report_jobs).
+Итоги отчета загружаются из БД в event loop, а PDF собирается в пуле процессов, чтобы ReportLab
+не блокировал обработку запросов. Готовые файлы лежат в {report_file_path}/report_cache: отчеты
+за закрытые периоды (end_date раньше сегодняшнего дня) переиспользуются по ключу
+"тип отчета + интервал + период + версия данных": версия - хэш итогов отчета, поэтому после
+пересчета снимков (триггеры report_daily_snapshot) собирается новый файл, а старый вытесняется
+из каталога. Отчеты с текущим днем собираются заново. Размер каталога ограничен, первыми
+удаляются файлы, которые дольше всего не запрашивали.
+"""
+import asyncio
+import datetime
+import hashlib
+import os
+import re
+import uuid
+from typing import Dict, Optional
+
+from config import settings
+from common.file_cache import evict_files
+from common.logger import logger
+from common.metrics import tracked_job
+from common.tracing import traced, SPAN_CONSUMER
+from models.users_db import HistoryPaymentTink, UsersUser
+from sevice.admin_service import ReportMaker, get_pdf_executor, render_pdf_report
+
+
+JOB_PENDING = "pending"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+# Тип отчета -> (модель, название, метрика, имя файла для скачивания)
+REPORTS = {
+    "sales": (HistoryPaymentTink, "Salary", "sum", "salary_report"),
+    "users": (UsersUser, "User register", "count", "user_report"),
+}
+
+# {тип}_{интервал}_{начало}_{конец}_v{версия} - кэшируемые отчеты, ..._{uuid} - собираемые заново
+JOB_ID_PATTERN = re.compile(
+    r"^(?P<report>[a-z]+)_(?P<granularity>[a-z]+)_(?P<start>\d{4}-\d{2}-\d{2})_(?P<end>\d{4}-\d{2}-\d{2})"
+    r"(?:_v(?P<version>[0-9a-f]{16})|_(?P<unique>[0-9a-f]{32}))$"
+)
+
+
+def get_data_version(data: Dict[datetime.date, float]) -> str:
+    """
+    Версия данных отчета: меняется, если изменились итоги хотя бы одного интервала.
+
+    Args:
+        data: Итоги отчета {начало интервала: значение}
+
+    Returns:
+        str: 16 hex-символов
+    """
+    digest = hashlib.sha1()
+    for day, value in sorted(data.items()):
+        digest.update(f"{day.isoformat()}={value};".encode())
+    return digest.hexdigest()[:16]
+
+
+def build_job_id(report: str,
+                 start_date: datetime.date,
+                 end_date: datetime.date,
+                 granularity: str,
+                 data: Dict[datetime.date, float],
+                 today: Optional[datetime.date] = None) -> str:
+    """
+    ID задачи сборки отчета. Для закрытого периода совпадает с ключом кэша.
+
+    Args:
+        report: Тип отчета (ключ REPORTS)
+        start_date: Начало периода
+        end_date: Конец периода
+        granularity: Интервал day/week/month
+        data: Итоги отчета, по ним считается версия ключа кэша
+        today: Текущая дата (по умолчанию date.today())
+
+    Returns:
+        str: ID задачи
+    """
+    key = f"{report}_{granularity}_{start_date.isoformat()}_{end_date.isoformat()}"
+    if end_date < (today or datetime.date.today()):
+        return f"{key}_v{get_data_version(data)}"
+    return f"{key}_{uuid.uuid4().hex}"
+
+
+def parse_job_id(job_id: str) -> Optional[Dict]:
+    """
+    Разбирает ID задачи.
+
+    Args:
+        job_id: ID задачи из запроса
+
+    Returns:
+        Optional[Dict]: {"report", "granularity", "start", "end", "cacheable"} или None,
+        если ID некорректен
+    """
+    match = JOB_ID_PATTERN.match(job_id)
+    if not match or match.group("report") not in REPORTS:
+        return None
+    return {
+        "report": match.group("report"),
+        "granularity": match.group("granularity"),
+        "start": match.group("start"),
+        "end": match.group("end"),
+        "cacheable": match.group("unique") is None
+    }
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _save_error(error_path: str, tmp_path: str, message: str) -> None:
+    with open(error_path, "w") as file:
+        file.write(message)
+    _remove(tmp_path)
+
+
+class ReportPdfService:
+    """Сервис фоновой сборки и кэша PDF отчетов"""
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.directory = directory or os.path.join(settings.report_file_path, "report_cache")
+        self.max_bytes = max_bytes if max_bytes is not None else settings.report_cache_max_mb * 1024 * 1024
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def _path(self, job_id: str, extension: str = "pdf") -> str:
+        return os.path.join(self.directory, f"{job_id}.{extension}")
+
+    async def start(self,
+                    report: str,
+                    start_date: datetime.date,
+                    end_date: datetime.date,
+                    granularity: str = "day") -> str:
+        """
+        Загружает итоги отчета и ставит сборку PDF в очередь (или возвращает готовый/уже
+        собираемый отчет с теми же данными).
+
+        Args:
+            report: Тип отчета (ключ REPORTS)
+            start_date: Начало периода
+            end_date: Конец периода
+            granularity: Интервал day/week/month
+
+        Returns:
+            str: ID задачи
+        """
+        if report not in REPORTS:
+            raise ValueError(f"Unknown report: {report}")
+        model, report_name, report_type, _ = REPORTS[report]
+        reporter = ReportMaker(model, report_name, report_type=report_type)
+        data = await reporter.create_report_by_period(start_date, end_date, granularity)
+        os.makedirs(self.directory, exist_ok=True)
+        job_id = build_job_id(report, start_date, end_date, granularity, data)
+        if job_id in self._tasks or self.get_file(job_id):
+            return job_id
+        await asyncio.to_thread(_remove, self._path(job_id, "error"))
+        task = asyncio.create_task(self._run(job_id, report_name, data, granularity))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+        return job_id
+
+    async def render(self,
+                     report: str,
+                     start_date: datetime.date,
+                     end_date: datetime.date,
+                     granularity: str = "day") -> str:
+        """
+        Собирает отчет (или берет из кэша) и ждет готовности файла.
+
+        Returns:
+            str: ID задачи; файл - get_file(job_id)
+        """
+        job_id = await self.start(report, start_date, end_date, granularity)
+        task = self._tasks.get(job_id)
+        if task is not None:
+            # Отмена запроса не прерывает сборку: файл попадет в кэш
+            await asyncio.shield(task)
+        status = self.get_status(job_id)
+        if status is None or status["status"] != JOB_DONE:
+            raise RuntimeError(f"Report {job_id} was not created: {status and status.get('error')}")
+        return job_id
+
+    def get_status(self, job_id: str) -> Optional[Dict]:
+        """
+        Состояние задачи. Готовые и упавшие задачи определяются по файлам в каталоге кэша,
+        поэтому видны из любого воркера.
+
+        Args:
+            job_id: ID задачи
+
+        Returns:
+            Optional[Dict]: {"id", "status", "error"} или None, если задача не найдена
+        """
+        if parse_job_id(job_id) is None:
+            return None
+        if os.path.exists(self._path(job_id)):
+            return {"id": job_id, "status": JOB_DONE, "error": None}
+        if job_id in self._tasks:
+            return {"id": job_id, "status": JOB_PENDING, "error": None}
+        try:
+            with open(self._path(job_id, "error")) as file:
+                return {"id": job_id, "status": JOB_FAILED, "error": file.read()}
+        except FileNotFoundError:
+            return None
+
+    def get_file(self, job_id: str) -> Optional[str]:
+        """
+        Путь к готовому PDF. Обновляет mtime, чтобы файл дольше оставался в кэше.
+
+        Args:
+            job_id: ID задачи
+
+        Returns:
+            Optional[str]: Путь к файлу или None
+        """
+        if parse_job_id(job_id) is None:
+            return None
+        path = self._path(job_id)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    @staticmethod
+    def get_download_name(job_id: str) -> str:
+        """
+        Имя файла для скачивания, например salary_report_2024-01-01_2024-01-31.pdf.
+        """
+        job = parse_job_id(job_id)
+        return f"{REPORTS[job['report']][3]}_{job['start']}_{job['end']}.pdf"
+
+    @staticmethod
+    def is_cacheable(job_id: str) -> bool:
+        """
+        Сохраняется ли файл отчета для повторных запросов (закрытый период).
+        """
+        job = parse_job_id(job_id)
+        return bool(job and job["cacheable"])
+
+    @tracked_job("report_pdf")
+    @traced("job.report_pdf", SPAN_CONSUMER)
+    async def _run(self,
+                   job_id: str,
+                   report_name: str,
+                   data: Dict[datetime.date, float],
+                   granularity: str) -> None:
+        path = self._path(job_id)
+        tmp_path = self._path(job_id, "pdf.tmp")
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                get_pdf_executor(), render_pdf_report, tmp_path, data, report_name, granularity)
+            await asyncio.to_thread(os.replace, tmp_path, path)
+            logger.debug(f"Report {job_id} has been created")
+        except Exception as exp:
+            logger.error(f"Can't to create report {job_id}: {exp}")
+            await asyncio.to_thread(_save_error, self._path(job_id, "error"), tmp_path, str(exp))
+            return
+        # Файловые операции - в потоке, чтобы обход каталога кэша не блокировал event loop
+        removed = await asyncio.to_thread(evict_files, self.directory, self.max_bytes,
+                                          keep=[os.path.basename(path)])
+        if removed:
+            logger.debug(f"Report cache eviction: {len(removed)} files removed")
+
+
+report_pdf = ReportPdfService()
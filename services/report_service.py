@@ -0,0 +1,212 @@
+"""
+Отчеты админ-панели по периодам (/admins/report_sales, /admins/report_users).
+Итоги по дням считаются в БД (GROUP BY date_trunc('day', datetime_create)) сразу для всех
+метрик (количество и сумма). Закрытые дни (до сегодняшнего) сохраняются в
+data.report_daily_snapshot и при следующих запросах читаются оттуда, текущий день
+считается заново. Триггер на таблицах-источниках удаляет снимок за день добавленной,
+измененной или удаленной записи, и этот день пересчитывается при следующем запросе.
+Недели и месяцы собираются из дневных итогов.
+"""
+import datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, Literal, Optional, Union
+
+from tortoise import Tortoise
+from tortoise.models import Model
+
+
+REPORT_GRANULARITIES = ("day", "week", "month")
+ReportGranularity = Literal["day", "week", "month"]
+REPORT_METRICS = ("count", "sum")
+
+# Дневные итоги таблицы за [$1, $2] с нулями для дней без записей.
+# {table} и {sum_expr} подставляются из метаданных модели, а не из запроса.
+REPORT_DAILY_SQL = """
+SELECT d::date AS day, COALESCE(a.count, 0) AS count, COALESCE(a.sum, 0) AS sum
+FROM generate_series($1::date, $2::date, interval '1 day') d
+LEFT JOIN (
+    SELECT date_trunc('day', datetime_create)::date AS day, COUNT(*) AS count, {sum_expr} AS sum
+    FROM {table}
+    WHERE datetime_create >= $1::date AND datetime_create < $2::date + 1
+    GROUP BY 1
+) a ON a.day = d::date
+"""
+
+# Параметры: $1 ключ отчета, $2 начало, $3 конец периода
+REPORT_SNAPSHOT_SELECT_SQL = """
+SELECT day, count, sum
+FROM data.report_daily_snapshot
+WHERE report_key = $1 AND day BETWEEN $2 AND $3
+"""
+
+# Считает закрытые дни за [$1, $2] и сохраняет их в снимок. Параметры: $3 ключ отчета
+REPORT_SNAPSHOT_FILL_SQL = """
+WITH daily AS (""" + REPORT_DAILY_SQL + """),
+saved AS (
+    INSERT INTO data.report_daily_snapshot (report_key, day, count, sum)
+    SELECT $3, day, count, sum FROM daily
+    ON CONFLICT (report_key, day) DO NOTHING
+)
+SELECT day, count, sum FROM daily
+"""
+
+
+def get_period_days(start_date: datetime.date, end_date: datetime.date) -> List[datetime.date]:
+    """
+    Список дней периода.
+
+    Args:
+        start_date: Начало периода (включительно)
+        end_date: Конец периода (включительно)
+
+    Returns:
+        List[datetime.date]: Дни по порядку (пустой, если start_date > end_date)
+    """
+    return [start_date + datetime.timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+
+
+def bucket_start(day: datetime.date, granularity: str) -> datetime.date:
+    """
+    Начало интервала, в который попадает день (как date_trunc в PostgreSQL).
+
+    Args:
+        day: День
+        granularity: day, week (неделя с понедельника) или month
+
+    Returns:
+        datetime.date: Первый день интервала
+    """
+    if granularity == "week":
+        return day - datetime.timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def to_number(value: Union[int, float, Decimal]) -> Union[int, float]:
+    """
+    Приводит итог из БД к числу для ответа API (целое, если дробной части нет).
+
+    Args:
+        value: Значение COUNT/SUM
+
+    Returns:
+        Union[int, float]: Число
+    """
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    return value
+
+
+def rollup_daily(daily: Dict[datetime.date, Dict],
+                 granularity: str = "day") -> Dict[datetime.date, Dict[str, Union[int, float]]]:
+    """
+    Собирает дневные итоги в интервалы day/week/month.
+
+    Args:
+        daily: День -> {"count": ..., "sum": ...}
+        granularity: Размер интервала
+
+    Returns:
+        Dict[datetime.date, Dict]: Начало интервала -> итоги по метрикам, по возрастанию даты
+    """
+    if granularity not in REPORT_GRANULARITIES:
+        raise ValueError(f"Unknown report granularity: {granularity}")
+    buckets: Dict[datetime.date, Dict] = {}
+    for day in sorted(daily):
+        bucket = buckets.setdefault(bucket_start(day, granularity), {metric: 0 for metric in REPORT_METRICS})
+        for metric in REPORT_METRICS:
+            bucket[metric] += to_number(daily[day][metric])
+    return buckets
+
+
+class ReportService:
+    """Сервис отчетов по периодам"""
+
+    @staticmethod
+    def get_table(model: Model) -> str:
+        """
+        Полное имя таблицы модели (schema.table).
+
+        Args:
+            model: Модель Tortoise
+
+        Returns:
+            str: Имя таблицы для SQL
+        """
+        meta = model._meta
+        return f'{meta.schema}."{meta.db_table}"' if meta.schema else f'"{meta.db_table}"'
+
+    @staticmethod
+    async def get_daily_totals(model: Model,
+                               start_date: datetime.date,
+                               end_date: datetime.date,
+                               sum_field: Optional[str] = None) -> Dict[datetime.date, Dict]:
+        """
+        Дневные итоги (количество записей и сумма sum_field) за период, включая дни без записей.
+        Закрытые дни берутся из снимка, недостающие считаются одним запросом и сохраняются,
+        текущий и будущие дни считаются без сохранения. Не более трех запросов.
+
+        Args:
+            model: Модель с полем datetime_create
+            start_date: Начало периода (включительно)
+            end_date: Конец периода (включительно)
+            sum_field: Поле для суммы или None (только количество)
+
+        Returns:
+            Dict[datetime.date, Dict]: День -> {"count": ..., "sum": ...}
+        """
+        table = ReportService.get_table(model)
+        report_key = f"{table}:{sum_field or 'count'}"
+        sum_expr = f'SUM("{sum_field}")' if sum_field else "0"
+        daily_sql = REPORT_DAILY_SQL.format(table=table, sum_expr=sum_expr)
+        fill_sql = REPORT_SNAPSHOT_FILL_SQL.format(table=table, sum_expr=sum_expr)
+        conn = Tortoise.get_connection("default")
+        daily: Dict[datetime.date, Dict] = {}
+
+        today = datetime.date.today()
+        closed_end = min(end_date, today - datetime.timedelta(days=1))
+        if start_date <= closed_end:
+            for row in await conn.execute_query_dict(REPORT_SNAPSHOT_SELECT_SQL,
+                                                     [report_key, start_date, closed_end]):
+                daily[row["day"]] = {"count": row["count"], "sum": row["sum"]}
+            missing = [day for day in get_period_days(start_date, closed_end) if day not in daily]
+            if missing:
+                for row in await conn.execute_query_dict(fill_sql, [missing[0], missing[-1], report_key]):
+                    daily.setdefault(row["day"], {"count": row["count"], "sum": row["sum"]})
+
+        live_start = max(start_date, today)
+        if live_start <= end_date:
+            for row in await conn.execute_query_dict(daily_sql, [live_start, end_date]):
+                daily[row["day"]] = {"count": row["count"], "sum": row["sum"]}
+        return daily
+
+    @staticmethod
+    async def get_rollup(model: Model,
+                         start_date: datetime.date,
+                         end_date: datetime.date,
+                         granularity: str = "day",
+                         sum_field: Optional[str] = None,
+                         metrics: Iterable[str] = REPORT_METRICS) -> Dict[datetime.date, Dict]:
+        """
+        Итоги за период по интервалам day/week/month сразу для нескольких метрик.
+
+        Args:
+            model: Модель с полем datetime_create
+            start_date: Начало периода (включительно)
+            end_date: Конец периода (включительно)
+            granularity: Размер интервала
+            sum_field: Поле для метрики sum
+            metrics: Метрики в ответе (count, sum)
+
+        Returns:
+            Dict[datetime.date, Dict]: Начало интервала -> {метрика: значение}
+        """
+        if granularity not in REPORT_GRANULARITIES:
+            raise ValueError(f"Unknown report granularity: {granularity}")
+        metrics = list(metrics)
+        daily = await ReportService.get_daily_totals(model, start_date, end_date, sum_field)
+        return {
+            bucket: {metric: totals[metric] for metric in metrics}
+            for bucket, totals in rollup_daily(daily, granularity).items()
+        }
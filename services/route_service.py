@@ -13,6 +13,7 @@ from models.static_data_db import DataCarTariff
 from const.cost_formulas import get_total_cost_of_the_trip
 from sevice.google_maps_api import get_lat_lon, get_distance_and_duration
 from common.logger import logger
+from services.open_roads_service import OpenRoadsService
 
 
 class RouteService:
@@ -169,6 +170,7 @@ class RouteService:
         await DataScheduleRoadContact.filter(id_schedule_road=route_id).update(isActive=False)
         await DataScheduleRoadDriver.filter(id_schedule_road=route_id).update(isActive=False)
         await DataScheduleRoadAddress.filter(id_schedule_road=route_id).update(isActive=False)
+        await OpenRoadsService.refresh(road_ids=[route_id])
         
         logger.info(
             f"Route deleted: {route_id}",
@@ -11,11 +11,13 @@ from models.orders_db import (
     DataSchedule, DataScheduleRoad, DataScheduleOtherParametrs,
     DataScheduleRoadAddress
 )
-from models.static_data_db import DataCarTariff, DataOtherDriveParametr
+from models.static_data_db import DataOtherDriveParametr
 from models.users_db import DataUserBalance
 from const.cost_formulas import get_total_cost_of_the_trip
+from services.pricing_config_service import pricing_config
 from sevice.google_maps_api import get_lat_lon, get_distance_and_duration
 from common.logger import logger
+from services.open_roads_service import OpenRoadsService
 
 
 class ScheduleService:
@@ -71,7 +73,8 @@ class ScheduleService:
         Returns:
             bool: True если тариф существует и активен
         """
-        return await DataCarTariff.filter(isActive=True, id=tariff_id).count() > 0
+        tariff = await pricing_config.get_tariff(tariff_id)
+        return bool(tariff and tariff["isActive"])
     
     @staticmethod
     async def get_tariff_amount(tariff_id: int) -> Optional[int]:
@@ -84,8 +87,8 @@ class ScheduleService:
         Returns:
             Optional[int]: Стоимость в рублях за км или None если тариф не найден
         """
-        tariff_dict = await DataCarTariff.filter(id=tariff_id).first().values("amount")
-        return tariff_dict["amount"] if tariff_dict else None
+        tariff = await pricing_config.get_tariff(tariff_id)
+        return tariff["amount"] if tariff else None
     
     @staticmethod
     async def calculate_route_price(addresses: list, tariff_amount: int) -> Tuple[float, list]:
@@ -226,6 +229,7 @@ class ScheduleService:
             return False
         
         await DataSchedule.filter(id=schedule_id).update(isActive=None)
+        await OpenRoadsService.refresh(schedule_ids=[schedule_id])
         
         logger.info(
             f"Schedule deleted: {schedule_id}",
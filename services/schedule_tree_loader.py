@@ -0,0 +1,223 @@
+"""
+Пакетная загрузка деревьев графиков (график -> маршруты -> адреса, дети, контакт, водитель).
+Все данные для набора графиков загружаются фиксированным числом запросов id__in
+и собираются в памяти, вместо нескольких запросов на каждый маршрут.
+"""
+from typing import Dict, Iterable, List, Optional
+
+from models.orders_db import (
+    DataSchedule, DataScheduleRoad, DataScheduleRoadAddress, DataScheduleOtherParametrs,
+    DataScheduleRoadChild, DataScheduleRoadContact, DataScheduleRoadDriver
+)
+from models.users_db import UsersUser, UsersUserPhoto
+from const.static_data_const import not_user_photo
+
+
+SCHEDULE_FIELDS = ("id", "id_user", "title", "description", "children_count", "id_tariff",
+                   "week_days", "duration", "isActive", "datetime_create")
+
+
+def parse_int_list(raw: Optional[str]) -> List[int]:
+    """
+    Разбирает строку вида "0;2;5" (week_days, type_drive) в список чисел.
+
+    Args:
+        raw: Строка с числами через ";"
+
+    Returns:
+        List[int]: Список чисел, нечисловые элементы пропускаются
+    """
+    if not raw:
+        return []
+    return [int(x) for x in raw.split(";") if x.isdigit()]
+
+
+def format_address(address: Dict) -> Dict:
+    """
+    Приводит строку DataScheduleRoadAddress к формату ответа API.
+
+    Args:
+        address: Строка адреса маршрута
+
+    Returns:
+        Dict: {"from_address": {...}, "to_address": {...}}
+    """
+    return {
+        "from_address": {
+            "address": address["from_address"],
+            "location": {
+                "longitude": address["from_lon"],
+                "latitude": address["from_lat"]
+            }
+        },
+        "to_address": {
+            "address": address["to_address"],
+            "location": {
+                "longitude": address["to_lon"],
+                "latitude": address["to_lat"]
+            }
+        }
+    }
+
+
+def format_contact(contact: Optional[Dict]) -> Optional[Dict]:
+    """
+    Приводит строку DataScheduleRoadContact к формату ответа API.
+
+    Args:
+        contact: Строка контакта или None
+
+    Returns:
+        Optional[Dict]: {"surname", "name", "patronymic", "phone"} или None
+    """
+    if contact is None:
+        return None
+    return {
+        "surname": contact["surname"],
+        "name": contact["name"],
+        "patronymic": contact["patronymic"],
+        "phone": contact["contact_phone"]
+    }
+
+
+class ScheduleTreeLoader:
+    """
+    Загрузчик деревьев графиков.
+
+    Результат load() - словарь id графика -> строка графика, дополненная полями:
+        - other_parametrs: [{"parametr", "count"}]
+        - user: {"id_user", "name", "surname", "phone", "photo_path"} - родитель
+        - roads: строки маршрутов (по id), каждая дополнена полями
+          addresses (строки адресов по id), children (ID детей), contact (строка или None),
+          driver ({"id_driver", "name", "surname", "phone", "photo_path"} или None)
+
+    Количество запросов не зависит от числа графиков и маршрутов (не более 9).
+    """
+
+    def __init__(self, only_active_roads: bool = True, with_users: bool = True, with_drivers: bool = True,
+                 with_children_and_contacts: bool = True, keep_missing_schedules: bool = False):
+        """
+        Args:
+            only_active_roads: Загружать только активные маршруты
+            with_users: Загружать родителей и водителей (имя, телефон, фото)
+            with_drivers: Загружать назначенных на маршруты водителей
+            with_children_and_contacts: Загружать детей и контакты маршрутов
+            keep_missing_schedules: Для маршрутов, графика которых нет в БД, возвращать дерево-заглушку
+                (поля графика None, "missing": True) вместо того, чтобы пропускать маршруты
+        """
+        self.only_active_roads = only_active_roads
+        self.with_users = with_users
+        self.with_drivers = with_drivers
+        self.with_children_and_contacts = with_children_and_contacts
+        self.keep_missing_schedules = keep_missing_schedules
+
+    async def _fetch(self, model, fields: Iterable[str] = (), order_by: str = "id", **filters) -> List[Dict]:
+        """Единая точка доступа к БД: один запрос на вызов."""
+        return await model.filter(**filters).order_by(order_by).values(*fields)
+
+    async def load(self, schedule_ids: Optional[Iterable[int]] = None,
+                   road_ids: Optional[Iterable[int]] = None) -> Dict[int, Dict]:
+        """
+        Загружает деревья графиков.
+
+        Args:
+            schedule_ids: ID графиков
+            road_ids: ID маршрутов; если указаны, в деревья попадают только эти маршруты,
+                а графики определяются по ним
+
+        Returns:
+            Dict[int, Dict]: id графика -> дерево графика (в порядке schedule_ids / id)
+        """
+        road_filters = {"isActive": True} if self.only_active_roads else {}
+        roads: Optional[List[Dict]] = None
+        if road_ids is not None:
+            road_ids = list(set(road_ids))
+            if not road_ids:
+                return {}
+            roads = await self._fetch(DataScheduleRoad, id__in=road_ids, **road_filters)
+            schedule_ids = [road["id_schedule"] for road in roads]
+
+        schedule_ids = list(dict.fromkeys(schedule_ids or []))
+        if not schedule_ids:
+            return {}
+
+        schedules = await self._fetch(DataSchedule, SCHEDULE_FIELDS, id__in=schedule_ids)
+        if self.keep_missing_schedules:
+            found = {schedule["id"] for schedule in schedules}
+            schedules += [dict(dict.fromkeys(SCHEDULE_FIELDS), id=id_schedule, missing=True)
+                          for id_schedule in schedule_ids if id_schedule not in found]
+        order = {id_schedule: index for index, id_schedule in enumerate(schedule_ids)}
+        schedules.sort(key=lambda schedule: order[schedule["id"]])
+        trees = {schedule["id"]: schedule for schedule in schedules}
+        for schedule in schedules:
+            schedule["other_parametrs"] = []
+            schedule["roads"] = []
+            schedule["user"] = None
+
+        for parametr in await self._fetch(DataScheduleOtherParametrs, id_schedule__in=schedule_ids, isActive=True):
+            if parametr["id_schedule"] in trees:
+                trees[parametr["id_schedule"]]["other_parametrs"].append({
+                    "parametr": parametr["id_other_parametr"],
+                    "count": parametr["amount"]
+                })
+
+        if roads is None:
+            roads = await self._fetch(DataScheduleRoad, id_schedule__in=schedule_ids, **road_filters)
+        roads_by_id = {}
+        for road in roads:
+            if road["id_schedule"] not in trees:
+                continue
+            road["addresses"] = []
+            road["children"] = []
+            road["contact"] = None
+            road["driver"] = None
+            roads_by_id[road["id"]] = road
+            trees[road["id_schedule"]]["roads"].append(road)
+
+        drivers = {}
+        if roads_by_id:
+            ids = list(roads_by_id)
+            for address in await self._fetch(DataScheduleRoadAddress, id_schedule_road__in=ids):
+                roads_by_id[address["id_schedule_road"]]["addresses"].append(address)
+            if self.with_children_and_contacts:
+                for child in await self._fetch(DataScheduleRoadChild, id_schedule_road__in=ids, isActive=True):
+                    roads_by_id[child["id_schedule_road"]]["children"].append(child["id_child"])
+                for contact in await self._fetch(DataScheduleRoadContact, id_schedule_road__in=ids, isActive=True):
+                    road = roads_by_id[contact["id_schedule_road"]]
+                    if road["contact"] is None:
+                        road["contact"] = contact
+            if self.with_drivers:
+                for driver in await self._fetch(DataScheduleRoadDriver, id_schedule_road__in=ids, isActive=True):
+                    drivers.setdefault(driver["id_schedule_road"], driver["id_driver"])
+
+        if self.with_users:
+            users = await self._load_users({schedule["id_user"] for schedule in schedules} | set(drivers.values()))
+            for schedule in schedules:
+                schedule["user"] = users.get(schedule["id_user"])
+            for id_road, id_driver in drivers.items():
+                driver = users.get(id_driver)
+                roads_by_id[id_road]["driver"] = dict(driver, id_driver=id_driver) if driver else None
+        else:
+            for id_road, id_driver in drivers.items():
+                roads_by_id[id_road]["driver"] = {"id_driver": id_driver}
+
+        return trees
+
+    async def _load_users(self, user_ids: Iterable[int]) -> Dict[int, Dict]:
+        """Загружает пользователей и их фото двумя запросами."""
+        user_ids = [id_user for id_user in user_ids if id_user is not None]
+        if not user_ids:
+            return {}
+        photos = {}
+        for photo in await self._fetch(UsersUserPhoto, id_user__in=user_ids):
+            photos.setdefault(photo["id_user"], photo["photo_path"])
+        return {
+            user["id"]: {
+                "id_user": user["id"],
+                "name": user["name"],
+                "surname": user["surname"],
+                "phone": user["phone"],
+                "photo_path": photos.get(user["id"], not_user_photo)
+            }
+            for user in await self._fetch(UsersUser, ("id", "name", "surname", "phone"), id__in=user_ids)
+        }
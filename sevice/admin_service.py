@@ -1,7 +1,7 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
 import datetime
-import traceback
 import hashlib
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4, landscape
@@ -15,6 +15,8 @@ from tortoise.transactions import atomic
 
 from config import settings
 from common.logger import logger
+from common.worker_pool import create_process_pool
+from services.report_service import ReportService
 
 from models.authentication_db import UsersUserAccount, UsersAuthorizationData
 from models.static_data_db import DataCity, DataCarTariff
@@ -28,119 +30,113 @@ class ReportType(Enum):
     SUM = "sum"
 
 
+# Строк в одной таблице PDF для недельных и месячных отчетов (дневные делятся по месяцам)
+PDF_ROWS_PER_TABLE = 31
+
+_pdf_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_pdf_executor() -> ProcessPoolExecutor:
+    """
+    Пул процессов для сборки PDF отчетов, чтобы ReportLab не блокировал event loop.
+    Процессы пишут логи только в stderr (common/worker_pool.py).
+    """
+    global _pdf_executor
+    if _pdf_executor is None:
+        _pdf_executor = create_process_pool(settings.report_pdf_workers, settings.log_level)
+    return _pdf_executor
+
+
+def render_pdf_report(file_name: str, data: Dict, report_name: str, granularity: str = "day") -> str:
+    """
+    Собирает PDF отчета в файл. Выполняется в пуле процессов get_pdf_executor().
+    """
+    ReportMaker.PdfReportMaker(file_name, data, report_name, granularity).create_pdf()
+    return file_name
+
+
 class ReportMaker:
 
     report_name: str
     report = None
     type_report: ReportType = None
-    _save_path: str = settings.report_file_path if settings.report_file_path[-1] != "/" \
-        else settings.report_file_path[:-1]
+    granularity: str = "day"
 
     def __init__(self,
                  model: Model,
                  report_name: str,
-                 report_type: ReportType):
+                 report_type: ReportType,
+                 sum_field: Optional[str] = None):
         self.model = model
         self.report_name = report_name
         self.type_report = report_type
-
-    def _sum_by_day(self, data, sum_field):
-        sums_by_day = {}
-        for row in data:
-            date = row["datetime_create"].date()
-            if date in sums_by_day:
-                sums_by_day[date] += row[sum_field]
-            else:
-                sums_by_day[date] = row[sum_field]
-        return sums_by_day
-
-    def _count_by_day(self, data):
-        counts_by_day = {}
-        for row in data:
-            date = row["datetime_create"].date()
-            if date in counts_by_day:
-                counts_by_day[date] += 1
-            else:
-                counts_by_day[date] = 1
-        return counts_by_day
-
-    def _get_list_date(self, start_date, end_date):
-        data_list = []
-        current_date = start_date
-        while current_date <= end_date:
-            data_list.append(current_date)
-            current_date += datetime.timedelta(days=1)
-        return data_list
-
-    def _full_report_empty_fields(self, date_list):
-        for date in date_list:
-            if date not in self.report:
-                self.report[date] = 0
-        sorted_report = dict(sorted(self.report.items()))
-        self.report = sorted_report
-
-    async def create_report_by_period(self, start_date: datetime.date, end_date: datetime.date) -> Dict:
-        payment_by_period = await self.model.filter(
-            datetime_create__range=[str(start_date) + " 00:00:00", str(end_date) + " 23:59:59"]
-        ).all().values()
-        date_list = self._get_list_date(start_date, end_date)
-        logger.debug(f"Next data from DB by period from {start_date} to {end_date}: {payment_by_period}")
-        if self.type_report == ReportType.SUM.value:
-            self.report = self._sum_by_day(payment_by_period, "amount")
-        if self.type_report == ReportType.COUNT.value:
-            self.report = self._count_by_day(payment_by_period)
-        logger.debug(f"Next data will be filled spaces: {self.report}")
-        self._full_report_empty_fields(date_list)
-        logger.debug(f"Data will be return: {self.report}")
+        self.sum_field = sum_field or ("amount" if report_type == ReportType.SUM.value else None)
+
+    async def create_rollup_by_period(self,
+                                      start_date: datetime.date,
+                                      end_date: datetime.date,
+                                      granularity: str = "day") -> Dict[datetime.date, Dict]:
+        """
+        Количество и сумма за период по интервалам day/week/month (итоги считаются в БД).
+        """
+        return await ReportService.get_rollup(self.model, start_date, end_date,
+                                              granularity=granularity, sum_field=self.sum_field)
+
+    async def create_report_by_period(self,
+                                      start_date: datetime.date,
+                                      end_date: datetime.date,
+                                      granularity: str = "day") -> Dict:
+        metric = "sum" if self.type_report == ReportType.SUM.value else "count"
+        rollup = await self.create_rollup_by_period(start_date, end_date, granularity)
+        self.report = {bucket: totals[metric] for bucket, totals in rollup.items()}
+        self.granularity = granularity
+        logger.debug(f"Report {self.report_name} from {start_date} to {end_date} by {granularity}: "
+                     f"{len(self.report)} rows")
 
         return self.report
 
-    async def save_report_to_pdf(self, title="report"):
-        file_name = f"{self._save_path}/{title}_{str(datetime.datetime.now())}.pdf"
-        logger.debug(f"Will convert a report {self.report} to pdf")
-        pdf_maker = self.PdfReportMaker(file_name, self.report, self.report_name)
-        try:
-            pdf_maker.create_pdf()
-        except Exception as exp:
-            logger.error(f"Can't to create pdf doc. The error occures: {exp}")
-            logger.error(traceback.format_exc())
-        else:
-            logger.debug(f"A file was be created: {file_name}")
-            return file_name
-
     class PdfReportMaker:
-        filename: str
-        _data_tables: List = []
-        _table_columns: List[int] = ["date"]
+        # Состояние сборки хранится в экземпляре: в воркере пула собирается много отчетов подряд
+        file_name: str
+        _data_tables: List
+        _table_columns: List[str]
         _max_value: int
         _min_value: int
         report_title: str
 
-        def __init__(self, file_name, data, report_name):
-            self._table_columns.append(report_name)
+        def __init__(self, file_name, data, report_name, granularity="day"):
+            self._table_columns = ["date", report_name]
+            self._data_tables = []
+            self._max_value = 0
+            self._min_value = 0
             self.file_name = file_name
             self.report_title = report_name
+            self.granularity = granularity
             try:
                 self._data_tables, self._max_value, self._min_value = self._convert_to_tables(data)
             except Exception as exp:
-                logger.error(f"Data can be converted to table: {data}. Error: {exp}")
-            logger.info(f"Data has been converted to table: {self._data_tables}")
+                logger.error(f"Data with {len(data)} rows can't be converted to table. Error: {exp}")
+            logger.info(f"Data has been converted to {len(self._data_tables)} tables")
+
+        def _is_new_table(self, table, key):
+            # Дневной отчет - таблица на месяц, недели и месяцы - по PDF_ROWS_PER_TABLE строк
+            if not table:
+                return False
+            if self.granularity == "day":
+                return key.month != table[0][0].month or key.year != table[0][0].year
+            return len(table) >= PDF_ROWS_PER_TABLE
 
         def _convert_to_tables(self, data):
-            logger.debug(f"Next data will be converted to tables: {data}")
+            logger.debug(f"{len(data)} rows will be converted to tables")
             data_tables = []
-            current_month = next(iter(data)).month
             current_table = []
             max_value = 0
             min_value = 0
             for key in data:
-                if key.month == current_month:
-                    current_table.append([key, data[key]])
-                else:
+                if self._is_new_table(current_table, key):
                     data_tables.append(current_table)
                     current_table = []
-                    current_month = key.month
-                    current_table.append([key, data[key]])
+                current_table.append([key, data[key]])
                 if data[key] > max_value:
                     max_value = data[key]
                 if data[key] < min_value:
@@ -171,13 +167,18 @@ class ReportMaker:
             row_data = []
             dates = []
 
+            if self.granularity == "day":
+                period = table[0][0].strftime('%Y-%B')
+            else:
+                period = f"{table[0][0]} - {table[-1][0]}"
+            label_format = "%d.%m.%y" if self.granularity == "week" else "%m.%Y"
             drawing.add(String(60, 120,
-                            f"{self.report_title} graphic for {table[0][0].strftime('%Y-%B')}",
+                            f"{self.report_title} graphic for {period}",
                             fontName='Times-Roman',
                             fontSize=36))
 
             for row in table:
-                dates.append(str(row[0].day))
+                dates.append(str(row[0].day) if self.granularity == "day" else row[0].strftime(label_format))
                 row_data.append(int(row[1]))
             data.append(row_data)
 
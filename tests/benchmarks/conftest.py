@@ -0,0 +1,11 @@
+"""
+Конфигурация для бенчмарков
+Бенчмарки не требуют запуска приложения и БД
+"""
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию в PYTHONPATH для импортов
+backend_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_dir))
@@ -0,0 +1,98 @@
+"""
+Бенчмарк логирования: время event loop на запись сообщений из горячих путей сокетов
+при синхронных handlers (как было) и при записи через очередь и фоновый поток.
+Время потока записи не учитывается - измеряется только то, что блокирует event loop.
+
+Запуск: python -m pytest -q tests/benchmarks -s
+"""
+
+import asyncio
+import logging
+import os
+import time
+
+import pytest
+
+pytest.importorskip("pythonjsonlogger")
+
+from common.logger_new import LogPolicyFilter, create_log_handlers, create_log_pipeline  # noqa: E402
+
+
+MESSAGES = 5000
+# Во сколько раз запись через очередь должна быть быстрее для event loop
+MIN_SPEEDUP = 3
+
+
+def create_handlers(tmp_path):
+    handlers = create_log_handlers(tmp_path / "logs")
+    handlers[0].setStream(open(os.devnull, "w"))
+    return handlers
+
+
+def close_handlers(handlers):
+    for handler in handlers:
+        handler.close()
+    handlers[0].stream.close()
+
+
+def create_logger(name, handler):
+    logger = logging.getLogger(f"benchmark.{name}")
+    logger.handlers = [handler]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
+
+
+async def send_personal_message(logger, message):
+    # Как ConnectionManager.send_personal_message в orders_socket: лог на каждое сообщение
+    logger.info(f"Sent message: {message}", extra={"event_type": "socket_message"})
+
+
+def measure_loop_seconds(logger):
+    message = '{"type": "driver_update", "data": {"id_driver": 1, "latitude": 55.75, "longitude": 37.61}}'
+
+    async def run():
+        started = time.perf_counter()
+        for _ in range(MESSAGES):
+            await send_personal_message(logger, message)
+        return time.perf_counter() - started
+
+    return asyncio.run(run())
+
+
+class TestLoggingBenchmark:
+    """Время event loop на логирование"""
+
+    def test_queue_pipeline_speedup(self, tmp_path):
+        """Тест: через очередь event loop тратит на логирование в MIN_SPEEDUP раз меньше"""
+        sync_handlers = create_handlers(tmp_path / "sync")
+        sync_logger = create_logger("sync", sync_handlers[1])
+        for handler in sync_handlers[::2]:
+            sync_logger.addHandler(handler)
+        sync_seconds = measure_loop_seconds(sync_logger)
+        close_handlers(sync_handlers)
+
+        queue_handlers = create_handlers(tmp_path / "queue")
+        queue_handler, listener = create_log_pipeline(queue_handlers, queue_size=MESSAGES)
+        queue_seconds = measure_loop_seconds(create_logger("queue", queue_handler))
+        listener.stop()
+        close_handlers(queue_handlers)
+
+        print(f"\nlogging {MESSAGES} messages: sync {sync_seconds * 1000:.1f} ms, "
+              f"queue {queue_seconds * 1000:.1f} ms on event loop")
+        assert queue_handler.dropped == 0
+        with open(tmp_path / "queue" / "logs" / "app.log", encoding="utf-8") as file:
+            assert sum(1 for _ in file) == MESSAGES
+        assert queue_seconds * MIN_SPEEDUP < sync_seconds
+
+    def test_sampling(self, tmp_path):
+        """Тест: прореженное событие почти не занимает event loop и не пишется целиком"""
+        handlers = create_handlers(tmp_path)
+        policy = LogPolicyFilter(sample_rates={f"{__name__.rsplit('.', 1)[-1]}.send_personal_message": 0.01})
+        queue_handler, listener = create_log_pipeline(handlers, policy=policy, queue_size=MESSAGES)
+        seconds = measure_loop_seconds(create_logger("sampled", queue_handler))
+        listener.stop()
+        close_handlers(handlers)
+
+        print(f"\nlogging {MESSAGES} messages sampled 1%: {seconds * 1000:.1f} ms on event loop")
+        assert policy.sampled_out > MESSAGES * 0.9
@@ -0,0 +1,56 @@
+"""
+Бенчмарк расчета стоимости: все тарифы x варианты маршрута поэлементно
+(get_total_cost_of_the_trip в цикле) и одной матрицей (get_total_cost_matrix).
+
+Запуск: python -m pytest -q tests/benchmarks -s
+"""
+
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from const.cost_formulas import get_total_cost_matrix, get_total_cost_of_the_trip  # noqa: E402
+
+
+TARIFFS = 10
+ROUTES = 20
+REPEATS = 200
+# Во сколько раз матричный расчет должен быть быстрее
+MIN_SPEEDUP = 3
+
+
+def measure_seconds(func) -> float:
+    best = float("inf")
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(REPEATS):
+            func()
+        best = min(best, time.perf_counter() - started)
+    return best / REPEATS
+
+
+class TestQuoteEngineBenchmark:
+    """Расчет матрицы стоимостей тарифы x маршруты"""
+
+    def test_matrix_speedup(self):
+        """Тест: матрица считается в MIN_SPEEDUP раз быстрее цикла и совпадает с ним"""
+        rng = np.random.default_rng(0)
+        tariffs = rng.integers(50, 1500, TARIFFS).tolist()
+        distances = rng.uniform(1000, 60000, ROUTES).tolist()
+        durations = rng.integers(300, 7200, ROUTES).tolist()
+
+        def scalar():
+            return [[get_total_cost_of_the_trip(M=m, S2=s, To=t) for s, t in zip(distances, durations)]
+                    for m in tariffs]
+
+        def matrix():
+            return get_total_cost_matrix(M=tariffs, S2=distances, To=durations).tolist()
+
+        scalar_seconds, matrix_seconds = measure_seconds(scalar), measure_seconds(matrix)
+
+        print(f"\n{TARIFFS} tariffs x {ROUTES} routes: loop {scalar_seconds * 1e6:.1f} us, "
+              f"matrix {matrix_seconds * 1e6:.1f} us")
+        np.testing.assert_allclose(matrix(), scalar(), rtol=1e-12)
+        assert matrix_seconds * MIN_SPEEDUP < scalar_seconds
@@ -0,0 +1,117 @@
+"""
+Бенчмарк отчетов админ-панели: сборка итогов и PDF за 30/365/3650 дней.
+Время и пиковая память измеряются разными прогонами (tracemalloc замедляет ReportLab в несколько раз).
+Бюджеты заданы с запасом, чтобы ловить регрессии, а не колебания CI.
+
+Запуск: python -m pytest -q tests/benchmarks -s
+"""
+
+import gc
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+import pytest
+
+pytest.importorskip("tortoise")
+pytest.importorskip("reportlab")
+
+from sevice.admin_service import ReportMaker, render_pdf_report  # noqa: E402
+from services.report_service import rollup_daily  # noqa: E402
+
+
+# Дней в отчете -> (секунд на сборку, МБ пиковой памяти)
+BUDGETS = {
+    30: (1.0, 8),
+    365: (5.0, 16),
+    3650: (30.0, 64),
+}
+
+
+def build_daily(days):
+    start = date(2020, 1, 1)
+    return {
+        start + timedelta(days=i): {"count": i % 17, "sum": (i * 7919) % 100000}
+        for i in range(days)
+    }
+
+
+def make_report(days, tmp_path, granularity="day"):
+    rollup = rollup_daily(build_daily(days), granularity)
+    report = {bucket: totals["sum"] for bucket, totals in rollup.items()}
+    return render_pdf_report(str(tmp_path / f"report_{days}.pdf"), report, "Salary", granularity)
+
+
+def measure_time(func):
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+def retained_bytes():
+    # Только память сборки отчета: циклические ссылки ReportLab собираются заранее,
+    # записи логов, которые держит pytest, не учитываются
+    gc.collect()
+    snapshot = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(True, "*admin_service.py"),
+        tracemalloc.Filter(True, "*report_service.py"),
+        tracemalloc.Filter(True, "*reportlab*"),
+    ])
+    return sum(stat.size for stat in snapshot.statistics("filename"))
+
+
+def measure_peak_mb(func):
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+class TestReportBenchmark:
+    """Время и память сборки отчетов"""
+
+    @pytest.mark.parametrize("days", sorted(BUDGETS))
+    def test_render_budget(self, days, tmp_path):
+        """Тест: отчет за период укладывается в бюджет времени и памяти"""
+        max_seconds, max_mb = BUDGETS[days]
+
+        seconds = measure_time(lambda: make_report(days, tmp_path))
+        peak_mb = measure_peak_mb(lambda: make_report(days, tmp_path))
+        print(f"\nreport {days} days: {seconds:.3f} s, peak {peak_mb:.1f} MB")
+
+        assert (tmp_path / f"report_{days}.pdf").stat().st_size > 0
+        assert seconds < max_seconds
+        assert peak_mb < max_mb
+
+    @pytest.mark.parametrize("granularity", ["week", "month"])
+    def test_render_rollup_budget(self, granularity, tmp_path):
+        """Тест: недельный и месячный отчеты за 10 лет не дороже дневного"""
+        max_seconds, _ = BUDGETS[3650]
+
+        seconds = measure_time(lambda: make_report(3650, tmp_path, granularity))
+        print(f"\nreport 3650 days by {granularity}: {seconds:.3f} s")
+
+        assert seconds < max_seconds
+
+    def test_repeated_renders_do_not_leak(self, tmp_path):
+        """Тест: состояние сборки не копится между отчетами одного процесса"""
+        for _ in range(3):
+            make_report(30, tmp_path)
+
+        tracemalloc.start()
+        try:
+            make_report(30, tmp_path)
+            before = retained_bytes()
+            for _ in range(20):
+                make_report(30, tmp_path)
+            after = retained_bytes()
+        finally:
+            tracemalloc.stop()
+        maker = ReportMaker.PdfReportMaker(str(tmp_path / "state.pdf"), {date(2024, 1, 1): 1}, "Salary")
+        print(f"\n20 reports: retained {(after - before) / 1024:.1f} KB")
+
+        assert maker._table_columns == ["date", "Salary"]
+        assert after - before < 64 * 1024
@@ -0,0 +1,87 @@
+"""
+Бенчмарк трассировки: время обработки HTTP запроса без трассировки и с ней
+(TracingMiddleware, span операции с заказом, доля trace в выборке по умолчанию).
+Обработчик, как роуты заказов, ждет запросы к БД (проверка токена и выборки заказа) -
+их время имитируется ожиданием DB_QUERY_SECONDS.
+
+Запуск: python -m pytest -q tests/benchmarks -s
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("fastapi")
+
+from fastapi import FastAPI  # noqa: E402
+
+from common import tracing  # noqa: E402
+from common.tracing import InMemorySpanExporter, TracingMiddleware, traced  # noqa: E402
+
+
+BATCHES = 20
+BATCH_SIZE = 50
+DB_QUERIES = 3
+DB_QUERY_SECONDS = 0.0005
+# Допустимое замедление обработки запроса
+MAX_OVERHEAD = 0.05
+
+
+async def send_order_to_driver(id_order: int):
+    for _ in range(DB_QUERIES):
+        await asyncio.sleep(DB_QUERY_SECONDS)
+    return json.dumps({"id": id_order, "drivers": list(range(20))})
+
+
+def create_app(tracing_enabled: bool) -> FastAPI:
+    app = FastAPI()
+    send = traced("orders.send_order_to_driver", order_arg="id_order")(send_order_to_driver) \
+        if tracing_enabled else send_order_to_driver
+
+    @app.post("/orders/{id_order}")
+    async def endpoint(id_order: int):
+        return {"message": await send(id_order=id_order)}
+
+    if tracing_enabled:
+        app.add_middleware(TracingMiddleware)
+    return app
+
+
+async def measure_batch(client: httpx.AsyncClient) -> float:
+    started = time.perf_counter()
+    for id_order in range(BATCH_SIZE):
+        await client.post(f"/orders/{id_order}")
+    return time.perf_counter() - started
+
+
+def measure_overhead() -> float:
+    """Медиана отношения времени пачек запросов; пачки чередуются, чтобы фоновая нагрузка влияла одинаково"""
+    async def run():
+        transport = httpx.ASGITransport
+        async with httpx.AsyncClient(transport=transport(app=create_app(False)), base_url="http://test") as plain, \
+                httpx.AsyncClient(transport=transport(app=create_app(True)), base_url="http://test") as traced_client:
+            await measure_batch(plain)
+            await measure_batch(traced_client)
+            return [await measure_batch(traced_client) / await measure_batch(plain) for _ in range(BATCHES)]
+
+    ratios = sorted(asyncio.run(run()))
+    return ratios[len(ratios) // 2] - 1
+
+
+class TestTracingBenchmark:
+    """Накладные расходы трассировки на запрос"""
+
+    def test_request_overhead(self):
+        """Тест: с трассировкой обработка запроса медленнее не более чем на MAX_OVERHEAD"""
+        exporter = InMemorySpanExporter()
+        previous = tracing.set_exporter(exporter)
+        overhead = measure_overhead()
+        tracing.set_exporter(previous)
+
+        print(f"\n{BATCHES * BATCH_SIZE} requests: tracing overhead {overhead * 100:.1f}%, "
+              f"exported {len(exporter.spans)} spans")
+        assert exporter.spans
+        assert overhead < MAX_OVERHEAD
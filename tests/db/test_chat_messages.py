@@ -0,0 +1,88 @@
+"""
+Тесты курсорной пагинации сообщений чата (/chats/get_messages)
+"""
+
+import pytest
+
+from services.chat_service import ChatService
+
+
+@pytest.fixture
+def chat_with_messages(rows):
+    async def create(count: int):
+        sender, receiver = await rows.user(), await rows.user()
+        id_chat = await rows.chat(sender, receiver)
+        ids = [(await ChatService.save_message(id_chat, sender, receiver, str(index), 1)).id
+               for index in range(count)]
+        return id_chat, sender, ids
+    return create
+
+
+@pytest.mark.asyncio
+async def test_before_id_pages(chat_with_messages):
+    """Тест: прокрутка истории по before_id без пропусков и повторов, has_more на границе"""
+    id_chat, _, ids = await chat_with_messages(5)
+
+    first, first_more = await ChatService.get_messages_page(id_chat, limit=2)
+    second, second_more = await ChatService.get_messages_page(id_chat, limit=2, before_id=first[-1]["id"])
+    last, last_more = await ChatService.get_messages_page(id_chat, limit=1, before_id=second[-1]["id"])
+
+    assert [message["id"] for message in first + second + last] == ids[::-1]
+    assert (first_more, second_more, last_more) == (True, True, False)
+
+
+@pytest.mark.asyncio
+async def test_has_more_at_limit(chat_with_messages):
+    """Тест: страница ровно до первого сообщения - has_more = False"""
+    id_chat, _, ids = await chat_with_messages(3)
+
+    messages, has_more = await ChatService.get_messages_page(id_chat, limit=3)
+
+    assert [message["id"] for message in messages] == ids[::-1]
+    assert has_more is False
+
+
+@pytest.mark.asyncio
+async def test_after_id(chat_with_messages):
+    """Тест: догрузка новых сообщений по after_id - ближайшие новые, от новых к старым"""
+    id_chat, _, ids = await chat_with_messages(5)
+
+    messages, has_more = await ChatService.get_messages_page(id_chat, limit=2, after_id=ids[1])
+
+    assert [message["id"] for message in messages] == [ids[3], ids[2]]
+    assert has_more is True
+
+
+@pytest.mark.asyncio
+async def test_both_cursors(chat_with_messages, api):
+    """Тест: before_id и after_id вместе - 400"""
+    id_chat, sender, ids = await chat_with_messages(2)
+    client = await api(sender)
+
+    response = await client.post("/chats/get_messages",
+                                 json={"id_chat": id_chat, "before_id": ids[1], "after_id": ids[0]})
+
+    assert response.status_code == 400
+    with pytest.raises(ValueError):
+        await ChatService.get_messages_page(id_chat, before_id=ids[1], after_id=ids[0])
+
+
+@pytest.mark.asyncio
+async def test_with_total(chat_with_messages, api):
+    """Тест: total считается в режиме offset и по with_total, с курсором - только по запросу"""
+    id_chat, sender, ids = await chat_with_messages(3)
+    client = await api(sender)
+
+    by_offset = (await client.post("/chats/get_messages", json={"id_chat": id_chat, "limit": 2})).json()
+    by_cursor = (await client.post("/chats/get_messages",
+                                   json={"id_chat": id_chat, "limit": 2, "before_id": ids[2]})).json()
+    with_total = (await client.post("/chats/get_messages",
+                                    json={"id_chat": id_chat, "before_id": ids[2], "with_total": True})).json()
+
+    assert by_offset["total"] == 3
+    assert by_offset["next_before_id"] == ids[1]
+    assert by_offset["has_more"] is True
+    assert by_cursor["total"] is None
+    assert [message["id"] for message in by_cursor["messages"]] == [ids[1], ids[0]]
+    assert by_cursor["has_more"] is False
+    assert with_total["total"] == 3
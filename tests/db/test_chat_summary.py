@@ -0,0 +1,95 @@
+"""
+Тесты сводки chats.chat_summary: обновление при отправке, редактировании и прочтении сообщений
+"""
+
+import pytest
+
+from services.chat_service import ChatService
+
+
+async def get_summary(rows, id_chat: int):
+    summary = await rows.fetch(
+        "SELECT id_user, id_last_message, last_msg, last_msg_type, unread_count "
+        "FROM chats.chat_summary WHERE id_chat = $1 ORDER BY id_user", id_chat)
+    return {row["id_user"]: row for row in summary}
+
+
+@pytest.mark.asyncio
+async def test_send_updates_summary(rows):
+    """Тест: последнее сообщение у обоих участников, непрочитанные растут только у получателя"""
+    sender, receiver = await rows.user("Отправитель"), await rows.user("Получатель")
+    id_chat = await rows.chat(sender, receiver)
+
+    await ChatService.save_message(id_chat, sender, receiver, "Привет", 1)
+    message = await ChatService.save_message(id_chat, sender, receiver, "Как дела?", 1)
+
+    summary = await get_summary(rows, id_chat)
+    assert summary[receiver]["unread_count"] == 2
+    assert summary[sender]["unread_count"] == 0
+    assert {row["id_last_message"] for row in summary.values()} == {message.id}
+    assert {row["last_msg"] for row in summary.values()} == {"Как дела?"}
+
+
+@pytest.mark.asyncio
+async def test_reply_marks_sender_read(rows):
+    """Тест: ответ в чате обнуляет непрочитанные отвечающего"""
+    first, second = await rows.user(), await rows.user()
+    id_chat = await rows.chat(first, second)
+
+    await ChatService.save_message(id_chat, first, second, "Вопрос", 1)
+    await ChatService.save_message(id_chat, second, first, "Ответ", 1)
+
+    summary = await get_summary(rows, id_chat)
+    assert summary[second]["unread_count"] == 0
+    assert summary[first]["unread_count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_edit_updates_last_message(rows):
+    """Тест: редактирование последнего сообщения меняет текст в сводке, старого - нет"""
+    sender, receiver = await rows.user(), await rows.user()
+    id_chat = await rows.chat(sender, receiver)
+    old = await ChatService.save_message(id_chat, sender, receiver, "Первое", 1)
+    last = await ChatService.save_message(id_chat, sender, receiver, "Второе", 1)
+
+    await ChatService.update_last_message(old.id, "Первое (изменено)", 1)
+    assert {row["last_msg"] for row in (await get_summary(rows, id_chat)).values()} == {"Второе"}
+
+    await ChatService.update_last_message(last.id, "Второе (изменено)", 1)
+    assert {row["last_msg"] for row in (await get_summary(rows, id_chat)).values()} == {"Второе (изменено)"}
+
+
+@pytest.mark.asyncio
+async def test_read_resets_unread(rows):
+    """Тест: прочтение обнуляет счетчик и уведомления только у прочитавшего"""
+    sender, receiver = await rows.user(), await rows.user()
+    id_chat = await rows.chat(sender, receiver)
+    await ChatService.save_message(id_chat, sender, receiver, "Привет", 1)
+
+    await ChatService.mark_chat_read(id_chat, receiver)
+
+    assert (await get_summary(rows, id_chat))[receiver]["unread_count"] == 0
+    unread = await rows.fetch(
+        "SELECT COUNT(*) AS count FROM history.chat_notification "
+        "WHERE id_chat = $1 AND id_user = $2 AND is_readed = FALSE", id_chat, receiver)
+    assert unread[0]["count"] == 0
+
+
+@pytest.mark.asyncio
+async def test_unread_count_endpoint(rows, api):
+    """Тест: GET /chats/unread_count - сумма непрочитанных по всем чатам пользователя"""
+    receiver = await rows.user()
+    first, second = await rows.user(), await rows.user()
+    first_chat = await rows.chat(first, receiver)
+    second_chat = await rows.chat(second, receiver)
+    await ChatService.save_message(first_chat, first, receiver, "1", 1)
+    await ChatService.save_message(first_chat, first, receiver, "2", 1)
+    await ChatService.save_message(second_chat, second, receiver, "3", 1)
+    client = await api(receiver)
+
+    response = await client.get("/chats/unread_count")
+    assert response.json()["unread"] == 3
+
+    await ChatService.mark_chat_read(first_chat, receiver)
+    response = await client.get("/chats/unread_count")
+    assert response.json()["unread"] == 1
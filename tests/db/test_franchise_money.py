@@ -0,0 +1,104 @@
+"""
+Тесты финансовой статистики франшизы (/franchises/money_stats): проверка периода и дат,
+суммы по дневным итогам data.franchise_balance_daily, которые поддерживает триггер
+"""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from services.franchise_service import FranchiseService
+from tests.db.conftest import ACCOUNT_DRIVER, ACCOUNT_FRANCHISE_ADMIN
+
+BONUS_TASK = -2
+COMMISSION_TASK = -3
+
+
+@pytest.fixture
+def franchise(rows, api):
+    async def create():
+        id_franchise = await rows.franchise()
+        admin = await rows.user(account=ACCOUNT_FRANCHISE_ADMIN, id_franchise=id_franchise)
+        driver = await rows.user(account=ACCOUNT_DRIVER, id_franchise=id_franchise)
+        return id_franchise, driver, await api(admin)
+    return create
+
+
+async def add_history(rows, id_user: int, id_task: int, money: float, created: datetime) -> int:
+    return await rows.insert("data.user_balance_history", id_user=id_user, id_task=id_task, money=money,
+                             isComplete=True, description="Тест", datetime_create=created)
+
+
+@pytest.mark.asyncio
+async def test_period_validation(franchise):
+    """Тест: положительный period, одна из дат или date_from после date_to - 400"""
+    _, _, client = await franchise()
+
+    responses = [
+        await client.get("/franchises/money_stats", params=params) for params in (
+            {"period": 1},
+            {"date_from": "2026-01-01"},
+            {"date_to": "2026-01-01"},
+            {"date_from": "2026-01-02", "date_to": "2026-01-01"},
+        )
+    ]
+
+    assert [response.status_code for response in responses] == [400] * 4
+    assert responses[0].json()["message"] == "The period must be 0 or negative"
+    assert all(response.json()["status"] is False for response in responses[1:])
+
+
+@pytest.mark.asyncio
+async def test_date_range_totals(rows, franchise):
+    """Тест: суммы за произвольный период, date_to включительно, записи вне периода не учитываются"""
+    _, driver, client = await franchise()
+    await add_history(rows, driver, BONUS_TASK, -100, datetime(2026, 3, 1, 0, 0))
+    await add_history(rows, driver, BONUS_TASK, -50, datetime(2026, 3, 31, 23, 59))
+    await add_history(rows, driver, COMMISSION_TASK, -30, datetime(2026, 3, 15, 12, 0))
+    await add_history(rows, driver, BONUS_TASK, -1000, datetime(2026, 4, 1, 0, 0))
+    await add_history(rows, driver, 5, 700, datetime(2026, 3, 10, 9, 0))
+
+    response = await client.get("/franchises/money_stats", params={"date_from": "2026-03-01", "date_to": "2026-03-31"})
+
+    assert response.status_code == 200
+    assert response.json()["minus"] == {"spending_on_bonuses": 150.0}
+    assert response.json()["plus"] == {"received_due_to_commission": 30.0}
+
+
+@pytest.mark.asyncio
+async def test_current_month(rows, franchise):
+    """Тест: period=0 - текущий месяц, period=-1 - предыдущий"""
+    _, driver, client = await franchise()
+    start_of_month = date.today().replace(day=1)
+    await add_history(rows, driver, BONUS_TASK, -10, datetime.combine(start_of_month, datetime.min.time()))
+    await add_history(rows, driver, BONUS_TASK, -20, datetime.combine(start_of_month - timedelta(days=1),
+                                                                     datetime.min.time()))
+
+    current = await client.get("/franchises/money_stats", params={"period": 0})
+    previous = await client.get("/franchises/money_stats", params={"period": -1})
+
+    assert current.json()["minus"]["spending_on_bonuses"] == 10.0
+    assert previous.json()["minus"]["spending_on_bonuses"] == 20.0
+
+
+@pytest.mark.asyncio
+async def test_rollup_follows_history(rows, franchise):
+    """Тест: дневные итоги поддерживаются триггером при вставке, изменении и удалении истории"""
+    id_franchise, driver, _ = await franchise()
+    march = (date(2026, 3, 1), date(2026, 4, 1))
+    first = await add_history(rows, driver, BONUS_TASK, -100, datetime(2026, 3, 5, 10, 0))
+    second = await add_history(rows, driver, BONUS_TASK, -40, datetime(2026, 3, 5, 18, 0))
+
+    inserted = await FranchiseService.get_money_totals(id_franchise, *march, [BONUS_TASK, COMMISSION_TASK])
+    daily = await rows.fetch("SELECT money, operations_count FROM data.franchise_balance_daily "
+                             "WHERE id_franchise = $1 AND id_task = $2", id_franchise, BONUS_TASK)
+    await rows.fetch("UPDATE data.user_balance_history SET datetime_create = $1 WHERE id = $2",
+                     datetime(2026, 4, 2, 10, 0), first)
+    moved = await FranchiseService.get_money_totals(id_franchise, *march, [BONUS_TASK])
+    await rows.fetch("DELETE FROM data.user_balance_history WHERE id = $1", second)
+    deleted = await FranchiseService.get_money_totals(id_franchise, *march, [BONUS_TASK])
+
+    assert inserted == {BONUS_TASK: -140.0, COMMISSION_TASK: 0.0}
+    assert [(float(row["money"]), row["operations_count"]) for row in daily] == [(-140.0, 2)]
+    assert moved == {BONUS_TASK: -40.0}
+    assert deleted == {BONUS_TASK: 0.0}
@@ -0,0 +1,35 @@
+"""
+Тесты /drivers/get_full_roads_info: график-заглушка для маршрутов без графика и количество запросов
+"""
+
+import pytest
+
+from tests.db.conftest import ACCOUNT_DRIVER, ACCOUNT_PARENT
+
+
+@pytest.mark.asyncio
+async def test_full_roads_info(rows, api, query_stats):
+    """Тест: маршруты нескольких графиков за постоянное число запросов, маршрут без графика не теряется"""
+    parent = await rows.user(account=ACCOUNT_PARENT, photo_path="/parent.jpg")
+    driver = await rows.user(account=ACCOUNT_DRIVER)
+    schedules = [await rows.schedule(parent) for _ in range(3)]
+    road_ids = [await rows.road(id_schedule, week_day) for id_schedule in schedules for week_day in (1, 3)]
+    orphan = await rows.road(0)
+    client = await api(driver)
+
+    before = query_stats.count
+    response = await client.get("/drivers/get_full_roads_info",
+                                params={"road_ids": ",".join(map(str, road_ids + [orphan]))})
+    queries = query_stats.count - before
+
+    assert response.status_code == 200
+    body = response.json()["schedules"]
+    assert [schedule["id"] for schedule in body] == schedules + [0]
+    assert [road["id"] for road in body[0]["roads"]] == road_ids[:2]
+    assert body[0]["user"] == {"id_user": parent, "name": "Тест", "photo_path": "/parent.jpg"}
+    assert body[-1]["title"] == "Unknown schedule"
+    assert body[-1]["user"]["name"] == "Unknown user"
+    assert body[-1]["week_days"] == [1]
+    assert [road["id"] for road in body[-1]["roads"]] == [orphan]
+    # Бюджет эндпоинта (@query_budget) не зависит от числа графиков и маршрутов
+    assert queries <= 9
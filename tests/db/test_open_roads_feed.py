@@ -0,0 +1,96 @@
+"""
+Тесты ленты открытых маршрутов /drivers/get_schedules_requests: курсор, маршруты с водителем,
+фильтры по дню недели и радиусу
+"""
+
+import pytest
+
+from services.open_roads_service import OpenRoadsService
+from tests.db.conftest import ACCOUNT_DRIVER, ACCOUNT_PARENT
+
+
+@pytest.fixture
+def feed(rows, api):
+    async def create():
+        parent = await rows.user(account=ACCOUNT_PARENT)
+        driver = await rows.user(account=ACCOUNT_DRIVER)
+        return parent, driver, await api(driver)
+    return create
+
+
+async def get_page(client, **params):
+    response = await client.get("/drivers/get_schedules_requests", params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_cursor_pages(rows, feed):
+    """Тест: две страницы по курсору next_after_id без пропусков и повторов"""
+    parent, _, client = await feed()
+    schedules = []
+    for _ in range(4):
+        id_schedule = await rows.schedule(parent)
+        await rows.road(id_schedule, 1)
+        schedules.append(id_schedule)
+    await OpenRoadsService.refresh(schedule_ids=schedules)
+
+    first = await get_page(client, limit=2, after_id=schedules[0] - 1)
+    second = await get_page(client, limit=2, after_id=first["next_after_id"])
+
+    assert [schedule["id"] for schedule in first["schedules"]] == schedules[:2]
+    assert first["has_more"] is True
+    assert first["next_after_id"] == schedules[1]
+    assert [schedule["id"] for schedule in second["schedules"]] == schedules[2:]
+
+
+@pytest.mark.asyncio
+async def test_roads_with_driver_excluded(rows, feed):
+    """Тест: маршруты с активным водителем не попадают в ленту, график без открытых маршрутов - тоже"""
+    parent, driver, client = await feed()
+    partly_taken, taken = await rows.schedule(parent), await rows.schedule(parent)
+    open_road, taken_road = await rows.road(partly_taken, 1), await rows.road(partly_taken, 2)
+    other_taken_road = await rows.road(taken, 1)
+    for id_road in (taken_road, other_taken_road):
+        await rows.insert("data.schedule_road_driver", id_schedule_road=id_road, id_driver=driver, isActive=True)
+    await rows.insert("data.schedule_road_driver", id_schedule_road=open_road, id_driver=driver, isActive=False)
+    await OpenRoadsService.refresh(schedule_ids=[partly_taken, taken])
+
+    page = await get_page(client, after_id=partly_taken - 1)
+
+    assert [schedule["id"] for schedule in page["schedules"]] == [partly_taken]
+    assert [road["id"] for road in page["schedules"][0]["roads"]] == [open_road]
+
+
+@pytest.mark.asyncio
+async def test_week_day_filter(rows, feed):
+    """Тест: фильтр по дню недели оставляет только маршруты этого дня"""
+    parent, _, client = await feed()
+    id_schedule, other_schedule = await rows.schedule(parent), await rows.schedule(parent)
+    monday, wednesday = await rows.road(id_schedule, 1), await rows.road(id_schedule, 3)
+    await rows.road(other_schedule, 1)
+    await OpenRoadsService.refresh(schedule_ids=[id_schedule, other_schedule])
+
+    page = await get_page(client, week_day=3, after_id=id_schedule - 1)
+
+    assert [schedule["id"] for schedule in page["schedules"]] == [id_schedule]
+    assert [road["id"] for road in page["schedules"][0]["roads"]] == [wednesday]
+    assert monday not in [road["id"] for road in page["schedules"][0]["roads"]]
+
+
+@pytest.mark.asyncio
+async def test_radius_filter(rows, feed):
+    """Тест: фильтр по радиусу от водителя; без координат и режима поиска заказов - ошибка"""
+    parent, _, client = await feed()
+    near, far = await rows.schedule(parent), await rows.schedule(parent)
+    near_road = await rows.road(near, 1, latitude=10.0, longitude=10.05)
+    await rows.road(far, 1, latitude=10.0, longitude=11.0)
+    await OpenRoadsService.refresh(schedule_ids=[near, far])
+
+    page = await get_page(client, radius_km=20, latitude=10.0, longitude=10.0)
+    unknown = await client.get("/drivers/get_schedules_requests", params={"radius_km": 20})
+
+    assert [schedule["id"] for schedule in page["schedules"]] == [near]
+    assert [road["id"] for road in page["schedules"][0]["roads"]] == [near_road]
+    assert page["schedules"][0]["distance_km"] == pytest.approx(5.48, abs=0.05)
+    assert unknown.json()["status"] is False
@@ -0,0 +1,87 @@
+"""
+Тесты витрины открытых маршрутов data.open_road_market: OpenRoadsService.refresh и страница MARKET_PAGE_SQL
+"""
+
+import pytest
+
+from services.open_roads_service import OpenRoadsService
+from tests.db.conftest import ACCOUNT_DRIVER, ACCOUNT_PARENT
+
+
+MARKET_ROWS_SQL = """
+SELECT id_schedule_road, week_day, salary, pickup_lat, requests_count
+FROM data.open_road_market WHERE id_schedule = $1 ORDER BY id_schedule_road
+"""
+
+
+@pytest.mark.asyncio
+async def test_refresh(rows):
+    """Тест: строки витрины появляются, обновляются и удаляются вместе с изменениями маршрутов"""
+    parent, driver = await rows.user(), await rows.user()
+    id_schedule = await rows.schedule(parent)
+    first, second = await rows.road(id_schedule, 1, amount=500), await rows.road(id_schedule, 2, latitude=56.0)
+    await rows.insert("wait_data.schedule_road_drivers", id_road=first, id_schedule=id_schedule, id_driver=driver)
+
+    await OpenRoadsService.refresh(schedule_ids=[id_schedule])
+    created = await rows.fetch(MARKET_ROWS_SQL, id_schedule)
+
+    await rows.fetch("UPDATE data.schedule_road SET amount = 700 WHERE id = $1", first)
+    await rows.insert("data.schedule_road_driver", id_schedule_road=second, id_driver=driver, isActive=True)
+    await OpenRoadsService.refresh(road_ids=[first, second])
+    updated = await rows.fetch(MARKET_ROWS_SQL, id_schedule)
+
+    await rows.fetch('UPDATE data.schedule_road SET "isActive" = FALSE WHERE id = $1', first)
+    await OpenRoadsService.refresh(road_ids=[first])
+
+    assert [(row["id_schedule_road"], row["week_day"], float(row["salary"]), row["requests_count"])
+            for row in created] == [(first, 1, 500.0, 1), (second, 2, 500.0, 0)]
+    assert created[1]["pickup_lat"] == 56.0
+    assert [(row["id_schedule_road"], float(row["salary"])) for row in updated] == [(first, 700.0)]
+    assert await rows.fetch(MARKET_ROWS_SQL, id_schedule) == []
+
+
+@pytest.mark.asyncio
+async def test_page_sorted_by_distance(rows):
+    """Тест: сортировка по ближайшей точке отправления, расстояние графика - до ближайшего маршрута"""
+    parent = await rows.user()
+    far, near, middle = [await rows.schedule(parent) for _ in range(3)]
+    await rows.road(far, 1, latitude=-10.0, longitude=-10.3)
+    near_roads = [await rows.road(near, 1, latitude=-10.0, longitude=-10.05),
+                  await rows.road(near, 2, latitude=-10.0, longitude=-10.25)]
+    await rows.road(middle, 1, latitude=-10.0, longitude=-10.1)
+    await OpenRoadsService.refresh(schedule_ids=[far, near, middle])
+    position = (-10.0, -10.0)
+
+    first, first_more = await OpenRoadsService.get_open_roads_page(
+        limit=2, position=position, radius_km=50, sort_by_distance=True)
+    second, second_more = await OpenRoadsService.get_open_roads_page(
+        limit=2, offset=2, position=position, radius_km=50, sort_by_distance=True)
+
+    assert list(first) == [near, middle]
+    assert first[near]["roads"] == near_roads
+    assert first[near]["distance_km"] == pytest.approx(5.48, abs=0.05)
+    assert first_more is True
+    assert list(second) == [far]
+    assert second_more is False
+
+
+@pytest.mark.asyncio
+async def test_feed_query_count(rows, api, query_stats):
+    """Тест: страница ленты - витрина и деревья графиков за постоянное число запросов"""
+    parent = await rows.user(account=ACCOUNT_PARENT)
+    client = await api(await rows.user(account=ACCOUNT_DRIVER))
+    schedules = [await rows.schedule(parent) for _ in range(3)]
+    for id_schedule in schedules:
+        for week_day in (1, 3):
+            await rows.road(id_schedule, week_day, latitude=-20.0, longitude=-20.0)
+    await OpenRoadsService.refresh(schedule_ids=schedules)
+
+    before = query_stats.count
+    response = await client.get("/drivers/get_schedules_requests",
+                                params={"radius_km": 10, "latitude": -20.0, "longitude": -20.0})
+    queries = query_stats.count - before
+
+    assert [schedule["id"] for schedule in response.json()["schedules"]] == schedules
+    assert all(len(schedule["roads"]) == 2 for schedule in response.json()["schedules"])
+    # Токен, витрина и 6 запросов деревьев; без координат - еще местоположение водителя (@query_budget(9))
+    assert queries <= 8
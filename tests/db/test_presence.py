@@ -0,0 +1,28 @@
+"""
+Тесты присутствия пользователей в users.user_presence: видимость между воркерами и продление сервером
+"""
+
+import pytest
+
+from services.presence_service import PresenceService
+
+
+@pytest.mark.asyncio
+async def test_presence_across_workers(rows):
+    """Тест: подключение в одном воркере видно другому, продление сервером и офлайн после отключения"""
+    id_user = await rows.user()
+    rows.delete_later("users.user_presence", "id_user", id_user)
+    worker, other_worker = PresenceService(), PresenceService()
+    worker.worker_id, other_worker.worker_id = "tests:1", "tests:2"
+
+    await worker.connect(id_user)
+    await rows.fetch("UPDATE users.user_presence SET online_until = NOW() - interval '1 second' WHERE id_user = $1",
+                     id_user)
+    expired = await other_worker.is_online(id_user)
+    await worker.renew()
+    renewed = await other_worker.is_online(id_user)
+    await worker.disconnect(id_user)
+
+    assert (expired, renewed) == (False, True)
+    assert not await other_worker.is_online(id_user)
+    worker._renew_task.cancel()
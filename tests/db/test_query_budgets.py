@@ -0,0 +1,85 @@
+"""
+Бюджеты запросов эндпоинтов со списками (@query_budget): запрос проходит через middleware,
+превышение бюджета проваливает тест (фикстура query_stats). Бюджеты /franchises/money_stats
+и /drivers/get_full_roads_info проверяют test_franchise_money.py и test_full_roads_info.py.
+"""
+
+import uuid
+from datetime import datetime
+
+import pytest
+
+from tests.db.conftest import ACCOUNT_ADMIN, ACCOUNT_DRIVER, ACCOUNT_FRANCHISE_ADMIN, ACCOUNT_PARENT
+
+
+@pytest.mark.asyncio
+async def test_children(rows, api):
+    """Тест: /users/children - активные дети родителя"""
+    parent = await rows.user(account=ACCOUNT_PARENT)
+    children = [await rows.insert("users.child", id_user=parent, name=name, surname="Тестов", isActive=True,
+                                  datetime_create=datetime.now()) for name in ("Аня", "Петя")]
+    await rows.insert("users.child", id_user=parent, name="Удален", isActive=False)
+    client = await api(parent)
+
+    response = await client.get("/users/children")
+
+    assert response.status_code == 200
+    assert sorted(child["id"] for child in response.json()["children"]) == children
+    assert response.json()["total"] == 2
+
+
+@pytest.mark.asyncio
+async def test_admin_parents(rows, api):
+    """Тест: /admins/parents - поиск, количество детей и активных графиков одним запросом"""
+    name = f"Бюджет{uuid.uuid4().hex[:8]}"
+    parents = [await rows.user(name=name, account=ACCOUNT_PARENT, photo_path="/parent.jpg") for _ in range(3)]
+    await rows.insert("users.child", id_user=parents[0], name="Аня", isActive=True)
+    await rows.schedule(parents[0])
+    client = await api(await rows.user(account=ACCOUNT_ADMIN))
+
+    response = await client.post("/admins/parents", json={"search": name, "limit": 2})
+    page = await client.post("/admins/parents", json={"search": name, "limit": 2, "offset": 2})
+
+    assert response.status_code == page.status_code == 200
+    assert response.json()["total"] == page.json()["total"] == 3
+    found = {parent["id"]: parent for parent in response.json()["parents"] + page.json()["parents"]}
+    assert sorted(found) == parents
+    assert (found[parents[0]]["children_count"], found[parents[0]]["active_orders_count"]) == (1, 1)
+    assert found[parents[1]]["photo_path"] == "/parent.jpg"
+
+
+@pytest.mark.asyncio
+async def test_admin_schedules(rows, api):
+    """Тест: /admins/schedules - графики родителя с количеством маршрутов, страница и курсор"""
+    parent = await rows.user(account=ACCOUNT_PARENT)
+    schedules = [await rows.schedule(parent) for _ in range(3)]
+    await rows.road(schedules[-1])
+    client = await api(await rows.user(account=ACCOUNT_ADMIN))
+
+    first = await client.post("/admins/schedules", params={"parent_id": parent, "per_page": 2})
+    cursor = first.json()["pagination"]["next_after_id"]
+    second = await client.post("/admins/schedules", params={"parent_id": parent, "per_page": 2, "after_id": cursor})
+
+    assert first.status_code == second.status_code == 200
+    assert [item["id"] for item in first.json()["data"]] == schedules[:0:-1]
+    assert first.json()["data"][0]["roads_count"] == 1
+    assert first.json()["pagination"]["total"] == 3
+    assert [item["id"] for item in second.json()["data"]] == schedules[:1]
+    assert second.json()["pagination"]["has_more"] is False
+
+
+@pytest.mark.asyncio
+async def test_franchise_drivers(rows, api):
+    """Тест: /franchises/drivers - водители франшизы без водителей других франшиз, страница"""
+    id_franchise = await rows.franchise()
+    drivers = [await rows.user(account=ACCOUNT_DRIVER, id_franchise=id_franchise) for _ in range(2)]
+    await rows.user(account=ACCOUNT_DRIVER, id_franchise=await rows.franchise())
+    client = await api(await rows.user(account=ACCOUNT_FRANCHISE_ADMIN, id_franchise=id_franchise))
+
+    response = await client.get("/franchises/drivers")
+    page = await client.get("/franchises/drivers", params={"limit": 1, "offset": 1})
+
+    assert response.status_code == page.status_code == 200
+    assert [driver["id"] for driver in response.json()["drivers"]] == drivers[::-1]
+    assert response.json()["total"] == 2
+    assert [driver["id"] for driver in page.json()["drivers"]] == drivers[:1]
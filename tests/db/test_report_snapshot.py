@@ -0,0 +1,72 @@
+"""
+Тесты снимка дневных итогов отчетов data.report_daily_snapshot: пересчет закрытых дней
+после изменения исходных записей
+"""
+
+from datetime import date, datetime
+
+import pytest
+
+from models.users_db import HistoryPaymentTink, UsersUser
+from services.report_pdf_service import ReportPdfService
+from services.report_service import ReportService
+
+DAY = date(2001, 2, 3)
+
+
+@pytest.mark.asyncio
+async def test_users_report_follows_changes(rows):
+    """Тест: регистрация за закрытый день после сохранения снимка попадает в отчет, удаление - тоже"""
+    rows.delete_later("data.report_daily_snapshot", "day", DAY)
+    before = await ReportService.get_daily_totals(UsersUser, DAY, DAY)
+    snapshot = await rows.fetch("SELECT count FROM data.report_daily_snapshot WHERE day = $1", DAY)
+
+    id_user = await rows.user()
+    await rows.fetch("UPDATE users.user SET datetime_create = $1 WHERE id = $2", datetime(2001, 2, 3, 12, 0), id_user)
+    added = await ReportService.get_daily_totals(UsersUser, DAY, DAY)
+    await rows.fetch("DELETE FROM users.user WHERE id = $1", id_user)
+    removed = await ReportService.get_daily_totals(UsersUser, DAY, DAY)
+
+    assert [row["count"] for row in snapshot] == [before[DAY]["count"]]
+    assert added[DAY]["count"] == before[DAY]["count"] + 1
+    assert removed[DAY]["count"] == before[DAY]["count"]
+
+
+@pytest.mark.asyncio
+async def test_sales_report_follows_changes(rows):
+    """Тест: изменение суммы платежа за закрытый день пересчитывает снимок только отчета по платежам"""
+    rows.delete_later("data.report_daily_snapshot", "day", DAY)
+    id_user = await rows.user()
+    id_payment = await rows.insert("history.payment_tink", id_user=id_user, amount=100,
+                                   datetime_create=datetime(2001, 2, 3, 9, 0))
+    before = await ReportService.get_daily_totals(HistoryPaymentTink, DAY, DAY, "amount")
+    await ReportService.get_daily_totals(UsersUser, DAY, DAY)
+
+    await rows.fetch("UPDATE history.payment_tink SET amount = 250 WHERE id = $1", id_payment)
+    keys = [row["report_key"] for row in await rows.fetch(
+        "SELECT report_key FROM data.report_daily_snapshot WHERE day = $1", DAY)]
+    after = await ReportService.get_daily_totals(HistoryPaymentTink, DAY, DAY, "amount")
+
+    assert after[DAY]["sum"] - before[DAY]["sum"] == 150
+    assert after[DAY]["count"] == before[DAY]["count"]
+    assert keys == [f"{ReportService.get_table(UsersUser)}:count"]
+
+
+@pytest.mark.asyncio
+async def test_cached_pdf_follows_changes(rows, tmp_path):
+    """Тест: PDF за закрытый период собирается заново после изменения платежа"""
+    rows.delete_later("data.report_daily_snapshot", "day", DAY)
+    id_user = await rows.user()
+    id_payment = await rows.insert("history.payment_tink", id_user=id_user, amount=100,
+                                   datetime_create=datetime(2001, 2, 3, 9, 0))
+    service = ReportPdfService(directory=str(tmp_path))
+    first = await service.render("sales", DAY, DAY)
+    cached = await service.start("sales", DAY, DAY)
+
+    await rows.fetch("UPDATE history.payment_tink SET amount = 250 WHERE id = $1", id_payment)
+    second = await service.render("sales", DAY, DAY)
+
+    assert cached == first
+    assert service.is_cacheable(second)
+    assert second != first
+    assert service.get_file(second) is not None
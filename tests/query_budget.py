@@ -0,0 +1,41 @@
+"""
+Pytest-плагин бюджетов запросов к БД (подключается в conftest.py в корне проекта).
+
+Каждый тест выполняется внутри счетчика common.query_profiler.profile_queries:
+- если эндпоинт с @query_budget(n) выполнил за HTTP запрос больше n запросов, тест падает;
+- @pytest.mark.query_budget(n) ограничивает количество запросов всего теста;
+- фикстура query_stats возвращает счетчик теста (count, total_ms, get_slowest()).
+"""
+import pytest
+
+try:
+    from common.query_profiler import install_query_profiler, profile_queries
+except ImportError:  # Зависимости приложения не установлены - плагин ничего не проверяет
+    install_query_profiler = profile_queries = None
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "query_budget(max_queries): максимальное количество запросов к БД за тест"
+    )
+    if install_query_profiler is not None:
+        try:
+            install_query_profiler()
+        except ImportError:
+            pass
+
+
+@pytest.fixture(autouse=True)
+def query_stats(request):
+    """Счетчик запросов к БД текущего теста"""
+    if profile_queries is None:
+        yield None
+        return
+    with profile_queries() as stats:
+        yield stats
+    if stats.budget_violations:
+        pytest.fail("DB query budget exceeded:\n" + "\n".join(stats.budget_violations), pytrace=False)
+    marker = request.node.get_closest_marker("query_budget")
+    if marker is not None and stats.count > marker.args[0]:
+        slowest = "\n".join(item["query"] for item in stats.get_slowest())
+        pytest.fail(f"{stats.count} DB queries, budget {marker.args[0]}. Slowest:\n{slowest}", pytrace=False)
@@ -0,0 +1,89 @@
+"""
+Тесты сервиса списков админ-панели: форматирование строк списков родителей и контрактов
+"""
+
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("tortoise")
+
+from services.admin_service import (  # noqa: E402
+    format_parent_row, format_date, format_schedule_row, build_tsquery
+)
+from const.static_data_const import not_user_photo  # noqa: E402
+
+
+class TestParentsList:
+    """Тесты формата строк /admins/parents"""
+
+    def build_row(self, **overrides):
+        row = {
+            "id": 1, "name": "Иван", "surname": "Иванов", "phone": "+79991234567",
+            "isActive": True, "datetime_create": datetime(2024, 3, 5, 10, 0),
+            "children_count": 2, "active_orders_count": 0, "photo_path": None, "total": 10
+        }
+        row.update(overrides)
+        return row
+
+    def test_format_parent_row(self):
+        """Тест: агрегаты из запроса и дата в формате DD.MM.YYYY"""
+        parent = format_parent_row(self.build_row())
+
+        assert parent["datetime_create"] == "05.03.2024"
+        assert parent["children_count"] == 2
+        assert parent["active_orders_count"] == 0
+        assert parent["status"] == "Активен"
+        assert "total" not in parent
+
+    def test_default_photo(self):
+        """Тест: фото по умолчанию, если у родителя нет фото"""
+        assert format_parent_row(self.build_row())["photo_path"] == not_user_photo
+        assert format_parent_row(self.build_row(photo_path="/p.jpg"))["photo_path"] == "/p.jpg"
+
+    def test_blocked_status(self):
+        """Тест: статус заблокированного родителя"""
+        assert format_parent_row(self.build_row(isActive=False))["status"] == "Заблокирован"
+
+    def test_format_empty_date(self):
+        """Тест: пустая дата регистрации"""
+        assert format_date(None) is None
+
+
+class TestSchedulesList:
+    """Тесты /admins/schedules: поиск и формат строк"""
+
+    def test_build_tsquery(self):
+        """Тест: префиксный поиск по каждому слову"""
+        assert build_tsquery("Школа №5") == "Школа:* & 5:*"
+        assert build_tsquery("  ") is None
+        assert build_tsquery(None) is None
+
+    def test_tsquery_strips_operators(self):
+        """Тест: операторы tsquery из строки поиска не попадают в запрос"""
+        assert build_tsquery("a & !b | (c)") == "a:* & b:* & c:*"
+
+    def test_format_schedule_row(self):
+        """Тест: родитель и агрегаты из одной строки запроса"""
+        row = {
+            "id": 7, "id_user": 3, "title": "Школа", "description": None, "children_count": 1,
+            "duration": 30, "week_days": "0;2", "isActive": True, "datetime_create": None,
+            "parent_name": "Иван", "parent_surname": "Иванов", "parent_phone": "+79991234567",
+            "parent_exists": True, "roads_count": 4, "drivers_assigned": 2
+        }
+        schedule = format_schedule_row(row)
+
+        assert schedule["parent"] == {"id": 3, "name": "Иван", "surname": "Иванов", "phone": "+79991234567"}
+        assert schedule["roads_count"] == 4
+        assert schedule["drivers_assigned"] == 2
+
+    def test_missing_parent(self):
+        """Тест: контракт удаленного родителя"""
+        row = {
+            "id": 7, "id_user": 3, "title": None, "description": None, "children_count": 1,
+            "duration": 30, "week_days": "0", "isActive": False, "datetime_create": None,
+            "parent_name": None, "parent_surname": None, "parent_phone": None,
+            "parent_exists": False, "roads_count": 0, "drivers_assigned": 0
+        }
+
+        assert format_schedule_row(row)["parent"]["id"] is None
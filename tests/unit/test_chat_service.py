@@ -0,0 +1,124 @@
+"""
+Тесты сервиса чатов: поиск по имени собеседника, формат строк списка чатов и общее количество
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("tortoise")
+
+from services import chat_service  # noqa: E402
+from services.chat_service import (  # noqa: E402
+    CHAT_LIST_COUNT_SQL, CHAT_LIST_SQL, ChatService, build_search_pattern, format_chat_row
+)
+from const.static_data_const import not_user_photo  # noqa: E402
+
+
+class FakeConnection:
+    """Соединение, которое возвращает заранее заданные строки для каждого запроса"""
+
+    def __init__(self, results):
+        self.results = dict(results)
+        self.queries = []
+
+    async def execute_query_dict(self, query, values=None):
+        self.queries.append((query, values))
+        return self.results[query]
+
+
+@pytest.fixture
+def connection(monkeypatch):
+    def install(results):
+        conn = FakeConnection(results)
+        monkeypatch.setattr(chat_service.Tortoise, "get_connection", lambda name: conn)
+        return conn
+    return install
+
+
+class TestSearchPattern:
+    """Тесты build_search_pattern"""
+
+    def test_substring(self):
+        """Тест: поиск по вхождению"""
+        assert build_search_pattern("Анна") == "%Анна%"
+
+    def test_empty(self):
+        """Тест: пустой поиск - без фильтра"""
+        assert build_search_pattern(None) is None
+        assert build_search_pattern("") is None
+
+    def test_escape_wildcards(self):
+        """Тест: % и _ ищутся как символы, а не как шаблон"""
+        assert build_search_pattern("100%") == "%100\\%%"
+        assert build_search_pattern("a_b") == "%a\\_b%"
+
+    def test_escape_backslash(self):
+        """Тест: обратный слеш экранируется до экранирования шаблонов"""
+        assert build_search_pattern("a\\%") == "%a\\\\\\%%"
+
+
+class TestChatRow:
+    """Тесты format_chat_row"""
+
+    def build_row(self, **overrides):
+        row = {
+            "id_chat": 7, "id_counterpart": 2, "username": "Анна", "photo_path": "/p.jpg",
+            "timestamp_send": 1700000000, "msg": "Привет", "has_message": True, "new_message": 3, "total": 1
+        }
+        row.update(overrides)
+        return row
+
+    def test_format_chat_row(self):
+        """Тест: собеседник и последнее сообщение с количеством непрочитанных"""
+        assert format_chat_row(self.build_row()) == {
+            "id_chat": 7,
+            "username": "Анна",
+            "photo_path": "/p.jpg",
+            "message": {"msg": "Привет", "time": 1700000000, "new_message": 3}
+        }
+
+    def test_default_photo(self):
+        """Тест: фото по умолчанию, если у собеседника нет фото"""
+        assert format_chat_row(self.build_row(photo_path=None))["photo_path"] == not_user_photo
+
+    def test_without_messages(self):
+        """Тест: чат без сообщений"""
+        assert format_chat_row(self.build_row(has_message=False))["message"] is None
+
+    def test_without_counterpart(self):
+        """Тест: чат без собеседника - только id и сообщение"""
+        chat = format_chat_row(self.build_row(id_counterpart=None, username=None))
+
+        assert "username" not in chat
+        assert "photo_path" not in chat
+
+
+class TestChatList:
+    """Тесты общего количества в ChatService.get_chat_list"""
+
+    def test_total_from_window(self, connection):
+        """Тест: общее количество из оконной функции, без отдельного COUNT"""
+        conn = connection({CHAT_LIST_SQL: [TestChatRow().build_row(total=12)]})
+
+        chats, total = asyncio.run(ChatService.get_chat_list(1, offset=0, limit=1, search="100%"))
+
+        assert total == 12
+        assert len(chats) == 1
+        assert conn.queries == [(CHAT_LIST_SQL, [1, "%100\\%%", 1, 0])]
+
+    def test_total_past_last_page(self, connection):
+        """Тест: страница за пределами выборки - количество отдельным запросом"""
+        conn = connection({CHAT_LIST_SQL: [], CHAT_LIST_COUNT_SQL: [{"total": 4}]})
+
+        chats, total = asyncio.run(ChatService.get_chat_list(1, offset=50, limit=50))
+
+        assert (chats, total) == ([], 4)
+        assert conn.queries[1] == (CHAT_LIST_COUNT_SQL, [1, None])
+
+    def test_no_chats(self, connection):
+        """Тест: у пользователя нет чатов - один запрос"""
+        conn = connection({CHAT_LIST_SQL: []})
+
+        assert asyncio.run(ChatService.get_chat_list(1)) == ([], 0)
+        assert len(conn.queries) == 1
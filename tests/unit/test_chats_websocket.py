@@ -0,0 +1,101 @@
+"""
+Тесты реестра чат-сокетов: подключение, отключение, закрытие после неудачной отправки и метрики
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("tortoise")
+pytest.importorskip("fastapi")
+
+from common.metrics import WEBSOCKET_EVICTIONS, registry  # noqa: E402
+from routers import chats_websocket  # noqa: E402
+from routers.chats_websocket import ConnectionManager  # noqa: E402
+
+
+class FakeWebSocket:
+    """Сокет, который запоминает отправленные кадры и закрытие"""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.accepted = False
+        self.closed = None
+        self.sent = []
+
+    async def accept(self):
+        self.accepted = True
+
+    async def send_text(self, text):
+        if self.fail:
+            raise RuntimeError("connection lost")
+        self.sent.append(text)
+
+    async def close(self, code=1000):
+        self.closed = code
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    connections = ConnectionManager()
+    monkeypatch.setattr(chats_websocket, "manager", connections)
+    monkeypatch.setattr(chats_websocket, "users", connections.sockets)
+    return connections
+
+
+class TestConnectionManager:
+    """Тесты ConnectionManager"""
+
+    def test_connect_and_disconnect(self, manager):
+        """Тест: соединение регистрируется под токеном, повторное отключение безопасно"""
+        websocket = FakeWebSocket()
+
+        asyncio.run(manager.connect(websocket, "token"))
+        registered = manager.sockets.get("token")
+        manager.disconnect(websocket)
+        manager.disconnect(websocket)
+
+        assert websocket.accepted
+        assert registered is websocket
+        assert manager.stats() == {"connections": 0, "evictions": 0, "memory_per_connection": 0}
+
+    def test_reconnect_keeps_new_socket(self, manager):
+        """Тест: отключение старого соединения не снимает новое с тем же токеном"""
+        old, new = FakeWebSocket(), FakeWebSocket()
+
+        async def run():
+            await manager.connect(old, "token")
+            await manager.connect(new, "token")
+        asyncio.run(run())
+        manager.disconnect(old)
+
+        assert manager.sockets["token"] is new
+
+    def test_no_frames_without_messages(self, manager):
+        """Тест: пассивный клиент не получает служебных кадров и не отключается"""
+        websocket = FakeWebSocket()
+
+        async def run():
+            await manager.connect(websocket, "token")
+            await asyncio.sleep(0.01)
+        asyncio.run(run())
+
+        assert websocket.sent == []
+        assert manager.stats()["connections"] == 1
+        assert manager.stats()["memory_per_connection"] > 0
+
+    def test_evict_after_failed_send(self, manager):
+        """Тест: кадр не отправился - соединение закрывается и учитывается в метрике"""
+        websocket = FakeWebSocket(fail=True)
+        evictions = WEBSOCKET_EVICTIONS.labels("chat").value
+
+        async def run():
+            await manager.connect(websocket, "token")
+            return await chats_websocket.deliver_chat_frame("token", {"msg": "Привет"})
+
+        assert asyncio.run(run()) is False
+        assert websocket.closed == 1001
+        assert manager.stats()["evictions"] == 1
+        assert "token" not in manager.sockets
+        assert WEBSOCKET_EVICTIONS.labels("chat").value == evictions + 1
+        assert 'websocket_memory_per_connection_bytes{manager="chat"}' in registry.render()
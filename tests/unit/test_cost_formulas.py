@@ -3,7 +3,12 @@ BE-MVP-031: Тесты для формул расчета стоимости п
 """
 
 import pytest
-from const.cost_formulas import get_total_cost_of_the_trip
+from const.cost_formulas import (
+    DEFAULT_COEFFICIENTS, PricingCoefficientsValues, get_current_coefficients, get_total_cost_matrix,
+    get_total_cost_of_the_trip, set_current_coefficients
+)
+
+np = pytest.importorskip("numpy")
 
 
 class TestCostFormulas:
@@ -100,6 +105,71 @@ class TestCostFormulas:
             # Это ожидаемое поведение для отрицательных значений
             pass
 
+    def test_default_coefficients(self):
+        """Тест: коэффициенты по умолчанию дают прежний расчет по константам модуля"""
+        # S = 3 + 10 км, Kh2 = 3600 / (3600 / 27 * 10) = 2.7 -> 2.5
+        expected = (2.5 * 13 * 50 * 1 + 1 * 10 / 100) * 1.03
+
+        cost = get_total_cost_of_the_trip(M=50, S2=10000, To=3600, coefficients=DEFAULT_COEFFICIENTS)
+
+        assert cost == pytest.approx(expected)
+
+    def test_current_coefficients(self):
+        """Тест: без явных коэффициентов используются активные (из кэша конфигурации цен)"""
+        previous = get_current_coefficients()
+        custom = PricingCoefficientsValues(vm=27, s1=0, kc=0, ks=0, kg=2)
+        set_current_coefficients(custom)
+        try:
+            cost = get_total_cost_of_the_trip(M=50, S2=10000, To=0)
+        finally:
+            set_current_coefficients(previous)
+
+        assert cost == pytest.approx(10 * 50 * 2)
+
+
+class TestCostMatrix:
+    """Тесты матричного расчета: совпадение с get_total_cost_of_the_trip"""
+
+    TARIFFS = [0, 50, 100, 450, 1500]
+
+    def scalar_matrix(self, distances, durations, coefficients=None):
+        return [[get_total_cost_of_the_trip(M=m, S2=s, To=t, coefficients=coefficients)
+                 for s, t in zip(distances, durations)] for m in self.TARIFFS]
+
+    def test_equivalence_random_routes(self):
+        """Тест: на случайных маршрутах матрица совпадает с поэлементным расчетом"""
+        rng = np.random.default_rng(42)
+        distances = rng.uniform(0, 60000, 200).tolist()
+        durations = rng.integers(0, 7200, 200).tolist()
+
+        matrix = get_total_cost_matrix(M=self.TARIFFS, S2=distances, To=durations)
+
+        assert matrix.shape == (len(self.TARIFFS), 200)
+        np.testing.assert_allclose(matrix, self.scalar_matrix(distances, durations), rtol=1e-12)
+
+    def test_equivalence_edge_cases(self):
+        """Тест: нулевые дистанция и время, границы коэффициента пробок"""
+        distances = [0, 0, 1, 10000, 10000, 10000]
+        durations = [0, 600, 0, 1, 3600, 36000]
+
+        matrix = get_total_cost_matrix(M=self.TARIFFS, S2=distances, To=durations)
+
+        np.testing.assert_allclose(matrix, self.scalar_matrix(distances, durations), rtol=1e-12)
+
+    def test_equivalence_custom_coefficients(self):
+        """Тест: совпадение при коэффициентах, отличных от значений по умолчанию (и нулевой скорости)"""
+        distances, durations = [0, 5000, 20000], [300, 900, 1200]
+        for coefficients in (PricingCoefficientsValues(vm=40, s1=1.5, kc=2, ks=0.5, kg=1.2),
+                             PricingCoefficientsValues(vm=0)):
+            matrix = get_total_cost_matrix(M=self.TARIFFS, S2=distances, To=durations, coefficients=coefficients)
+
+            np.testing.assert_allclose(matrix, self.scalar_matrix(distances, durations, coefficients), rtol=1e-12)
+
+    def test_routes_shape_mismatch(self):
+        """Тест: разная длина дистанций и времени - ошибка"""
+        with pytest.raises(ValueError):
+            get_total_cost_matrix(M=[50], S2=[1000, 2000], To=[60])
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
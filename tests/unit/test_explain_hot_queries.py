@@ -0,0 +1,46 @@
+"""
+Тесты проверки планов горячих запросов: поиск Seq Scan в плане и версии миграций
+"""
+
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("tortoise")
+pytest.importorskip("asyncpg")
+
+from explain_hot_queries import (  # noqa: E402
+    HOT_PATH_MIGRATIONS, MIGRATIONS_DIR, find_seq_scans, get_migration_version
+)
+
+
+class TestExplainHotQueries:
+    """Тесты explain_hot_queries.py"""
+
+    def test_seq_scan_on_hot_table(self):
+        """Тест: Seq Scan ищется во вложенных узлах плана"""
+        plan = {
+            "Node Type": "Limit",
+            "Plans": [{
+                "Node Type": "Nested Loop",
+                "Plans": [
+                    {"Node Type": "Seq Scan", "Schema": "data", "Relation Name": "driver_mode"},
+                    {"Node Type": "Index Scan", "Schema": "data", "Relation Name": "order"},
+                ]
+            }]
+        }
+
+        assert find_seq_scans(plan, ["data.driver_mode"]) == ["data.driver_mode"]
+        assert find_seq_scans(plan, ["data.order"]) == []
+
+    def test_seq_scan_on_other_table_is_ignored(self):
+        """Тест: Seq Scan по справочнику вне горячего пути не считается ошибкой"""
+        plan = {"Node Type": "Seq Scan", "Schema": "data", "Relation Name": "city"}
+
+        assert find_seq_scans(plan, ["data.driver_mode"]) == []
+
+    def test_migration_versions(self):
+        """Тест: у каждой индексной миграции есть версия aerich"""
+        for file_name in HOT_PATH_MIGRATIONS:
+            sql = Path(MIGRATIONS_DIR, file_name).read_text(encoding="utf-8")
+            assert get_migration_version(sql) == file_name.split(".")[0].lstrip("0")
@@ -0,0 +1,57 @@
+"""
+Тесты файловых кэшей: вытеснение файлов и сборка превью в пуле процессов без импорта приложения
+"""
+
+import os
+import sys
+
+import pytest
+
+from common.file_cache import evict_files, render_thumbnail
+from common.worker_pool import create_process_pool
+
+
+# Модули приложения, которые процесс пула не должен импортировать ради сборки превью
+APP_MODULES = ("config", "common.logger", "common.logger_new", "services.media_service", "main")
+
+
+def loaded_app_modules():
+    """Модули приложения, загруженные в процессе"""
+    return [name for name in APP_MODULES if name in sys.modules]
+
+
+class TestEvictFiles:
+    """Тесты evict_files"""
+
+    def test_evict_least_recently_used(self, tmp_path):
+        """Тест: удаляются давно не запрашивавшиеся файлы, пока кэш больше лимита"""
+        for index, name in enumerate(["old.pdf", "middle.pdf", "new.pdf"]):
+            path = tmp_path / name
+            path.write_bytes(b"x" * 100)
+            os.utime(path, (1000 + index, 1000 + index))
+        (tmp_path / "render.pdf.tmp").write_bytes(b"x" * 100)
+
+        removed = evict_files(str(tmp_path), 150, keep=["old.pdf"])
+
+        assert removed == ["middle.pdf", "new.pdf"]
+        assert sorted(os.listdir(tmp_path)) == ["old.pdf", "render.pdf.tmp"]
+
+
+class TestRenderThumbnail:
+    """Тесты render_thumbnail в пуле процессов"""
+
+    def test_worker_without_app_imports(self, tmp_path):
+        """Тест: превью собирается в процессе пула, модули приложения и логи в нем не загружаются"""
+        cv2 = pytest.importorskip("cv2")
+        np = pytest.importorskip("numpy")
+        source = tmp_path / "photo.jpg"
+        cv2.imwrite(str(source), np.zeros((100, 300, 3), dtype=np.uint8))
+        target = tmp_path / "64_photo.jpg"
+
+        with create_process_pool(1) as pool:
+            rendered = pool.submit(render_thumbnail, str(source), str(target), 64).result(timeout=60)
+            modules = pool.submit(loaded_app_modules).result(timeout=60)
+
+        assert rendered is True
+        assert cv2.imread(str(target)).shape[:2] == (21, 64)
+        assert modules == []
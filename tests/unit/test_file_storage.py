@@ -0,0 +1,99 @@
+"""
+Тесты потокового сохранения загруженных файлов: имена по содержимому, дедупликация и лимиты размера
+"""
+
+import asyncio
+import hashlib
+import io
+import os
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from fastapi import UploadFile  # noqa: E402
+
+from services import file_storage_service  # noqa: E402
+from services.file_storage_service import (  # noqa: E402
+    FILE_TYPE_IMAGE, FILE_TYPE_OTHER, FILE_TYPE_VIDEO, FileStorageService, UploadTooLarge,
+    get_content_name, get_file_type, is_content_name
+)
+
+
+def make_upload(filename: str, content: bytes, size_known: bool = True) -> UploadFile:
+    return UploadFile(io.BytesIO(content), filename=filename, size=len(content) if size_known else None)
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return FileStorageService(directory=str(tmp_path), chunk_size=7)
+
+
+class TestNames:
+    """Тесты типа и имени файла"""
+
+    def test_file_type(self):
+        """Тест: тип по расширению без учета регистра"""
+        assert get_file_type("photo.JPG") == FILE_TYPE_IMAGE
+        assert get_file_type("clip.h264") == FILE_TYPE_VIDEO
+        assert get_file_type("document.pdf") == FILE_TYPE_OTHER
+        assert get_file_type(None) == FILE_TYPE_OTHER
+
+    def test_content_name(self):
+        """Тест: sha256 + безопасное расширение в нижнем регистре"""
+        sha256 = "a" * 64
+
+        assert get_content_name(sha256, "Photo.PNG") == sha256 + ".png"
+        assert get_content_name(sha256, "../etc/passwd") == sha256 + ".passwd"
+        assert get_content_name(sha256, "archive") == sha256
+        assert get_content_name(sha256, "file.to?x") == sha256
+        assert is_content_name(sha256 + ".png")
+        assert not is_content_name("photo.png")
+
+
+class TestSave:
+    """Тесты FileStorageService.save"""
+
+    def test_copies_in_chunks(self, storage, tmp_path):
+        """Тест: содержимое и sha256 совпадают с исходным файлом, временных файлов не остается"""
+        content = b"0123456789" * 10
+
+        stored = asyncio.run(storage.save([make_upload("photo.jpg", content)]))
+
+        sha256 = hashlib.sha256(content).hexdigest()
+        assert [(item.name, item.file_type, item.size) for item in stored] == [
+            (sha256 + ".jpg", FILE_TYPE_IMAGE, len(content))
+        ]
+        assert (tmp_path / (sha256 + ".jpg")).read_bytes() == content
+        assert os.listdir(tmp_path) == [sha256 + ".jpg"]
+
+    def test_duplicates_stored_once(self, storage, tmp_path):
+        """Тест: одинаковые файлы сохраняются один раз, каждый получает свой адрес в ответе"""
+        uploads = [make_upload("a.png", b"same"), make_upload("b.png", b"same"), make_upload("c.mp4", b"other")]
+
+        stored = asyncio.run(storage.save(uploads))
+
+        assert stored[0].name == stored[1].name
+        assert sorted(os.listdir(tmp_path)) == sorted({item.name for item in stored})
+
+    def test_rejects_known_size_before_copy(self, storage, tmp_path, monkeypatch):
+        """Тест: размер из multipart больше лимита - файл не копируется"""
+        monkeypatch.setattr(file_storage_service.settings, "upload_max_image_mb", 1)
+        upload = make_upload("photo.png", b"x" * (1024 * 1024 + 1))
+
+        with pytest.raises(UploadTooLarge):
+            asyncio.run(storage.save([upload]))
+
+        assert upload.file.tell() == 0
+        assert os.listdir(tmp_path) == []
+
+    def test_rejects_while_streaming(self, storage, tmp_path, monkeypatch):
+        """Тест: размер неизвестен заранее - копирование прерывается, уже принятые файлы удаляются"""
+        monkeypatch.setattr(file_storage_service.settings, "upload_max_other_mb", 1)
+        uploads = [make_upload("ok.txt", b"small", size_known=False),
+                   make_upload("big.txt", b"x" * (1024 * 1024 + 1), size_known=False)]
+
+        with pytest.raises(UploadTooLarge):
+            asyncio.run(FileStorageService(directory=str(tmp_path), chunk_size=64 * 1024).save(uploads))
+
+        assert os.listdir(tmp_path) == []
@@ -0,0 +1,44 @@
+"""
+Тесты сервиса панели франшизы: формат списка водителей
+"""
+
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip("tortoise")
+
+from services.franchise_service import (  # noqa: E402
+    format_driver_row, DRIVER_STATUS_FILTERS, DRIVER_STATUS_ACTIVE
+)
+from const.static_data_const import not_user_photo  # noqa: E402
+
+
+class TestFranchiseDrivers:
+    """Тесты /franchises/drivers"""
+
+    def build_row(self, **overrides):
+        row = {
+            "id": 5, "surname": "Петров", "name": "Петр", "phone": "+79997654321",
+            "isActive": True, "datetime_create": datetime(2024, 1, 2, 3, 4, 5),
+            "status": DRIVER_STATUS_ACTIVE, "request_for_payment": Decimal("150.50"),
+            "photo_path": None, "total": 1
+        }
+        row.update(overrides)
+        return row
+
+    def test_format_driver_row(self):
+        """Тест: формат ответа совпадает с прежним"""
+        driver = format_driver_row(self.build_row())
+
+        assert driver["datetime_create"] == "2024-01-02T03:04:05"
+        assert driver["request_for_payment"] == 150.5
+        assert isinstance(driver["request_for_payment"], float)
+        assert driver["photo_path"] == not_user_photo
+        assert "total" not in driver
+
+    def test_status_filters(self):
+        """Тест: все статусы доступны для фильтрации"""
+        assert set(DRIVER_STATUS_FILTERS) == {"unverified", "deleted", "blocked", "active"}
+        assert DRIVER_STATUS_FILTERS["active"] == DRIVER_STATUS_ACTIVE
@@ -0,0 +1,84 @@
+"""
+Тесты конвейера логирования: уровни модулей, sampling, ограничение частоты и очередь
+"""
+
+import logging
+import queue
+
+import pytest
+
+pytest.importorskip("pythonjsonlogger")
+
+from common.logger_new import LogPolicyFilter, NonBlockingQueueHandler  # noqa: E402
+
+
+def make_record(level=logging.INFO, module="orders_socket", func="send_personal_message",
+                lineno=10, created=1000.0):
+    record = logging.LogRecord("autonanny", level, f"/app/routers/{module}.py", lineno, "message", None, None,
+                               func=func)
+    record.created = created
+    return record
+
+
+class TestLogPolicyFilter:
+    """Тесты LogPolicyFilter"""
+
+    def test_module_level(self):
+        """Тест: уровень модуля выше общего отсекает записи модуля"""
+        policy = LogPolicyFilter(module_levels={"orders_socket": "warning"})
+
+        assert policy.filter(make_record(logging.INFO)) is False
+        assert policy.filter(make_record(logging.WARNING)) is True
+        assert policy.filter(make_record(logging.INFO, module="drivers")) is True
+
+    def test_sampling(self):
+        """Тест: прореживание по функции, сохраненная запись помечается sample_rate"""
+        policy = LogPolicyFilter(sample_rates={"orders_socket.send_personal_message": 0.0,
+                                               "orders_socket": 1.0})
+        record = make_record(func="connect")
+
+        assert policy.filter(make_record()) is False
+        assert policy.filter(record) is True
+        assert record.sample_rate == 1.0
+        assert policy.sampled_out == 1
+
+    def test_warnings_are_not_sampled(self):
+        """Тест: предупреждения и ошибки не прореживаются"""
+        policy = LogPolicyFilter(sample_rates={"orders_socket": 0.0}, rate_limit=1)
+
+        assert all(policy.filter(make_record(logging.ERROR)) for _ in range(5))
+
+    def test_rate_limit(self):
+        """Тест: сверх лимита записи отбрасываются, следующее окно сообщает их количество"""
+        policy = LogPolicyFilter(rate_limit=2)
+
+        results = [policy.filter(make_record(created=1000.0 + i * 0.1)) for i in range(5)]
+        next_window = make_record(created=1001.5)
+
+        assert results == [True, True, False, False, False]
+        assert policy.filter(make_record(lineno=11, created=1000.5)) is True
+        assert policy.filter(next_window) is True
+        assert next_window.suppressed == 3
+
+
+class TestNonBlockingQueueHandler:
+    """Тесты NonBlockingQueueHandler"""
+
+    def test_drop_when_full(self):
+        """Тест: при переполнении очереди запись отбрасывается без ожидания"""
+        handler = NonBlockingQueueHandler(queue.SimpleQueue(), max_size=2)
+        for _ in range(3):
+            handler.handle(make_record())
+
+        assert handler.queue.qsize() == 2
+        assert handler.dropped == 1
+
+    def test_message_arguments(self):
+        """Тест: аргументы подставляются до постановки в очередь"""
+        handler = NonBlockingQueueHandler(queue.SimpleQueue())
+        args = {"id": 1}
+        record = logging.LogRecord("autonanny", logging.INFO, __file__, 1, "order %s", (args,), None)
+        handler.handle(record)
+        args["id"] = 2
+
+        assert handler.queue.get_nowait().getMessage() == "order {'id': 1}"
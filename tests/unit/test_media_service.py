@@ -0,0 +1,199 @@
+"""
+Тесты отдачи загруженных файлов: ETag/304, Range, кэширование и превью
+"""
+
+import asyncio
+import hashlib
+import os
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("fastapi")
+
+from fastapi import FastAPI, Request  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from services import media_service  # noqa: E402
+from services.media_service import (  # noqa: E402
+    CACHE_CONTROL_IMMUTABLE, CACHE_CONTROL_REVALIDATE, MediaService, get_thumbnail_size, parse_range
+)
+
+
+CONTENT = bytes(range(256)) * 4
+CONTENT_NAME = hashlib.sha256(CONTENT).hexdigest() + ".mp4"
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    (tmp_path / CONTENT_NAME).write_bytes(CONTENT)
+    (tmp_path / "legacy.pdf").write_bytes(b"pdf")
+    # Превью собираются в пуле потоков вместо пула процессов
+    monkeypatch.setattr(media_service, "get_thumbnail_executor", lambda: None)
+    return MediaService(directory=str(tmp_path))
+
+
+@pytest.fixture
+def app(service):
+    application = FastAPI()
+
+    @application.get("/files/{file}")
+    async def send_files(request: Request, file: str, size: int = None):
+        media_file = await service.get_file(file, size)
+        if media_file is None:
+            return JSONResponse({"status": False}, 404)
+        return await service.response(request, media_file)
+
+    return application
+
+
+def get(app, url, **headers):
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.get(url, headers=headers)
+    return asyncio.run(run())
+
+
+class TestParseRange:
+    """Тесты parse_range"""
+
+    def test_ranges(self):
+        """Тест: начало-конец, открытый конец, суффикс и конец за пределами файла"""
+        assert parse_range("bytes=0-9", 100) == (0, 9)
+        assert parse_range("bytes=90-", 100) == (90, 99)
+        assert parse_range("bytes=-10", 100) == (90, 99)
+        assert parse_range("bytes=-500", 100) == (0, 99)
+        assert parse_range("bytes=50-500", 100) == (50, 99)
+
+    def test_whole_file(self):
+        """Тест: без заголовка, несколько диапазонов и некорректный синтаксис - файл целиком"""
+        assert parse_range(None, 100) is None
+        assert parse_range("bytes=0-1,5-6", 100) is None
+        assert parse_range("bytes=9-1", 100) is None
+        assert parse_range("items=0-1", 100) is None
+
+    def test_unsatisfiable(self):
+        """Тест: начало за пределами файла"""
+        with pytest.raises(ValueError):
+            parse_range("bytes=100-", 100)
+        with pytest.raises(ValueError):
+            parse_range("bytes=-0", 100)
+
+    def test_thumbnail_size(self):
+        """Тест: размер округляется вверх до разрешенного"""
+        assert get_thumbnail_size(1) == 64
+        assert get_thumbnail_size(200) == 256
+        assert get_thumbnail_size(5000) == 1024
+
+
+class TestResponse:
+    """Тесты MediaService.response"""
+
+    def test_content_name_is_immutable(self, app):
+        """Тест: файл по содержимому кэшируется навсегда, ETag - sha256"""
+        response = get(app, f"/files/{CONTENT_NAME}")
+
+        assert response.status_code == 200
+        assert response.content == CONTENT
+        assert response.headers["etag"] == f'"{CONTENT_NAME[:64]}"'
+        assert response.headers["cache-control"] == CACHE_CONTROL_IMMUTABLE
+        assert response.headers["accept-ranges"] == "bytes"
+
+    def test_not_modified(self, app):
+        """Тест: If-None-Match с текущим ETag - 304 без тела"""
+        etag = get(app, "/files/legacy.pdf").headers["etag"]
+
+        response = get(app, "/files/legacy.pdf", **{"If-None-Match": f"W/{etag}"})
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["cache-control"] == CACHE_CONTROL_REVALIDATE
+
+    def test_range(self, app):
+        """Тест: 206 с нужными байтами и Content-Range"""
+        response = get(app, f"/files/{CONTENT_NAME}", Range="bytes=10-19")
+
+        assert response.status_code == 206
+        assert response.content == CONTENT[10:20]
+        assert response.headers["content-range"] == f"bytes 10-19/{len(CONTENT)}"
+        assert response.headers["content-length"] == "10"
+
+    def test_range_not_satisfiable(self, app):
+        """Тест: диапазон за пределами файла - 416"""
+        response = get(app, f"/files/{CONTENT_NAME}", Range=f"bytes={len(CONTENT)}-")
+
+        assert response.status_code == 416
+        assert response.headers["content-range"] == f"bytes */{len(CONTENT)}"
+
+    def test_if_range_changed(self, app):
+        """Тест: If-Range с устаревшим ETag - файл целиком"""
+        response = get(app, f"/files/{CONTENT_NAME}", Range="bytes=10-19", **{"If-Range": '"old"'})
+
+        assert response.status_code == 200
+        assert response.content == CONTENT
+
+    def test_hidden_and_missing(self, app, service):
+        """Тест: отсутствующие и скрытые файлы (превью, временные загрузки) - 404"""
+        os.makedirs(service.thumbnails_directory)
+
+        assert get(app, "/files/missing.jpg").status_code == 404
+        assert get(app, "/files/.thumbnails").status_code == 404
+
+    def test_size_ignored_for_video(self, app):
+        """Тест: ?size= для видео - исходный файл"""
+        response = get(app, f"/files/{CONTENT_NAME}?size=128")
+
+        assert response.content == CONTENT
+
+
+class TestThumbnails:
+    """Тесты превью"""
+
+    @pytest.fixture
+    def image(self, service, tmp_path):
+        cv2 = pytest.importorskip("cv2")
+        np = pytest.importorskip("numpy")
+        image = np.zeros((400, 800, 3), dtype=np.uint8)
+        image[:, :400] = (0, 0, 255)
+        ok, buffer = cv2.imencode(".jpg", image)
+        content = buffer.tobytes()
+        name = hashlib.sha256(content).hexdigest() + ".jpg"
+        (tmp_path / name).write_bytes(content)
+        return name
+
+    def test_thumbnail(self, app, service, image):
+        """Тест: превью вписано в квадрат, сохраняет пропорции и хранится в кэше"""
+        cv2 = pytest.importorskip("cv2")
+        np = pytest.importorskip("numpy")
+
+        response = get(app, f"/files/{image}?size=200")
+
+        assert response.status_code == 200
+        assert response.headers["etag"] == f'"{image[:64]}-256"'
+        assert response.headers["content-type"] == "image/jpeg"
+        thumbnail = cv2.imdecode(np.frombuffer(response.content, np.uint8), cv2.IMREAD_COLOR)
+        assert thumbnail.shape[:2] == (128, 256)
+        assert os.listdir(service.thumbnails_directory) == [f"256_{image}"]
+
+    def test_not_an_image(self, app, tmp_path):
+        """Тест: файл не читается как изображение - отдается исходный файл"""
+        (tmp_path / "broken.png").write_bytes(b"not a png")
+
+        response = get(app, "/files/broken.png?size=64")
+
+        assert response.status_code == 200
+        assert response.content == b"not a png"
+
+    def test_eviction(self, service, image):
+        """Тест: при превышении размера кэша удаляются превью, которые дольше всего не запрашивали"""
+        pytest.importorskip("cv2")
+        service.max_bytes = 1
+
+        async def run():
+            first = await service.get_thumbnail(image, 64)
+            os.utime(first, (0, 0))
+            await service.get_thumbnail(image, 128)
+
+        asyncio.run(run())
+
+        assert os.listdir(service.thumbnails_directory) == [f"128_{image}"]
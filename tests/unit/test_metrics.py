@@ -0,0 +1,129 @@
+"""
+Тесты метрик: формат Prometheus, ограничение рядов, фоновые задачи и HTTP middleware
+"""
+
+import asyncio
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("fastapi")
+
+from fastapi import FastAPI  # noqa: E402
+
+from common import metrics  # noqa: E402
+from common.metrics import (  # noqa: E402
+    HTTP_REQUESTS, JOB_RUNS, MAX_SERIES, MetricsMiddleware, MetricsRegistry, get_external_service,
+    track_job, tracked_job
+)
+
+
+class TestMetricsRegistry:
+    """Тесты MetricsRegistry"""
+
+    def test_counter_render(self):
+        """Тест: счетчик с метками в текстовом формате"""
+        registry = MetricsRegistry()
+        counter = registry.counter("pushes_total", "Pushes", ("app",))
+        counter.labels("client").inc()
+        counter.labels("client").inc(2)
+
+        text = registry.render()
+
+        assert "# TYPE pushes_total counter" in text
+        assert 'pushes_total{app="client"} 3' in text
+
+    def test_histogram_buckets(self):
+        """Тест: интервалы гистограммы накопительные, +Inf равен количеству"""
+        registry = MetricsRegistry()
+        histogram = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 5.0):
+            histogram.observe(value)
+
+        text = registry.render()
+
+        assert 'latency_seconds_bucket{le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{le="1"} 2' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+        assert "latency_seconds_count 3" in text
+        assert "latency_seconds_sum 5.55" in text
+
+    def test_gauge_function(self):
+        """Тест: значения gauge с функцией считаются при сборе"""
+        connections = {"driver": 2}
+        registry = MetricsRegistry()
+        registry.gauge("sockets", "Sockets", ("manager",),
+                       function=lambda: {(name,): count for name, count in connections.items()})
+        connections["driver"] = 5
+
+        assert 'sockets{manager="driver"} 5' in registry.render()
+
+    def test_series_limit(self):
+        """Тест: ряды сверх MAX_SERIES попадают в ряд other"""
+        registry = MetricsRegistry()
+        counter = registry.counter("paths_total", "Paths", ("path",))
+        for i in range(MAX_SERIES + 10):
+            counter.labels(f"/items/{i}").inc()
+
+        text = registry.render()
+
+        assert 'paths_total{path="other"} 10' in text
+        assert text.count("paths_total{") == MAX_SERIES + 1
+
+    def test_label_escaping(self):
+        """Тест: кавычки в значении метки экранируются"""
+        registry = MetricsRegistry()
+        registry.counter("errors_total", "Errors", ("error",)).labels('bad "value"').inc()
+
+        assert 'errors_total{error="bad \\"value\\""} 1' in registry.render()
+
+
+class TestJobs:
+    """Тесты учета фоновых задач"""
+
+    def test_track_job_error(self):
+        """Тест: упавший запуск учитывается с result=error"""
+        with pytest.raises(RuntimeError):
+            with track_job("test_job_error"):
+                raise RuntimeError("failed")
+
+        assert JOB_RUNS.labels("test_job_error", "error").value == 1
+
+    def test_tracked_job(self):
+        """Тест: декоратор учитывает каждый вызов корутины"""
+        @tracked_job("test_job_ok")
+        async def job():
+            return 42
+
+        assert asyncio.run(job()) == 42
+        assert JOB_RUNS.labels("test_job_ok", "ok").value == 1
+
+    def test_external_service(self):
+        """Тест: метка внешнего сервиса по хосту, неизвестные хосты - other"""
+        assert get_external_service("https://securepay.tinkoff.ru/v2/Init") == "tinkoff"
+        assert get_external_service("https://maps.googleapis.com/maps/api/geocode/json") == "google_maps"
+        assert get_external_service("https://example.com/") == "other"
+
+
+class TestMetricsMiddleware:
+    """Тесты MetricsMiddleware"""
+
+    def test_route_template_label(self):
+        """Тест: запросы учитываются по шаблону маршрута, а не по пути"""
+        app = FastAPI()
+
+        @app.get("/metrics-test/{item_id}")
+        async def endpoint(item_id: int):
+            return {"id": item_id}
+
+        app.add_middleware(MetricsMiddleware)
+
+        async def run():
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                for item_id in range(3):
+                    await client.get(f"/metrics-test/{item_id}")
+
+        asyncio.run(run())
+
+        assert HTTP_REQUESTS.labels("GET", "/metrics-test/{item_id}", "200").value == 3
+        assert "/metrics-test/1" not in metrics.registry.render()
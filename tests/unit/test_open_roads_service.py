@@ -0,0 +1,41 @@
+"""
+Тесты ленты открытых маршрутов: bounding box для фильтра по расстоянию
+"""
+
+import pytest
+
+pytest.importorskip("tortoise")
+
+from services.open_roads_service import bounding_box, KM_PER_DEGREE  # noqa: E402
+
+
+class TestBoundingBox:
+    """Тесты прямоугольника координат вокруг водителя"""
+
+    def test_box_contains_center(self):
+        """Тест: центр внутри прямоугольника"""
+        min_lat, max_lat, min_lon, max_lon = bounding_box(55.75, 37.62, 10)
+
+        assert min_lat < 55.75 < max_lat
+        assert min_lon < 37.62 < max_lon
+
+    def test_latitude_delta(self):
+        """Тест: по широте радиус переводится в градусы напрямую"""
+        min_lat, max_lat, _, _ = bounding_box(55.75, 37.62, KM_PER_DEGREE)
+
+        assert max_lat - 55.75 == pytest.approx(1.0)
+        assert 55.75 - min_lat == pytest.approx(1.0)
+
+    def test_longitude_wider_at_high_latitude(self):
+        """Тест: чем севернее, тем шире прямоугольник по долготе"""
+        _, _, equator_min, equator_max = bounding_box(0, 37.62, 10)
+        _, _, north_min, north_max = bounding_box(60, 37.62, 10)
+
+        assert north_max - north_min > equator_max - equator_min
+        assert north_max - north_min == pytest.approx(2 * (equator_max - equator_min), rel=1e-3)
+
+    def test_pole_covers_all_longitudes(self):
+        """Тест: у полюса фильтр по долготе не ограничивает"""
+        _, _, min_lon, max_lon = bounding_box(90, 37.62, 10)
+
+        assert (min_lon, max_lon) == (-180.0, 180.0)
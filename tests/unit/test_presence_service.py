@@ -0,0 +1,182 @@
+"""
+Тесты присутствия пользователей в чате и правила отправки push
+"""
+
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("tortoise")
+pytest.importorskip("fastapi")
+
+from services import presence_service  # noqa: E402
+from services.presence_service import (  # noqa: E402
+    PRESENCE_IS_ONLINE_SQL, PRESENCE_OFFLINE_SQL, PRESENCE_RENEW_SQL, PRESENCE_UPSERT_SQL, PresenceService
+)
+
+
+class FakeConnection:
+    """Соединение, которое запоминает запросы"""
+
+    def __init__(self):
+        self.queries = []
+
+    async def execute_query(self, query, values=None):
+        self.queries.append((query, values))
+
+    async def execute_query_dict(self, query, values=None):
+        self.queries.append((query, values))
+        return [{"online": False}]
+
+
+class FakeWebSocket:
+    """Сокет, который запоминает отправленные кадры"""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.sent = []
+
+    async def send_text(self, text):
+        if self.fail:
+            raise RuntimeError("connection lost")
+        self.sent.append(json.loads(text))
+
+
+@pytest.fixture
+def connection(monkeypatch):
+    conn = FakeConnection()
+    monkeypatch.setattr(presence_service.Tortoise, "get_connection", lambda name: conn)
+    return conn
+
+
+@pytest.fixture
+def service(connection):
+    return PresenceService()
+
+
+class TestPresence:
+    """Тесты PresenceService"""
+
+    def test_connect_and_disconnect(self, service, connection):
+        """Тест: присутствие по чат-сокетам; офлайн, когда закрыт последний сокет"""
+        async def run():
+            await service.connect(1)
+            await service.connect(1)
+            await service.disconnect(1)
+            online = service.is_online_local(1)
+            await service.disconnect(1)
+            return online
+
+        assert asyncio.run(run()) is True
+        assert not service.is_online_local(1)
+        assert [query for query, _ in connection.queries] == [
+            PRESENCE_UPSERT_SQL, PRESENCE_UPSERT_SQL, PRESENCE_OFFLINE_SQL
+        ]
+
+    def test_renew_all_connected(self, service, connection):
+        """Тест: сервер продлевает присутствие всех подключенных пользователей одним запросом"""
+        async def run():
+            await service.connect(1)
+            await service.connect(2)
+            connection.queries.clear()
+            await service.renew()
+
+        asyncio.run(run())
+
+        assert connection.queries == [
+            (PRESENCE_RENEW_SQL, [[1, 2], service.worker_id, float(PresenceService.HEARTBEAT_TTL)])
+        ]
+
+    def test_renew_loop_without_ping(self, service, connection, monkeypatch):
+        """Тест: присутствие продлевается без кадров от клиента, цикл завершается без подключений"""
+        monkeypatch.setattr(PresenceService, "WRITE_INTERVAL", 0.01)
+
+        async def run():
+            await service.connect(1)
+            await asyncio.sleep(0.05)
+            await service.disconnect(1)
+            await asyncio.wait_for(service._renew_task, 1)
+
+        asyncio.run(run())
+
+        assert any(query == PRESENCE_RENEW_SQL for query, _ in connection.queries)
+        assert service._renew_task.done()
+
+    def test_is_online_from_other_worker(self, service, connection):
+        """Тест: без подключения в этом воркере статус читается из БД"""
+        assert asyncio.run(service.is_online(1)) is False
+        assert connection.queries == [(PRESENCE_IS_ONLINE_SQL, [1])]
+
+
+class TestChatPush:
+    """Тесты правила push для нового сообщения в чате"""
+
+    @pytest.fixture
+    def chat(self, monkeypatch):
+        from routers import chats_websocket
+
+        manager = chats_websocket.ConnectionManager()
+        monkeypatch.setattr(chats_websocket, "manager", manager)
+        monkeypatch.setattr(chats_websocket, "users", manager.sockets)
+        return chats_websocket
+
+    @pytest.fixture
+    def pushes(self, chat, monkeypatch):
+        sent = []
+
+        async def send_chat_push(id_user, id_chat, msg):
+            sent.append((id_user, id_chat, msg))
+
+        monkeypatch.setattr(chat, "send_chat_push", send_chat_push)
+        return sent
+
+    @pytest.fixture
+    def online(self, chat, monkeypatch):
+        """Пользователи, подключенные к чату в других воркерах"""
+        user_ids = set()
+
+        async def is_online(id_user):
+            return id_user in user_ids
+
+        monkeypatch.setattr(chat.presence, "is_online", is_online)
+        return user_ids
+
+    def register(self, chat, token, websocket):
+        chat.manager.active_connections[websocket] = token
+        chat.manager.sockets[token] = websocket
+
+    def test_chat_socket_gets_frame(self, chat, pushes, online):
+        """Тест: получатель подключен к чату в этом воркере - кадр без push"""
+        websocket = FakeWebSocket()
+        self.register(chat, "receiver", websocket)
+
+        asyncio.run(chat.notify_receiver("receiver", 2, 7, {"msg": "Привет"}))
+
+        assert websocket.sent == [{"msg": "Привет"}]
+        assert pushes == []
+
+    def test_offline_gets_push(self, chat, pushes, online):
+        """Тест: получатель не подключен к чату ни в одном воркере - push"""
+        asyncio.run(chat.notify_receiver("receiver", 2, 7, {"msg": "Привет"}))
+
+        assert pushes == [(2, 7, "Привет")]
+
+    def test_online_in_other_worker_without_push(self, chat, pushes, online):
+        """Тест: чат получателя открыт в другом воркере - push не отправляется"""
+        online.add(2)
+
+        asyncio.run(chat.notify_receiver("receiver", 2, 7, {"msg": "Привет"}))
+
+        assert pushes == []
+
+    def test_failed_send_gets_push(self, chat, pushes, online):
+        """Тест: кадр не отправился - сокет отключается, получатель получает push, хотя еще числится онлайн"""
+        online.add(2)
+        websocket = FakeWebSocket(fail=True)
+        self.register(chat, "receiver", websocket)
+
+        asyncio.run(chat.notify_receiver("receiver", 2, 7, {"msg": "Привет"}))
+
+        assert pushes == [(2, 7, "Привет")]
+        assert "receiver" not in chat.manager.sockets
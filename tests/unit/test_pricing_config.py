@@ -0,0 +1,171 @@
+"""
+Тесты кэша конфигурации цен: сверка версии, перечитывание и активные коэффициенты
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("tortoise")
+
+from tortoise.exceptions import OperationalError  # noqa: E402
+
+from const.cost_formulas import (  # noqa: E402
+    DEFAULT_COEFFICIENTS, PricingCoefficientsValues, get_current_coefficients, get_total_cost_of_the_trip
+)
+from services import pricing_config_service  # noqa: E402
+from services.pricing_config_service import PricingConfig, PricingConfigService, UNDEFINED_TABLE  # noqa: E402
+from services import quote_service  # noqa: E402
+from services.quote_service import QuoteService  # noqa: E402
+
+
+# Чтение версии из БД (фикстура database его подменяет)
+READ_VERSION = PricingConfigService._read_version
+
+TARIFFS = [
+    {"id": 1, "id_franchise": 10, "amount": 100, "isActive": True},
+    {"id": 2, "id_franchise": 10, "amount": 150, "isActive": False},
+    {"id": 3, "id_franchise": 20, "amount": 120, "isActive": True},
+]
+
+
+class DatabaseError(Exception):
+    """Ошибка драйвера с кодом SQLSTATE"""
+
+    def __init__(self, sqlstate):
+        super().__init__(sqlstate)
+        self.sqlstate = sqlstate
+
+
+class FailingConnection:
+    """Соединение, запрос через которое завершается ошибкой драйвера"""
+
+    def __init__(self, sqlstate):
+        self.sqlstate = sqlstate
+
+    async def execute_query(self, query, values=None):
+        raise OperationalError(DatabaseError(self.sqlstate))
+
+
+@pytest.fixture
+def database(monkeypatch):
+    """Версия и содержимое конфигурации вместо БД"""
+    state = {"version": 1, "loads": 0, "vm": 27.0}
+
+    async def read_version():
+        return state["version"]
+
+    async def load(version):
+        state["loads"] += 1
+        return PricingConfig(
+            version=version,
+            tariffs={tariff["id"]: tariff for tariff in TARIFFS},
+            franchise_tariffs={10: TARIFFS[:2], 20: TARIFFS[2:]},
+            coefficients=PricingCoefficientsValues(vm=state["vm"]),
+            coefficients_row=None,
+            franchise_by_user={7: 10}
+        )
+
+    monkeypatch.setattr(PricingConfigService, "_read_version", staticmethod(read_version))
+    monkeypatch.setattr(pricing_config_service, "load_pricing_config", load)
+    monkeypatch.setattr(pricing_config_service.settings, "pricing_version_check_seconds", 60)
+    yield state
+    pricing_config_service.set_current_coefficients(DEFAULT_COEFFICIENTS)
+
+
+class TestPricingConfigService:
+    """Тесты PricingConfigService"""
+
+    def test_tariffs(self, database):
+        """Тест: тарифы по ID и по франшизе, неактивные - только по запросу"""
+        service = PricingConfigService()
+
+        async def run():
+            return (await service.get_tariff(3), await service.get_tariff(99),
+                    await service.get_franchise_tariffs(10), await service.get_franchise_tariffs(10, only_active=False))
+
+        tariff, missing, active, all_tariffs = asyncio.run(run())
+
+        assert tariff["amount"] == 120
+        assert missing is None
+        assert [each["id"] for each in active] == [1]
+        assert [each["id"] for each in all_tariffs] == [1, 2]
+        assert database["loads"] == 1
+
+    def test_reload_on_new_version(self, database):
+        """Тест: после invalidate конфигурация перечитывается, только если версия изменилась"""
+        service = PricingConfigService()
+
+        async def run():
+            await service.get()
+            service.invalidate()
+            await service.get()
+            loads_same_version = database["loads"]
+            database["version"], database["vm"] = 2, 54.0
+            service.invalidate()
+            return loads_same_version, await service.get()
+
+        loads_same_version, config = asyncio.run(run())
+
+        assert loads_same_version == 1
+        assert database["loads"] == 2
+        assert config.version == 2
+        assert get_current_coefficients().vm == 54.0
+
+    def test_version_check_interval(self, database):
+        """Тест: версия не сверяется чаще интервала"""
+        service = PricingConfigService()
+
+        async def run():
+            await service.get()
+            database["version"] = 2
+            return await service.get()
+
+        assert asyncio.run(run()).version == 1
+
+
+    def test_missing_version_table(self, database, monkeypatch):
+        """Тест: нет data.pricing_config_version - версия 0, перечитывание только после invalidate()"""
+        monkeypatch.setattr(PricingConfigService, "_read_version", READ_VERSION)
+        monkeypatch.setattr(pricing_config_service.Tortoise, "get_connection",
+                            lambda name: FailingConnection(UNDEFINED_TABLE))
+        service = PricingConfigService()
+
+        async def run():
+            first = await service.get()
+            service.invalidate()
+            return first, await service.get()
+
+        first, reloaded = asyncio.run(run())
+
+        assert first.version == reloaded.version == 0
+        assert reloaded is not first
+        assert database["loads"] == 2
+
+    def test_other_errors_raised(self, database, monkeypatch):
+        """Тест: остальные ошибки чтения версии не скрываются"""
+        monkeypatch.setattr(PricingConfigService, "_read_version", READ_VERSION)
+        monkeypatch.setattr(pricing_config_service.Tortoise, "get_connection",
+                            lambda name: FailingConnection("42501"))
+
+        with pytest.raises(OperationalError):
+            asyncio.run(PricingConfigService().get())
+
+
+class TestQuoteService:
+    """Тесты QuoteService"""
+
+    def test_quote_onetime(self, database, monkeypatch):
+        """Тест: стоимость по активным тарифам франшизы пользователя для каждого варианта маршрута"""
+        monkeypatch.setattr(quote_service, "pricing_config", PricingConfigService())
+        routes = [{"distance": 10000, "duration": 1200}, {"distance": 25000, "duration": 3000}]
+
+        quotes = asyncio.run(QuoteService.quote_onetime(7, routes))
+        requested = asyncio.run(QuoteService.quote_onetime(7, routes, id_tariffs=[2, 3]))
+
+        assert [quote["id_tariff"] for quote in quotes] == [1]
+        assert quotes[0]["prices"] == [
+            pytest.approx(get_total_cost_of_the_trip(M=100, S2=route["distance"], To=route["duration"]))
+            for route in routes
+        ]
+        assert requested == []
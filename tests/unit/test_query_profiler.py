@@ -0,0 +1,106 @@
+"""
+Тесты профилирования запросов к БД: счетчики, middleware и бюджеты эндпоинтов
+"""
+
+import asyncio
+import contextvars
+
+import pytest
+
+pytest.importorskip("tortoise")
+httpx = pytest.importorskip("httpx")
+
+from starlette.applications import Starlette  # noqa: E402
+from starlette.responses import JSONResponse  # noqa: E402
+from starlette.routing import Route  # noqa: E402
+
+from common.query_profiler import (  # noqa: E402
+    SLOWEST_QUERIES, QueryProfilerMiddleware, QueryStats, profile_queries, query_budget, record_query,
+    _profiled
+)
+
+
+def create_app(queries_count: int, budget: int, debug: bool = True) -> Starlette:
+    @query_budget(budget)
+    async def endpoint(request):
+        for i in range(queries_count):
+            record_query(f"SELECT {i}", float(i))
+        return JSONResponse({"status": True})
+
+    app = Starlette(routes=[Route("/items", endpoint)])
+    app.add_middleware(QueryProfilerMiddleware, debug=debug)
+    return app
+
+
+async def get_items(app: Starlette) -> httpx.Response:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        return await client.get("/items")
+
+
+class TestQueryStats:
+    """Тесты QueryStats и profile_queries"""
+
+    def test_slowest_queries(self):
+        """Тест: хранятся только самые медленные запросы, от самого медленного"""
+        stats = QueryStats()
+        for i in range(SLOWEST_QUERIES + 5):
+            stats.add(f"SELECT {i}", float(i))
+
+        slowest = stats.get_slowest()
+        assert stats.count == SLOWEST_QUERIES + 5
+        assert len(slowest) == SLOWEST_QUERIES
+        assert slowest[0] == {"query": f"SELECT {SLOWEST_QUERIES + 4}", "duration_ms": SLOWEST_QUERIES + 4}
+
+    def test_nested_counters(self):
+        """Тест: запрос учитывается во всех вложенных счетчиках"""
+        with profile_queries() as outer:
+            record_query("SELECT 1", 1.0)
+            with profile_queries() as inner:
+                record_query("SELECT 2", 2.0)
+
+        assert (outer.count, outer.total_ms) == (2, 3.0)
+        assert (inner.count, inner.total_ms) == (1, 2.0)
+
+    def test_profiled_client_method(self):
+        """Тест: обернутый метод клиента учитывает запрос"""
+        class Client:
+            async def execute_query(self, query, values=None):
+                return query
+
+        method = _profiled(Client.execute_query)
+        with profile_queries() as stats:
+            assert asyncio.run(method(Client(), "SELECT 1")) == "SELECT 1"
+
+        assert stats.count == 1
+        assert stats.get_slowest()[0]["query"] == "SELECT 1"
+
+
+class TestQueryProfilerMiddleware:
+    """Тесты QueryProfilerMiddleware"""
+
+    @pytest.mark.query_budget(3)
+    def test_debug_headers(self, query_stats):
+        """Тест: в режиме отладки количество и время запросов отдаются в заголовках"""
+        response = asyncio.run(get_items(create_app(queries_count=3, budget=3)))
+
+        assert response.headers["X-DB-Query-Count"] == "3"
+        assert float(response.headers["X-DB-Time-Ms"]) == 3.0
+        assert query_stats.count == 3
+
+    def test_no_headers_without_debug(self):
+        """Тест: без режима отладки заголовки не добавляются"""
+        response = asyncio.run(get_items(create_app(queries_count=1, budget=1, debug=False)))
+
+        assert "X-DB-Query-Count" not in response.headers
+
+    def test_budget_exceeded(self):
+        """Тест: превышение бюджета эндпоинта передается во внешний счетчик"""
+        async def run():
+            with profile_queries() as stats:
+                await get_items(create_app(queries_count=4, budget=2))
+            return stats
+
+        # Отдельный контекст, чтобы превышение не уронило сам тест (плагин tests/query_budget.py)
+        stats = contextvars.Context().run(asyncio.run, run())
+
+        assert stats.budget_violations == ["GET /items: 4 DB queries, budget 2"]
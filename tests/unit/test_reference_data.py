@@ -0,0 +1,156 @@
+"""
+Тесты кэша справочников: индексы, поиск, ETag/304 и сброс после изменения
+"""
+
+import asyncio
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("fastapi")
+pytest.importorskip("tortoise")
+
+from fastapi import FastAPI, Request  # noqa: E402
+
+from services import reference_data_service  # noqa: E402
+from services.reference_data_service import (  # noqa: E402
+    CAR_MODELS, COLORS, DRIVE_PARAMETERS, ReferenceDataService, build_table
+)
+
+
+CAR_MODEL_ROWS = [
+    {"id": 1, "title": "Camry", "id_car_mark": 1, "releaseYear": 2020},
+    {"id": 2, "title": "Corolla", "id_car_mark": 1, "releaseYear": None},
+    {"id": 3, "title": "Solaris", "id_car_mark": 2, "releaseYear": None},
+]
+
+
+@pytest.fixture
+def drive_parameters(monkeypatch):
+    rows = [{"id": 1, "title": "Детское кресло", "amount": 100.0, "isActive": True}]
+
+    async def load_drive_parameters():
+        return [dict(row) for row in rows]
+
+    monkeypatch.setitem(reference_data_service.LOADERS, DRIVE_PARAMETERS, load_drive_parameters)
+    return rows
+
+
+@pytest.fixture
+def colors(monkeypatch):
+    rows = [{"id": 1, "title": "Белый"}, {"id": 2, "title": "Черный"}]
+    calls = []
+
+    async def load_colors():
+        calls.append(1)
+        return [dict(row) for row in rows]
+
+    monkeypatch.setitem(reference_data_service.LOADERS, COLORS, load_colors)
+    return rows, calls
+
+
+class TestReferenceTable:
+    """Тесты build_table"""
+
+    def test_car_models(self):
+        """Тест: год выпуска в названии, модели сгруппированы по марке"""
+        table = build_table(CAR_MODELS, CAR_MODEL_ROWS)
+
+        assert table.by_id[1]["title"] == "Camry (2020)"
+        assert [row["id"] for row in table.by_mark[1]] == [1, 2]
+        assert table.by_mark.get(3) is None
+
+    def test_search_raw_title(self):
+        """Тест: поиск без учета регистра по названию без года"""
+        table = build_table(CAR_MODELS, CAR_MODEL_ROWS)
+
+        assert [row["id"] for row in table.search("CO")] == [2]
+        assert table.search("2020") == []
+        assert [row["id"] for row in table.search("o", table.by_mark[2])] == [3]
+
+    def test_etag_by_content(self):
+        """Тест: ETag и Last-Modified не меняются, если содержимое не изменилось"""
+        table = build_table(CAR_MODELS, CAR_MODEL_ROWS)
+        reloaded = build_table(CAR_MODELS, [dict(row) for row in CAR_MODEL_ROWS], table)
+        reloaded.last_modified = "changed"
+        changed = build_table(CAR_MODELS, CAR_MODEL_ROWS[:2], reloaded)
+
+        assert reloaded.etag == table.etag
+        assert changed.etag != table.etag
+        assert changed.last_modified != "changed"
+
+
+class TestReferenceDataService:
+    """Тесты ReferenceDataService"""
+
+    def test_loaded_once(self, colors):
+        """Тест: справочник читается из БД один раз, после invalidate - заново"""
+        rows, calls = colors
+        service = ReferenceDataService()
+
+        async def run():
+            await asyncio.gather(*(service.get(COLORS) for _ in range(5)))
+            rows.append({"id": 3, "title": "Синий"})
+            cached = await service.get(COLORS)
+            service.invalidate(COLORS)
+            return cached, await service.get(COLORS)
+
+        cached, reloaded = asyncio.run(run())
+
+        assert len(calls) == 2
+        assert len(cached.rows) == 2
+        assert len(reloaded.rows) == 3
+
+    def test_not_modified(self, colors):
+        """Тест: ответ с ETag, по If-None-Match - 304 без тела"""
+        service = ReferenceDataService()
+        app = FastAPI()
+
+        @app.get("/colors")
+        async def endpoint(request: Request):
+            return await service.response(request, COLORS)
+
+        async def run():
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                first = await client.get("/colors")
+                revalidated = await client.get("/colors", headers={"If-None-Match": first.headers["ETag"]})
+                by_date = await client.get("/colors", headers={"If-Modified-Since": first.headers["Last-Modified"]})
+                stale = await client.get("/colors", headers={"If-None-Match": '"other"'})
+                return first, revalidated, by_date, stale
+
+        first, revalidated, by_date, stale = asyncio.run(run())
+
+        assert first.json() == {"status": True, "message": "Success!", "colors": colors[0]}
+        assert revalidated.status_code == 304
+        assert revalidated.content == b""
+        assert by_date.status_code == 304
+        assert stale.status_code == 200
+
+    def test_drive_parameters_short_ttl(self, colors, drive_parameters, monkeypatch):
+        """Тест: изменение доп. параметров из другого воркера видно через короткий TTL"""
+        clock = [1000.0]
+        monkeypatch.setattr(reference_data_service.time, "monotonic", lambda: clock[0])
+        monkeypatch.setattr(reference_data_service.settings, "reference_data_ttl", 600)
+        monkeypatch.setattr(reference_data_service.settings, "reference_data_drive_parameters_ttl", 10)
+        rows, calls = colors
+        service = ReferenceDataService()
+
+        async def run():
+            await service.get(COLORS)
+            before = await service.get(DRIVE_PARAMETERS)
+            # Изменение в другом воркере: invalidate() этого воркера не вызывается
+            drive_parameters[0]["amount"] = 150.0
+            clock[0] += 5
+            cached = await service.get(DRIVE_PARAMETERS)
+            clock[0] += 6
+            reloaded = await service.get(DRIVE_PARAMETERS)
+            await service.get(COLORS)
+            return before, cached, reloaded
+
+        before, cached, reloaded = asyncio.run(run())
+
+        assert cached is before
+        assert reloaded.rows[0]["amount"] == 150.0
+        assert reloaded.etag != before.etag
+        # Цвета (REFERENCE_DATA_TTL) не перечитывались
+        assert len(calls) == 1
@@ -0,0 +1,50 @@
+"""
+Тесты фоновой сборки PDF отчетов: ID задач
+"""
+
+from datetime import date
+
+import pytest
+
+pytest.importorskip("tortoise")
+pytest.importorskip("reportlab")
+
+from services.report_pdf_service import build_job_id, parse_job_id  # noqa: E402
+
+DATA = {date(2024, 1, 1): 100.0, date(2024, 1, 8): 250.0}
+
+
+class TestReportJobs:
+    """Тесты ReportPdfService"""
+
+    def test_closed_period_is_cached(self):
+        """Тест: ID задачи за закрытый период совпадает с ключом кэша и зависит от данных"""
+        job_id = build_job_id("sales", date(2024, 1, 1), date(2024, 1, 31), "week", DATA, today=date(2024, 2, 1))
+        same = build_job_id("sales", date(2024, 1, 1), date(2024, 1, 31), "week", dict(reversed(DATA.items())),
+                            today=date(2024, 2, 1))
+
+        assert job_id == same
+        assert job_id.startswith("sales_week_2024-01-01_2024-01-31_v")
+        assert parse_job_id(job_id)["cacheable"] is True
+
+    def test_changed_data_changes_key(self):
+        """Тест: после пересчета итогов закрытого периода используется новый ключ кэша"""
+        changed = {**DATA, date(2024, 1, 8): 300.0}
+        job_id = build_job_id("sales", date(2024, 1, 1), date(2024, 1, 31), "week", DATA, today=date(2024, 2, 1))
+
+        assert build_job_id("sales", date(2024, 1, 1), date(2024, 1, 31), "week", changed,
+                            today=date(2024, 2, 1)) != job_id
+
+    def test_open_period_is_not_cached(self):
+        """Тест: отчет с текущим днем собирается заново"""
+        first = build_job_id("users", date(2024, 1, 1), date(2024, 2, 1), "day", DATA, today=date(2024, 2, 1))
+        second = build_job_id("users", date(2024, 1, 1), date(2024, 2, 1), "day", DATA, today=date(2024, 2, 1))
+
+        assert first != second
+        assert parse_job_id(first)["cacheable"] is False
+
+    def test_invalid_job_id(self):
+        """Тест: ID не может указывать на произвольный путь"""
+        assert parse_job_id("../../etc/passwd") is None
+        assert parse_job_id("orders_day_2024-01-01_2024-01-31_v0123456789abcdef") is None
+        assert parse_job_id("sales_day_2024-01-01_2024-01-31") is None
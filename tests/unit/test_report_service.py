@@ -0,0 +1,70 @@
+"""
+Тесты отчетов админ-панели: сборка дневных итогов в недели и месяцы
+"""
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip("tortoise")
+
+from services.report_service import (  # noqa: E402
+    bucket_start, get_period_days, rollup_daily, to_number
+)
+
+
+class TestReportRollup:
+    """Тесты ReportService"""
+
+    def build_daily(self):
+        return {
+            day: {"count": 1, "sum": Decimal("100")}
+            for day in get_period_days(date(2024, 1, 29), date(2024, 2, 4))
+        }
+
+    def test_period_days(self):
+        """Тест: период включает обе границы"""
+        days = get_period_days(date(2024, 2, 27), date(2024, 3, 1))
+
+        assert days == [date(2024, 2, 27), date(2024, 2, 28), date(2024, 2, 29), date(2024, 3, 1)]
+        assert get_period_days(date(2024, 3, 2), date(2024, 3, 1)) == []
+
+    def test_bucket_start(self):
+        """Тест: неделя начинается с понедельника, месяц - с первого числа"""
+        assert bucket_start(date(2024, 2, 4), "day") == date(2024, 2, 4)
+        assert bucket_start(date(2024, 2, 4), "week") == date(2024, 1, 29)
+        assert bucket_start(date(2024, 2, 4), "month") == date(2024, 2, 1)
+
+    def test_rollup_by_day_keeps_empty_days(self):
+        """Тест: дни без записей остаются в отчете с нулями"""
+        daily = self.build_daily()
+        daily[date(2024, 1, 30)] = {"count": 0, "sum": 0}
+
+        report = rollup_daily(daily, "day")
+
+        assert list(report) == sorted(daily)
+        assert report[date(2024, 1, 30)] == {"count": 0, "sum": 0}
+        assert report[date(2024, 1, 29)] == {"count": 1, "sum": 100}
+
+    def test_rollup_by_week_and_month(self):
+        """Тест: несколько метрик за один проход"""
+        daily = self.build_daily()
+
+        assert rollup_daily(daily, "week") == {date(2024, 1, 29): {"count": 7, "sum": 700}}
+        assert rollup_daily(daily, "month") == {
+            date(2024, 1, 1): {"count": 3, "sum": 300},
+            date(2024, 2, 1): {"count": 4, "sum": 400},
+        }
+
+    def test_unknown_granularity(self):
+        """Тест: неизвестный интервал"""
+        with pytest.raises(ValueError):
+            rollup_daily(self.build_daily(), "year")
+
+    def test_to_number(self):
+        """Тест: целые суммы остаются целыми (ответ Report - Dict[date, int])"""
+        assert to_number(Decimal("150")) == 150
+        assert isinstance(to_number(Decimal("150")), int)
+        assert to_number(Decimal("150.50")) == 150.5
+        assert to_number(3) == 3
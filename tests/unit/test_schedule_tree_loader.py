@@ -0,0 +1,140 @@
+"""
+Тесты ScheduleTreeLoader: количество запросов не зависит от числа графиков и маршрутов
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("tortoise")
+
+from services.schedule_tree_loader import ScheduleTreeLoader, parse_int_list, format_contact  # noqa: E402
+
+
+def build_rows(schedules_count: int, roads_per_schedule: int) -> dict:
+    """Строит фикстурные строки таблиц для заданного числа графиков и маршрутов"""
+    rows = {
+        "DataSchedule": [], "DataScheduleOtherParametrs": [], "DataScheduleRoad": [],
+        "DataScheduleRoadAddress": [], "DataScheduleRoadChild": [], "DataScheduleRoadContact": [],
+        "DataScheduleRoadDriver": [], "UsersUser": [], "UsersUserPhoto": []
+    }
+    road_id = 0
+    for id_schedule in range(1, schedules_count + 1):
+        id_user = 1000 + id_schedule
+        rows["DataSchedule"].append({
+            "id": id_schedule, "id_user": id_user, "title": "Школа", "description": None,
+            "children_count": 1, "id_tariff": 1, "week_days": "0;2", "duration": 30,
+            "isActive": True, "datetime_create": None
+        })
+        rows["DataScheduleOtherParametrs"].append({"id_schedule": id_schedule, "id_other_parametr": 1, "amount": 2})
+        rows["UsersUser"].append({"id": id_user, "name": "Иван", "surname": "Иванов", "phone": "+79990000000"})
+        for _ in range(roads_per_schedule):
+            road_id += 1
+            rows["DataScheduleRoad"].append({"id": road_id, "id_schedule": id_schedule, "week_day": 0})
+            rows["DataScheduleRoadAddress"].append({"id_schedule_road": road_id, "from_address": "A"})
+            rows["DataScheduleRoadChild"].append({"id_schedule_road": road_id, "id_child": road_id})
+            rows["DataScheduleRoadContact"].append({
+                "id_schedule_road": road_id, "surname": "Петров", "name": "Петр",
+                "patronymic": None, "contact_phone": "+79991111111"
+            })
+            if road_id % 2:
+                rows["DataScheduleRoadDriver"].append({"id_schedule_road": road_id, "id_driver": 5000 + road_id})
+                rows["UsersUser"].append({"id": 5000 + road_id, "name": "Олег", "surname": "Сидоров",
+                                          "phone": "+79992222222"})
+    return rows
+
+
+class CountingLoader(ScheduleTreeLoader):
+    """Загрузчик, отдающий фикстурные строки и считающий запросы"""
+
+    def __init__(self, rows: dict, **kwargs):
+        super().__init__(**kwargs)
+        self.rows = rows
+        self.queries = 0
+
+    async def _fetch(self, model, fields=(), order_by="id", **filters):
+        self.queries += 1
+        result = []
+        for row in self.rows[model.__name__]:
+            matched = True
+            for key, value in filters.items():
+                if key.endswith("__in"):
+                    matched = matched and row.get(key[:-4]) in value
+                elif key in row:
+                    matched = matched and row[key] == value
+            if matched:
+                result.append(dict(row))
+        return result
+
+
+class TestScheduleTreeLoader:
+    """Тесты пакетной загрузки деревьев графиков"""
+
+    @pytest.mark.parametrize("schedules_count,roads_per_schedule", [(1, 1), (5, 3), (40, 7)])
+    def test_query_count_is_constant(self, schedules_count, roads_per_schedule):
+        """Тест: не более 9 запросов для любого числа графиков"""
+        loader = CountingLoader(build_rows(schedules_count, roads_per_schedule))
+        trees = asyncio.run(loader.load(schedule_ids=range(1, schedules_count + 1)))
+
+        assert len(trees) == schedules_count
+        assert loader.queries <= 9
+
+    def test_tree_assembly(self):
+        """Тест сборки дерева: маршруты, адреса, дети, контакт, водитель, родитель"""
+        loader = CountingLoader(build_rows(2, 2))
+        trees = asyncio.run(loader.load(schedule_ids=[2, 1]))
+
+        assert list(trees) == [2, 1]
+        tree = trees[1]
+        assert tree["user"]["id_user"] == 1001
+        assert tree["other_parametrs"] == [{"parametr": 1, "count": 2}]
+        assert [road["id"] for road in tree["roads"]] == [1, 2]
+        assert tree["roads"][0]["children"] == [1]
+        assert tree["roads"][0]["driver"]["id_driver"] == 5001
+        assert tree["roads"][1]["driver"] is None
+        assert format_contact(tree["roads"][0]["contact"])["phone"] == "+79991111111"
+
+    def test_load_by_road_ids(self):
+        """Тест загрузки только указанных маршрутов"""
+        loader = CountingLoader(build_rows(3, 2))
+        trees = asyncio.run(loader.load(road_ids=[3, 6]))
+
+        assert list(trees) == [2, 3]
+        assert [road["id"] for road in trees[2]["roads"]] == [3]
+
+    def test_without_children_and_contacts(self):
+        """Тест: без детей и контактов - на 2 запроса меньше"""
+        loader = CountingLoader(build_rows(3, 2), with_drivers=False, with_children_and_contacts=False)
+        trees = asyncio.run(loader.load(road_ids=[1, 2, 3]))
+
+        assert loader.queries == 6
+        assert trees[1]["roads"][0]["children"] == []
+        assert trees[1]["roads"][0]["contact"] is None
+        assert trees[1]["roads"][0]["addresses"]
+
+    def test_missing_schedule(self):
+        """Тест: маршрут без графика пропускается или, с keep_missing_schedules, попадает в дерево-заглушку"""
+        rows = build_rows(2, 1)
+        rows["DataSchedule"] = rows["DataSchedule"][:1]
+
+        default = asyncio.run(CountingLoader(rows).load(road_ids=[1, 2]))
+        kept = asyncio.run(CountingLoader(rows, keep_missing_schedules=True).load(road_ids=[1, 2]))
+
+        assert list(default) == [1]
+        assert list(kept) == [1, 2]
+        assert kept[2]["missing"] is True
+        assert kept[2]["title"] is None and kept[2]["user"] is None
+        assert [road["id"] for road in kept[2]["roads"]] == [2]
+
+    def test_empty_ids(self):
+        """Тест: пустой набор ID не выполняет запросов"""
+        loader = CountingLoader(build_rows(1, 1))
+
+        assert asyncio.run(loader.load(schedule_ids=[])) == {}
+        assert loader.queries == 0
+
+    def test_parse_int_list(self):
+        """Тест разбора строк week_days / type_drive"""
+        assert parse_int_list("0;2;5") == [0, 2, 5]
+        assert parse_int_list("") == []
+        assert parse_int_list(None) == []
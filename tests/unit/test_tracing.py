@@ -0,0 +1,167 @@
+"""
+Тесты трассировки: вложенные spans, sampling, traceparent, связь с заказом, логи и middleware
+"""
+
+import asyncio
+import logging
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("fastapi")
+
+from fastapi import FastAPI, Request  # noqa: E402
+
+from common import tracing  # noqa: E402
+from common.tracing import (  # noqa: E402
+    InMemorySpanExporter, OtlpHttpSpanExporter, Span, TraceContextFilter, TracingMiddleware,
+    get_trace_id, link_order_trace, parse_traceparent, remember_order_trace, span_to_otlp, start_span, traced
+)
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    monkeypatch.setattr(tracing.settings, "trace_sample_rate", 1.0)
+    exporter = InMemorySpanExporter()
+    previous = tracing.set_exporter(exporter)
+    yield exporter
+    tracing.set_exporter(previous)
+
+
+class TestSpans:
+    """Тесты start_span и traced"""
+
+    def test_nested_spans(self, exporter):
+        """Тест: вложенный span наследует trace_id, родитель - внешний span"""
+        with start_span("outer") as outer:
+            with start_span("inner", order=1) as inner:
+                assert get_trace_id() == outer.trace_id
+
+        assert get_trace_id() is None
+        assert inner.trace_id == outer.trace_id
+        assert inner.parent_id == outer.span_id
+        assert inner.attributes == {"order": 1}
+        assert [span.name for span in exporter.spans] == ["inner", "outer"]
+
+    def test_error_status(self, exporter):
+        """Тест: исключение помечает span ошибкой"""
+        with pytest.raises(ValueError):
+            with start_span("failing"):
+                raise ValueError("failed")
+
+        assert exporter.spans[0].status == tracing.STATUS_ERROR
+        assert exporter.spans[0].attributes["exception.type"] == "ValueError"
+
+    def test_not_sampled(self, exporter, monkeypatch):
+        """Тест: trace вне выборки имеет trace_id, но не экспортируется"""
+        monkeypatch.setattr(tracing.settings, "trace_sample_rate", 0.0)
+        with start_span("outer"):
+            with start_span("inner"):
+                assert get_trace_id() is not None
+
+        assert exporter.spans == []
+
+    def test_traced_task_context(self, exporter):
+        """Тест: задача create_task продолжает trace вызывающей корутины"""
+        @traced("child")
+        async def child():
+            return get_trace_id()
+
+        async def run():
+            with start_span("parent") as parent:
+                return parent.trace_id, await asyncio.create_task(child())
+
+        parent_trace_id, child_trace_id = asyncio.run(run())
+
+        assert parent_trace_id == child_trace_id
+        assert exporter.get_spans("child")[0].parent_id == exporter.get_spans("parent")[0].span_id
+
+    def test_order_link(self, exporter):
+        """Тест: span операции с заказом связан с trace создания заказа"""
+        @traced("orders.accept", order_arg="id_order")
+        async def accept(id_order: int):
+            pass
+
+        with start_span("start_onetime_drive") as created:
+            remember_order_trace(1001)
+        asyncio.run(accept(id_order=1001))
+        with start_span("decline") as declined:
+            link_order_trace(1001)
+
+        accepted = exporter.get_spans("orders.accept")[0]
+        assert accepted.attributes["order.id"] == 1001
+        assert accepted.links == [(created.trace_id, created.span_id)]
+        assert declined.attributes["order.trace_id"] == created.trace_id
+
+
+class TestPropagation:
+    """Тесты traceparent и логов"""
+
+    def test_parse_traceparent(self):
+        """Тест: разбор W3C traceparent, некорректные значения игнорируются"""
+        header = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+
+        assert parse_traceparent(header) == ("0af7651916cd43dd8448eb211c80319c", "b7ad6b7169203331", True)
+        assert parse_traceparent("00-" + "0" * 32 + "-b7ad6b7169203331-01") is None
+        assert parse_traceparent("garbage") is None
+        assert parse_traceparent(None) is None
+
+    def test_log_record_fields(self, exporter):
+        """Тест: запись лога внутри span получает trace_id и span_id"""
+        record = logging.LogRecord("autonanny", logging.INFO, __file__, 1, "message", None, None)
+        with start_span("operation") as span:
+            TraceContextFilter().filter(record)
+
+        assert record.trace_id == span.trace_id
+        assert record.span_id == span.span_id
+
+    def test_otlp_payload(self):
+        """Тест: span в формате OTLP JSON"""
+        span = Span("push.send", "a" * 32, "b" * 16, "c" * 16, True, tracing.SPAN_CLIENT, 1, 2,
+                    attributes={"order.id": 5, "app": "client"}, links=[("d" * 32, "e" * 16)])
+
+        payload = span_to_otlp(span)
+
+        assert payload["kind"] == 3
+        assert payload["parentSpanId"] == "c" * 16
+        assert {"key": "order.id", "value": {"intValue": "5"}} in payload["attributes"]
+        assert payload["links"] == [{"traceId": "d" * 32, "spanId": "e" * 16}]
+
+    def test_otlp_buffer_limit(self):
+        """Тест: при переполнении буфера экспортера spans отбрасываются"""
+        exporter = OtlpHttpSpanExporter("http://127.0.0.1:1/v1/traces", "test", interval=60, max_queue=2)
+        for i in range(3):
+            exporter.export(Span(f"span{i}", "a" * 32, "b" * 16))
+
+        assert exporter.dropped == 1
+        assert len(exporter._buffer) == 2
+        exporter._buffer.clear()
+        exporter.shutdown()
+
+
+class TestTracingMiddleware:
+    """Тесты TracingMiddleware"""
+
+    def test_request_trace(self, exporter):
+        """Тест: trace_id в request.state и заголовке, входящий traceparent продолжается"""
+        app = FastAPI()
+
+        @app.get("/tracing-test/{item_id}")
+        async def endpoint(request: Request, item_id: int):
+            return {"trace_id": request.state.trace_id}
+
+        app.add_middleware(TracingMiddleware)
+        traceparent = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+
+        async def run():
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                return await client.get("/tracing-test/1", headers={"traceparent": traceparent})
+
+        response = asyncio.run(run())
+        span = exporter.spans[0]
+
+        assert response.json()["trace_id"] == "0af7651916cd43dd8448eb211c80319c"
+        assert response.headers["X-Trace-Id"] == span.trace_id
+        assert span.parent_id == "b7ad6b7169203331"
+        assert span.name == "GET /tracing-test/{item_id}"
+        assert span.attributes["http.status_code"] == 200
@@ -0,0 +1,55 @@
+"""
+Тесты пулов процессов: логи процессов пула без файлов и потока записи
+"""
+
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+pytest.importorskip("pythonjsonlogger")
+
+from common.worker_pool import create_process_pool, init_worker_logging  # noqa: E402
+
+
+def logging_state():
+    """Состояние логов процесса после импорта модулей приложения"""
+    from common import logger_new
+
+    logger_new.logger.info("worker message")
+    handlers = {type(handler).__name__ for item in (logging.getLogger(), logger_new.logger)
+                for handler in item.handlers}
+    return logger_new._pipeline is None, handlers, logger_new.logger.propagate
+
+
+def logging_state_after_init():
+    """Состояние логов, если модуль логов импортирован до инициализатора"""
+    from common import logger_new
+
+    assert logger_new._pipeline is not None
+    init_worker_logging("warning")
+    return logging_state() + (logging.getLogger().level,)
+
+
+class TestWorkerLogging:
+    """Тесты init_worker_logging"""
+
+    def test_pool_without_file_handlers(self):
+        """Тест: процесс пула пишет в stderr через root, без QueueListener и RotatingFileHandler"""
+        with create_process_pool(1) as pool:
+            no_pipeline, handlers, propagate = pool.submit(logging_state).result(timeout=60)
+
+        assert no_pipeline is True
+        assert handlers == {"StreamHandler"}
+        assert propagate is True
+
+    def test_pipeline_closed(self):
+        """Тест: конвейер, созданный до инициализатора, останавливается"""
+        with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            no_pipeline, handlers, propagate, level = pool.submit(logging_state_after_init).result(timeout=60)
+
+        assert no_pipeline is True
+        assert handlers == {"StreamHandler"}
+        assert propagate is True
+        assert level == logging.WARNING
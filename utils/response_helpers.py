@@ -4,6 +4,7 @@ BE-MVP-003: Рефакторинг orders.py
 """
 import json
 from models.orders_db import DataScheduleRoadChild, DataScheduleRoadContact
+from services.schedule_tree_loader import format_contact
 
 
 def generate_responses(answers: list) -> dict:
@@ -56,33 +57,27 @@ async def enrich_roads_with_children_and_contact(roads: list) -> list:
         >>> roads = await DataScheduleRoad.filter(...).values()
         >>> enriched = await enrich_roads_with_children_and_contact(roads)
     """
+    road_ids = [road["id"] for road in roads]
+    if not road_ids:
+        return roads
+
+    # Дети и контакты всех маршрутов загружаются двумя запросами
+    children = {}
+    for rec in await DataScheduleRoadChild.filter(
+        id_schedule_road__in=road_ids,
+        isActive=True
+    ).order_by("id").values("id_schedule_road", "id_child"):
+        children.setdefault(rec["id_schedule_road"], []).append(rec["id_child"])
+
+    contacts = {}
+    for rec in await DataScheduleRoadContact.filter(
+        id_schedule_road__in=road_ids,
+        isActive=True
+    ).order_by("id").values("id_schedule_road", "surname", "name", "patronymic", "contact_phone"):
+        contacts.setdefault(rec["id_schedule_road"], rec)
+
     for road in roads:
-        # Получаем детей для маршрута
-        children_records = await DataScheduleRoadChild.filter(
-            id_schedule_road=road["id"], 
-            isActive=True
-        ).all().values("id_child")
-        road["children"] = [rec["id_child"] for rec in children_records]
+        road["children"] = children.get(road["id"], [])
+        road["contact"] = format_contact(contacts.get(road["id"]))
 
-        # Получаем контактное лицо для маршрута
-        contact_exists = await DataScheduleRoadContact.filter(
-            id_schedule_road=road["id"], 
-            isActive=True
-        ).count() > 0
-        
-        if contact_exists:
-            contact_record = await DataScheduleRoadContact.filter(
-                id_schedule_road=road["id"], 
-                isActive=True
-            ).first().values("surname", "name", "patronymic", "contact_phone")
-            
-            road["contact"] = {
-                "surname": contact_record["surname"],
-                "name": contact_record["name"],
-                "patronymic": contact_record["patronymic"],
-                "phone": contact_record["contact_phone"]
-            }
-        else:
-            road["contact"] = None
-            
     return roads